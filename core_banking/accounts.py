@@ -16,7 +16,7 @@ import uuid
 from .currency import Money, Currency
 from .storage import StorageInterface, StorageRecord
 from .audit import AuditTrail, AuditEventType
-from .ledger import GeneralLedger, AccountType
+from .ledger import GeneralLedger, AccountType, ACCOUNT_CHANGED
 
 # Import events for Phase 2 observer pattern (optional)
 try:
@@ -368,6 +368,10 @@ class AccountManager:
             }
         )
         
+        # Publish domain event (Phase 2)
+        if DomainEvent:
+            self._publish_event(DomainEvent.ACCOUNT_UPDATED, account)
+        
         return account
     
     def place_hold(
@@ -494,6 +498,21 @@ class AccountManager:
         
         return balance
     
+    def get_book_balances(self, accounts: List[Account]) -> Dict[str, Money]:
+        """
+        Get book balances for many accounts with one pass over the ledger
+        
+        Same values and sign conventions as get_book_balance().
+        """
+        balances = self.ledger.calculate_account_balances(
+            {account.id: account.account_type for account in accounts},
+            {account.id: account.currency for account in accounts}
+        )
+        for account in accounts:
+            if account.is_credit_product:
+                balances[account.id] = -balances[account.id]
+        return balances
+    
     def get_available_balance(self, account_id: str) -> Money:
         """
         Get available balance (book balance minus holds and plus credit limit)
@@ -562,7 +581,9 @@ class AccountManager:
     def _save_account(self, account: Account) -> None:
         """Save account to storage"""
         account_dict = self._account_to_dict(account)
-        self.storage.save(self.accounts_table, account.id, account_dict)
+        with self.storage.atomic():
+            self.storage.save(self.accounts_table, account.id, account_dict)
+            self.ledger.changes.record(ACCOUNT_CHANGED, [account.id])
     
     def _account_to_dict(self, account: Account) -> Dict:
         """Convert Account to dictionary for storage"""
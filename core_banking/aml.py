@@ -0,0 +1,479 @@
+"""
+AML Batch Scanning Module
+
+Offline anti-money-laundering scan over the stored transaction history.
+Transactions are streamed from storage in batches, partitioned by customer
+and reduced to per-(customer, currency) daily series. Detection rules run as
+vectorized NumPy window computations over each partition, optionally in a
+process pool, and findings are filed in bulk as SuspiciousActivityAlerts
+through the ComplianceEngine.
+
+Requires numpy (pip install nexum[aml]).
+"""
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import time
+import uuid
+import zlib
+
+from .compliance import ComplianceEngine, SuspiciousActivityType
+from .currency import Currency, Money
+from .storage import StorageInterface
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+logger = logging.getLogger("nexum.aml")
+
+
+# Namespace for deterministic alert ids, so re-scans do not duplicate alerts
+AML_ALERT_NAMESPACE = uuid.UUID("8c7c1f0e-3b5e-4d8a-9a52-6f0d2f4c9b17")
+
+# Transaction types that represent customer-initiated money movement
+SCANNED_TRANSACTION_TYPES = frozenset({
+    "deposit", "withdrawal", "transfer_internal", "transfer_external", "payment"
+})
+
+# Daily rows are keyed by entity * _KEY_STRIDE + day ordinal
+_KEY_STRIDE = 1 << 22
+
+
+@dataclass
+class AMLScanConfig:
+    """Detection rule parameters for a batch scan"""
+    # Structuring: several sub-threshold transactions that together reach the threshold
+    structuring_window_days: int = 3
+    structuring_min_count: int = 2
+    structuring_floor_ratio: Decimal = Decimal('0.5')  # Of the reporting threshold
+    # Velocity: transactions per calendar day
+    velocity_daily_count: int = 25
+    # Unusual size: daily volume against the customer's average day
+    unusual_multiplier: int = 5
+    unusual_min_active_days: int = 5
+    # Round amounts: multiples of 500 (at least 1,000) within a window
+    round_window_days: int = 7
+    round_min_count: int = 3
+    # Only scan transactions from the last N days (None for full history)
+    lookback_days: Optional[int] = None
+
+
+@dataclass
+class AMLFinding:
+    """A rule hit for one customer and currency"""
+    customer_id: str
+    currency: Currency
+    activity_type: SuspiciousActivityType
+    day: date
+    description: str
+    risk_score: int
+    metrics: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def alert_id(self) -> str:
+        """Deterministic alert id for this customer, currency, rule and day"""
+        name = f"{self.customer_id}:{self.currency.code}:{self.activity_type.value}:{self.day.isoformat()}"
+        return str(uuid.uuid5(AML_ALERT_NAMESPACE, name))
+
+
+@dataclass
+class AMLScanResult:
+    """Summary of a batch scan"""
+    transactions_scanned: int
+    customers_scanned: int
+    partitions: int
+    findings: List[AMLFinding]
+    alerts_raised: int
+    duration_ms: float
+
+    def findings_by_type(self) -> Dict[str, int]:
+        """Count findings per activity type"""
+        counts: Dict[str, int] = {}
+        for finding in self.findings:
+            key = finding.activity_type.value
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+
+class _Partition:
+    """Columnar transaction buffer for one customer partition"""
+
+    def __init__(self):
+        self.entities: List[Tuple[str, str]] = []  # (customer_id, currency code)
+        self._index: Dict[Tuple[str, str], int] = {}
+        self.entity = array('q')
+        self.day = array('q')
+        self.amount = array('q')  # Minor units
+
+    def append(self, customer_id: str, currency: str, day: int, amount_minor: int) -> None:
+        key = (customer_id, currency)
+        index = self._index.get(key)
+        if index is None:
+            index = len(self.entities)
+            self._index[key] = index
+            self.entities.append(key)
+        self.entity.append(index)
+        self.day.append(day)
+        self.amount.append(amount_minor)
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+
+class AMLBatchScanner:
+    """
+    Batch AML scanner over the transactions table
+
+    The parent process streams transactions once, maps accounts to
+    customers and fills compact per-partition columns; each partition is
+    scanned independently (in worker processes when max_workers > 1) and
+    only the findings are returned. Alerts use deterministic ids, so
+    re-running a scan over the same period does not raise duplicates.
+    """
+
+    def __init__(
+        self,
+        storage: StorageInterface,
+        compliance_engine: ComplianceEngine,
+        config: Optional[AMLScanConfig] = None,
+        partitions: int = 8,
+        max_workers: int = 1,
+        batch_size: int = 5000
+    ):
+        """
+        Args:
+            storage: Storage backend holding accounts and transactions
+            compliance_engine: Engine used for thresholds and alert filing
+            config: Detection parameters
+            partitions: Number of customer partitions
+            max_workers: Worker processes (1 scans partitions in-process)
+            batch_size: Rows fetched from storage per batch
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy required for AMLBatchScanner. Install with: pip install numpy")
+
+        self.storage = storage
+        self.compliance_engine = compliance_engine
+        self.config = config or AMLScanConfig()
+        self.partitions = max(1, partitions)
+        self.max_workers = max(1, max_workers)
+        self.batch_size = batch_size
+        self.accounts_table = "accounts"
+        self.transactions_table = "transactions"
+
+    def scan(self, as_of: Optional[date] = None, raise_alerts: bool = True) -> AMLScanResult:
+        """
+        Run all detection rules over the transaction history
+
+        Args:
+            as_of: Last day included in the scan (defaults to today, UTC)
+            raise_alerts: File findings as alerts (False for a dry run)
+
+        Returns:
+            AMLScanResult with the findings
+        """
+        started = time.perf_counter()
+        as_of = as_of or datetime.now(timezone.utc).date()
+
+        partitions, scanned = self._load_partitions(as_of)
+        findings = self._run_partitions(partitions)
+
+        raised = 0
+        if raise_alerts and findings:
+            raised = len(self._raise_alerts(findings))
+
+        result = AMLScanResult(
+            transactions_scanned=scanned,
+            customers_scanned=len({customer for p in partitions for customer, _ in p.entities}),
+            partitions=len(partitions),
+            findings=findings,
+            alerts_raised=raised,
+            duration_ms=(time.perf_counter() - started) * 1000
+        )
+        logger.info(
+            f"AML scan: {scanned} transactions, {len(findings)} findings, "
+            f"{raised} alerts in {result.duration_ms:.0f}ms"
+        )
+        return result
+
+    def _load_account_owners(self) -> Dict[str, str]:
+        """Map account id -> customer id"""
+        owners = {}
+        for batch in self.storage.iter_batches(self.accounts_table, self.batch_size):
+            for record in batch:
+                customer_id = record.get("customer_id")
+                if customer_id:
+                    owners[record["id"]] = customer_id
+        return owners
+
+    def _load_partitions(self, as_of: date) -> Tuple[List[_Partition], int]:
+        """Stream completed transactions into per-partition columns"""
+        owners = self._load_account_owners()
+        partitions = [_Partition() for _ in range(self.partitions)]
+        last_day = as_of.toordinal()
+        first_day = last_day - self.config.lookback_days + 1 if self.config.lookback_days else 0
+        scales: Dict[str, int] = {}
+        scanned = 0
+
+        for batch in self.storage.iter_batches(self.transactions_table, self.batch_size):
+            for record in batch:
+                if record.get("state") != "completed":
+                    continue
+                if record.get("transaction_type") not in SCANNED_TRANSACTION_TYPES:
+                    continue
+
+                account_id = record.get("from_account_id") or record.get("to_account_id")
+                customer_id = owners.get(account_id)
+                if not customer_id:
+                    continue
+
+                timestamp = record.get("processed_at") or record.get("created_at")
+                posted = datetime.fromisoformat(timestamp)
+                if posted.tzinfo is not None:
+                    posted = posted.astimezone(timezone.utc)
+                day = posted.date().toordinal()
+                if day < first_day or day > last_day:
+                    continue
+
+                code = record["currency"]
+                scale = scales.get(code)
+                if scale is None:
+                    scale = scales[code] = 10 ** Currency[code].precision
+                amount_minor = int(abs(Decimal(record["amount"])) * scale)
+
+                partition = partitions[zlib.crc32(customer_id.encode()) % self.partitions]
+                partition.append(customer_id, code, day, amount_minor)
+                scanned += 1
+
+        return [p for p in partitions if len(p)], scanned
+
+    def _partition_payload(self, partition: _Partition) -> Dict[str, Any]:
+        """Build the picklable work item for one partition"""
+        thresholds = {}
+        threshold_minor = array('q')
+        floor_minor = array('q')
+        unit_minor = array('q')
+
+        for _, code in partition.entities:
+            currency = Currency[code]
+            scale = 10 ** currency.precision
+            if code not in thresholds:
+                threshold = self.compliance_engine._large_transaction_threshold(currency)
+                thresholds[code] = threshold.amount if threshold else None
+            threshold = thresholds[code]
+
+            if threshold is None:
+                threshold_minor.append(0)
+                floor_minor.append(0)
+            else:
+                threshold_minor.append(int(threshold * scale))
+                floor_minor.append(int(threshold * self.config.structuring_floor_ratio * scale))
+            unit_minor.append(scale)
+
+        config = asdict(self.config)
+        config["structuring_floor_ratio"] = str(config["structuring_floor_ratio"])
+        return {
+            "entity": partition.entity,
+            "day": partition.day,
+            "amount": partition.amount,
+            "threshold": threshold_minor,
+            "floor": floor_minor,
+            "unit": unit_minor,
+            "config": config
+        }
+
+    def _run_partitions(self, partitions: List[_Partition]) -> List[AMLFinding]:
+        """Scan partitions in-process or across a process pool"""
+        payloads = [self._partition_payload(p) for p in partitions]
+
+        if self.max_workers > 1 and len(payloads) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(payloads))) as pool:
+                hits_per_partition = list(pool.map(scan_partition, payloads))
+        else:
+            hits_per_partition = [scan_partition(payload) for payload in payloads]
+
+        findings = []
+        for partition, hits in zip(partitions, hits_per_partition):
+            for entity_index, activity, day, metrics in hits:
+                customer_id, code = partition.entities[entity_index]
+                findings.append(self._build_finding(customer_id, Currency[code], activity, day, metrics))
+
+        findings.sort(key=lambda f: (f.customer_id, f.currency.code, f.activity_type.value))
+        return findings
+
+    def _build_finding(
+        self,
+        customer_id: str,
+        currency: Currency,
+        activity: str,
+        day: int,
+        metrics: Dict[str, int]
+    ) -> AMLFinding:
+        """Turn a raw partition hit into a described finding"""
+        activity_type = SuspiciousActivityType(activity)
+        scale = Decimal(10) ** currency.precision
+
+        def money(minor: int) -> str:
+            return Money(Decimal(minor) / scale, currency).to_string()
+
+        if activity_type == SuspiciousActivityType.STRUCTURED_TRANSACTION:
+            description = (
+                f"{metrics['count']} sub-threshold transactions totalling {money(metrics['amount'])} "
+                f"within {self.config.structuring_window_days} days"
+            )
+            risk_score = 80
+        elif activity_type == SuspiciousActivityType.HIGH_VELOCITY:
+            description = f"High velocity: {metrics['count']} transactions in one day"
+            risk_score = 60
+        elif activity_type == SuspiciousActivityType.UNUSUAL_TRANSACTION_SIZE:
+            description = (
+                f"Daily volume {money(metrics['amount'])} exceeds {self.config.unusual_multiplier}x "
+                f"the customer's average day of {money(metrics['baseline'])}"
+            )
+            risk_score = 50
+        else:
+            description = (
+                f"{metrics['count']} round-amount transactions within {self.config.round_window_days} days"
+            )
+            risk_score = 40
+
+        return AMLFinding(
+            customer_id=customer_id,
+            currency=currency,
+            activity_type=activity_type,
+            day=date.fromordinal(day),
+            description=description,
+            risk_score=risk_score,
+            metrics=metrics
+        )
+
+    def _raise_alerts(self, findings: List[AMLFinding]) -> List:
+        """File findings through the compliance engine in one batch"""
+        return self.compliance_engine.raise_suspicious_activity_alerts([
+            {
+                "alert_id": finding.alert_id,
+                "customer_id": finding.customer_id,
+                "activity_type": finding.activity_type,
+                "description": f"Batch scan {finding.day.isoformat()}: {finding.description}",
+                "risk_score": finding.risk_score
+            }
+            for finding in findings
+        ])
+
+
+def _rolling_sum(keys, values, window_days: int):
+    """Trailing window sums over sorted daily rows of the same entity"""
+    totals = np.concatenate(([0], np.cumsum(values)))
+    first = np.searchsorted(keys, keys - (window_days - 1), side="left")
+    return totals[1:] - totals[first]
+
+
+def _last_per_entity(mask, daily_entity):
+    """Indices of the latest flagged day for every flagged entity"""
+    rows = np.nonzero(mask)[0]
+    if rows.size == 0:
+        return rows
+    entities = daily_entity[rows]
+    is_last = np.append(entities[1:] != entities[:-1], True)
+    return rows[is_last]
+
+
+def scan_partition(payload: Dict[str, Any]) -> List[Tuple[int, str, int, Dict[str, int]]]:
+    """
+    Run the detection rules over one partition
+
+    Module-level so it can be shipped to worker processes. Amounts are
+    integer minor units, so every sum and comparison is exact.
+
+    Returns:
+        (entity index, activity type value, day ordinal, metrics) per hit,
+        at most one per entity and rule (the latest triggering day)
+    """
+    config = payload["config"]
+    entity = np.frombuffer(payload["entity"], dtype=np.int64)
+    day = np.frombuffer(payload["day"], dtype=np.int64)
+    amount = np.frombuffer(payload["amount"], dtype=np.int64)
+    threshold = np.frombuffer(payload["threshold"], dtype=np.int64)
+    floor = np.frombuffer(payload["floor"], dtype=np.int64)
+    unit = np.frombuffer(payload["unit"], dtype=np.int64)
+
+    if amount.size == 0:
+        return []
+
+    order = np.lexsort((day, entity))
+    entity, day, amount = entity[order], day[order], amount[order]
+
+    # Per-transaction flags
+    txn_threshold = threshold[entity]
+    sub_threshold = (txn_threshold > 0) & (amount >= floor[entity]) & (amount < txn_threshold)
+    txn_unit = unit[entity]
+    round_amount = (amount % (500 * txn_unit) == 0) & (amount >= 1000 * txn_unit)
+
+    # Collapse to one row per (entity, day)
+    keys, starts = np.unique(entity * _KEY_STRIDE + day, return_index=True)
+    daily_entity = keys // _KEY_STRIDE
+    daily_day = keys % _KEY_STRIDE
+    daily_amount = np.add.reduceat(amount, starts)
+    daily_count = np.diff(np.append(starts, amount.size))
+    daily_sub_count = np.add.reduceat(sub_threshold.astype(np.int64), starts)
+    daily_sub_amount = np.add.reduceat(np.where(sub_threshold, amount, 0), starts)
+    daily_round = np.add.reduceat(round_amount.astype(np.int64), starts)
+
+    hits = []
+
+    def collect(mask, activity: SuspiciousActivityType, metrics):
+        for row in _last_per_entity(mask, daily_entity):
+            hits.append((
+                int(daily_entity[row]),
+                activity.value,
+                int(daily_day[row]),
+                {name: int(values[row]) for name, values in metrics.items()}
+            ))
+
+    # Structuring clusters across days
+    window = config["structuring_window_days"]
+    sub_count = _rolling_sum(keys, daily_sub_count, window)
+    sub_amount = _rolling_sum(keys, daily_sub_amount, window)
+    daily_threshold = threshold[daily_entity]
+    structuring = (
+        (daily_threshold > 0)
+        & (sub_count >= config["structuring_min_count"])
+        & (sub_amount >= daily_threshold)
+    )
+    collect(structuring, SuspiciousActivityType.STRUCTURED_TRANSACTION,
+            {"count": sub_count, "amount": sub_amount})
+
+    # Velocity
+    velocity = daily_count >= config["velocity_daily_count"]
+    collect(velocity, SuspiciousActivityType.HIGH_VELOCITY, {"count": daily_count})
+
+    # Unusual daily volume against the customer's other days
+    entity_total = np.bincount(daily_entity, weights=daily_amount.astype(np.float64))
+    entity_days = np.bincount(daily_entity)
+    other_days = entity_days[daily_entity] - 1
+    other_total = entity_total[daily_entity] - daily_amount
+    baseline = np.divide(other_total, other_days, out=np.zeros(len(keys)), where=other_days > 0)
+    unusual = (
+        (other_days >= config["unusual_min_active_days"])
+        & (baseline > 0)
+        & (daily_amount > baseline * config["unusual_multiplier"])
+    )
+    collect(unusual, SuspiciousActivityType.UNUSUAL_TRANSACTION_SIZE,
+            {"amount": daily_amount, "baseline": baseline.astype(np.int64)})
+
+    # Round amounts
+    round_count = _rolling_sum(keys, daily_round, config["round_window_days"])
+    rounds = round_count >= config["round_min_count"]
+    collect(rounds, SuspiciousActivityType.ROUND_DOLLAR_AMOUNTS, {"count": round_count})
+
+    return hits
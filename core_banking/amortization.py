@@ -0,0 +1,312 @@
+"""
+Amortization Kernel Module
+
+Computes loan amortization schedules as columns of currency minor units in
+one pass instead of period-by-period Money arithmetic, and stores them as a
+single compact record per loan (zlib-compressed little-endian integer
+columns). Equal-installment balances come from the closed-form annuity
+formula; interest is rounded half-up exactly on the opening balance of each
+period using the interest kernel.
+
+Columns are computed with NumPy when it is installed (pip install
+nexum[interest]) and with a plain Python loop otherwise; both give the same
+amounts.
+"""
+
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, List, Optional, Sequence
+import base64
+import calendar
+import math
+import sys
+import threading
+import zlib
+
+from .interest_kernel import accrue_minor, interest_minor
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+SCHEDULE_FORMAT = "columnar-v1"
+
+# (months, days) between payments, keyed by PaymentFrequency values
+PERIOD_STEPS = {
+    "weekly": (0, 7),
+    "bi_weekly": (0, 14),
+    "monthly": (1, 0),
+    "quarterly": (3, 0),
+    "semi_annually": (6, 0),
+    "annually": (12, 0)
+}
+
+AMOUNT_COLUMNS = ("payment", "principal", "interest", "remaining")
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@dataclass
+class ScheduleColumns:
+    """Amortization schedule as parallel columns (dates as ordinals, amounts in minor units)"""
+    ordinals: Sequence[int]
+    payment: Sequence[int]
+    principal: Sequence[int]
+    interest: Sequence[int]
+    remaining: Sequence[int]
+    
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+
+def add_months(start_date: date, months: int) -> date:
+    """Add months to a date, clamping the day to the end of the month"""
+    month = start_date.month - 1 + months
+    year = start_date.year + month // 12
+    month = month % 12 + 1
+    day = min(start_date.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+def payment_ordinals(first_payment_date: date, frequency: str, count: int) -> Sequence[int]:
+    """
+    Payment dates as date ordinals
+    
+    Month-based dates are offset from the first payment date rather than
+    from the previous payment, so a schedule starting on the 31st keeps
+    paying on the last day of shorter months and returns to the 31st.
+    """
+    months, days = PERIOD_STEPS[frequency]
+    first = first_payment_date.toordinal()
+    
+    if not NUMPY_AVAILABLE:
+        if days:
+            return [first + days * k for k in range(count)]
+        return [add_months(first_payment_date, months * k).toordinal() for k in range(count)]
+    
+    steps = np.arange(count, dtype=np.int64)
+    if days:
+        return first + days * steps
+    
+    month_starts = np.datetime64(first_payment_date, 'M') + (months * steps).astype('timedelta64[M]')
+    first_days = month_starts.astype('datetime64[D]')
+    next_month = (month_starts + np.timedelta64(1, 'M')).astype('datetime64[D]')
+    month_lengths = (next_month - first_days).astype(np.int64)
+    payment_days = first_days + (np.minimum(first_payment_date.day, month_lengths) - 1)
+    return payment_days.astype(np.int64) + _EPOCH_ORDINAL
+
+
+def amortize(
+    principal: int,
+    annual_rate: Decimal,
+    payments_per_year: int,
+    count: int,
+    method: str,
+    installment: Optional[int] = None
+) -> Dict[str, Sequence[int]]:
+    """
+    Amount columns of an amortization schedule in minor units
+    
+    Args:
+        principal: Loan principal in minor units
+        annual_rate: Annual rate as a fraction (0.075 for 7.5%)
+        payments_per_year: Payment periods per year
+        count: Number of scheduled payments
+        method: AmortizationMethod value (equal_installment, equal_principal, bullet)
+        installment: Level payment in minor units (required for equal_installment)
+    
+    Returns:
+        Dict of payment, principal, interest and remaining columns. The
+        schedule stops early if the balance reaches zero before count.
+    """
+    if count <= 0:
+        return {column: [] for column in AMOUNT_COLUMNS}
+    
+    if method == "equal_installment":
+        if installment is None:
+            raise ValueError("Equal installment schedules need the installment amount")
+        balances = _annuity_balances(principal, annual_rate, payments_per_year, count, installment)
+    elif method == "equal_principal":
+        step = int((Decimal(principal) / Decimal(count)).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+        balances = _straight_line_balances(principal, step, count)
+    elif method == "bullet":
+        balances = _bullet_balances(principal, count)
+    else:
+        raise ValueError(f"Unsupported amortization method: {method}")
+    
+    if NUMPY_AVAILABLE:
+        return _columns_numpy(principal, annual_rate, payments_per_year, balances, method, installment)
+    return _columns_python(principal, annual_rate, payments_per_year, balances, method, installment)
+
+
+def encode_schedule(columns: ScheduleColumns, currency_code: str) -> Dict[str, Any]:
+    """Pack schedule columns into a storable record"""
+    record = {
+        "format": SCHEDULE_FORMAT,
+        "currency": currency_code,
+        "count": len(columns),
+        "dates": _pack(columns.ordinals, "i")
+    }
+    for column in AMOUNT_COLUMNS:
+        record[column] = _pack(getattr(columns, column), "q")
+    return record
+
+
+def decode_schedule(record: Dict[str, Any]) -> ScheduleColumns:
+    """Unpack a record written by encode_schedule()"""
+    if record.get("format") != SCHEDULE_FORMAT:
+        raise ValueError(f"Unsupported schedule format: {record.get('format')}")
+    return ScheduleColumns(
+        ordinals=_unpack(record["dates"], "i"),
+        **{column: _unpack(record[column], "q") for column in AMOUNT_COLUMNS}
+    )
+
+
+class ScheduleCache:
+    """
+    Thread-safe LRU cache of decoded schedules, keyed by loan ID
+    """
+    
+    def __init__(self, max_size: int = 1024):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, loan_id: str) -> Optional[List[Any]]:
+        """Return a copy of the cached schedule, or None on a miss"""
+        with self._lock:
+            schedule = self._entries.get(loan_id)
+            if schedule is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(loan_id)
+            self.hits += 1
+            return list(schedule)
+    
+    def put(self, loan_id: str, schedule: List[Any]) -> None:
+        """Store a schedule, evicting the least recently used one if full"""
+        with self._lock:
+            self._entries.pop(loan_id, None)
+            while len(self._entries) >= self.max_size:
+                self._entries.popitem(last=False)
+            self._entries[loan_id] = list(schedule)
+    
+    def invalidate(self, loan_id: str) -> None:
+        """Drop a loan's cached schedule"""
+        with self._lock:
+            self._entries.pop(loan_id, None)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _annuity_balances(principal: int, annual_rate: Decimal, payments_per_year: int,
+                      count: int, installment: int) -> List[int]:
+    """Closed-form balance after each payment: P*g^k - A*(g^k - 1)/r, rounded half-up"""
+    rate = float(annual_rate) / payments_per_year
+    if rate == 0:
+        return _straight_line_balances(principal, installment, count)
+    
+    if NUMPY_AVAILABLE:
+        growth = (1.0 + rate) ** np.arange(1, count + 1, dtype=np.float64)
+        balances = np.floor(principal * growth - installment * (growth - 1.0) / rate + 0.5)
+        return np.clip(balances, 0, principal).astype(np.int64).tolist()
+    
+    balances = []
+    for k in range(1, count + 1):
+        growth = (1.0 + rate) ** k
+        balance = math.floor(principal * growth - installment * (growth - 1.0) / rate + 0.5)
+        balances.append(min(max(balance, 0), principal))
+    return balances
+
+
+def _straight_line_balances(principal: int, step: int, count: int) -> List[int]:
+    return [max(principal - step * k, 0) for k in range(1, count + 1)]
+
+
+def _bullet_balances(principal: int, count: int) -> List[int]:
+    return [principal] * (count - 1) + [0]
+
+
+def _final_period(balances: List[int]) -> int:
+    """Index of the last payment: the first zero balance, else the last period"""
+    try:
+        return balances.index(0)
+    except ValueError:
+        return len(balances) - 1
+
+
+def _columns_numpy(principal, annual_rate, payments_per_year, balances, method, installment):
+    last = _final_period(balances)
+    remaining = np.array(balances[:last + 1], dtype=np.int64)
+    remaining[last] = 0
+    opening = np.concatenate(([principal], remaining[:-1])).astype(np.int64)
+    principal_paid = opening - remaining
+    
+    interest = accrue_minor(opening, [annual_rate] * len(opening), [payments_per_year] * len(opening))
+    interest = np.asarray(interest, dtype=np.int64)
+    if method == "equal_installment":
+        # Level payments; the final payment settles the rounded-off balance
+        interest[:last] = installment - principal_paid[:last]
+    payment = principal_paid + interest
+    
+    return {
+        "payment": payment,
+        "principal": principal_paid,
+        "interest": interest,
+        "remaining": remaining
+    }
+
+
+def _columns_python(principal, annual_rate, payments_per_year, balances, method, installment):
+    last = _final_period(balances)
+    remaining = balances[:last + 1]
+    remaining[last] = 0
+    opening = [principal] + remaining[:-1]
+    principal_paid = [o - r for o, r in zip(opening, remaining)]
+    
+    interest = [interest_minor(o, annual_rate, payments_per_year) for o in opening]
+    if method == "equal_installment":
+        # Level payments; the final payment settles the rounded-off balance
+        interest[:last] = [installment - p for p in principal_paid[:last]]
+    payment = [p + i for p, i in zip(principal_paid, interest)]
+    
+    return {
+        "payment": payment,
+        "principal": principal_paid,
+        "interest": interest,
+        "remaining": remaining
+    }
+
+
+def _pack(values: Sequence[int], typecode: str) -> str:
+    data = array(typecode, [int(v) for v in values])
+    if sys.byteorder == "big":
+        data.byteswap()
+    return base64.b64encode(zlib.compress(data.tobytes())).decode("ascii")
+
+
+def _unpack(blob: str, typecode: str) -> List[int]:
+    data = array(typecode)
+    data.frombytes(zlib.decompress(base64.b64decode(blob)))
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data.tolist()
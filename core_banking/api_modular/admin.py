@@ -2,12 +2,18 @@
 Admin endpoints (interest accrual, maintenance, etc.)
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Dict, Any
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Any, Optional
+from pydantic import BaseModel, Field
 
 from .auth import BankingSystem, get_banking_system
 from ..config import get_config
+from ..audit import AuditEventType
+from ..accounts import ProductType
+from ..interest import MAX_PROJECTION_DAYS
 from ..encryption import (
     is_encryption_available, create_encryption_provider, 
     EncryptedStorage, KeyManager, PII_FIELDS
@@ -22,6 +28,11 @@ class KeyRotationRequest(BaseModel):
     new_key: str
 
 
+class RateWhatIfRequest(BaseModel):
+    new_rates: Dict[str, str]  # Product type -> annual rate, e.g. {"savings": "0.03"}
+    horizon_days: int = Field(30, ge=1, le=MAX_PROJECTION_DAYS)
+
+
 @router.get("/encryption/status")
 async def get_encryption_status(system: BankingSystem = Depends(get_banking_system)) -> Dict[str, Any]:
     """Get encryption status and configuration"""
@@ -108,6 +119,74 @@ async def get_encryption_audit(system: BankingSystem = Depends(get_banking_syste
         }
 
 
+def _parse_event_type(event_type: Optional[str]) -> Optional[AuditEventType]:
+    if event_type is None:
+        return None
+    try:
+        return AuditEventType(event_type)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Unknown event type: {event_type}")
+
+
+@router.get("/audit/events")
+async def get_audit_events(
+    entity_type: Optional[str] = None,
+    entity_id: Optional[str] = None,
+    event_type: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    system: BankingSystem = Depends(get_banking_system)
+) -> Dict[str, Any]:
+    """Page through audit events (oldest first) using the audit indexes"""
+    page = system.audit_trail.query_events(
+        entity_type=entity_type,
+        entity_id=entity_id,
+        event_type=_parse_event_type(event_type),
+        start_time=start_time,
+        end_time=end_time,
+        cursor=cursor,
+        page_size=limit
+    )
+    return {
+        "items": [
+            {
+                "id": event.id,
+                "sequence": event.sequence,
+                "event_type": event.event_type.value,
+                "entity_type": event.entity_type,
+                "entity_id": event.entity_id,
+                "created_at": event.created_at.isoformat(),
+                "user_id": event.user_id,
+                "metadata": event.metadata
+            }
+            for event in page.events
+        ],
+        "next_cursor": page.next_cursor
+    }
+
+
+@router.get("/audit/export")
+async def export_audit_events(
+    entity_type: Optional[str] = None,
+    entity_id: Optional[str] = None,
+    event_type: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    system: BankingSystem = Depends(get_banking_system)
+) -> StreamingResponse:
+    """Stream matching audit events as NDJSON"""
+    lines = system.audit_trail.export_ndjson(
+        entity_type=entity_type,
+        entity_id=entity_id,
+        event_type=_parse_event_type(event_type),
+        start_time=start_time,
+        end_time=end_time
+    )
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
 # Existing placeholder endpoints
 @router.post("/interest/accrue")
 async def run_interest_accrual(system: BankingSystem = Depends(get_banking_system)):
@@ -115,6 +194,38 @@ async def run_interest_accrual(system: BankingSystem = Depends(get_banking_syste
     pass
 
 
+@router.post("/interest/rate-what-if")
+def project_rate_change(
+    request: RateWhatIfRequest,
+    system: BankingSystem = Depends(get_banking_system)
+) -> Dict[str, Any]:
+    """
+    Project book-wide interest under changed product rates
+    
+    A plain function, so FastAPI runs the whole-book scan in its
+    threadpool instead of blocking the event loop.
+    """
+    try:
+        new_rates = {ProductType(product): Decimal(rate) for product, rate in request.new_rates.items()}
+        projection = system.interest_engine.project_rate_change(new_rates, request.horizon_days)
+    except (ValueError, InvalidOperation, ImportError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "horizon_days": request.horizon_days,
+        "projection": {
+            product: {
+                currency: {
+                    key: str(value.amount) if key != "accounts" else value
+                    for key, value in totals.items()
+                }
+                for currency, totals in by_currency.items()
+            }
+            for product, by_currency in projection.items()
+        }
+    }
+
+
 @router.get("/stats")
 async def get_system_stats(system: BankingSystem = Depends(get_banking_system)):
     """Get system statistics"""
@@ -169,5 +280,6 @@ async def get_fraud_status(system: BankingSystem = Depends(get_banking_system))
         "bastion_healthy": is_healthy,
         "timeout_seconds": fraud_client.timeout,
         "fallback_decision": fraud_client.fallback_on_error,
-        "statistics": fraud_stats
+        "statistics": fraud_stats,
+        "score_cache": fraud_client.get_cache_stats()
     }
\ No newline at end of file
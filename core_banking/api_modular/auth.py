@@ -3,11 +3,14 @@ Authentication and authorization dependencies
 """
 
 from ..storage import InMemoryStorage, SQLiteStorage
-from ..audit import AuditTrail
+from ..audit import AuditTrail, BufferedAuditWriter
+from ..audit_segments import AuditSegmentLog
 from ..ledger import GeneralLedger
+from ..events import EventDispatcher
 from ..accounts import AccountManager
 from ..customers import CustomerManager
 from ..compliance import ComplianceEngine
+from ..outbox import TransactionalOutbox
 from ..transactions import TransactionProcessor
 from ..interest import InterestEngine
 from ..credit import CreditLineManager
@@ -18,7 +21,9 @@ from ..reporting import ReportingEngine
 from ..workflows import WorkflowEngine
 from ..rbac import RBACManager
 from ..custom_fields import CustomFieldManager
-from ..fraud_client import BastionClient
+from ..fraud_client import BastionClient, FraudScoreCache
+from ..fraud_events import FraudEventBridge
+from ..kafka_integration import KafkaEventBus
 from ..config import get_config
 
 
@@ -33,19 +38,25 @@ class BankingSystem:
             self.storage = InMemoryStorage()
         
         # Initialize core components
-        self.audit_trail = AuditTrail(self.storage)
+        self.audit_trail = self._create_audit_trail()
+        self.audit_writer = self._create_audit_writer()
         self.ledger = GeneralLedger(self.storage, self.audit_trail)
-        self.account_manager = AccountManager(self.storage, self.ledger, self.audit_trail)
+        self.event_dispatcher = EventDispatcher()
+        self.account_manager = AccountManager(
+            self.storage, self.ledger, self.audit_trail,
+            event_dispatcher=self.event_dispatcher
+        )
         self.customer_manager = CustomerManager(self.storage, self.audit_trail)
-        self.compliance_engine = ComplianceEngine(self.storage, self.customer_manager, self.audit_trail)
+        self.compliance_engine, self.compliance_outbox_worker = self._create_compliance_engine()
         
         # Initialize fraud client if configured
         fraud_client = self._create_fraud_client()
+        self.fraud_bridge = self._create_fraud_bridge(fraud_client)
         
         self.transaction_processor = TransactionProcessor(
             self.storage, self.ledger, self.account_manager, 
             self.customer_manager, self.compliance_engine, self.audit_trail,
-            fraud_client=fraud_client
+            fraud_client=fraud_client, event_dispatcher=self.event_dispatcher
         )
         self.interest_engine = InterestEngine(
             self.storage, self.ledger, self.account_manager,
@@ -68,12 +79,75 @@ class BankingSystem:
         self.reporting_engine = ReportingEngine(
             self.storage, self.ledger, self.account_manager, self.loan_manager,
             self.credit_manager, self.collections_manager, self.customer_manager,
-            self.product_engine, self.audit_trail
+            self.product_engine, self.audit_trail, self.event_dispatcher
         )
+        self.reporting_change_worker = self._create_reporting_change_worker()
         self.workflow_engine = WorkflowEngine(self.storage, self.audit_trail)
         self.rbac_manager = RBACManager(self.storage, self.audit_trail)
         self.custom_field_manager = CustomFieldManager(self.storage, self.audit_trail)
     
+    def _create_audit_trail(self):
+        """Create the audit trail, on segment files if configured"""
+        config = get_config()
+        
+        if not config.audit_segment_dir:
+            return AuditTrail(self.storage)
+        
+        event_log = AuditSegmentLog(
+            config.audit_segment_dir,
+            segment_events=config.audit_segment_events,
+            compress_sealed=config.audit_compress_sealed_segments
+        )
+        return AuditTrail(self.storage, event_log=event_log)
+    
+    def _create_audit_writer(self):
+        """Start a buffered audit writer if enabled"""
+        config = get_config()
+        
+        if not config.audit_buffered_writer:
+            return None
+        
+        writer = BufferedAuditWriter(
+            self.audit_trail,
+            max_queue_size=config.audit_writer_queue_size,
+            batch_size=config.audit_writer_batch_size,
+            flush_on_commit=config.audit_flush_on_commit,
+            max_attempts=config.audit_writer_max_attempts,
+            commit_timeout=config.audit_flush_timeout_seconds
+        )
+        writer.start()
+        return writer
+    
+    def _create_compliance_engine(self):
+        """Create compliance engine, with an outbox worker if async filings are enabled"""
+        config = get_config()
+        
+        if not config.compliance_async_filings:
+            return ComplianceEngine(self.storage, self.customer_manager, self.audit_trail), None
+        
+        outbox = TransactionalOutbox(self.storage, table_name="compliance_outbox")
+        engine = ComplianceEngine(self.storage, self.customer_manager, self.audit_trail, outbox=outbox)
+        worker = engine.create_outbox_worker(
+            batch_size=config.compliance_outbox_batch_size,
+            poll_interval_seconds=config.compliance_outbox_poll_seconds,
+            retry_backoff_seconds=config.compliance_outbox_retry_seconds
+        )
+        worker.start()
+        return engine, worker
+    
+    def _create_reporting_change_worker(self):
+        """Keep report aggregates caught up with postings from every process"""
+        config = get_config()
+        
+        if config.reporting_catch_up_seconds <= 0:
+            return None
+        
+        worker = self.reporting_engine.create_change_worker(
+            poll_interval_seconds=config.reporting_catch_up_seconds
+        )
+        worker.start()
+        return worker
+    
     def _create_fraud_client(self):
         """Create fraud client based on configuration"""
         config = get_config()
@@ -82,13 +156,37 @@ class BankingSystem:
         if not config.bastion_url:
             return None
         
+        cache = None
+        if config.bastion_cache_size > 0:
+            cache = FraudScoreCache(
+                max_size=config.bastion_cache_size,
+                ttl_seconds=config.bastion_cache_ttl_seconds
+            )
+        
         return BastionClient(
             base_url=config.bastion_url,
             timeout=config.bastion_timeout,
             api_key=config.bastion_api_key if config.bastion_api_key else None,
             enabled=True,
-            fallback_on_error=config.bastion_fallback
+            fallback_on_error=config.bastion_fallback,
+            cache=cache
         )
+    
+    def _create_fraud_bridge(self, fraud_client):
+        """Consume Bastion decisions so they invalidate cached fraud scores"""
+        config = get_config()
+        
+        if fraud_client is None or fraud_client.cache is None:
+            return None
+        
+        # Bastion publishes updated decisions over Kafka only
+        if not (config.enable_kafka_events and config.kafka_bootstrap_servers):
+            return None
+        
+        event_bus = KafkaEventBus(config.kafka_bootstrap_servers, client_id=config.kafka_consumer_group)
+        bridge = FraudEventBridge(event_bus, score_cache=fraud_client.cache)
+        bridge.start()
+        return bridge
 
 
 # Global banking system instance
@@ -26,6 +26,7 @@ from .storage import InMemoryStorage, SQLiteStorage
 from .async_storage import AsyncStorageInterface, create_async_storage
 from .audit import AuditTrail, AuditEventType
 from .ledger import GeneralLedger, AccountType
+from .events import EventDispatcher
 from .accounts import AccountManager, ProductType, AccountState
 from .customers import CustomerManager, KYCStatus, KYCTier, Address
 from .compliance import ComplianceEngine
@@ -500,12 +501,17 @@ class BankingSystem:
         # Initialize core components
         self.audit_trail = AuditTrail(self.storage)
         self.ledger = GeneralLedger(self.storage, self.audit_trail)
-        self.account_manager = AccountManager(self.storage, self.ledger, self.audit_trail)
+        self.event_dispatcher = EventDispatcher()
+        self.account_manager = AccountManager(
+            self.storage, self.ledger, self.audit_trail,
+            event_dispatcher=self.event_dispatcher
+        )
         self.customer_manager = CustomerManager(self.storage, self.audit_trail)
         self.compliance_engine = ComplianceEngine(self.storage, self.customer_manager, self.audit_trail)
         self.transaction_processor = TransactionProcessor(
             self.storage, self.ledger, self.account_manager, 
-            self.customer_manager, self.compliance_engine, self.audit_trail
+            self.customer_manager, self.compliance_engine, self.audit_trail,
+            event_dispatcher=self.event_dispatcher
         )
         self.interest_engine = InterestEngine(
             self.storage, self.ledger, self.account_manager,
@@ -528,7 +534,7 @@ class BankingSystem:
         self.reporting_engine = ReportingEngine(
             self.storage, self.ledger, self.account_manager, self.loan_manager,
             self.credit_manager, self.collections_manager, self.customer_manager,
-            self.product_engine, self.audit_trail
+            self.product_engine, self.audit_trail, self.event_dispatcher
         )
         self.workflow_engine = WorkflowEngine(self.storage, self.audit_trail)
         self.rbac_manager = RBACManager(self.storage, self.audit_trail)
@@ -1478,15 +1484,18 @@ async def list_cases(
     status: Optional[str] = None,
     priority: Optional[int] = None,
     collector: Optional[str] = None,
+    include_resolved: bool = True,
     system: BankingSystem = Depends(get_banking_system)
 ):
-    """List collection cases"""
+    """List collection cases (include_resolved=false lists only open cases)"""
     try:
         status_filter = None
         if status:
             status_filter = DelinquencyStatus[status.upper()]
         
-        cases = system.collections_manager.get_cases(status_filter, priority, collector)
+        cases = system.collections_manager.get_cases(
+            status_filter, priority, collector, include_resolved=include_resolved
+        )
         
         result = []
         for case in cases:
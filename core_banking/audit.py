@@ -5,16 +5,29 @@ Hash-chained immutable audit log with SHA-256 for tamper detection.
 Every state change in the system is logged here.
 """
 
+import base64
 import hashlib
 import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
-from dataclasses import dataclass, asdict
-from typing import Dict, List, Optional, Any, Union
+from dataclasses import dataclass, asdict, field
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Any, Tuple, Union
 from enum import Enum
 from decimal import Decimal
+import logging
+import queue
+import threading
+import time
 import uuid
 
-from .storage import StorageInterface, StorageRecord
+from .storage import StorageInterface, StorageRecord, INDEX_KEY_SEPARATOR
+
+if TYPE_CHECKING:
+    from .audit_segments import AuditSegmentLog
+
+
+logger = logging.getLogger("nexum.audit")
 
 
 class AuditEventType(Enum):
@@ -100,6 +113,26 @@ class AuditEventType(Enum):
     AUDIT_INTEGRITY_CHECK = "audit_integrity_check"
 
 
+# Events written synchronously even when a buffered writer is attached
+REGULATED_EVENT_TYPES = frozenset({
+    AuditEventType.KYC_STATUS_CHANGED,
+    AuditEventType.ACCOUNT_FROZEN,
+    AuditEventType.ACCOUNT_UNFROZEN,
+    AuditEventType.ACCOUNT_CLOSED,
+    AuditEventType.ACCOUNT_HOLD_PLACED,
+    AuditEventType.ACCOUNT_HOLD_RELEASED,
+    AuditEventType.TRANSACTION_REVERSED,
+    AuditEventType.JOURNAL_ENTRY_REVERSED,
+    AuditEventType.SUSPICIOUS_ACTIVITY_FLAGGED,
+    AuditEventType.LARGE_TRANSACTION_REPORTED,
+    AuditEventType.USER_LOCKED,
+    AuditEventType.LOGIN_FAILED,
+    AuditEventType.PASSWORD_CHANGED,
+    AuditEventType.ROLE_UPDATED,
+    AuditEventType.AUDIT_INTEGRITY_CHECK,
+})
+
+
 @dataclass
 class AuditEvent(StorageRecord):
     """
@@ -113,6 +146,7 @@ class AuditEvent(StorageRecord):
     metadata: Dict[str, Any]  # Additional event-specific data
     user_id: Optional[str] = None  # User who initiated the action
     session_id: Optional[str] = None  # Session identifier
+    sequence: Optional[int] = None  # Position in the chain (1-based); None for legacy events
     
     def __post_init__(self):
         # Ensure metadata is JSON serializable
@@ -143,6 +177,10 @@ class AuditEvent(StorageRecord):
         Calculate SHA-256 hash of this event
         Hash includes all fields except current_hash to prevent circular reference
         """
+        return hashlib.sha256(self.hash_payload()).hexdigest()
+    
+    def hash_payload(self) -> bytes:
+        """Canonical JSON bytes covered by the event hash"""
         hash_data = {
             'id': self.id,
             'created_at': self.created_at.isoformat(),
@@ -154,10 +192,13 @@ class AuditEvent(StorageRecord):
             'session_id': self.session_id,
             'metadata': self.metadata
         }
+        # Legacy events were hashed before sequence numbers existed
+        if self.sequence is not None:
+            hash_data['sequence'] = self.sequence
         
         # Create deterministic JSON string
         json_data = json.dumps(hash_data, sort_keys=True, separators=(',', ':'))
-        return hashlib.sha256(json_data.encode('utf-8')).hexdigest()
+        return json_data.encode('utf-8')
     
     def verify_hash(self) -> bool:
         """Verify that the current hash is correct"""
@@ -186,27 +227,348 @@ class AuditEvent(StorageRecord):
         return cls(**data)
 
 
+def new_audit_event(
+    event_type: AuditEventType,
+    entity_type: str,
+    entity_id: str,
+    metadata: Optional[Dict[str, Any]] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None
+) -> AuditEvent:
+    """Build an unchained event; previous_hash, current_hash and sequence are set on append"""
+    now = datetime.now(timezone.utc)
+    return AuditEvent(
+        id=str(uuid.uuid4()),
+        created_at=now,
+        updated_at=now,
+        event_type=event_type,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        previous_hash="",
+        current_hash="",
+        user_id=user_id,
+        session_id=session_id,
+        metadata=metadata or {}
+    )
+
+
+def merkle_root(hashes: List[str]) -> str:
+    """
+    Merkle root of a list of hex digests
+    
+    Leaves are paired left to right and hashed together; an odd node at
+    the end of a level is carried up unchanged.
+    """
+    if not hashes:
+        return ""
+    level = list(hashes)
+    while len(level) > 1:
+        paired = [
+            hashlib.sha256((level[i] + level[i + 1]).encode('utf-8')).hexdigest()
+            for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+
+# Bumped when the set or layout of index tables changes
+AUDIT_INDEX_VERSION = 1
+
+
+def _index_key(*parts: str) -> str:
+    return INDEX_KEY_SEPARATOR.join(parts)
+
+
+def _prefix_end(prefix: str) -> str:
+    """Exclusive upper bound for keys starting with a separator-terminated prefix"""
+    return prefix[:-1] + chr(ord(INDEX_KEY_SEPARATOR) + 1)
+
+
+def _time_key(moment: datetime) -> str:
+    """Fixed-width, lexicographically ordered UTC timestamp"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+def _encode_cursor(key: str) -> str:
+    return base64.urlsafe_b64encode(key.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor: str) -> str:
+    return base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+
+
+@dataclass
+class AuditEventPage:
+    """One page of audit query results"""
+    events: List['AuditEvent']
+    next_cursor: Optional[str]  # Pass back to continue; None when exhausted
+
+
+@dataclass
+class SegmentVerification:
+    """Verification result for one fixed-size segment of the chain"""
+    segment: int
+    first_sequence: int
+    last_sequence: int
+    event_count: int
+    merkle_root: str
+    last_hash: str  # Stored hash of the segment's last event
+    hash_errors: List[Dict[str, Any]] = field(default_factory=list)
+    chain_breaks: List[Dict[str, Any]] = field(default_factory=list)
+    missing_sequences: List[int] = field(default_factory=list)
+    event_types: List[str] = field(default_factory=list)
+    entity_types: List[str] = field(default_factory=list)
+    first_event_time: Optional[str] = None
+    last_event_time: Optional[str] = None
+    from_checkpoint: bool = False  # Trusted from a stored checkpoint, not re-hashed
+    checkpoint_mismatch: bool = False  # Re-hashed segment disagrees with its checkpoint
+    
+    @property
+    def valid(self) -> bool:
+        return not (self.hash_errors or self.chain_breaks or self.missing_sequences or self.checkpoint_mismatch)
+
+
+def verify_segment(payload: Dict[str, Any]) -> SegmentVerification:
+    """
+    Re-hash one segment of the chain
+    
+    Module-level so segments can be verified in worker processes. The
+    payload carries the segment's events in sequence order (None where an
+    indexed event is missing) and the stored hash that precedes the segment.
+    """
+    previous_hash = payload['previous_hash']
+    first_sequence = payload['first_sequence']
+    computed = []
+    result = SegmentVerification(
+        segment=payload['segment'],
+        first_sequence=first_sequence,
+        last_sequence=first_sequence + len(payload['events']) - 1,
+        event_count=0,
+        merkle_root="",
+        last_hash=previous_hash
+    )
+    event_types = set()
+    entity_types = set()
+    
+    for offset, data in enumerate(payload['events']):
+        sequence = first_sequence + offset
+        if data is None:
+            result.missing_sequences.append(sequence)
+            continue
+        
+        event = AuditEvent.from_dict(dict(data))
+        expected_hash = event.calculate_hash()
+        if event.current_hash != expected_hash or event.sequence not in (None, sequence):
+            result.hash_errors.append({
+                'event_id': event.id,
+                'position': sequence - 1,
+                'sequence': sequence,
+                'expected_hash': expected_hash,
+                'actual_hash': event.current_hash
+            })
+        
+        if event.previous_hash != previous_hash:
+            result.chain_breaks.append({
+                'event_id': event.id,
+                'position': sequence - 1,
+                'sequence': sequence,
+                'expected_previous_hash': previous_hash,
+                'actual_previous_hash': event.previous_hash
+            })
+        previous_hash = event.current_hash
+        
+        computed.append(expected_hash)
+        event_types.add(event.event_type.value)
+        entity_types.add(event.entity_type)
+        created_at = event.created_at.isoformat()
+        if result.first_event_time is None:
+            result.first_event_time = created_at
+        result.last_event_time = created_at
+        result.event_count += 1
+    
+    result.merkle_root = merkle_root(computed)
+    result.last_hash = previous_hash
+    result.event_types = sorted(event_types)
+    result.entity_types = sorted(entity_types)
+    return result
+
+
 class AuditTrail:
     """
     Hash-chained audit trail for tamper detection
+    
+    The tip of the chain (last hash and sequence number) is kept in a
+    single chain-head record that is updated in the same storage
+    transaction as each appended event, so appends and get_latest_hash()
+    never scan the audit table.
+    
+    Every event carries a monotonic sequence number, indexed in a
+    sequence table. The chain is verified in fixed-size segments; each
+    segment that verifies cleanly is sealed with a checkpoint holding its
+    Merkle root and last hash, and later verifications only re-hash the
+    segments after the last checkpoint.
+    
+    With an event_log, events are appended to segment files instead of the
+    audit table; storage keeps only the chain head, checkpoints and query
+    indexes, and the head stays the commit record for the log.
     """
     
-    def __init__(self, storage: StorageInterface, table_name: str = "audit_events"):
-        import threading
+    CHAIN_HEAD_ID = "head"
+    MAX_APPEND_ATTEMPTS = 100
+    
+    def __init__(
+        self,
+        storage: StorageInterface,
+        table_name: str = "audit_events",
+        segment_size: int = 1000,
+        event_log: Optional['AuditSegmentLog'] = None
+    ):
         self.storage = storage
+        self.event_log = event_log
         self.table_name = table_name
+        self.head_table = f"{table_name}_chain_head"
+        self.sequence_table = f"{table_name}_sequence"
+        self.checkpoint_table = f"{table_name}_checkpoints"
+        self.entity_index_table = f"{table_name}_by_entity"
+        self.type_index_table = f"{table_name}_by_type"
+        self.time_index_table = f"{table_name}_by_time"
+        # Verification segments line up with segment files
+        self.segment_size = event_log.segment_events if event_log is not None else segment_size
         self._last_hash: Optional[str] = None
+        self._sequence = 0
         self._lock = threading.Lock()  # Thread safety for concurrent access
-        self._load_last_hash()
+        
+        # Optional buffered writer; sync_event_types are always written inline
+        self.writer: Optional['BufferedAuditWriter'] = None
+        self.sync_event_types = set(REGULATED_EVENT_TYPES)
+        
+        self._load_chain_head(bootstrap=True)
     
-    def _load_last_hash(self) -> None:
-        """Load the hash of the most recent audit event"""
+    def _load_chain_head(self, bootstrap: bool = False) -> None:
+        """
+        Load the chain head record
+        
+        Args:
+            bootstrap: Build the head from existing events if it is missing
+        """
+        head = self.storage.load(self.head_table, self.CHAIN_HEAD_ID)
+        if head is None:
+            head = self._rebuild_chain_head() if bootstrap else {}
+        if bootstrap and bool(head.get('event_log')) != (self.event_log is not None) and head.get('sequence'):
+            raise ValueError(
+                f"Audit table '{self.table_name}' is "
+                f"{'stored in segment files' if head.get('event_log') else 'stored in the database'}; "
+                f"open it {'with' if head.get('event_log') else 'without'} an event log"
+            )
+        if bootstrap and self.event_log is not None:
+            # Records past the head were never committed
+            self.event_log.truncate(head.get('sequence', 0))
+        if bootstrap and head.get('sequence') and head.get('index_version') != AUDIT_INDEX_VERSION:
+            self.rebuild_indexes()
+            head = self.storage.load(self.head_table, self.CHAIN_HEAD_ID) or head
+        self._last_hash = head.get('last_hash') or None
+        self._sequence = head.get('sequence', 0)
+    
+    def _rebuild_chain_head(self) -> Dict[str, Any]:
+        """
+        Derive the chain head and sequence index by scanning the audit table
+        
+        Only needed once for audit tables written before chain-head records
+        existed; legacy events are numbered in creation order and the result
+        is persisted so later loads are O(1). With an event log the head is
+        taken from the log's last record.
+        """
+        if self.event_log is not None:
+            return self._rebuild_chain_head_from_log()
+        
         events = self.storage.find(self.table_name, {})
-        if events:
-            # Sort by created_at to find the most recent
-            sorted_events = sorted(events, key=lambda x: x.get('created_at', ''))
-            if sorted_events:
-                self._last_hash = sorted_events[-1].get('current_hash')
+        if not events:
+            return {'last_hash': None, 'sequence': 0}
+        
+        # Legacy (unsequenced) events first, in creation order
+        events.sort(key=lambda x: (x.get('sequence') is not None, x.get('sequence') or 0, x.get('created_at', '')))
+        with self.storage.atomic():
+            for sequence, data in enumerate(events, start=1):
+                self._save_sequence_entry(sequence, data['id'])
+            
+            latest = events[-1]
+            head = {
+                'id': self.CHAIN_HEAD_ID,
+                'last_hash': latest.get('current_hash'),
+                'last_event_id': latest.get('id'),
+                'sequence': len(events),
+                'index_version': None,  # Indexes are rebuilt next
+                'updated_at': datetime.now(timezone.utc).isoformat()
+            }
+            self.storage.save(self.head_table, self.CHAIN_HEAD_ID, head)
+        return head
+    
+    def _rebuild_chain_head_from_log(self) -> Dict[str, Any]:
+        count = self.event_log.count()
+        if not count:
+            return {'last_hash': None, 'sequence': 0}
+        latest = self.event_log.read(count)
+        head = {
+            'id': self.CHAIN_HEAD_ID,
+            'last_hash': latest['current_hash'],
+            'last_event_id': latest['id'],
+            'sequence': count,
+            'event_log': True,
+            'index_version': None,  # Indexes are rebuilt next
+            'updated_at': datetime.now(timezone.utc).isoformat()
+        }
+        self.storage.save(self.head_table, self.CHAIN_HEAD_ID, head)
+        return head
+    
+    def _save_sequence_entry(self, sequence: int, event_id: str) -> None:
+        """Index an event by its chain position"""
+        self.storage.save(self.sequence_table, self._sequence_key(sequence), {
+            'id': self._sequence_key(sequence),
+            'sequence': sequence,
+            'event_id': event_id
+        })
+    
+    @staticmethod
+    def _sequence_key(sequence: int) -> str:
+        return f"{sequence:012d}"
+    
+    def _load_sequence(self, sequence: int) -> Optional[Dict[str, Any]]:
+        """Stored event at a chain position"""
+        if self.event_log is not None:
+            return self.event_log.read(sequence)
+        entry = self.storage.load(self.sequence_table, self._sequence_key(sequence))
+        return self.storage.load(self.table_name, entry['event_id']) if entry else None
+    
+    def _load_indexed_event(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Stored event for an index row"""
+        if self.event_log is not None:
+            return self.event_log.read(entry['sequence'])
+        return self.storage.load(self.table_name, entry['event_id'])
+    
+    def _iter_sequenced(self, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """Batches of stored events in chain order"""
+        if self.event_log is not None:
+            batch = []
+            for data in self.event_log.iter_events():
+                batch.append(data)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+            return
+        
+        for entries in self.storage.iter_batches(self.sequence_table, batch_size):
+            batch = []
+            for entry in entries:
+                data = self.storage.load(self.table_name, entry['event_id'])
+                if data is not None:
+                    batch.append(dict(data, sequence=entry['sequence']))
+            yield batch
     
     def log_event(
         self,
@@ -229,40 +591,309 @@ class AuditTrail:
             session_id: Session identifier
             
         Returns:
-            Created AuditEvent
+            Created AuditEvent. With a buffered writer attached, events not in
+            sync_event_types get their chain fields once the writer persists them.
         """
-        with self._lock:  # Thread-safe event creation and chaining
-            now = datetime.now(timezone.utc)
-            event_id = str(uuid.uuid4())
-            
-            # Re-load last hash to ensure we have the most recent one
-            self._load_last_hash()
-            
-            # Create event with previous hash for chaining
-            event = AuditEvent(
-                id=event_id,
-                created_at=now,
-                updated_at=now,
-                event_type=event_type,
-                entity_type=entity_type,
-                entity_id=entity_id,
-                previous_hash=self._last_hash or "",
-                current_hash="",  # Will be calculated below
-                user_id=user_id,
-                session_id=session_id,
-                metadata=metadata or {}
-            )
+        event = new_audit_event(event_type, entity_type, entity_id, metadata, user_id, session_id)
+        
+        writer = self.writer
+        if writer is not None and event_type not in self.sync_event_types:
+            # Queued once the caller's storage transaction commits
+            self.storage.on_commit(lambda: writer.submit(event))
+            return event
+        
+        self._append_events([event])
+        return event
+    
+    def log_event_batch(self, events: List[AuditEvent]) -> None:
+        """
+        Append prebuilt events (see new_audit_event) in one chained write
+        
+        For batch jobs that already write in bulk; bypasses the buffered writer.
+        """
+        self._append_events(events)
+    
+    def _append_events(self, events: List[AuditEvent]) -> None:
+        """
+        Chain-hash events and persist them with the new chain head
+        
+        All events, their sequence entries and the head are written in one
+        storage transaction, using one multi-row write per table. With an
+        event log, the events are appended to it before the head is saved.
+        
+        The first new sequence entry is claimed with insert_if_absent, so
+        writers in other processes sharing the table cannot fork the chain:
+        the loser re-reads the head and chains again.
+        """
+        if not events:
+            return
+        
+        with self._lock:  # Thread-safe chaining
+            with self.storage.atomic():
+                for _ in range(self.MAX_APPEND_ATTEMPTS):
+                    # Re-read the head in case another AuditTrail shares this table
+                    self._load_chain_head()
+                    
+                    previous_hash = self._last_hash or ""
+                    sequence = self._sequence
+                    rows = {}
+                    sequence_rows = {}
+                    index_rows = {table: {} for table in self._index_tables()}
+                    for event in events:
+                        sequence += 1
+                        event.sequence = sequence
+                        event.previous_hash = previous_hash
+                        event.current_hash = event.calculate_hash()
+                        previous_hash = event.current_hash
+                        
+                        rows[event.id] = event.to_dict()
+                        key = self._sequence_key(sequence)
+                        sequence_rows[key] = {'id': key, 'sequence': sequence, 'event_id': event.id}
+                        for table, entry in self._index_entries(event).items():
+                            index_rows[table][entry['id']] = entry
+                    
+                    if self._claim_sequence(sequence_rows):
+                        break
+                else:
+                    raise RuntimeError(f"Could not append to audit chain '{self.table_name}': head kept moving")
+                
+                # Save the events, their index entries and the chain head together
+                if self.event_log is not None:
+                    self.event_log.append(events)
+                else:
+                    self.storage.save_many(self.table_name, rows)
+                    self.storage.save_many(self.sequence_table, sequence_rows)
+                for table, entries in index_rows.items():
+                    self.storage.save_many(table, entries)
+                self.storage.save(self.head_table, self.CHAIN_HEAD_ID, {
+                    'id': self.CHAIN_HEAD_ID,
+                    'last_hash': previous_hash,
+                    'last_event_id': events[-1].id,
+                    'sequence': sequence,
+                    'event_log': self.event_log is not None,
+                    'index_version': AUDIT_INDEX_VERSION,
+                    'updated_at': datetime.now(timezone.utc).isoformat()
+                })
             
-            # Calculate and set the hash
-            event.current_hash = event.calculate_hash()
+            # Update last hash for chain continuity
+            self._last_hash = previous_hash
+            self._sequence = sequence
+    
+    def _claim_sequence(self, sequence_rows: Dict[str, Dict[str, Any]]) -> bool:
+        """Claim the first new chain position; False if another writer holds it"""
+        if self.event_log is not None:
+            return True  # Segment logs have a single writer process
+        key, row = next(iter(sequence_rows.items()))
+        return self.storage.insert_if_absent(self.sequence_table, key, row)
+    
+    def _index_tables(self) -> List[str]:
+        return [self.entity_index_table, self.type_index_table, self.time_index_table]
+    
+    def _index_entries(self, event: AuditEvent) -> Dict[str, Dict[str, Any]]:
+        """Index rows for an event, keyed by index table"""
+        sequence = self._sequence_key(event.sequence)
+        created = _time_key(event.created_at)
+        keys = {
+            self.entity_index_table: _index_key(event.entity_type, event.entity_id, sequence),
+            self.type_index_table: _index_key(event.event_type.value, created, sequence),
+            self.time_index_table: _index_key(created, sequence)
+        }
+        return {
+            table: {'id': key, 'event_id': event.id, 'sequence': event.sequence}
+            for table, key in keys.items()
+        }
+    
+    def rebuild_indexes(self, batch_size: int = 1000) -> int:
+        """
+        Rebuild the query index tables from the stored chain
+        
+        Runs automatically when a trail is opened over events written
+        before the current index layout.
+        
+        Returns:
+            Number of events indexed
+        """
+        indexed = 0
+        with self._lock:
+            for table in self._index_tables():
+                self.storage.clear_table(table)
             
-            # Save to storage
-            self.storage.save(self.table_name, event.id, event.to_dict())
+            for batch in self._iter_sequenced(batch_size):
+                index_rows = {table: {} for table in self._index_tables()}
+                for data in batch:
+                    event = AuditEvent.from_dict(data)
+                    for table, row in self._index_entries(event).items():
+                        index_rows[table][row['id']] = row
+                    indexed += 1
+                for table, rows in index_rows.items():
+                    self.storage.save_many(table, rows)
             
-            # Update last hash for chain continuity
-            self._last_hash = event.current_hash
+            head = self.storage.load(self.head_table, self.CHAIN_HEAD_ID)
+            if head is not None:
+                head['index_version'] = AUDIT_INDEX_VERSION
+                self.storage.save(self.head_table, self.CHAIN_HEAD_ID, head)
+        return indexed
+    
+    def _index_range(
+        self,
+        entity_type: Optional[str],
+        entity_id: Optional[str],
+        event_type: Optional[AuditEventType],
+        start_time: Optional[datetime],
+        end_time: Optional[datetime]
+    ):
+        """Pick the index and key range for a query, plus any residual filter"""
+        if entity_type is not None and entity_id is not None:
+            prefix = _index_key(entity_type, entity_id, "")
+            low, high = prefix, _prefix_end(prefix)
+            table = self.entity_index_table
+            time_filtered = False
+        else:
+            prefix = _index_key(event_type.value, "") if event_type is not None else ""
+            table = self.type_index_table if event_type is not None else self.time_index_table
+            low = prefix + _time_key(start_time) if start_time else (prefix or None)
+            if end_time:
+                high = _prefix_end(prefix + _index_key(_time_key(end_time), ""))
+            else:
+                high = _prefix_end(prefix) if prefix else None
+            time_filtered = True
+        
+        def residual(event: AuditEvent) -> bool:
+            if entity_type is not None and event.entity_type != entity_type:
+                return False
+            if entity_id is not None and event.entity_id != entity_id:
+                return False
+            if event_type is not None and event.event_type != event_type:
+                return False
+            if not time_filtered:
+                if start_time and event.created_at < start_time:
+                    return False
+                if end_time and event.created_at > end_time:
+                    return False
+            return True
+        
+        return table, low, high, residual
+    
+    def _load_indexed(self, entries: List[Dict[str, Any]], residual) -> List[AuditEvent]:
+        events = []
+        for entry in entries:
+            data = self._load_indexed_event(entry)
+            if data is None:
+                continue
+            event = AuditEvent.from_dict(data)
+            if residual(event):
+                events.append(event)
+        return events
+    
+    def _query_latest(
+        self,
+        limit: Optional[int],
+        entity_type: Optional[str] = None,
+        entity_id: Optional[str] = None,
+        event_type: Optional[AuditEventType] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> List[AuditEvent]:
+        """Matching events in chain order; with a limit, the most recent N"""
+        if not limit:
+            events = []
+            cursor = None
+            while True:
+                page = self.query_events(
+                    entity_type=entity_type, entity_id=entity_id, event_type=event_type,
+                    start_time=start_time, end_time=end_time, cursor=cursor, page_size=1000
+                )
+                events.extend(page.events)
+                if page.next_cursor is None:
+                    return events
+                cursor = page.next_cursor
+        
+        table, low, high, residual = self._index_range(entity_type, entity_id, event_type, start_time, end_time)
+        events: List[AuditEvent] = []
+        upper = high
+        while len(events) < limit:
+            entries = self.storage.scan_range(table, low, upper, limit=limit, reverse=True)
+            if not entries:
+                break
+            events.extend(self._load_indexed(entries, residual))
+            upper = entries[-1]['id']
+        
+        events = events[:limit]
+        events.reverse()
+        return events
+    
+    def query_events(
+        self,
+        entity_type: Optional[str] = None,
+        entity_id: Optional[str] = None,
+        event_type: Optional[AuditEventType] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        page_size: int = 100
+    ) -> AuditEventPage:
+        """
+        Get one page of matching events, oldest first
+        
+        Entity queries read the (entity_type, entity_id, sequence) index;
+        event-type and time-range queries read the (event_type, created_at)
+        or created_at index, so cost is proportional to the matching events.
+        
+        Args:
+            entity_type: Entity type (used with entity_id)
+            entity_id: Entity ID
+            event_type: Event type
+            start_time: Start of time range (inclusive)
+            end_time: End of time range (inclusive)
+            cursor: next_cursor from the previous page
+            page_size: Maximum events per page
+        """
+        table, low, high, residual = self._index_range(entity_type, entity_id, event_type, start_time, end_time)
+        if cursor:
+            low = _decode_cursor(cursor)
+        
+        events: List[AuditEvent] = []
+        while len(events) < page_size:
+            entries = self.storage.scan_range(table, low, high, limit=page_size - len(events))
+            if not entries:
+                return AuditEventPage(events=events, next_cursor=None)
+            events.extend(self._load_indexed(entries, residual))
             
-            return event
+            # Resume just past the last entry read
+            last = entries[-1]
+            low = self._key_after(last['id'], last['sequence'])
+        
+        return AuditEventPage(events=events, next_cursor=_encode_cursor(low))
+    
+    def _key_after(self, index_key: str, sequence: int) -> str:
+        """Smallest index key past the entry for sequence"""
+        return index_key.rsplit(INDEX_KEY_SEPARATOR, 1)[0] + INDEX_KEY_SEPARATOR + self._sequence_key(sequence + 1)
+    
+    def export_ndjson(
+        self,
+        entity_type: Optional[str] = None,
+        entity_id: Optional[str] = None,
+        event_type: Optional[AuditEventType] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        page_size: int = 1000
+    ) -> Iterator[str]:
+        """
+        Stream matching events as newline-delimited JSON, oldest first
+        
+        Reads one page at a time, so exports of any size run in bounded memory.
+        """
+        cursor = None
+        while True:
+            page = self.query_events(
+                entity_type=entity_type, entity_id=entity_id, event_type=event_type,
+                start_time=start_time, end_time=end_time, cursor=cursor, page_size=page_size
+            )
+            for event in page.events:
+                yield json.dumps(event.to_dict(), default=str, sort_keys=True) + "\n"
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
     
     def get_events_for_entity(
         self,
@@ -281,21 +912,7 @@ class AuditTrail:
         Returns:
             List of AuditEvent objects sorted by creation time
         """
-        filters = {
-            'entity_type': entity_type,
-            'entity_id': entity_id
-        }
-        
-        events_data = self.storage.find(self.table_name, filters)
-        events = [AuditEvent.from_dict(data) for data in events_data]
-        
-        # Sort by creation time
-        events.sort(key=lambda x: x.created_at)
-        
-        if limit:
-            events = events[-limit:]  # Get most recent N events
-        
-        return events
+        return self._query_latest(limit, entity_type=entity_type, entity_id=entity_id)
     
     def get_events_by_type(
         self,
@@ -316,25 +933,7 @@ class AuditTrail:
         Returns:
             List of AuditEvent objects
         """
-        all_events = self.storage.load_all(self.table_name)
-        events = [AuditEvent.from_dict(data) for data in all_events]
-        
-        # Filter by event type
-        filtered_events = [e for e in events if e.event_type == event_type]
-        
-        # Filter by time range
-        if start_time:
-            filtered_events = [e for e in filtered_events if e.created_at >= start_time]
-        if end_time:
-            filtered_events = [e for e in filtered_events if e.created_at <= end_time]
-        
-        # Sort by creation time
-        filtered_events.sort(key=lambda x: x.created_at)
-        
-        if limit:
-            filtered_events = filtered_events[-limit:]
-        
-        return filtered_events
+        return self._query_latest(limit, event_type=event_type, start_time=start_time, end_time=end_time)
     
     def get_all_events(
         self,
@@ -353,26 +952,30 @@ class AuditTrail:
         Returns:
             List of AuditEvent objects sorted by creation time
         """
-        all_events_data = self.storage.load_all(self.table_name)
-        events = [AuditEvent.from_dict(data) for data in all_events_data]
-        
-        # Filter by time range
-        if start_time:
-            events = [e for e in events if e.created_at >= start_time]
-        if end_time:
-            events = [e for e in events if e.created_at <= end_time]
-        
-        # Sort by creation time
-        events.sort(key=lambda x: x.created_at)
-        
-        if limit:
-            events = events[-limit:]
-        
-        return events
+        return self._query_latest(limit, start_time=start_time, end_time=end_time)
     
-    def verify_integrity(self) -> Dict[str, Any]:
+    def verify_integrity(
+        self,
+        full: bool = False,
+        max_workers: int = 1,
+        progress_callback: Optional[Callable[[SegmentVerification], None]] = None
+    ) -> Dict[str, Any]:
         """
-        Verify the integrity of the entire audit chain
+        Verify the integrity of the audit chain
+        
+        Checkpoints live in the same storage as the events, so they are no
+        stronger than that storage. Without full=True a checkpointed segment
+        is trusted once its last event still carries the checkpointed hash:
+        an event edited inside it goes undetected, as does a forgery that
+        rewrites the checkpoints too. Run with full=True periodically, and
+        compare the chain head's last hash against a copy kept outside this
+        storage, to detect storage-level tampering.
+        
+        Args:
+            full: Re-hash every segment, including checkpointed ones, and
+                compare their Merkle roots against the checkpoints
+            max_workers: Worker processes for re-hashing segments
+            progress_callback: Called with each SegmentVerification as it completes
         
         Returns:
             Dictionary with integrity check results
@@ -380,66 +983,443 @@ class AuditTrail:
         result = {
             'valid': True,
             'total_events': 0,
+            'verified_events': 0,
             'hash_errors': [],
             'chain_breaks': [],
             'details': {}
         }
         
-        # Load all events and sort by creation time
-        all_events_data = self.storage.load_all(self.table_name)
-        if not all_events_data:
-            return result
-        
-        events = [AuditEvent.from_dict(data) for data in all_events_data]
-        events.sort(key=lambda x: x.created_at)
-        
-        result['total_events'] = len(events)
-        
-        # Verify each event's hash
-        for i, event in enumerate(events):
-            if not event.verify_hash():
-                result['valid'] = False
-                result['hash_errors'].append({
-                    'event_id': event.id,
-                    'position': i,
-                    'expected_hash': event.calculate_hash(),
-                    'actual_hash': event.current_hash
-                })
+        segments = []
+        for segment in self.iter_verify_segments(full=full, max_workers=max_workers):
+            segments.append(segment)
+            if progress_callback:
+                progress_callback(segment)
         
-        # Verify chain continuity
-        previous_hash = ""
-        for i, event in enumerate(events):
-            if event.previous_hash != previous_hash:
-                result['valid'] = False
-                result['chain_breaks'].append({
-                    'event_id': event.id,
-                    'position': i,
-                    'expected_previous_hash': previous_hash,
-                    'actual_previous_hash': event.previous_hash
-                })
-            previous_hash = event.current_hash
+        head = self.storage.load(self.head_table, self.CHAIN_HEAD_ID) or {}
+        sequence = head.get('sequence', 0)
+        stored_events = self.count_events()
+        result['total_events'] = max(sequence, stored_events)
+        
+        missing = []
+        checkpoint_mismatches = []
+        event_types = set()
+        entity_types = set()
+        for segment in segments:
+            result['hash_errors'].extend(segment.hash_errors)
+            result['chain_breaks'].extend(segment.chain_breaks)
+            missing.extend(segment.missing_sequences)
+            event_types.update(segment.event_types)
+            entity_types.update(segment.entity_types)
+            if not segment.from_checkpoint:
+                result['verified_events'] += segment.event_count
+            if segment.checkpoint_mismatch:
+                checkpoint_mismatches.append(segment.segment)
+        
+        # The chain must end at the head, and every stored event must be in it
+        tail_hash = segments[-1].last_hash if segments else ""
+        head_mismatch = sequence > 0 and tail_hash != (head.get('last_hash') or "")
+        unsequenced = stored_events - (sequence - len(missing))
         
-        # Additional statistics
+        result['valid'] = not (
+            result['hash_errors'] or result['chain_breaks'] or missing
+            or checkpoint_mismatches or head_mismatch or unsequenced
+        )
+        
+        verified = [s for s in segments if s.first_event_time is not None]
         result['details'] = {
-            'first_event_time': events[0].created_at.isoformat() if events else None,
-            'last_event_time': events[-1].created_at.isoformat() if events else None,
-            'event_types': list(set(e.event_type.value for e in events)),
-            'entity_types': list(set(e.entity_type for e in events))
+            'first_event_time': verified[0].first_event_time if verified else None,
+            'last_event_time': verified[-1].last_event_time if verified else None,
+            'event_types': sorted(event_types),
+            'entity_types': sorted(entity_types),
+            'segments': len(segments),
+            'segments_from_checkpoint': sum(1 for s in segments if s.from_checkpoint),
+            'missing_sequences': missing,
+            'checkpoint_mismatches': checkpoint_mismatches,
+            'head_mismatch': head_mismatch,
+            'unsequenced_events': unsequenced
         }
         
         return result
     
+    def iter_verify_segments(self, full: bool = False, max_workers: int = 1) -> Iterator[SegmentVerification]:
+        """
+        Verify the chain segment by segment, yielding results in order
+        
+        Segments up to the last contiguous checkpoint are trusted (unless
+        full=True): only the stored hash at each checkpoint boundary is
+        compared. Remaining segments are re-hashed, in worker processes when
+        max_workers > 1, and every complete segment that verifies cleanly
+        gets a checkpoint.
+        
+        Args:
+            full: Re-hash checkpointed segments too
+            max_workers: Worker processes for re-hashing segments
+        """
+        head = self.storage.load(self.head_table, self.CHAIN_HEAD_ID) or {}
+        total = head.get('sequence', 0)
+        segment_count = -(-total // self.segment_size)
+        
+        previous_hash = ""
+        segment = 0
+        checkpoints = {}
+        while segment < segment_count:
+            checkpoint = self.storage.load(self.checkpoint_table, self._checkpoint_key(segment))
+            if checkpoint is None or checkpoint.get('first_previous_hash') != previous_hash:
+                break
+            checkpoints[segment] = checkpoint
+            if not full:
+                yield self._verify_checkpoint_boundary(checkpoint)
+            previous_hash = checkpoint['last_hash']
+            segment += 1
+        
+        if full:
+            segment, previous_hash = 0, ""
+        
+        pool = ProcessPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+        try:
+            pending = deque()
+            for index in range(segment, segment_count):
+                if self.event_log is not None:
+                    # Workers hash the segment file in place
+                    verifier = self.event_log.verify_segment
+                    payload = self.event_log.segment_payload(index, previous_hash, total)
+                    last_sequence = payload['first_sequence'] + payload['event_count'] - 1
+                    previous_hash = self.event_log.stored_hash(last_sequence) or previous_hash
+                else:
+                    verifier = verify_segment
+                    payload = self._segment_payload(index, previous_hash, total)
+                    previous_hash = self._last_stored_hash(payload, previous_hash)
+                
+                if pool is None:
+                    pending.append(verifier(payload))
+                else:
+                    pending.append(pool.submit(verifier, payload))
+                
+                # Keep a bounded number of segments in flight
+                while len(pending) > max(1, max_workers * 2) or (pending and pool is None):
+                    yield self._finish_segment(pending.popleft(), checkpoints)
+            
+            while pending:
+                yield self._finish_segment(pending.popleft(), checkpoints)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    
+    def _segment_payload(self, segment: int, previous_hash: str, total: int) -> Dict[str, Any]:
+        """Load one segment's events in sequence order, from one read of its sequence range"""
+        first = segment * self.segment_size + 1
+        last = min(total, first + self.segment_size - 1)
+        event_ids = {
+            entry['sequence']: entry['event_id']
+            for entry in self.storage.scan_range(
+                self.sequence_table, self._sequence_key(first), self._sequence_key(last + 1)
+            )
+        }
+        events = [
+            self.storage.load(self.table_name, event_ids[sequence]) if sequence in event_ids else None
+            for sequence in range(first, last + 1)
+        ]
+        return {
+            'segment': segment,
+            'first_sequence': first,
+            'previous_hash': previous_hash,
+            'events': events
+        }
+    
+    @staticmethod
+    def _last_stored_hash(payload: Dict[str, Any], previous_hash: str) -> str:
+        """Stored hash the next segment must chain from"""
+        for data in reversed(payload['events']):
+            if data is not None:
+                return data.get('current_hash', "")
+        return previous_hash
+    
+    def _finish_segment(self, outcome, checkpoints: Dict[int, Dict[str, Any]]) -> SegmentVerification:
+        """Collect a segment result and checkpoint it if it is sealed and valid"""
+        segment = outcome if isinstance(outcome, SegmentVerification) else outcome.result()
+        checkpoint = checkpoints.get(segment.segment)
+        
+        if checkpoint is not None:
+            if checkpoint['merkle_root'] != segment.merkle_root or checkpoint['last_hash'] != segment.last_hash:
+                segment.checkpoint_mismatch = True
+        elif segment.valid and segment.event_count == self.segment_size:
+            now = datetime.now(timezone.utc).isoformat()
+            self.storage.save(self.checkpoint_table, self._checkpoint_key(segment.segment), {
+                'id': self._checkpoint_key(segment.segment),
+                'segment': segment.segment,
+                'first_sequence': segment.first_sequence,
+                'last_sequence': segment.last_sequence,
+                'first_previous_hash': self._first_previous_hash(segment),
+                'last_hash': segment.last_hash,
+                'merkle_root': segment.merkle_root,
+                'verified_at': now
+            })
+        return segment
+    
+    def _first_previous_hash(self, segment: SegmentVerification) -> str:
+        """previous_hash of a segment's first event"""
+        data = self._load_sequence(segment.first_sequence)
+        return data.get('previous_hash', "") if data else ""
+    
+    def _verify_checkpoint_boundary(self, checkpoint: Dict[str, Any]) -> SegmentVerification:
+        """Check a trusted segment's last event still carries the checkpointed hash"""
+        segment = SegmentVerification(
+            segment=checkpoint['segment'],
+            first_sequence=checkpoint['first_sequence'],
+            last_sequence=checkpoint['last_sequence'],
+            event_count=checkpoint['last_sequence'] - checkpoint['first_sequence'] + 1,
+            merkle_root=checkpoint['merkle_root'],
+            last_hash=checkpoint['last_hash'],
+            from_checkpoint=True
+        )
+        
+        data = self._load_sequence(checkpoint['last_sequence'])
+        if data is None:
+            segment.missing_sequences.append(checkpoint['last_sequence'])
+        elif data.get('current_hash') != checkpoint['last_hash']:
+            segment.hash_errors.append({
+                'event_id': data.get('id'),
+                'position': checkpoint['last_sequence'] - 1,
+                'sequence': checkpoint['last_sequence'],
+                'expected_hash': checkpoint['last_hash'],
+                'actual_hash': data.get('current_hash')
+            })
+        return segment
+    
+    @staticmethod
+    def _checkpoint_key(segment: int) -> str:
+        return f"{segment:08d}"
+    
     def get_event_by_id(self, event_id: str) -> Optional[AuditEvent]:
         """Get a specific audit event by ID"""
-        event_data = self.storage.load(self.table_name, event_id)
+        if self.event_log is not None:
+            event_data = self.event_log.find(event_id)
+        else:
+            event_data = self.storage.load(self.table_name, event_id)
         if event_data:
             return AuditEvent.from_dict(event_data)
         return None
     
     def count_events(self) -> int:
         """Get total number of audit events"""
+        if self.event_log is not None:
+            return self.event_log.count()
         return self.storage.count(self.table_name)
     
     def get_latest_hash(self) -> Optional[str]:
         """Get the hash of the most recent audit event"""
-        return self._last_hash
\ No newline at end of file
+        head = self.storage.load(self.head_table, self.CHAIN_HEAD_ID)
+        if head is not None:
+            return head.get('last_hash') or None
+        return self._last_hash
+    
+    def get_sequence(self) -> int:
+        """Get the number of events appended to the chain"""
+        head = self.storage.load(self.head_table, self.CHAIN_HEAD_ID)
+        if head is not None:
+            return head.get('sequence', 0)
+        return self._sequence
+
+
+class BufferedAuditWriter:
+    """
+    Background writer that chain-hashes and persists audit events in batches
+    
+    Attached to an AuditTrail, it takes events of every type outside
+    AuditTrail.sync_event_types off the caller's path: log_event() only
+    builds the event, which is queued when the caller's storage transaction
+    commits (and dropped if it rolls back). A writer thread appends queued
+    events in batches with one multi-row write per table. The queue is
+    bounded, so producers block rather than grow memory when the writer
+    falls behind.
+    
+    A batch that fails is retried with exponential backoff; after
+    max_attempts it is moved to a dead-letter table so the writer can carry
+    on, and callers waiting for its events get an error.
+    """
+    
+    def __init__(
+        self,
+        audit_trail: AuditTrail,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_on_commit: bool = False,
+        max_attempts: int = 5,
+        retry_backoff: float = 0.5,
+        commit_timeout: Optional[float] = 30.0
+    ):
+        """
+        Args:
+            audit_trail: Trail to write to
+            max_queue_size: Queued events before submit() blocks
+            batch_size: Maximum events appended per storage transaction
+            flush_on_commit: Make submit() wait until the event is persisted,
+                so a committed operation's audit events are durable when it
+                returns while still being written in shared batches
+            max_attempts: Appends of a batch before it is dead-lettered
+            retry_backoff: Seconds before the first retry; doubled per retry
+            commit_timeout: Seconds a flush_on_commit submit() waits (None waits forever)
+        """
+        self.audit_trail = audit_trail
+        self.batch_size = batch_size
+        self.flush_on_commit = flush_on_commit
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.commit_timeout = commit_timeout
+        self.dead_letter_table = f"{audit_trail.table_name}_dead_letter"
+        self.written = 0
+        self.failed_batches = 0
+        self.dead_lettered = 0
+        self.last_error: Optional[str] = None
+        self._queue: 'queue.Queue[Tuple[int, AuditEvent]]' = queue.Queue(maxsize=max_queue_size)
+        self._submit_lock = threading.Lock()
+        self._submitted = 0
+        self._settled = 0  # Highest ticket persisted or dead-lettered
+        self._failed: List[Tuple[int, int, str]] = []  # Dead-lettered ticket ranges and their errors
+        self._progress = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Attach to the audit trail and start the writer thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer")
+        self._thread.daemon = True
+        self._thread.start()
+        self.audit_trail.writer = self
+        logger.info("BufferedAuditWriter started")
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        """Detach from the audit trail, write out the queue and stop the thread"""
+        if self.audit_trail.writer is self:
+            self.audit_trail.writer = None
+        self.flush(timeout=timeout)
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        logger.info("BufferedAuditWriter stopped")
+    
+    def submit(self, event: AuditEvent) -> None:
+        """
+        Queue an event for the writer thread
+        
+        Raises:
+            RuntimeError: With flush_on_commit, if the event was not persisted
+                within commit_timeout or its batch was dead-lettered
+        """
+        # Tickets enter the queue in order, so the writer settles them in order
+        with self._submit_lock:
+            self._submitted += 1
+            ticket = self._submitted
+            self._queue.put((ticket, event))
+        
+        if self.flush_on_commit:
+            if not self._wait_for(ticket, self.commit_timeout):
+                raise RuntimeError(f"Audit event {event.id} was not persisted within {self.commit_timeout}s")
+            error = self._failure(ticket)
+            if error:
+                raise RuntimeError(
+                    f"Audit event {event.id} could not be persisted and was moved to {self.dead_letter_table}: {error}"
+                )
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every event submitted so far is persisted or dead-lettered
+        
+        Returns:
+            False if the timeout expired first
+        """
+        with self._submit_lock:
+            ticket = self._submitted
+        return self._wait_for(ticket, timeout)
+    
+    def _wait_for(self, ticket: int, timeout: Optional[float] = None) -> bool:
+        with self._progress:
+            return self._progress.wait_for(lambda: self._settled >= ticket, timeout=timeout)
+    
+    def _failure(self, ticket: int) -> Optional[str]:
+        """Error of the dead-lettered batch holding a ticket, if any"""
+        with self._progress:
+            for first, last, error in self._failed:
+                if first <= ticket <= last:
+                    return error
+        return None
+    
+    def _run(self) -> None:
+        while not self._stop_event.is_set() or not self._queue.empty():
+            try:
+                batch = [self._queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            self._write(batch)
+    
+    def _write(self, batch: List[Tuple[int, AuditEvent]]) -> None:
+        """Append a batch, retrying with backoff, then dead-letter it"""
+        events = [event for _, event in batch]
+        error = None
+        
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.audit_trail._append_events(events)
+                error = None
+                break
+            except Exception as e:
+                error = e
+                self.failed_batches += 1
+                logger.error(f"Audit batch of {len(events)} events failed (attempt {attempt}/{self.max_attempts}): {e}")
+                if attempt < self.max_attempts:
+                    time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+        
+        if error is not None:
+            self._dead_letter(events, error)
+        
+        with self._progress:
+            if error is None:
+                self.written += len(events)
+            else:
+                self._failed.append((batch[0][0], batch[-1][0], str(error)))
+            self._settled = batch[-1][0]
+            self._progress.notify_all()
+    
+    def _dead_letter(self, events: List[AuditEvent], error: Exception) -> None:
+        """Park a batch that could not be appended, for inspection and replay"""
+        self.dead_lettered += len(events)
+        self.last_error = str(error)
+        failed_at = datetime.now(timezone.utc).isoformat()
+        try:
+            self.audit_trail.storage.save_many(self.dead_letter_table, {
+                event.id: {
+                    'id': event.id,
+                    'event': dict(event.to_dict(), previous_hash=None, current_hash=None, sequence=None),
+                    'error': str(error),
+                    'failed_at': failed_at
+                }
+                for event in events
+            })
+            logger.critical(f"Moved {len(events)} audit events to {self.dead_letter_table}: {error}")
+        except Exception as e:
+            logger.critical(f"Could not dead-letter {len(events)} audit events ({error}); they are lost: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get writer statistics"""
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "failed_batches": self.failed_batches,
+            "dead_lettered": self.dead_lettered,
+            "last_error": self.last_error,
+            "batch_size": self.batch_size,
+            "flush_on_commit": self.flush_on_commit
+        }
@@ -0,0 +1,469 @@
+"""
+Audit Segment Log Module
+
+Append-only file backend for audit trail events. Events are written as
+length-prefixed records to numbered segment files, each with a sidecar
+offset index, so appends are sequential writes and the operational
+database only keeps the chain head and query indexes. Integrity scans hash
+records in place over a memory map; sealed segments can be compressed.
+"""
+
+from array import array
+import bisect
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+from .audit import AuditEvent, SegmentVerification, merkle_root
+
+
+# Record header: payload length, hex SHA-256 of the payload
+RECORD_HEADER = struct.Struct(">I64s")
+
+# Sidecar index entry: byte offset of a record in the uncompressed segment
+OFFSET_ENTRY = struct.Struct("<Q")
+
+# Payloads are canonical JSON with sorted keys, so these are fixed landmarks
+CREATED_AT_PREFIX = b'{"created_at":"'
+PREVIOUS_HASH_MARKER = b'"previous_hash":"'
+EVENT_TYPE_MARKER = b'"event_type":"'
+ENTITY_TYPE_MARKER = b'"entity_type":"'
+
+SegmentBuffer = Union[mmap.mmap, bytes]
+
+
+def _segment_path(directory: str, segment: int, suffix: str) -> str:
+    return os.path.join(directory, f"{segment:08d}{suffix}")
+
+
+def _read_offsets(directory: str, segment: int) -> array:
+    """Record offsets of a segment, in sequence order"""
+    offsets = array('Q')
+    path = _segment_path(directory, segment, ".idx")
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        offsets.frombytes(data[:len(data) - len(data) % OFFSET_ENTRY.size])
+    return offsets
+
+
+def _open_segment(directory: str, segment: int) -> Optional[SegmentBuffer]:
+    """
+    Map a segment for reading
+    
+    Uncompressed segments are memory-mapped; compressed (sealed) segments
+    are inflated into one bytes object. Returns None for a missing or empty
+    segment.
+    """
+    compressed = _segment_path(directory, segment, ".log.z")
+    if os.path.exists(compressed):
+        with open(compressed, 'rb') as f:
+            return zlib.decompress(f.read())
+    
+    path = _segment_path(directory, segment, ".log")
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _close_buffer(buffer: Optional[SegmentBuffer]) -> None:
+    if isinstance(buffer, mmap.mmap):
+        buffer.close()
+
+
+def _decode_record(buffer: SegmentBuffer, offset: int) -> Dict[str, Any]:
+    """Rebuild an event dictionary from the record at offset"""
+    length, digest = RECORD_HEADER.unpack_from(buffer, offset)
+    start = offset + RECORD_HEADER.size
+    data = json.loads(buffer[start:start + length])
+    data['current_hash'] = digest.decode('ascii')
+    data['updated_at'] = data['created_at']
+    return data
+
+
+def _string_after(buffer: SegmentBuffer, marker: bytes, start: int, end: int) -> Optional[str]:
+    """Value of the first top-level string field introduced by marker"""
+    position = buffer.find(marker, start, end)
+    if position < 0:
+        return None
+    position += len(marker)
+    return buffer[position:buffer.find(b'"', position, end)].decode('utf-8')
+
+
+def verify_segment_file(payload: Dict[str, Any]) -> SegmentVerification:
+    """
+    Re-hash one segment file in place
+    
+    Module-level so segments can be verified in worker processes. Each
+    record payload is hashed through a memoryview of the mapped segment,
+    and the chain link and sequence number are compared as raw bytes at
+    the payload's previous_hash field, so records are only parsed to
+    report errors.
+    """
+    directory = payload['directory']
+    first_sequence = payload['first_sequence']
+    expected_count = payload['event_count']
+    previous_hash = payload['previous_hash']
+    result = SegmentVerification(
+        segment=payload['segment'],
+        first_sequence=first_sequence,
+        last_sequence=first_sequence + expected_count - 1,
+        event_count=0,
+        merkle_root="",
+        last_hash=previous_hash
+    )
+    
+    offsets = _read_offsets(directory, payload['segment'])[:expected_count]
+    buffer = _open_segment(directory, payload['segment']) if offsets else None
+    computed = []
+    event_types = set()
+    entity_types = set()
+    try:
+        view = memoryview(buffer if buffer is not None else b"")
+        for position, offset in enumerate(offsets):
+            sequence = first_sequence + position
+            length, digest = RECORD_HEADER.unpack_from(buffer, offset)
+            start = offset + RECORD_HEADER.size
+            end = start + length
+            stored_hash = digest.decode('ascii')
+            expected_hash = hashlib.sha256(view[start:end]).hexdigest()
+            
+            # "previous_hash":"<hash>","sequence":<n>, -- the last top-level
+            # occurrence of the marker; nested metadata keys sort before it
+            marker = buffer.rfind(PREVIOUS_HASH_MARKER, start, end)
+            link_start = marker + len(PREVIOUS_HASH_MARKER)
+            link = previous_hash.encode('ascii') + b'"'
+            linked = marker >= 0 and buffer[link_start:link_start + len(link)] == link
+            sequence_field = b',"sequence":%d,' % sequence
+            sequenced = linked and buffer[link_start + len(link):link_start + len(link) + len(sequence_field)] == sequence_field
+            
+            if stored_hash != expected_hash or (linked and not sequenced):
+                result.hash_errors.append({
+                    'event_id': _decode_record(buffer, offset)['id'],
+                    'position': sequence - 1,
+                    'sequence': sequence,
+                    'expected_hash': expected_hash,
+                    'actual_hash': stored_hash
+                })
+            if not linked:
+                data = _decode_record(buffer, offset)
+                result.chain_breaks.append({
+                    'event_id': data['id'],
+                    'position': sequence - 1,
+                    'sequence': sequence,
+                    'expected_previous_hash': previous_hash,
+                    'actual_previous_hash': data.get('previous_hash')
+                })
+            previous_hash = stored_hash
+            
+            computed.append(expected_hash)
+            event_types.add(_string_after(buffer, EVENT_TYPE_MARKER, start, end))
+            entity_types.add(_string_after(buffer, ENTITY_TYPE_MARKER, start, end))
+            if position == 0 or position == len(offsets) - 1:
+                created_at = _string_after(buffer, CREATED_AT_PREFIX, start, end)
+                if result.first_event_time is None:
+                    result.first_event_time = created_at
+                result.last_event_time = created_at
+            result.event_count += 1
+        view.release()
+    finally:
+        _close_buffer(buffer)
+    
+    result.missing_sequences.extend(range(first_sequence + len(offsets), first_sequence + expected_count))
+    result.merkle_root = merkle_root(computed)
+    result.last_hash = previous_hash
+    result.event_types = sorted(t for t in event_types if t is not None)
+    result.entity_types = sorted(t for t in entity_types if t is not None)
+    return result
+
+
+class AuditSegmentLog:
+    """
+    Append-only segment files holding audit events in chain order
+    
+    Segment N holds sequences N * segment_events + 1 onwards. Each record is
+    a 4-byte length, the 64-character stored hash and the event's canonical
+    hash payload; the .idx sidecar lists record offsets, so reading a
+    sequence is one seek. A full segment is sealed and, with
+    compress_sealed, replaced by a zlib-compressed copy.
+    
+    The log is written by one process. The AuditTrail chain head remains
+    the commit record: records past the head's sequence (from a rolled
+    back transaction or a crash) are truncated when the trail is opened or
+    appended to.
+    """
+    
+    verify_segment = staticmethod(verify_segment_file)
+    
+    def __init__(
+        self,
+        directory: str,
+        segment_events: int = 100000,
+        compress_sealed: bool = True,
+        fsync: bool = True,
+        cache_segments: int = 4
+    ):
+        """
+        Args:
+            directory: Directory holding the segment files
+            segment_events: Records per segment (also the verification segment size)
+            compress_sealed: Compress segments once they are full
+            fsync: Flush appends to disk before returning
+            cache_segments: Mapped segments kept open for reads
+        """
+        self.directory = directory
+        self.segment_events = segment_events
+        self.compress_sealed = compress_sealed
+        self.fsync = fsync
+        self.cache_segments = cache_segments
+        self._lock = threading.RLock()
+        self._buffers: 'OrderedDict[int, SegmentBuffer]' = OrderedDict()
+        
+        os.makedirs(directory, exist_ok=True)
+        self._count = self._recover()
+    
+    def _recover(self) -> int:
+        """Count complete records and drop torn writes at the tail"""
+        segments = sorted(
+            int(name.split('.')[0]) for name in os.listdir(self.directory)
+            if name.endswith('.idx')
+        )
+        if not segments:
+            return 0
+        
+        for segment in segments:
+            log_path = _segment_path(self.directory, segment, ".log")
+            compressed = _segment_path(self.directory, segment, ".log.z")
+            if os.path.exists(compressed) and os.path.exists(log_path):
+                os.remove(log_path)  # Interrupted after the compressed copy was renamed in
+            if os.path.exists(compressed + ".tmp"):
+                os.remove(compressed + ".tmp")
+        
+        active = segments[-1]
+        offsets = _read_offsets(self.directory, active)
+        log_path = _segment_path(self.directory, active, ".log")
+        if os.path.exists(log_path):
+            size = os.path.getsize(log_path)
+            valid, end = len(offsets), 0
+            with open(log_path, 'rb') as f:
+                while valid:
+                    f.seek(offsets[valid - 1])
+                    header = f.read(RECORD_HEADER.size)
+                    if len(header) == RECORD_HEADER.size:
+                        record_end = offsets[valid - 1] + RECORD_HEADER.size + RECORD_HEADER.unpack(header)[0]
+                        if record_end <= size:
+                            end = record_end
+                            break
+                    valid -= 1
+            self._truncate_files(active, valid, end)
+            del offsets[valid:]
+            if valid == self.segment_events:
+                self._seal(active)  # Filled before a crash, never sealed
+        return active * self.segment_events + len(offsets)
+    
+    def count(self) -> int:
+        """Number of records in the log"""
+        return self._count
+    
+    def append(self, events: List[AuditEvent]) -> None:
+        """
+        Append chained events
+        
+        Events must carry consecutive sequence numbers continuing the chain.
+        Records at or after the first sequence are uncommitted leftovers and
+        are truncated first.
+        """
+        if not events:
+            return
+        
+        with self._lock:
+            first = events[0].sequence
+            if first is not None and first <= self._count:
+                self.truncate(first - 1)
+            if first != self._count + 1:
+                raise ValueError(f"Audit segment log expected sequence {self._count + 1}, got {first}")
+            
+            pending: Dict[int, List[AuditEvent]] = OrderedDict()
+            for event in events:
+                pending.setdefault((event.sequence - 1) // self.segment_events, []).append(event)
+            for segment, batch in pending.items():
+                self._write_records(segment, batch)
+    
+    def _write_records(self, segment: int, events: List[AuditEvent]) -> None:
+        log_path = _segment_path(self.directory, segment, ".log")
+        position = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+        
+        records = bytearray()
+        offsets = array('Q')
+        for event in events:
+            body = event.hash_payload()
+            offsets.append(position + len(records))
+            records += RECORD_HEADER.pack(len(body), event.current_hash.encode('ascii'))
+            records += body
+        
+        # Records first, then their offsets: an offset never points past the data
+        for path, data in ((log_path, records), (_segment_path(self.directory, segment, ".idx"), offsets.tobytes())):
+            with open(path, 'ab') as f:
+                f.write(data)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+        
+        self._count += len(events)
+        self._drop_buffer(segment)
+        if self._count == (segment + 1) * self.segment_events:
+            self._seal(segment)
+    
+    def _seal(self, segment: int) -> None:
+        """Compress a full segment"""
+        if not self.compress_sealed:
+            return
+        log_path = _segment_path(self.directory, segment, ".log")
+        compressed = _segment_path(self.directory, segment, ".log.z")
+        with open(log_path, 'rb') as f:
+            data = zlib.compress(f.read())
+        with open(compressed + ".tmp", 'wb') as f:
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(compressed + ".tmp", compressed)
+        os.remove(log_path)
+    
+    def truncate(self, count: int) -> None:
+        """
+        Drop records after the first count
+        
+        Only records in the active (unsealed) segment can be dropped.
+        """
+        with self._lock:
+            if count >= self._count:
+                return
+            segment, position = divmod(count, self.segment_events)
+            sealed = os.path.exists(_segment_path(self.directory, segment, ".log.z"))
+            if sealed or count < (self._count - 1) // self.segment_events * self.segment_events:
+                raise ValueError(f"Cannot truncate sealed audit segment {segment}")
+            
+            offsets = _read_offsets(self.directory, segment)
+            end = offsets[position] if position < len(offsets) else 0
+            self._truncate_files(segment, position, end)
+            self._count = count
+    
+    def _truncate_files(self, segment: int, records: int, end: int) -> None:
+        self._drop_buffer(segment)
+        for path, size in (
+            (_segment_path(self.directory, segment, ".log"), end),
+            (_segment_path(self.directory, segment, ".idx"), records * OFFSET_ENTRY.size)
+        ):
+            if os.path.exists(path) and os.path.getsize(path) != size:
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+    
+    def _buffer(self, segment: int) -> Optional[SegmentBuffer]:
+        """Mapped segment from the read cache"""
+        buffer = self._buffers.get(segment)
+        if buffer is not None:
+            self._buffers.move_to_end(segment)
+            return buffer
+        
+        buffer = _open_segment(self.directory, segment)
+        if buffer is not None:
+            self._buffers[segment] = buffer
+            while len(self._buffers) > self.cache_segments:
+                _, evicted = self._buffers.popitem(last=False)
+                _close_buffer(evicted)
+        return buffer
+    
+    def _drop_buffer(self, segment: int) -> None:
+        _close_buffer(self._buffers.pop(segment, None))
+    
+    def _locate(self, sequence: int) -> Optional[Tuple[SegmentBuffer, int]]:
+        """Buffer and offset of the record for a sequence"""
+        if not 1 <= sequence <= self._count:
+            return None
+        segment, position = divmod(sequence - 1, self.segment_events)
+        with open(_segment_path(self.directory, segment, ".idx"), 'rb') as f:
+            f.seek(position * OFFSET_ENTRY.size)
+            entry = f.read(OFFSET_ENTRY.size)
+        if len(entry) < OFFSET_ENTRY.size:
+            return None
+        buffer = self._buffer(segment)
+        return (buffer, OFFSET_ENTRY.unpack(entry)[0]) if buffer is not None else None
+    
+    def read(self, sequence: int) -> Optional[Dict[str, Any]]:
+        """Event dictionary at a sequence number"""
+        with self._lock:
+            located = self._locate(sequence)
+            return _decode_record(*located) if located else None
+    
+    def stored_hash(self, sequence: int) -> Optional[str]:
+        """Stored hash at a sequence number, read from the record header"""
+        with self._lock:
+            located = self._locate(sequence)
+            if not located:
+                return None
+            return RECORD_HEADER.unpack_from(*located)[1].decode('ascii')
+    
+    def iter_events(self, first: int = 1) -> Iterator[Dict[str, Any]]:
+        """Event dictionaries in sequence order from first"""
+        sequence = max(first, 1)
+        while sequence <= self._count:
+            segment, position = divmod(sequence - 1, self.segment_events)
+            with self._lock:
+                offsets = _read_offsets(self.directory, segment)[position:position + 1000]
+                buffer = self._buffer(segment)
+                records = [_decode_record(buffer, offset) for offset in offsets] if buffer else []
+            if not records:
+                return
+            yield from records
+            sequence += len(records)
+    
+    def find(self, event_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Find an event by id
+        
+        Scans segment bytes for the id field, newest segment first; meant
+        for occasional lookups, since the log is keyed by sequence.
+        """
+        needle = b'"id":"' + event_id.encode('utf-8') + b'"'
+        last_segment = (self._count - 1) // self.segment_events
+        for segment in range(last_segment, -1, -1):
+            with self._lock:
+                buffer = self._buffer(segment)
+                if buffer is None:
+                    continue
+                offsets = _read_offsets(self.directory, segment)
+                position = buffer.find(needle)
+                while position >= 0:
+                    # Record containing the match; the id may also appear in metadata
+                    index = max(0, bisect.bisect_right(offsets, position) - 1)
+                    data = _decode_record(buffer, offsets[index])
+                    if data['id'] == event_id:
+                        return data
+                    position = buffer.find(needle, position + 1)
+        return None
+    
+    def segment_payload(self, segment: int, previous_hash: str, total: int) -> Dict[str, Any]:
+        """Work item for verify_segment_file, covering sequences up to total"""
+        first = segment * self.segment_events + 1
+        return {
+            'directory': self.directory,
+            'segment': segment,
+            'first_sequence': first,
+            'event_count': min(total, first + self.segment_events - 1) - first + 1,
+            'previous_hash': previous_hash
+        }
+    
+    def close(self) -> None:
+        """Release mapped segments"""
+        with self._lock:
+            while self._buffers:
+                _close_buffer(self._buffers.popitem()[1])
+
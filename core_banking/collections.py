@@ -10,14 +10,18 @@ from datetime import datetime, timezone, date, timedelta
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 from enum import Enum
+import bisect
 import uuid
 
 from .currency import Money, Currency
-from .storage import StorageInterface, StorageRecord
+from .storage import StorageInterface, StorageRecord, INDEX_KEY_SEPARATOR
 from .audit import AuditTrail, AuditEventType
 from .loans import LoanManager, Loan, LoanState
 from .credit import CreditLineManager
-from .accounts import AccountManager
+from .accounts import AccountManager, AccountState
+from .delinquency import (
+    CREDIT_LINE_OBLIGATION, LOAN_OBLIGATION, TRACKED_LOAN_STATES, DelinquencyIndex
+)
 
 
 class DelinquencyStatus(Enum):
@@ -172,6 +176,70 @@ class CollectionStrategy(StorageRecord):
             self.auto_write_off_days = 365
 
 
+def _prefix_end(prefix: str) -> str:
+    """Exclusive upper bound for keys starting with a separator-terminated prefix"""
+    return prefix[:-1] + chr(ord(INDEX_KEY_SEPARATOR) + 1)
+
+
+def _priority_rank(priority: int) -> str:
+    """Key component that sorts priority 5 first"""
+    return str(5 - int(priority))
+
+
+def _work_queue_key(case_data: Dict) -> str:
+    """Open-case queue key: status, priority (highest first), next action date, collector"""
+    return INDEX_KEY_SEPARATOR.join((
+        case_data["status"],
+        _priority_rank(case_data["priority"]),
+        case_data.get("next_action_date") or "",
+        case_data.get("assigned_collector") or "",
+        case_data["id"]
+    ))
+
+
+def _collector_queue_key(case_data: Dict) -> str:
+    """Per-collector queue key; unassigned cases sit under the empty collector"""
+    return INDEX_KEY_SEPARATOR.join((
+        case_data.get("assigned_collector") or "",
+        _priority_rank(case_data["priority"]),
+        case_data.get("next_action_date") or "",
+        case_data["id"]
+    ))
+
+
+def _resolved_key(case_data: Dict) -> str:
+    return INDEX_KEY_SEPARATOR.join((case_data["resolved_at"][:10], case_data["id"]))
+
+
+def _stats_key(case_data: Dict) -> str:
+    assigned = "1" if case_data.get("assigned_collector") else "0"
+    return INDEX_KEY_SEPARATOR.join((case_data["status"], str(case_data["priority"]), assigned))
+
+
+def _last_action_key(case_id: str, action_type: str) -> str:
+    return INDEX_KEY_SEPARATOR.join((case_id, action_type))
+
+
+def _escalation_table(strategy: CollectionStrategy) -> Tuple[List[int], List[List[CollectionAction]]]:
+    """
+    Precompute which automatic actions apply at each days-past-due threshold
+    
+    Returns sorted thresholds and, for each, every auto-executed action
+    whose threshold is at or below it, so a case's actions are one bisect.
+    """
+    thresholds: List[int] = []
+    actions: List[List[CollectionAction]] = []
+    for days, action, auto_execute in sorted(strategy.escalation_rules, key=lambda rule: rule[0]):
+        if not auto_execute:
+            continue
+        if thresholds and thresholds[-1] == days:
+            actions[-1].append(action)
+        else:
+            thresholds.append(days)
+            actions.append((actions[-1] if actions else []) + [action])
+    return thresholds, actions
+
+
 class CollectionsManager:
     """Manager for collection cases and activities"""
     
@@ -192,6 +260,22 @@ class CollectionsManager:
         self.promises_table = "payment_promises"
         self.strategies_table = "collection_strategies"
         
+        # Case indexes kept by _save_case(): open cases ordered for work
+        # (by status and per collector), resolved cases by resolution date,
+        # open-case counters for the summary, and the last time each
+        # action was taken on a case
+        self.work_queue_table = "collection_work_queue"
+        self.collector_queue_table = "collection_collector_queue"
+        self.resolved_index_table = "collection_resolved_index"
+        self.case_stats_table = "collection_case_stats"
+        self.last_actions_table = "collection_last_actions"
+        self.case_index_state_table = "collection_case_index_state"
+        
+        # Due-date queue of obligations to review; loan and credit managers keep it current
+        self.delinquency_index = DelinquencyIndex(storage)
+        self.scan_batch_size = 500
+        self.max_claim_attempts = 10  # dequeue_case() retries after losing a claim race
+        
         # Initialize default strategy
         self._initialize_default_strategy()
     
@@ -210,7 +294,14 @@ class CollectionsManager:
             self.storage.save(self.strategies_table, "default", strategy_dict)
     
     def scan_delinquencies(self) -> Dict[str, int]:
-        """Scan all loans and credit lines for delinquencies, create/update cases"""
+        """
+        Review loans and credit lines queued in the delinquency index, create/update cases
+        
+        Only obligations whose review date has arrived are read: loans saved
+        with days past due, and credit lines whose statement fell due or
+        changed. The first scan seeds the index from every tracked loan and
+        credit line (see rebuild_delinquency_index()).
+        """
         results = {
             "cases_created": 0,
             "cases_updated": 0, 
@@ -219,66 +310,54 @@ class CollectionsManager:
         
         today = date.today()
         
-        # Scan loans if loan manager available
-        if self.loan_manager:
-            # Get all active loans
-            all_loans_data = self.storage.find(
-                self.loan_manager.loans_table,
-                {"state": LoanState.ACTIVE.value}
-            ) + self.storage.find(
-                self.loan_manager.loans_table, 
-                {"state": LoanState.DISBURSED.value}
-            )
+        if not self.delinquency_index.is_built():
+            self.rebuild_delinquency_index(today)
+        
+        after = None
+        while True:
+            entries = self.delinquency_index.due(today, after=after, limit=self.scan_batch_size)
+            if not entries:
+                break
             
-            for loan_data in all_loans_data:
-                loan = self.loan_manager._loan_from_dict(loan_data)
-                
-                # Calculate days past due
-                days_past_due = self._calculate_days_past_due_loan(loan, today)
-                
-                if days_past_due > 0:
-                    # Check if case already exists
-                    existing_case = self._get_case_by_loan_id(loan.id)
-                    
-                    if existing_case:
-                        # Update existing case
-                        self._update_case_for_loan(existing_case, loan, days_past_due)
-                        results["cases_updated"] += 1
-                    else:
-                        # Create new case
-                        new_case = self._create_case_for_loan(loan, days_past_due)
-                        results["cases_created"] += 1
-                    
-                    results["total_amount_overdue"] += self._calculate_overdue_amount_loan(loan)
+            for entry in entries:
+                after = entry["id"]
+                if entry["obligation_type"] == LOAN_OBLIGATION and self.loan_manager:
+                    self._review_loan(entry["obligation_id"], today, results)
+                elif entry["obligation_type"] == CREDIT_LINE_OBLIGATION and self.credit_manager:
+                    self._review_credit_line(entry["obligation_id"], today, results)
+        
+        return results
+    
+    def rebuild_delinquency_index(self, today: Optional[date] = None) -> int:
+        """
+        Queue every tracked loan and credit line for review today
+        
+        Used once for books that predate the index, or to recover it. The
+        next scan_delinquencies() reviews everything and re-queues each
+        obligation for its own next review date.
+        
+        Returns:
+            Number of obligations queued
+        """
+        today = today or date.today()
+        queued = 0
+        
+        self.delinquency_index.clear()
+        
+        if self.loan_manager:
+            for state in TRACKED_LOAN_STATES:
+                for loan_data in self.storage.find(self.loan_manager.loans_table, {"state": state}):
+                    self.delinquency_index.schedule(LOAN_OBLIGATION, loan_data["id"], today)
+                    queued += 1
         
-        # Scan credit lines if credit manager available
         if self.credit_manager:
-            # Get all credit line accounts from account manager
             from .accounts import ProductType
-            all_accounts_data = self.storage.find(
-                "accounts",
-                {"product_type": ProductType.CREDIT_LINE.value}
-            )
-            
-            for account_data in all_accounts_data:
-                account = self.account_manager._account_from_dict(account_data)
-                
-                if account.is_active:
-                    days_past_due = self._calculate_days_past_due_credit_account(account, today)
-                    
-                    if days_past_due > 0:
-                        existing_case = self._get_case_by_credit_line_id(account.id)
-                        
-                        if existing_case:
-                            self._update_case_for_credit_account(existing_case, account, days_past_due)
-                            results["cases_updated"] += 1
-                        else:
-                            new_case = self._create_case_for_credit_account(account, days_past_due)
-                            results["cases_created"] += 1
-                        
-                        results["total_amount_overdue"] += self._calculate_overdue_amount_credit_account(account)
+            for account_data in self.storage.find("accounts", {"product_type": ProductType.CREDIT_LINE.value}):
+                self.delinquency_index.schedule(CREDIT_LINE_OBLIGATION, account_data["id"], today)
+                queued += 1
         
-        return results
+        self.delinquency_index.mark_built()
+        return queued
     
     def get_case(self, case_id: str) -> Optional[CollectionCase]:
         """Get collection case by ID"""
@@ -291,26 +370,101 @@ class CollectionsManager:
         self,
         status: Optional[DelinquencyStatus] = None,
         priority: Optional[int] = None,
-        collector: Optional[str] = None
+        collector: Optional[str] = None,
+        include_resolved: bool = False
     ) -> List[CollectionCase]:
-        """Get collection cases with optional filters"""
-        filters = {}
+        """
+        Get collection cases with optional filters
+        
+        Open cases are read from the work queue (by collector when one is
+        given, otherwise by status); resolved cases are only included on
+        request.
+        """
+        self._ensure_case_index()
+        rank = _priority_rank(priority) if priority else None
         
-        if status:
-            filters["status"] = status.value
-        if priority:
-            filters["priority"] = priority  
         if collector:
-            filters["assigned_collector"] = collector
+            parts = (collector, rank) if rank else (collector,)
+            rows = self._scan_prefix(self.collector_queue_table, INDEX_KEY_SEPARATOR.join(parts) + INDEX_KEY_SEPARATOR)
+        else:
+            statuses = [status] if status else list(DelinquencyStatus)
+            rows = []
+            for queue_status in statuses:
+                parts = (queue_status.value, rank) if rank else (queue_status.value,)
+                rows.extend(self._scan_prefix(self.work_queue_table, INDEX_KEY_SEPARATOR.join(parts) + INDEX_KEY_SEPARATOR))
+        
+        rows = [
+            row for row in rows
+            if (not status or row["status"] == status.value) and (not priority or row["priority"] == priority)
+        ]
+        cases = [case for case in (self.get_case(row["case_id"]) for row in rows) if case]
         
-        cases_data = self.storage.find(self.cases_table, filters)
-        cases = [self._case_from_dict(data) for data in cases_data]
+        if include_resolved:
+            for row in self.storage.scan_range(self.resolved_index_table):
+                case = self.get_case(row["case_id"])
+                if (case and (not status or case.status == status) and (not priority or case.priority == priority)
+                        and (not collector or case.assigned_collector == collector)):
+                    cases.append(case)
         
         # Sort by priority (highest first), then by days past due
         cases.sort(key=lambda x: (-x.priority, -x.days_past_due))
         
         return cases
     
+    def dequeue_case(self, collector_id: str, as_of: Optional[date] = None) -> Optional[CollectionCase]:
+        """
+        Next case a collector should work on
+        
+        Picks the highest-priority case due for action (no next action date,
+        or one on or before as_of), preferring the collector's own cases
+        over unassigned ones of the same priority; an unassigned case is
+        assigned to the collector. Each lookup is a single ordered range
+        read, so the cost does not grow with the number of open cases.
+        Recording an action with a follow-up date moves the case back in
+        the queue.
+        
+        Claiming an unassigned case re-checks it inside a storage
+        transaction, so two collectors never get the same case; the one
+        that loses the race looks again.
+        """
+        self._ensure_case_index()
+        cutoff = (as_of or date.today()).isoformat()
+        
+        for _ in range(self.max_claim_attempts):
+            row = self._next_queued(collector_id, cutoff)
+            if row is None:
+                return None
+            if row["assigned_collector"]:
+                return self.get_case(row["case_id"])
+            case = self._claim_case(row["case_id"], collector_id)
+            if case:
+                return case
+        
+        return None
+    
+    def _next_queued(self, collector_id: str, cutoff: str) -> Optional[Dict]:
+        """First due queue row of the collector's or unassigned cases, by priority"""
+        for rank in range(5):
+            for owner in (collector_id, ""):
+                prefix = INDEX_KEY_SEPARATOR.join((owner, str(rank), ""))
+                rows = self.storage.scan_range(
+                    self.collector_queue_table, prefix, prefix + cutoff + chr(ord(INDEX_KEY_SEPARATOR) + 1), limit=1
+                )
+                if rows:
+                    return rows[0]
+        return None
+    
+    def _claim_case(self, case_id: str, collector_id: str) -> Optional[CollectionCase]:
+        """Assign an unassigned case, or None if another collector claimed it first"""
+        with self.storage.atomic():
+            case = self.get_case(case_id)
+            if not case or case.assigned_collector:
+                return None
+            case.assigned_collector = collector_id
+            case.updated_at = datetime.now(timezone.utc)
+            self._save_case(case)
+        return case
+    
     def get_cases_by_customer(self, customer_id: str) -> List[CollectionCase]:
         """Get all collection cases for a customer"""
         cases_data = self.storage.find(self.cases_table, {"customer_id": customer_id})
@@ -360,7 +514,15 @@ class CollectionsManager:
         
         # Save action record
         action_dict = self._action_to_dict(action)
-        self.storage.save(self.actions_table, action_id, action_dict)
+        last_action_key = _last_action_key(case_id, action_type.value)
+        with self.storage.atomic():
+            self.storage.save(self.actions_table, action_id, action_dict)
+            self.storage.save(self.last_actions_table, last_action_key, {
+                "id": last_action_key,
+                "case_id": case_id,
+                "action_type": action_type.value,
+                "performed_at": now.isoformat()
+            })
         
         # Update case with next action date
         if next_follow_up:
@@ -442,12 +604,6 @@ class CollectionsManager:
             "unassigned_cases": 0
         }
         
-        # Get all unresolved cases
-        all_cases_data = self.storage.load_all(self.cases_table)
-        cases = [self._case_from_dict(data) for data in all_cases_data if not data.get('resolved_at')]
-        
-        summary["total_cases"] = len(cases)
-        
         # Initialize counters
         for status in DelinquencyStatus:
             summary["cases_by_status"][status.value] = 0
@@ -455,22 +611,18 @@ class CollectionsManager:
         for priority in range(1, 6):
             summary["cases_by_priority"][priority] = 0
         
-        # Count cases
-        for case in cases:
-            # Count by status
-            summary["cases_by_status"][case.status.value] += 1
-            
-            # Count by priority
-            summary["cases_by_priority"][case.priority] += 1
-            
-            # Sum overdue amounts
-            summary["total_overdue_amount"] += case.amount_overdue.amount
+        # Unresolved cases are pre-counted by status, priority and assignment
+        self._ensure_case_index()
+        for row in self.storage.load_all(self.case_stats_table):
+            summary["total_cases"] += row["cases"]
+            summary["cases_by_status"][row["status"]] += row["cases"]
+            summary["cases_by_priority"][row["priority"]] += row["cases"]
+            summary["total_overdue_amount"] += Decimal(row["amount_overdue"])
             
-            # Count assignment
-            if case.assigned_collector:
-                summary["assigned_cases"] += 1
+            if row["assigned"]:
+                summary["assigned_cases"] += row["cases"]
             else:
-                summary["unassigned_cases"] += 1
+                summary["unassigned_cases"] += row["cases"]
         
         return summary
     
@@ -496,28 +648,40 @@ class CollectionsManager:
         raise ValueError("Default collection strategy not found")
     
     def run_auto_actions(self) -> Dict[str, int]:
-        """Execute automatic collection actions based on strategy"""
+        """
+        Execute automatic collection actions based on strategy
+        
+        Pages through the open-case work queue; the strategy's escalation
+        rules are turned into a threshold table once per run.
+        """
         results = {"actions_executed": 0, "cases_processed": 0}
         
-        today = date.today()
+        self._ensure_case_index()
         
-        # Get all unresolved cases
-        cases = self.get_cases()
+        # Get strategy (use product-specific if available)
+        strategy = self.get_strategy()
+        thresholds, actions_due = _escalation_table(strategy)
         
-        for case in cases:
-            if case.is_resolved:
-                continue
+        after = None
+        while True:
+            start = after + "\x00" if after is not None else None
+            rows = self.storage.scan_range(self.work_queue_table, start, None, limit=self.scan_batch_size)
+            if not rows:
+                break
             
-            results["cases_processed"] += 1
+            for row in rows:
+                after = row["id"]
+                case = self.get_case(row["case_id"])
+                if not case or case.is_resolved:
+                    continue
             
-            # Get strategy (use product-specific if available)
-            strategy = self.get_strategy()
+                results["cases_processed"] += 1
             
-            # Check escalation rules
-            for days_threshold, action, auto_execute in strategy.escalation_rules:
-                if (case.days_past_due >= days_threshold and 
-                    auto_execute and 
-                    not self._action_recently_taken(case, action)):
+                # Check escalation rules
+                level = bisect.bisect_right(thresholds, case.days_past_due)
+                for action in (actions_due[level - 1] if level else []):
+                    if self._action_recently_taken(case, action):
+                        continue
                     
                     # Execute automatic action
                     self.record_action(
@@ -530,14 +694,14 @@ class CollectionsManager:
                     
                     results["actions_executed"] += 1
             
-            # Check for auto write-off
-            if (strategy.auto_write_off_days and 
-                case.days_past_due >= strategy.auto_write_off_days and
-                case.status != DelinquencyStatus.WRITTEN_OFF):
+                # Check for auto write-off
+                if (strategy.auto_write_off_days and 
+                    case.days_past_due >= strategy.auto_write_off_days and
+                    case.status != DelinquencyStatus.WRITTEN_OFF):
                 
-                # Auto write-off
-                self.resolve_case(case.id, CaseResolution.WRITTEN_OFF)
-                results["actions_executed"] += 1
+                    # Auto write-off
+                    self.resolve_case(case.id, CaseResolution.WRITTEN_OFF)
+                    results["actions_executed"] += 1
         
         return results
     
@@ -571,21 +735,11 @@ class CollectionsManager:
         period_end: Optional[date] = None
     ) -> Dict[str, Decimal]:
         """Calculate recovery rate for resolved cases"""
-        # Filter resolved cases by date range
-        all_cases_data = self.storage.load_all(self.cases_table)
-        resolved_cases = []
-        
-        for case_data in all_cases_data:
-            case = self._case_from_dict(case_data)
-            if not case.is_resolved:
-                continue
-            
-            if period_start and case.resolved_at.date() < period_start:
-                continue
-            if period_end and case.resolved_at.date() > period_end:
-                continue
-            
-            resolved_cases.append(case)
+        # Resolved cases are indexed by resolution date
+        self._ensure_case_index()
+        start = period_start.isoformat() if period_start else None
+        end = period_end.isoformat() + chr(ord(INDEX_KEY_SEPARATOR) + 1) if period_end else None
+        resolved_cases = self.storage.scan_range(self.resolved_index_table, start, end)
         
         if not resolved_cases:
             return {
@@ -605,16 +759,17 @@ class CollectionsManager:
         cases_written_off = 0
         
         for case in resolved_cases:
-            total_overdue += case.amount_overdue.amount
+            amount_overdue = Decimal(case["amount_overdue"])
+            total_overdue += amount_overdue
             
-            if case.resolution == CaseResolution.PAID:
-                recovered_amount += case.amount_overdue.amount
+            if case["resolution"] == CaseResolution.PAID.value:
+                recovered_amount += amount_overdue
                 cases_paid += 1
-            elif case.resolution == CaseResolution.RESTRUCTURED:
+            elif case["resolution"] == CaseResolution.RESTRUCTURED.value:
                 # Assume partial recovery for restructured cases (50%)
-                recovered_amount += case.amount_overdue.amount * Decimal('0.5')
+                recovered_amount += amount_overdue * Decimal('0.5')
                 cases_restructured += 1
-            elif case.resolution == CaseResolution.WRITTEN_OFF:
+            elif case["resolution"] == CaseResolution.WRITTEN_OFF.value:
                 cases_written_off += 1
                 # No recovery for written-off cases
         
@@ -632,8 +787,119 @@ class CollectionsManager:
             "cases_written_off": cases_written_off
         }
     
+    def rebuild_case_index(self) -> int:
+        """
+        Rebuild the work queues, resolved-case index, summary counters and
+        last-action index from the stored cases and actions
+        
+        Only needed for cases saved before the indexes existed, or to
+        recover them; the first indexed read runs it automatically.
+        
+        Returns:
+            Number of cases indexed
+        """
+        indexed = 0
+        stats: Dict[str, Dict] = {}
+        last_actions: Dict[str, Dict] = {}
+        
+        with self.storage.atomic():
+            for table in (self.work_queue_table, self.collector_queue_table, self.resolved_index_table,
+                          self.case_stats_table, self.last_actions_table):
+                self.storage.clear_table(table)
+            
+            for batch in self.storage.iter_batches(self.cases_table):
+                queue_rows, collector_rows, resolved_rows = {}, {}, {}
+                for case_data in batch:
+                    for table, row in self._case_index_rows(case_data):
+                        if table == self.work_queue_table:
+                            queue_rows[row["id"]] = row
+                        elif table == self.collector_queue_table:
+                            collector_rows[row["id"]] = row
+                        else:
+                            resolved_rows[row["id"]] = row
+                    if not case_data.get("resolved_at"):
+                        self._count_case(stats.setdefault(_stats_key(case_data), self._new_stats_row(case_data)), case_data, 1)
+                    indexed += 1
+                
+                self.storage.save_many(self.work_queue_table, queue_rows)
+                self.storage.save_many(self.collector_queue_table, collector_rows)
+                self.storage.save_many(self.resolved_index_table, resolved_rows)
+            
+            self.storage.save_many(self.case_stats_table, stats)
+            
+            for batch in self.storage.iter_batches(self.actions_table):
+                for action_data in batch:
+                    key = _last_action_key(action_data["case_id"], action_data["action_type"])
+                    current = last_actions.get(key)
+                    if not current or action_data["performed_at"] > current["performed_at"]:
+                        last_actions[key] = {
+                            "id": key,
+                            "case_id": action_data["case_id"],
+                            "action_type": action_data["action_type"],
+                            "performed_at": action_data["performed_at"]
+                        }
+            self.storage.save_many(self.last_actions_table, last_actions)
+            
+            self.storage.save(self.case_index_state_table, "state", {
+                "id": "state",
+                "rebuilt_at": datetime.now(timezone.utc).isoformat()
+            })
+        return indexed
+    
     # Private helper methods
     
+    def _review_loan(self, loan_id: str, today: date, results: Dict) -> None:
+        """Create or update the case of a queued loan; it stays unqueued until saved again"""
+        loan_data = self.storage.load(self.loan_manager.loans_table, loan_id)
+        self.delinquency_index.unschedule(LOAN_OBLIGATION, loan_id)
+        if not loan_data or loan_data.get("state") not in TRACKED_LOAN_STATES:
+            return
+        
+        loan = self.loan_manager._loan_from_dict(loan_data)
+        days_past_due = self._calculate_days_past_due_loan(loan, today)
+        if days_past_due <= 0:
+            return
+        
+        existing_case = self._get_case_by_loan_id(loan.id)
+        if existing_case:
+            self._update_case_for_loan(existing_case, loan, days_past_due)
+            results["cases_updated"] += 1
+        else:
+            self._create_case_for_loan(loan, days_past_due)
+            results["cases_created"] += 1
+        
+        results["total_amount_overdue"] += self._calculate_overdue_amount_loan(loan)
+    
+    def _review_credit_line(self, account_id: str, today: date, results: Dict) -> None:
+        """Create or update the case of a queued credit line and queue its next review"""
+        account = self.account_manager.get_account(account_id)
+        if not account or account.state != AccountState.ACTIVE:
+            self.delinquency_index.unschedule(CREDIT_LINE_OBLIGATION, account_id)
+            return
+        
+        days_past_due = self._calculate_days_past_due_credit_account(account, today)
+        if days_past_due > 0:
+            existing_case = self._get_case_by_credit_line_id(account.id)
+            if existing_case:
+                self._update_case_for_credit_account(existing_case, account, days_past_due)
+                results["cases_updated"] += 1
+            else:
+                self._create_case_for_credit_account(account, days_past_due)
+                results["cases_created"] += 1
+            
+            results["total_amount_overdue"] += self._calculate_overdue_amount_credit_account(account)
+            # Days past due grow daily while the statement stays unpaid
+            self.delinquency_index.schedule(CREDIT_LINE_OBLIGATION, account_id, today + timedelta(days=1))
+            return
+        
+        review_date = self.delinquency_index.statement_review_date(
+            self.credit_manager.get_current_statement(account_id), today
+        )
+        if review_date:
+            self.delinquency_index.schedule(CREDIT_LINE_OBLIGATION, account_id, review_date)
+        else:
+            self.delinquency_index.unschedule(CREDIT_LINE_OBLIGATION, account_id)
+    
     def _get_case_by_loan_id(self, loan_id: str) -> Optional[CollectionCase]:
         """Get collection case by loan ID"""
         cases_data = self.storage.find(self.cases_table, {"loan_id": loan_id})
@@ -786,7 +1052,7 @@ class CollectionsManager:
             current_statement = self.credit_manager.get_current_statement(account.id)
         
         if current_statement and current_statement.due_date:
-            if as_of_date > current_statement.due_date and current_statement.remaining_balance().is_positive():
+            if as_of_date > current_statement.due_date and current_statement.remaining_balance.is_positive():
                 return (as_of_date - current_statement.due_date).days
         
         return 0
@@ -808,7 +1074,7 @@ class CollectionsManager:
         # Get current statement to determine minimum payment due
         if self.credit_manager:
             current_statement = self.credit_manager.get_current_statement(account.id)
-            if current_statement and current_statement.is_overdue():
+            if current_statement and current_statement.is_overdue:
                 return current_statement.minimum_payment_due.amount
         
         # Fallback - assume 5% minimum payment on outstanding balance
@@ -856,23 +1122,82 @@ class CollectionsManager:
         """Check if action was recently taken (within last 7 days)"""
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=7)
         
-        # Check recent actions for this case
-        actions_data = self.storage.find(
-            self.actions_table,
-            {"case_id": case.id, "action_type": action.value}
-        )
-        
-        for action_data in actions_data:
-            action_record = self._action_from_dict(action_data)
-            if action_record.performed_at > cutoff_date:
-                return True
-        
-        return False
+        # Last time this action was taken on the case
+        last_action = self.storage.load(self.last_actions_table, _last_action_key(case.id, action.value))
+        return bool(last_action) and datetime.fromisoformat(last_action["performed_at"]) > cutoff_date
     
     def _save_case(self, case: CollectionCase) -> None:
-        """Save case to storage"""
+        """Save case to storage, moving its work queue, resolved index and counter entries"""
         case_dict = self._case_to_dict(case)
-        self.storage.save(self.cases_table, case.id, case_dict)
+        
+        with self.storage.atomic():
+            previous = self.storage.load(self.cases_table, case.id)
+            self.storage.save(self.cases_table, case.id, case_dict)
+            
+            if previous:
+                for table, row in self._case_index_rows(previous):
+                    self.storage.delete(table, row["id"])
+                self._update_case_stats(previous, -1)
+            for table, row in self._case_index_rows(case_dict):
+                self.storage.save(table, row["id"], row)
+            self._update_case_stats(case_dict, 1)
+    
+    def _case_index_rows(self, case_data: Dict) -> List[Tuple[str, Dict]]:
+        """Index tables and rows for a stored case"""
+        if case_data.get("resolved_at"):
+            return [(self.resolved_index_table, {
+                "id": _resolved_key(case_data),
+                "case_id": case_data["id"],
+                "resolution": case_data.get("resolution"),
+                "amount_overdue": case_data["amount_overdue"]
+            })]
+        
+        row = {
+            "case_id": case_data["id"],
+            "status": case_data["status"],
+            "priority": case_data["priority"],
+            "next_action_date": case_data.get("next_action_date"),
+            "assigned_collector": case_data.get("assigned_collector")
+        }
+        return [
+            (self.work_queue_table, dict(row, id=_work_queue_key(case_data))),
+            (self.collector_queue_table, dict(row, id=_collector_queue_key(case_data)))
+        ]
+    
+    def _new_stats_row(self, case_data: Dict) -> Dict:
+        return {
+            "id": _stats_key(case_data),
+            "status": case_data["status"],
+            "priority": case_data["priority"],
+            "assigned": bool(case_data.get("assigned_collector")),
+            "cases": 0,
+            "amount_overdue": "0"
+        }
+    
+    @staticmethod
+    def _count_case(row: Dict, case_data: Dict, sign: int) -> None:
+        row["cases"] += sign
+        row["amount_overdue"] = str(Decimal(row["amount_overdue"]) + sign * Decimal(case_data["amount_overdue"]))
+    
+    def _update_case_stats(self, case_data: Dict, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) an open case from the summary counters"""
+        if case_data.get("resolved_at"):
+            return
+        
+        key = _stats_key(case_data)
+        row = self.storage.load(self.case_stats_table, key) or self._new_stats_row(case_data)
+        self._count_case(row, case_data, sign)
+        if row["cases"] > 0:
+            self.storage.save(self.case_stats_table, key, row)
+        else:
+            self.storage.delete(self.case_stats_table, key)
+    
+    def _ensure_case_index(self) -> None:
+        if not self.storage.exists(self.case_index_state_table, "state"):
+            self.rebuild_case_index()
+    
+    def _scan_prefix(self, table: str, prefix: str) -> List[Dict]:
+        return self.storage.scan_range(table, prefix, _prefix_end(prefix))
     
     # Serialization methods
     
@@ -8,14 +8,16 @@ account freezes, holds, and suspicious activity detection.
 from decimal import Decimal
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from enum import Enum
 import uuid
 
 from .currency import Money, Currency
 from .storage import StorageInterface, StorageRecord
 from .audit import AuditTrail, AuditEventType
-from .customers import Customer, CustomerManager, KYCTier
+from .customers import Customer, CustomerManager, KYCTier, KYCLimits
+from .velocity import VelocityCounterStore
+from .outbox import TransactionalOutbox, OutboxWorker
 
 
 class ComplianceRuleType(Enum):
@@ -49,6 +51,12 @@ class ComplianceAction(Enum):
     FREEZE_ACCOUNT = "freeze_account"  # Freeze account
 
 
+# Outbox entry kinds for deferred compliance filings
+OUTBOX_LARGE_TRANSACTION_REPORT = "compliance.large_transaction_report"
+OUTBOX_SUSPICIOUS_ACTIVITY_ALERT = "compliance.suspicious_activity_alert"
+OUTBOX_VIOLATION = "compliance.violation"
+
+
 @dataclass
 class ComplianceRule:
     """Compliance rule definition"""
@@ -105,6 +113,52 @@ class LargeTransactionReport(StorageRecord):
     filing_reference: Optional[str] = None
 
 
+class CompiledRuleSet:
+    """
+    Active compliance rules grouped into (rule_type, currency) lookup tables
+    
+    Built once from ComplianceEngine.rules so per-transaction checks do a
+    dict lookup instead of walking every rule. ``version`` records the
+    engine's rules version it was compiled from.
+    """
+    
+    def __init__(self, rules: List[ComplianceRule], version: int = 0):
+        self.version = version
+        self._rules: Dict[Tuple[ComplianceRuleType, Currency], List[ComplianceRule]] = {}
+        
+        for rule in rules:
+            if rule.is_active:
+                key = (rule.rule_type, rule.threshold.currency)
+                self._rules.setdefault(key, []).append(rule)
+        
+        for matching in self._rules.values():
+            matching.sort(key=lambda r: r.threshold.amount)
+        
+        # Lowest threshold per key is all the threshold checks need
+        self._min_thresholds: Dict[Tuple[ComplianceRuleType, Currency], Money] = {
+            key: matching[0].threshold for key, matching in self._rules.items()
+        }
+    
+    def rules_for(self, rule_type: ComplianceRuleType, currency: Currency) -> List[ComplianceRule]:
+        """Get active rules of a type for a currency, lowest threshold first"""
+        return self._rules.get((rule_type, currency), [])
+    
+    def min_threshold(self, rule_type: ComplianceRuleType, currency: Currency) -> Optional[Money]:
+        """Get the lowest active threshold of a type for a currency"""
+        return self._min_thresholds.get((rule_type, currency))
+
+
+@dataclass
+class ComplianceContext:
+    """Data loaded once per compliance evaluation and shared by every check"""
+    customer_id: str
+    account_id: str
+    amount: Money
+    transaction_type: str
+    customer: Optional[Customer] = None
+    kyc_limits: Optional[KYCLimits] = None
+
+
 class ComplianceEngine:
     """
     Compliance engine for transaction limits, monitoring, and suspicious activity detection
@@ -114,16 +168,34 @@ class ComplianceEngine:
         self,
         storage: StorageInterface,
         customer_manager: CustomerManager,
-        audit_trail: AuditTrail
+        audit_trail: AuditTrail,
+        outbox: Optional[TransactionalOutbox] = None
     ):
+        """
+        Args:
+            storage: Storage backend
+            customer_manager: Customer lookups and KYC limits
+            audit_trail: Audit trail for compliance events
+            outbox: When set, reports, alerts and violations (with their audit
+                events) are queued here and written by an OutboxWorker instead
+                of inside the caller's transaction
+        """
         self.storage = storage
         self.customer_manager = customer_manager
         self.audit_trail = audit_trail
+        self.outbox = outbox
         self.violations_table = "compliance_violations"
         self.alerts_table = "suspicious_activity_alerts"
         self.reports_table = "large_transaction_reports"
         
+        # Sliding-window counters of posted transactions (velocity, daily/monthly limits)
+        self.velocity_counters = VelocityCounterStore(storage)
+        self.velocity_window = timedelta(hours=1)
+        self.velocity_max_transactions = 5
+        
         # Default compliance rules
+        self.rules_version = 0
+        self._compiled_rules: Optional[CompiledRuleSet] = None
         self._initialize_default_rules()
     
     def _initialize_default_rules(self):
@@ -141,6 +213,60 @@ class ComplianceEngine:
             )
         ]
     
+    @property
+    def rules(self) -> List[ComplianceRule]:
+        return self._rules
+    
+    @rules.setter
+    def rules(self, rules: List[ComplianceRule]) -> None:
+        self._rules = rules
+        self.rules_version += 1
+    
+    def add_rule(self, rule: ComplianceRule) -> None:
+        """Add a compliance rule"""
+        self._rules.append(rule)
+        self.rules_version += 1
+    
+    def update_rule(self, rule: ComplianceRule, **changes: Any) -> ComplianceRule:
+        """
+        Change fields of a compliance rule
+        
+        Args:
+            rule: Rule in self.rules to change
+            **changes: ComplianceRule fields and their new values
+        """
+        if rule not in self._rules:
+            raise ValueError("Rule is not registered with this engine")
+        for name, value in changes.items():
+            if not hasattr(rule, name):
+                raise ValueError(f"Unknown compliance rule field: {name}")
+            setattr(rule, name, value)
+        self.rules_version += 1
+        return rule
+    
+    def remove_rule(self, rule: ComplianceRule) -> None:
+        """Remove a compliance rule"""
+        self._rules.remove(rule)
+        self.rules_version += 1
+    
+    @property
+    def compiled_rules(self) -> CompiledRuleSet:
+        """
+        Rule lookup tables for the current rules
+        
+        Recompiled whenever the rules version changes, i.e. after
+        add_rule(), update_rule(), remove_rule() or replacing self.rules.
+        Editing self.rules or a rule directly needs recompile_rules().
+        """
+        if self._compiled_rules is None or self._compiled_rules.version != self.rules_version:
+            self._compiled_rules = CompiledRuleSet(self._rules, self.rules_version)
+        return self._compiled_rules
+    
+    def recompile_rules(self) -> CompiledRuleSet:
+        """Rebuild the rule lookup tables from self.rules"""
+        self.rules_version += 1
+        return self.compiled_rules
+    
     def check_transaction_compliance(
         self,
         customer_id: str,
@@ -152,6 +278,9 @@ class ComplianceEngine:
         """
         Check transaction against all compliance rules
         
+        The customer is loaded once and shared, together with its KYC limits,
+        by every check through a ComplianceContext.
+        
         Args:
             customer_id: Customer performing transaction
             account_id: Account being transacted on
@@ -174,8 +303,16 @@ class ComplianceEngine:
             violations.append("Customer account is inactive")
             return ComplianceAction.BLOCK, violations
         
+        context = ComplianceContext(
+            customer_id=customer_id,
+            account_id=account_id,
+            amount=transaction_amount,
+            transaction_type=transaction_type,
+            customer=customer
+        )
+        
         # Check KYC limits
-        kyc_violations = self._check_kyc_limits(customer, account_id, transaction_amount)
+        kyc_violations = self._check_kyc_limits(customer, account_id, transaction_amount, context)
         if kyc_violations:
             violations.extend(kyc_violations)
             max_action = ComplianceAction.BLOCK
@@ -189,7 +326,7 @@ class ComplianceEngine:
         
         # Check for suspicious patterns
         suspicious_alerts = self._check_suspicious_patterns(
-            customer_id, account_id, transaction_amount, transaction_type
+            customer_id, account_id, transaction_amount, transaction_type, context
         )
         
         if suspicious_alerts:
@@ -218,12 +355,37 @@ class ComplianceEngine:
         
         return max_action, violations
     
-    def _check_kyc_limits(self, customer: Customer, account_id: str, amount: Money) -> List[str]:
+    def record_posted_transaction(
+        self,
+        customer_id: str,
+        amount: Money,
+        posted_at: Optional[datetime] = None
+    ) -> None:
+        """
+        Update velocity and limit counters once a transaction has posted
+        
+        Args:
+            customer_id: Customer the transaction was checked against
+            amount: Posted transaction amount
+            posted_at: Posting timestamp (defaults to now)
+        """
+        self.velocity_counters.record_transaction(customer_id, amount, posted_at)
+    
+    def _check_kyc_limits(
+        self,
+        customer: Customer,
+        account_id: str,
+        amount: Money,
+        context: Optional[ComplianceContext] = None
+    ) -> List[str]:
         """Check transaction against KYC tier limits"""
         violations = []
         
-        # Get KYC limits for customer
-        kyc_limits = self.customer_manager.get_kyc_limits(customer.id, amount.currency)
+        # Get KYC limits for customer (cached on the evaluation context)
+        if context is not None:
+            kyc_limits = self._get_context_kyc_limits(context)
+        else:
+            kyc_limits = self.customer_manager.get_kyc_limits_for_customer(customer, amount.currency)
         
         # Check single transaction limit
         if amount > kyc_limits.single_transaction_limit:
@@ -250,29 +412,43 @@ class ComplianceEngine:
         
         return violations
     
+    def _get_context_kyc_limits(self, context: ComplianceContext) -> KYCLimits:
+        """Get KYC limits for the evaluation, computing them at most once"""
+        if context.kyc_limits is None:
+            context.kyc_limits = self.customer_manager.get_kyc_limits_for_customer(
+                context.customer, context.amount.currency
+            )
+        return context.kyc_limits
+    
+    def _get_context_customer(self, customer_id: str, context: Optional[ComplianceContext]) -> Optional[Customer]:
+        """Get the customer from the evaluation context, loading only without one"""
+        if context is not None and context.customer_id == customer_id:
+            return context.customer
+        return self.customer_manager.get_customer(customer_id)
+    
+    def _large_transaction_threshold(self, currency: Currency) -> Optional[Money]:
+        """Get the active large-transaction reporting threshold for a currency"""
+        return self.compiled_rules.min_threshold(ComplianceRuleType.LARGE_TRANSACTION_REPORTING, currency)
+    
     def _requires_large_transaction_report(self, amount: Money) -> bool:
         """Check if transaction requires large transaction reporting"""
-        for rule in self.rules:
-            if (rule.rule_type == ComplianceRuleType.LARGE_TRANSACTION_REPORTING and
-                rule.is_active and
-                rule.threshold.currency == amount.currency and
-                amount >= rule.threshold):
-                return True
-        return False
+        threshold = self._large_transaction_threshold(amount.currency)
+        return threshold is not None and amount >= threshold
     
     def _check_suspicious_patterns(
         self,
         customer_id: str,
         account_id: str,
         amount: Money,
-        transaction_type: str
+        transaction_type: str,
+        context: Optional[ComplianceContext] = None
     ) -> List[SuspiciousActivityAlert]:
         """Check for suspicious activity patterns"""
         alerts = []
         
         # Check for round dollar amounts (potential structuring)
         # Flag significant round amounts for all customers
-        customer = self.customer_manager.get_customer(customer_id)
+        customer = self._get_context_customer(customer_id, context)
         if self._is_round_amount(amount) and customer and amount.amount >= Decimal('5000'):
             # Risk score varies by tier - but kept moderate to avoid blocking transactions
             if customer.kyc_tier == KYCTier.TIER_0:
@@ -303,7 +479,7 @@ class ComplianceEngine:
             alerts.append(alert)
         
         # Check for unusual transaction size for customer
-        if self._is_unusual_size_for_customer(customer_id, amount):
+        if self._is_unusual_size_for_customer(customer_id, amount, context):
             alert = self._create_suspicious_activity_alert(
                 customer_id=customer_id,
                 account_id=account_id,
@@ -317,24 +493,10 @@ class ComplianceEngine:
     
     def _check_velocity(self, customer_id: str, account_id: str, amount: Money) -> Optional[str]:
         """Check for high-velocity transactions"""
-        # Look for multiple transactions in short time period
-        one_hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
-        
-        # In a real implementation, would query transaction history
-        # For now, simplified velocity check
-        recent_violations = self.storage.find(
-            self.violations_table,
-            {"customer_id": customer_id}
-        )
+        # Count posted transactions (all currencies) in the trailing window
+        recent_count, _ = self.velocity_counters.get_window(customer_id, self.velocity_window)
         
-        # Count violations in last hour
-        recent_count = 0
-        for violation_data in recent_violations:
-            violation = self._violation_from_dict(violation_data)
-            if violation.created_at > one_hour_ago:
-                recent_count += 1
-        
-        if recent_count >= 5:  # More than 5 transactions/violations in last hour
+        if recent_count >= self.velocity_max_transactions:
             self._create_suspicious_activity_alert(
                 customer_id=customer_id,
                 account_id=account_id,
@@ -354,9 +516,9 @@ class ComplianceEngine:
     
     def _is_structured_transaction(self, amount: Money) -> bool:
         """Check if transaction appears to be structured to avoid reporting"""
-        reporting_threshold = Money(Decimal('10000'), Currency.USD)  # $10K USD threshold
+        reporting_threshold = self._large_transaction_threshold(amount.currency)
         
-        if amount.currency != reporting_threshold.currency:
+        if reporting_threshold is None:
             return False
         
         # Check if amount is between 95% and 99.9% of threshold
@@ -365,10 +527,15 @@ class ComplianceEngine:
         
         return threshold_95 <= amount <= threshold_999
     
-    def _is_unusual_size_for_customer(self, customer_id: str, amount: Money) -> bool:
+    def _is_unusual_size_for_customer(
+        self,
+        customer_id: str,
+        amount: Money,
+        context: Optional[ComplianceContext] = None
+    ) -> bool:
         """Check if transaction size is unusual for customer's typical pattern"""
         # Simplified implementation - in production would analyze historical patterns
-        customer = self.customer_manager.get_customer(customer_id)
+        customer = self._get_context_customer(customer_id, context)
         if not customer:
             return False
         
@@ -380,15 +547,12 @@ class ComplianceEngine:
         return False
     
     def _get_daily_transaction_total(self, customer_id: str, currency: Currency) -> Money:
-        """Get total transaction amount for customer today"""
-        # Simplified implementation - in production would query actual transactions
-        # For now, return zero as we don't have transaction history yet
-        return Money(Decimal('0'), currency)
+        """Get total posted transaction amount for customer today"""
+        return self.velocity_counters.get_daily_total(customer_id, currency)
     
     def _get_monthly_transaction_total(self, customer_id: str, currency: Currency) -> Money:
-        """Get total transaction amount for customer this month"""
-        # Simplified implementation - in production would query actual transactions
-        return Money(Decimal('0'), currency)
+        """Get total posted transaction amount for customer this month"""
+        return self.velocity_counters.get_monthly_total(customer_id, currency)
     
     def _create_large_transaction_report(
         self,
@@ -402,7 +566,7 @@ class ComplianceEngine:
         report_id = str(uuid.uuid4())
         
         # Get reporting threshold
-        threshold = Money(Decimal('10000'), Currency.USD)  # Simplified
+        threshold = self._large_transaction_threshold(amount.currency) or Money(Decimal('10000'), Currency.USD)
         
         report = LargeTransactionReport(
             id=report_id,
@@ -415,20 +579,21 @@ class ComplianceEngine:
             reporting_threshold=threshold
         )
         
-        # Save report
-        report_dict = self._report_to_dict(report)
-        self.storage.save(self.reports_table, report.id, report_dict)
-        
-        # Log audit event
-        self.audit_trail.log_event(
-            event_type=AuditEventType.LARGE_TRANSACTION_REPORTED,
-            entity_type="transaction",
-            entity_id=transaction_id,
-            metadata={
-                "customer_id": customer_id,
-                "amount": amount.to_string(),
-                "threshold": threshold.to_string(),
-                "report_id": report_id
+        # Save report and log audit event (now or via the outbox)
+        self._file_record(
+            OUTBOX_LARGE_TRANSACTION_REPORT,
+            self.reports_table,
+            self._report_to_dict(report),
+            audit={
+                "event_type": AuditEventType.LARGE_TRANSACTION_REPORTED.value,
+                "entity_type": "transaction",
+                "entity_id": transaction_id,
+                "metadata": {
+                    "customer_id": customer_id,
+                    "amount": amount.to_string(),
+                    "threshold": threshold.to_string(),
+                    "report_id": report_id
+                }
             }
         )
         
@@ -441,11 +606,12 @@ class ComplianceEngine:
         description: str,
         risk_score: int,
         account_id: Optional[str] = None,
-        transaction_id: Optional[str] = None
+        transaction_id: Optional[str] = None,
+        alert_id: Optional[str] = None
     ) -> SuspiciousActivityAlert:
         """Create suspicious activity alert"""
         now = datetime.now(timezone.utc)
-        alert_id = str(uuid.uuid4())
+        alert_id = alert_id or str(uuid.uuid4())
         
         alert = SuspiciousActivityAlert(
             id=alert_id,
@@ -459,25 +625,46 @@ class ComplianceEngine:
             risk_score=risk_score
         )
         
-        # Save alert
-        alert_dict = self._alert_to_dict(alert)
-        self.storage.save(self.alerts_table, alert.id, alert_dict)
-        
-        # Log audit event
-        self.audit_trail.log_event(
-            event_type=AuditEventType.SUSPICIOUS_ACTIVITY_FLAGGED,
-            entity_type="customer",
-            entity_id=customer_id,
-            metadata={
-                "alert_id": alert_id,
-                "activity_type": activity_type.value,
-                "risk_score": risk_score,
-                "description": description
+        # Save alert and log audit event (now or via the outbox)
+        self._file_record(
+            OUTBOX_SUSPICIOUS_ACTIVITY_ALERT,
+            self.alerts_table,
+            self._alert_to_dict(alert),
+            audit={
+                "event_type": AuditEventType.SUSPICIOUS_ACTIVITY_FLAGGED.value,
+                "entity_type": "customer",
+                "entity_id": customer_id,
+                "metadata": {
+                    "alert_id": alert_id,
+                    "activity_type": activity_type.value,
+                    "risk_score": risk_score,
+                    "description": description
+                }
             }
         )
         
         return alert
     
+    def raise_suspicious_activity_alerts(self, alerts: List[Dict]) -> List[SuspiciousActivityAlert]:
+        """
+        File many suspicious activity alerts in one storage transaction
+        
+        Used by batch scanners. Each item holds _create_suspicious_activity_alert
+        keyword arguments; items whose alert_id is already on file are skipped,
+        so re-running a scan with deterministic ids raises nothing twice.
+        
+        Returns:
+            The alerts that were created
+        """
+        created = []
+        with self.storage.atomic():
+            for spec in alerts:
+                alert_id = spec.get("alert_id")
+                if alert_id and self.storage.exists(self.alerts_table, alert_id):
+                    continue
+                created.append(self._create_suspicious_activity_alert(**spec))
+        return created
+    
     def _record_violation(
         self,
         customer_id: str,
@@ -505,12 +692,64 @@ class ComplianceEngine:
             action_taken=action_taken
         )
         
-        # Save violation
-        violation_dict = self._violation_to_dict(violation)
-        self.storage.save(self.violations_table, violation.id, violation_dict)
+        # Save violation (now or via the outbox)
+        self._file_record(OUTBOX_VIOLATION, self.violations_table, self._violation_to_dict(violation))
         
         return violation
     
+    def _file_record(
+        self,
+        kind: str,
+        table: str,
+        record: Dict,
+        audit: Optional[Dict] = None
+    ) -> None:
+        """Persist a compliance record and its audit event, or queue both"""
+        payload = {"table": table, "record": record, "audit": audit}
+        if self.outbox is not None:
+            self.outbox.enqueue(kind, payload)
+        else:
+            self.apply_filing(payload)
+    
+    def apply_filing(self, payload: Dict) -> None:
+        """
+        Write a compliance record and its audit event
+        
+        Used directly in synchronous mode and as the OutboxWorker handler in
+        outbox mode. Records are saved by their pre-assigned id, so applying
+        the same payload twice leaves a single record.
+        """
+        record = payload["record"]
+        self.storage.save(payload["table"], record["id"], record)
+        
+        audit = payload.get("audit")
+        if audit:
+            self.audit_trail.log_event(
+                event_type=AuditEventType(audit["event_type"]),
+                entity_type=audit["entity_type"],
+                entity_id=audit["entity_id"],
+                metadata=audit.get("metadata")
+            )
+    
+    def outbox_handlers(self) -> Dict[str, Callable[[Dict], None]]:
+        """Handlers for every compliance outbox kind"""
+        return {
+            OUTBOX_LARGE_TRANSACTION_REPORT: self.apply_filing,
+            OUTBOX_SUSPICIOUS_ACTIVITY_ALERT: self.apply_filing,
+            OUTBOX_VIOLATION: self.apply_filing
+        }
+    
+    def create_outbox_worker(self, batch_size: int = 100, **kwargs) -> OutboxWorker:
+        """
+        Create a worker that drains this engine's outbox
+        
+        Raises:
+            ValueError: If the engine was created without an outbox
+        """
+        if self.outbox is None:
+            raise ValueError("ComplianceEngine has no outbox configured")
+        return OutboxWorker(self.outbox, self.outbox_handlers(), batch_size=batch_size, **kwargs)
+    
     def get_customer_violations(self, customer_id: str) -> List[ComplianceViolation]:
         """Get all violations for a customer"""
         violations_data = self.storage.find(self.violations_table, {"customer_id": customer_id})
@@ -59,6 +59,28 @@ class NexumConfig(BaseSettings):
     bastion_timeout: float = 2.0
     bastion_api_key: str = ""
     bastion_fallback: str = "APPROVE"  # What to do if Bastion is down
+    bastion_cache_size: int = 10000  # 0 = disable fraud score caching
+    bastion_cache_ttl_seconds: float = 300.0
+    
+    # Compliance configuration
+    compliance_async_filings: bool = False  # Queue reports/alerts/violations in an outbox
+    compliance_outbox_batch_size: int = 100
+    compliance_outbox_poll_seconds: float = 1.0
+    compliance_outbox_retry_seconds: float = 1.0  # Doubles per failed attempt
+    
+    # Reporting configuration
+    reporting_catch_up_seconds: float = 5.0  # Interval of the reporting change log worker (0 = disabled)
+    
+    # Audit configuration
+    audit_buffered_writer: bool = False  # Write non-regulated audit events from a background thread
+    audit_writer_queue_size: int = 10000
+    audit_writer_batch_size: int = 500
+    audit_flush_on_commit: bool = False  # Wait for buffered events to persist before returning
+    audit_flush_timeout_seconds: float = 30.0  # Longest a committing caller waits for its audit events
+    audit_writer_max_attempts: int = 5  # Appends of a failing batch before it is dead-lettered
+    audit_segment_dir: Optional[str] = None  # Store audit events in segment files under this directory
+    audit_segment_events: int = 100000
+    audit_compress_sealed_segments: bool = True
     
     # Feature flags
     enable_audit_logging: bool = True
@@ -9,17 +9,20 @@ Similar to Salmon's credit management but with full banking integration.
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, timezone, timedelta, date
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from enum import Enum
+from concurrent.futures import ProcessPoolExecutor
 import uuid
 import calendar
+import zlib
 
 from .currency import Money, Currency
-from .storage import StorageInterface, StorageRecord
-from .audit import AuditTrail, AuditEventType
+from .storage import StorageInterface, StorageRecord, INDEX_KEY_SEPARATOR
+from .audit import AuditTrail, AuditEventType, new_audit_event
 from .accounts import AccountManager, Account, ProductType
-from .transactions import TransactionProcessor, TransactionType, TransactionChannel
+from .transactions import TransactionProcessor, TransactionType, TransactionChannel, TransactionState
 from .interest import InterestEngine, GracePeriodTracker
+from .delinquency import DelinquencyIndex
 
 
 class StatementStatus(Enum):
@@ -149,6 +152,170 @@ class CreditTransaction(StorageRecord):
             raise ValueError("Interest charged currency must match transaction amount currency")
 
 
+# Namespace for deterministic statement ids (one statement per account per
+# cycle date), so a re-run cycle overwrites rather than duplicates statements
+STATEMENT_NAMESPACE = uuid.UUID("3c9e5a71-2f48-5b06-9d13-8e7f6a5b4c2d")
+
+# Billing cycle days; later days would not exist in every month
+CYCLE_DAYS = range(1, 29)
+
+CHARGE_CATEGORIES = (TransactionCategory.PURCHASE, TransactionCategory.CASH_ADVANCE,
+                     TransactionCategory.BALANCE_TRANSFER)
+
+
+def calculate_minimum_payment(
+    current_balance: Money,
+    interest_charged: Money,
+    fees_charged: Money,
+    minimum_payment_rate: Decimal,
+    minimum_payment_floor: Decimal
+) -> Money:
+    """Calculate minimum payment due"""
+    if current_balance.is_zero() or current_balance.is_negative():
+        return Money(Decimal('0'), current_balance.currency)
+    
+    # Minimum payment is greater of:
+    # 1. Percentage of balance (e.g., 2%)
+    # 2. Interest + fees + minimum principal payment
+    # 3. Floor amount (e.g., $25)
+    
+    percentage_payment = current_balance * minimum_payment_rate
+    
+    # Ensure minimum covers at least interest and fees
+    required_payment = interest_charged + fees_charged
+    
+    # Add minimum principal payment if balance is large
+    if current_balance > Money(Decimal('1000'), current_balance.currency):
+        required_payment = required_payment + Money(Decimal('10'), current_balance.currency)
+    
+    # Take the maximum of percentage and required payment
+    minimum_payment = max(percentage_payment, required_payment, key=lambda x: x.amount)
+    
+    # Apply floor amount
+    floor_amount = Money(minimum_payment_floor, current_balance.currency)
+    minimum_payment = max(minimum_payment, floor_amount, key=lambda x: x.amount)
+    
+    # Don't exceed current balance
+    if minimum_payment > current_balance:
+        minimum_payment = current_balance
+    
+    return minimum_payment
+
+
+def statement_amounts(
+    currency: Currency,
+    credit_limit: Money,
+    previous_balance: Money,
+    transactions: Iterable[Tuple[TransactionCategory, Money]],
+    minimum_payment_rate: Decimal,
+    minimum_payment_floor: Decimal
+) -> Dict[str, Money]:
+    """
+    Balance and payment amounts of a statement
+    
+    Args:
+        currency: Account currency
+        credit_limit: Credit limit
+        previous_balance: Balance of the previous statement
+        transactions: (category, amount) of each transaction on the statement
+        minimum_payment_rate: Fraction of the balance due as minimum payment
+        minimum_payment_floor: Smallest minimum payment
+    """
+    new_charges = Money(Decimal('0'), currency)
+    payments_credits = Money(Decimal('0'), currency)
+    interest_charged = Money(Decimal('0'), currency)
+    fees_charged = Money(Decimal('0'), currency)
+    
+    for category, amount in transactions:
+        if category in CHARGE_CATEGORIES:
+            new_charges = new_charges + amount
+        elif category == TransactionCategory.PAYMENT:
+            payments_credits = payments_credits + amount
+        elif category == TransactionCategory.INTEREST:
+            interest_charged = interest_charged + amount
+        elif category == TransactionCategory.FEE:
+            fees_charged = fees_charged + amount
+    
+    # Calculate current balance
+    current_balance = previous_balance + new_charges + interest_charged + fees_charged - payments_credits
+    
+    minimum_payment = calculate_minimum_payment(
+        current_balance, interest_charged, fees_charged, minimum_payment_rate, minimum_payment_floor
+    )
+    
+    # Calculate available credit
+    available_credit = credit_limit - current_balance
+    if available_credit.is_negative():
+        available_credit = Money(Decimal('0'), currency)
+    
+    return {
+        "previous_balance": previous_balance,
+        "new_charges": new_charges,
+        "payments_credits": payments_credits,
+        "interest_charged": interest_charged,
+        "fees_charged": fees_charged,
+        "current_balance": current_balance,
+        "minimum_payment_due": minimum_payment,
+        "available_credit": available_credit,
+        "credit_limit": credit_limit
+    }
+
+
+def build_statement_shard(payload: Dict[str, Any]) -> List[Tuple]:
+    """
+    Compute the statements of one shard of a billing cycle
+    
+    Module-level so shards can run in worker processes. Each account row is
+    (account_id, currency code, credit limit, previous balance,
+    [(category, amount), ...]) with amounts as strings. Returns
+    (account_id, {field: amount string}) per account, or
+    (account_id, None, error message) when the calculation fails.
+    """
+    rate = Decimal(payload["minimum_payment_rate"])
+    floor = Decimal(payload["minimum_payment_floor"])
+    
+    results = []
+    for account_id, code, credit_limit, previous_balance, transactions in payload["accounts"]:
+        try:
+            currency = Currency[code]
+            amounts = statement_amounts(
+                currency,
+                Money(Decimal(credit_limit), currency),
+                Money(Decimal(previous_balance), currency),
+                [(TransactionCategory(category), Money(Decimal(amount), currency))
+                 for category, amount in transactions],
+                rate,
+                floor
+            )
+            results.append((account_id, {field: str(money.amount) for field, money in amounts.items()}))
+        except Exception as e:
+            results.append((account_id, None, str(e)))
+    return results
+
+
+def _statement_index_key(status: str, due_date: str, statement_id: str) -> str:
+    """Status index key, ordered by status then due date"""
+    return INDEX_KEY_SEPARATOR.join((status, due_date, statement_id))
+
+
+def _status_prefix(status: StatementStatus) -> str:
+    return f"{status.value}{INDEX_KEY_SEPARATOR}"
+
+
+def _cycle_index_key(cycle_day: int, account_id: str) -> str:
+    return f"{cycle_day:02d}{INDEX_KEY_SEPARATOR}{account_id}"
+
+
+def _unbilled_index_key(account_id: str, post_date: str, credit_transaction_id: str) -> str:
+    """Unbilled-transaction index key, ordered by account then post date"""
+    return INDEX_KEY_SEPARATOR.join((account_id, post_date, credit_transaction_id))
+
+
+def _prefix_end(prefix: str) -> str:
+    """Exclusive upper bound for keys starting with a separator-terminated prefix"""
+    return prefix[:-1] + chr(ord(INDEX_KEY_SEPARATOR) + 1)
+
+
 class CreditLineManager:
     """
     Manages credit line operations including statement generation,
@@ -172,6 +339,21 @@ class CreditLineManager:
         self.statements_table = "credit_statements"
         self.credit_transactions_table = "credit_transactions"
         
+        # Statements ordered by (status, due date), so overdue processing reads
+        # only CURRENT statements that have fallen due
+        self.statement_index_table = "credit_statement_status_index"
+        self.statement_index_state_table = "credit_statement_index_state"
+        
+        # Billing cycles: accounts by statement cycle day, and credit
+        # transactions not yet on a statement by account and post date
+        self.billing_accounts_table = "credit_billing_accounts"
+        self.billing_cycle_index_table = "credit_billing_cycle_index"
+        self.unbilled_index_table = "credit_unbilled_index"
+        self.billing_index_state_table = "credit_billing_index_state"
+        
+        # Queues credit lines for the collections delinquency scan as statements change
+        self.delinquency_index = DelinquencyIndex(storage)
+        
         # Credit line parameters
         self.grace_period_days = 25  # Days from statement to due date
         self.minimum_payment_rate = Decimal('0.02')  # 2% of balance
@@ -214,6 +396,9 @@ class CreditLineManager:
         if not account or account.product_type != ProductType.CREDIT_LINE:
             raise ValueError("Account must be a credit line")
         
+        if not self.storage.exists(self.billing_accounts_table, account_id):
+            self.assign_billing_cycle(account_id)
+        
         # Check for overlimit condition
         if category in [TransactionCategory.PURCHASE, TransactionCategory.CASH_ADVANCE]:
             current_balance = self.account_manager.get_book_balance(account_id)
@@ -347,32 +532,16 @@ class CreditLineManager:
         transactions = self._get_credit_transactions_since(account_id, last_statement_date)
         
         # Calculate statement components
-        new_charges = Money(Decimal('0'), account.currency)
-        payments_credits = Money(Decimal('0'), account.currency)
-        interest_charged = Money(Decimal('0'), account.currency)
-        fees_charged = Money(Decimal('0'), account.currency)
-        
-        for txn in transactions:
-            if txn.category in [TransactionCategory.PURCHASE, TransactionCategory.CASH_ADVANCE, 
-                              TransactionCategory.BALANCE_TRANSFER]:
-                new_charges = new_charges + txn.amount
-            elif txn.category == TransactionCategory.PAYMENT:
-                payments_credits = payments_credits + txn.amount
-            elif txn.category == TransactionCategory.INTEREST:
-                interest_charged = interest_charged + txn.amount
-            elif txn.category == TransactionCategory.FEE:
-                fees_charged = fees_charged + txn.amount
-        
-        # Calculate current balance
-        current_balance = previous_balance + new_charges + interest_charged + fees_charged - payments_credits
-        
-        # Calculate minimum payment
-        minimum_payment = self._calculate_minimum_payment(current_balance, interest_charged, fees_charged)
-        
-        # Calculate available credit
-        available_credit = account.credit_limit - current_balance
-        if available_credit.is_negative():
-            available_credit = Money(Decimal('0'), account.currency)
+        amounts = statement_amounts(
+            account.currency,
+            account.credit_limit,
+            previous_balance,
+            [(txn.category, txn.amount) for txn in transactions],
+            self.minimum_payment_rate,
+            self.minimum_payment_floor.amount
+        )
+        current_balance = amounts["current_balance"]
+        minimum_payment = amounts["minimum_payment_due"]
         
         # Set due date
         due_date = statement_date + timedelta(days=self.grace_period_days)
@@ -385,20 +554,13 @@ class CreditLineManager:
             account_id=account_id,
             statement_date=statement_date,
             due_date=due_date,
-            previous_balance=previous_balance,
-            new_charges=new_charges,
-            payments_credits=payments_credits,
-            interest_charged=interest_charged,
-            fees_charged=fees_charged,
-            current_balance=current_balance,
-            minimum_payment_due=minimum_payment,
-            available_credit=available_credit,
-            credit_limit=account.credit_limit,
-            paid_amount=Money(Decimal('0'), account.currency)
+            paid_amount=Money(Decimal('0'), account.currency),
+            **amounts
         )
         
         # Save statement
         self._save_statement(statement)
+        self._record_billing(account_id, statement)
         
         # Update transaction statement assignments
         for txn in transactions:
@@ -430,55 +592,272 @@ class CreditLineManager:
         
         return statement
     
-    def process_overdue_accounts(self) -> Dict[str, int]:
+    def process_overdue_accounts(self, batch_size: int = 500) -> Dict[str, int]:
         """
         Process overdue accounts and charge late fees
         
+        Reads CURRENT statements past their due date from the statement
+        status index, and charges each batch's late fees through the bulk
+        system posting path: fee transactions, credit transactions, status
+        updates and audit events are written in one storage transaction.
+        Fee transaction IDs derive from the statement, so a statement is
+        never charged twice even if a run is repeated. Past-due statements
+        that owe no fee (minimum paid, or nothing owed) move to PAID_MINIMUM
+        or PAID_FULL, so later runs do not read them again.
+        
+        Args:
+            batch_size: Statements charged per batch
+        
         Returns:
             Dictionary with counts of accounts processed
         """
         results = {"late_fees_charged": 0, "accounts_processed": 0}
+        today = date.today()
         
-        # Get all current statements
-        all_statements_data = self.storage.load_all(self.statements_table)
-        statements = [self._statement_from_dict(data) for data in all_statements_data]
-        
-        current_statements = [s for s in statements if s.status == StatementStatus.CURRENT]
-        
-        for statement in current_statements:
-            if statement.is_overdue and not statement.is_minimum_paid:
-                # Charge late fee
-                try:
-                    self._charge_fee(
-                        account_id=statement.account_id,
-                        fee_amount=self.late_fee,
-                        description="Late payment fee",
-                        channel=TransactionChannel.SYSTEM
-                    )
-                    results["late_fees_charged"] += 1
+        if not self.storage.exists(self.statement_index_state_table, "state"):
+            self.rebuild_statement_index()
+        
+        # Due dates before today, i.e. statements that are past due
+        start = _status_prefix(StatementStatus.CURRENT)
+        end = start + today.isoformat()
+        
+        while True:
+            rows = self.storage.scan_range(self.statement_index_table, start, end, limit=batch_size)
+            if not rows:
+                break
+            start = rows[-1]["id"] + "\x00"
                     
-                    # Update statement status
-                    statement.status = StatementStatus.OVERDUE
-                    statement.updated_at = datetime.now(timezone.utc)
-                    self._save_statement(statement)
+            statements = []
+            for row in rows:
+                data = self.storage.load(self.statements_table, row["statement_id"])
+                if data:
+                    statements.append(self._statement_from_dict(data))
                     
-                except Exception as e:
-                    # Log error but continue with other accounts
-                    self.audit_trail.log_event(
-                        event_type=AuditEventType.SYSTEM_START,  # Generic error
-                        entity_type="credit_account",
-                        entity_id=statement.account_id,
-                        metadata={
-                            "error": "Late fee processing failed",
-                            "message": str(e),
-                            "statement_id": statement.id
-                        }
-                    )
-                
-                results["accounts_processed"] += 1
+            self._charge_late_fees(
+                [s for s in statements if s.is_overdue and not s.is_minimum_paid], today, results
+            )
+            self._settle_statements([s for s in statements if not s.is_overdue or s.is_minimum_paid])
         
         return results
     
+    def get_statements_by_status(
+        self,
+        status: StatementStatus,
+        due_before: Optional[date] = None
+    ) -> List[CreditStatement]:
+        """Get statements with a status, optionally only those due before a date, by due date"""
+        start = _status_prefix(status)
+        end = start + due_before.isoformat() if due_before else _prefix_end(start)
+        
+        statements = []
+        for row in self.storage.scan_range(self.statement_index_table, start, end):
+            data = self.storage.load(self.statements_table, row["statement_id"])
+            if data:
+                statements.append(self._statement_from_dict(data))
+        return statements
+    
+    def rebuild_statement_index(self) -> int:
+        """
+        Rebuild the statement status index from the statements table
+        
+        Only needed for statements written before the index existed, or
+        if the index is lost; statement saves keep it current.
+        
+        Returns:
+            Number of statements indexed
+        """
+        indexed = 0
+        with self.storage.atomic():
+            self.storage.clear_table(self.statement_index_table)
+            for batch in self.storage.iter_batches(self.statements_table):
+                self.storage.save_many(self.statement_index_table, {
+                    row["id"]: row for row in (self._statement_index_row(data) for data in batch)
+                })
+                indexed += len(batch)
+            
+            self.storage.save(self.statement_index_state_table, "state", {
+                "id": "state",
+                "rebuilt_at": datetime.now(timezone.utc).isoformat()
+            })
+        return indexed
+    
+    def run_statement_cycle(
+        self,
+        cycle_date: Optional[date] = None,
+        shards: int = 8,
+        max_workers: int = 1
+    ) -> Dict[str, int]:
+        """
+        Generate the statements of every credit line billed on a cycle date
+        
+        Accounts are read from the cycle-day index (see
+        assign_billing_cycle()), and each account's unbilled credit
+        transactions posted on or before the cycle date from the unbilled
+        index. Accounts are split into shards whose statement amounts are
+        computed in worker processes when max_workers > 1; each shard's
+        statements, transaction assignments, grace periods and audit events
+        are written in one storage transaction. Accounts already billed for
+        the cycle date, and accounts with no balance and no activity, are
+        skipped, so a stopped run can simply be repeated.
+        
+        Args:
+            cycle_date: Statement date (defaults to today)
+            shards: Number of account partitions
+            max_workers: Worker processes (1 computes shards in-process)
+        
+        Returns:
+            Dictionary with counts of statements generated, transactions
+            billed, and accounts skipped or failed
+        """
+        if not cycle_date:
+            cycle_date = date.today()
+        
+        if not self.storage.exists(self.billing_index_state_table, "state"):
+            self.rebuild_billing_index()
+        
+        results = {"statements_generated": 0, "transactions_billed": 0, "accounts_skipped": 0, "accounts_failed": 0}
+        if cycle_date.day not in CYCLE_DAYS:
+            return results
+        
+        shards = max(1, shards)
+        cycle_key = cycle_date.isoformat()
+        shard_rows: Dict[int, List[Tuple]] = {shard: [] for shard in range(shards)}
+        context: Dict[str, Tuple[Account, Dict[str, Any], List[Dict[str, Any]]]] = {}
+        
+        prefix = _cycle_index_key(cycle_date.day, "")
+        for row in self.storage.scan_range(self.billing_cycle_index_table, prefix, _prefix_end(prefix)):
+            account_id = row["account_id"]
+            billing = self.storage.load(self.billing_accounts_table, account_id)
+            account = self.account_manager.get_account(account_id)
+            if (not billing or not account or account.product_type != ProductType.CREDIT_LINE or
+                    (billing.get("last_statement_date") or "") >= cycle_key):
+                results["accounts_skipped"] += 1
+                continue
+            
+            account_prefix = _unbilled_index_key(account_id, "", "")[:-1]
+            unbilled = self.storage.scan_range(
+                self.unbilled_index_table, account_prefix, _prefix_end(account_prefix + cycle_key + INDEX_KEY_SEPARATOR)
+            )
+            previous_balance = billing.get("last_balance") or "0"
+            if not unbilled and Decimal(previous_balance) == 0:
+                results["accounts_skipped"] += 1
+                continue
+            
+            shard_rows[zlib.crc32(account_id.encode()) % shards].append((
+                account_id,
+                account.currency.code,
+                str(account.credit_limit.amount),
+                previous_balance,
+                [(r["category"], r["amount"]) for r in unbilled]
+            ))
+            context[account_id] = (account, billing, unbilled)
+        
+        payloads = [
+            {
+                "shard": shard,
+                "minimum_payment_rate": str(self.minimum_payment_rate),
+                "minimum_payment_floor": str(self.minimum_payment_floor.amount),
+                "accounts": rows
+            }
+            for shard, rows in shard_rows.items() if rows
+        ]
+        
+        if max_workers > 1 and len(payloads) > 1:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(payloads))) as pool:
+                shard_results = list(pool.map(build_statement_shard, payloads))
+        else:
+            shard_results = [build_statement_shard(payload) for payload in payloads]
+        
+        for rows in shard_results:
+            self._write_statement_shard(cycle_date, rows, context, results)
+        
+        return results
+    
+    def assign_billing_cycle(self, account_id: str, cycle_day: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Set the day of the month on which a credit line's statements are cut
+        
+        Args:
+            account_id: Credit line account ID
+            cycle_day: Day 1-28; defaults to a day derived from the account
+                ID, which spreads accounts evenly over the month
+        
+        Returns:
+            The account's billing record
+        """
+        if cycle_day is None:
+            cycle_day = CYCLE_DAYS[zlib.crc32(account_id.encode()) % len(CYCLE_DAYS)]
+        if cycle_day not in CYCLE_DAYS:
+            raise ValueError(f"Cycle day must be between {CYCLE_DAYS[0]} and {CYCLE_DAYS[-1]}")
+        
+        with self.storage.atomic():
+            billing = self.storage.load(self.billing_accounts_table, account_id) or {
+                "id": account_id,
+                "last_statement_id": None,
+                "last_statement_date": None,
+                "last_balance": None
+            }
+            if billing.get("cycle_day"):
+                self.storage.delete(self.billing_cycle_index_table, _cycle_index_key(billing["cycle_day"], account_id))
+            
+            billing["cycle_day"] = cycle_day
+            key = _cycle_index_key(cycle_day, account_id)
+            self.storage.save(self.billing_accounts_table, account_id, billing)
+            self.storage.save(self.billing_cycle_index_table, key, {
+                "id": key,
+                "account_id": account_id,
+                "cycle_day": cycle_day
+            })
+        return billing
+    
+    def rebuild_billing_index(self) -> int:
+        """
+        Register every credit line for billing and rebuild the unbilled index
+        
+        Keeps assigned cycle days, and takes each account's previous
+        balance from its latest statement. Only needed for data written
+        before billing cycles existed, or if the indexes are lost.
+        
+        Returns:
+            Number of credit lines registered
+        """
+        latest: Dict[str, Dict[str, Any]] = {}
+        for batch in self.storage.iter_batches(self.statements_table):
+            for data in batch:
+                current = latest.get(data["account_id"])
+                if not current or data["statement_date"] > current["statement_date"]:
+                    latest[data["account_id"]] = data
+        
+        accounts = self.storage.find(
+            self.account_manager.accounts_table, {"product_type": ProductType.CREDIT_LINE.value}
+        )
+        
+        with self.storage.atomic():
+            self.storage.clear_table(self.unbilled_index_table)
+            for batch in self.storage.iter_batches(self.credit_transactions_table):
+                self.storage.save_many(self.unbilled_index_table, {
+                    row["id"]: row
+                    for row in (self._unbilled_index_row(data) for data in batch if not data.get("statement_id"))
+                })
+            
+            for data in accounts:
+                existing = self.storage.load(self.billing_accounts_table, data["id"])
+                billing = self.assign_billing_cycle(data["id"], existing.get("cycle_day") if existing else None)
+                statement = latest.get(data["id"])
+                if statement:
+                    billing.update(
+                        last_statement_id=statement["id"],
+                        last_statement_date=statement["statement_date"],
+                        last_balance=statement["current_balance_amount"]
+                    )
+                    self.storage.save(self.billing_accounts_table, data["id"], billing)
+            
+            self.storage.save(self.billing_index_state_table, "state", {
+                "id": "state",
+                "rebuilt_at": datetime.now(timezone.utc).isoformat()
+            })
+        return len(accounts)
+    
     def adjust_credit_limit(
         self,
         account_id: str,
@@ -586,35 +965,10 @@ class CreditLineManager:
         fees_charged: Money
     ) -> Money:
         """Calculate minimum payment due"""
-        if current_balance.is_zero() or current_balance.is_negative():
-            return Money(Decimal('0'), current_balance.currency)
-        
-        # Minimum payment is greater of:
-        # 1. Percentage of balance (e.g., 2%)
-        # 2. Interest + fees + minimum principal payment
-        # 3. Floor amount (e.g., $25)
-        
-        percentage_payment = current_balance * self.minimum_payment_rate
-        
-        # Ensure minimum covers at least interest and fees
-        required_payment = interest_charged + fees_charged
-        
-        # Add minimum principal payment if balance is large
-        if current_balance > Money(Decimal('1000'), current_balance.currency):
-            required_payment = required_payment + Money(Decimal('10'), current_balance.currency)
-        
-        # Take the maximum of percentage and required payment
-        minimum_payment = max(percentage_payment, required_payment, key=lambda x: x.amount)
-        
-        # Apply floor amount
-        floor_amount = Money(self.minimum_payment_floor.amount, current_balance.currency)
-        minimum_payment = max(minimum_payment, floor_amount, key=lambda x: x.amount)
-        
-        # Don't exceed current balance
-        if minimum_payment > current_balance:
-            minimum_payment = current_balance
-        
-        return minimum_payment
+        return calculate_minimum_payment(
+            current_balance, interest_charged, fees_charged,
+            self.minimum_payment_rate, self.minimum_payment_floor.amount
+        )
     
     def _charge_fee(
         self,
@@ -691,15 +1045,266 @@ class CreditLineManager:
         
         return filtered
     
+    def _charge_late_fees(self, statements: List[CreditStatement], today: date, results: Dict[str, int]) -> None:
+        """Charge late fees for a batch of overdue statements and mark them OVERDUE"""
+        if not statements:
+            return
+        
+        fees = []
+        by_fee_id = {}
+        for statement in statements:
+            fee = self.transaction_processor.new_system_transaction(
+                transaction_type=TransactionType.FEE,
+                amount=self.late_fee,
+                description="Late payment fee",
+                idempotency_key=f"late-fee:{statement.id}",
+                from_account_id=statement.account_id,
+                reference=f"FEE-{statement.account_id}-{today.strftime('%Y%m%d')}"
+            )
+            fees.append(fee)
+            by_fee_id[fee.id] = statement
+        
+        now = datetime.now(timezone.utc)
+        credit_records = {}
+        unbilled_records = {}
+        events = []
+        
+        with self.storage.atomic():
+            for fee in self.transaction_processor.post_system_transactions(fees):
+                statement = by_fee_id[fee.id]
+                results["accounts_processed"] += 1
+                
+                if fee.state != TransactionState.COMPLETED:
+                    # Log error but continue with other accounts
+                    events.append(new_audit_event(
+                        event_type=AuditEventType.SYSTEM_START,  # Generic error
+                        entity_type="credit_account",
+                        entity_id=statement.account_id,
+                        metadata={
+                            "error": "Late fee processing failed",
+                            "message": fee.error_message,
+                            "statement_id": statement.id
+                        }
+                    ))
+                    continue
+                
+                credit_txn = CreditTransaction(
+                    id=str(uuid.uuid4()),
+                    created_at=now,
+                    updated_at=now,
+                    account_id=statement.account_id,
+                    transaction_id=fee.id,
+                    category=TransactionCategory.FEE,
+                    amount=self.late_fee,
+                    transaction_date=today,
+                    post_date=today,
+                    description="Late payment fee"
+                )
+                credit_records[credit_txn.id] = self._credit_transaction_to_dict(credit_txn)
+                unbilled_row = self._unbilled_index_row(credit_records[credit_txn.id])
+                unbilled_records[unbilled_row["id"]] = unbilled_row
+                events.append(new_audit_event(
+                    event_type=AuditEventType.TRANSACTION_CREATED,
+                    entity_type="credit_account",
+                    entity_id=statement.account_id,
+                    metadata={
+                        "credit_transaction_id": credit_txn.id,
+                        "transaction_id": fee.id,
+                        "category": TransactionCategory.FEE.value,
+                        "amount": self.late_fee.to_string(),
+                        "eligible_for_grace": credit_txn.eligible_for_grace
+                    }
+                ))
+                
+                statement.status = StatementStatus.OVERDUE
+                statement.updated_at = now
+                self._save_statement(statement)
+                results["late_fees_charged"] += 1
+            
+            self.storage.save_many(self.credit_transactions_table, credit_records)
+            self.storage.save_many(self.unbilled_index_table, unbilled_records)
+            self.audit_trail.log_event_batch(events)
+    
+    def _settle_statements(self, statements: List[CreditStatement]) -> None:
+        """Move past-due statements that owe no late fee out of CURRENT"""
+        if not statements:
+            return
+        
+        now = datetime.now(timezone.utc)
+        with self.storage.atomic():
+            for statement in statements:
+                statement.status = StatementStatus.PAID_FULL if statement.is_paid_full else StatementStatus.PAID_MINIMUM
+                statement.updated_at = now
+                self._save_statement(statement)
+    
     def _save_statement(self, statement: CreditStatement) -> None:
-        """Save credit statement to storage"""
+        """Save credit statement to storage and move its status index entry"""
         statement_dict = self._statement_to_dict(statement)
-        self.storage.save(self.statements_table, statement.id, statement_dict)
+        index_row = self._statement_index_row(statement_dict)
+        
+        with self.storage.atomic():
+            previous = self.storage.load(self.statements_table, statement.id)
+            if previous:
+                previous_key = self._statement_index_row(previous)["id"]
+                if previous_key != index_row["id"]:
+                    self.storage.delete(self.statement_index_table, previous_key)
+            
+            self.storage.save(self.statements_table, statement.id, statement_dict)
+            self.storage.save(self.statement_index_table, index_row["id"], index_row)
+        
+        self.delinquency_index.track_statement(statement)
+    
+    def _statement_index_row(self, statement_data: Dict) -> Dict:
+        """Status index record for a stored statement"""
+        return {
+            "id": _statement_index_key(statement_data["status"], statement_data["due_date"], statement_data["id"]),
+            "statement_id": statement_data["id"],
+            "account_id": statement_data["account_id"],
+            "status": statement_data["status"],
+            "due_date": statement_data["due_date"]
+        }
     
     def _save_credit_transaction(self, credit_txn: CreditTransaction) -> None:
-        """Save credit transaction to storage"""
+        """Save credit transaction to storage and keep the unbilled index current"""
         txn_dict = self._credit_transaction_to_dict(credit_txn)
-        self.storage.save(self.credit_transactions_table, credit_txn.id, txn_dict)
+        index_row = self._unbilled_index_row(txn_dict)
+        
+        with self.storage.atomic():
+            self.storage.save(self.credit_transactions_table, credit_txn.id, txn_dict)
+            if credit_txn.statement_id:
+                self.storage.delete(self.unbilled_index_table, index_row["id"])
+            else:
+                self.storage.save(self.unbilled_index_table, index_row["id"], index_row)
+    
+    def _unbilled_index_row(self, txn_data: Dict) -> Dict:
+        """Unbilled index record for a stored credit transaction"""
+        return {
+            "id": _unbilled_index_key(txn_data["account_id"], txn_data["post_date"], txn_data["id"]),
+            "credit_transaction_id": txn_data["id"],
+            "account_id": txn_data["account_id"],
+            "category": txn_data["category"],
+            "amount": txn_data["amount"]
+        }
+    
+    def _record_billing(self, account_id: str, statement: CreditStatement) -> None:
+        """Point the account's billing record at its newest statement"""
+        billing = self.storage.load(self.billing_accounts_table, account_id) or self.assign_billing_cycle(account_id)
+        billing.update(
+            last_statement_id=statement.id,
+            last_statement_date=statement.statement_date.isoformat(),
+            last_balance=str(statement.current_balance.amount)
+        )
+        self.storage.save(self.billing_accounts_table, account_id, billing)
+    
+    def _write_statement_shard(
+        self,
+        cycle_date: date,
+        rows: List[Tuple],
+        context: Dict[str, Tuple[Account, Dict[str, Any], List[Dict[str, Any]]]],
+        results: Dict[str, int]
+    ) -> None:
+        """Write one shard's statements and their side effects in one transaction"""
+        now = datetime.now(timezone.utc)
+        due_date = cycle_date + timedelta(days=self.grace_period_days)
+        
+        statements = []
+        statement_records = {}
+        index_records = {}
+        transaction_records = {}
+        billed_keys = []
+        grace_records = {}
+        billing_records = {}
+        events = []
+        
+        for row in rows:
+            account_id, amounts = row[0], row[1]
+            account, billing, unbilled = context[account_id]
+            if amounts is None:
+                # Log error but continue with other accounts
+                results["accounts_failed"] += 1
+                events.append(new_audit_event(
+                    event_type=AuditEventType.SYSTEM_START,  # Generic error
+                    entity_type="credit_account",
+                    entity_id=account_id,
+                    metadata={
+                        "error": "Statement generation failed",
+                        "message": row[2],
+                        "cycle_date": cycle_date.isoformat()
+                    }
+                ))
+                continue
+            
+            currency = account.currency
+            statement = CreditStatement(
+                id=str(uuid.uuid5(STATEMENT_NAMESPACE, f"{account_id}:{cycle_date.isoformat()}")),
+                created_at=now,
+                updated_at=now,
+                account_id=account_id,
+                statement_date=cycle_date,
+                due_date=due_date,
+                paid_amount=Money(Decimal('0'), currency),
+                **{field: Money(Decimal(amount), currency) for field, amount in amounts.items()}
+            )
+            statements.append(statement)
+            statement_dict = self._statement_to_dict(statement)
+            statement_records[statement.id] = statement_dict
+            index_row = self._statement_index_row(statement_dict)
+            index_records[index_row["id"]] = index_row
+            
+            for entry in unbilled:
+                txn_data = self.storage.load(self.credit_transactions_table, entry["credit_transaction_id"])
+                if txn_data:
+                    transaction_records[txn_data["id"]] = dict(
+                        txn_data, statement_id=statement.id, updated_at=now.isoformat()
+                    )
+                billed_keys.append(entry["id"])
+            
+            if not statement.current_balance.is_zero():
+                tracker = GracePeriodTracker(
+                    id=str(uuid.uuid4()),
+                    created_at=now,
+                    updated_at=now,
+                    account_id=account_id,
+                    statement_date=cycle_date,
+                    statement_balance=statement.current_balance,
+                    due_date=due_date
+                )
+                grace_records[tracker.id] = self.interest_engine._grace_period_to_dict(tracker)
+            
+            billing_records[account_id] = dict(
+                billing,
+                last_statement_id=statement.id,
+                last_statement_date=cycle_date.isoformat(),
+                last_balance=str(statement.current_balance.amount)
+            )
+            events.append(new_audit_event(
+                event_type=AuditEventType.CREDIT_STATEMENT_GENERATED,
+                entity_type="credit_account",
+                entity_id=account_id,
+                metadata={
+                    "statement_id": statement.id,
+                    "statement_date": cycle_date.isoformat(),
+                    "due_date": due_date.isoformat(),
+                    "current_balance": statement.current_balance.to_string(),
+                    "minimum_payment": statement.minimum_payment_due.to_string()
+                }
+            ))
+        
+        with self.storage.atomic():
+            self.storage.save_many(self.statements_table, statement_records)
+            self.storage.save_many(self.statement_index_table, index_records)
+            self.storage.save_many(self.credit_transactions_table, transaction_records)
+            for key in billed_keys:
+                self.storage.delete(self.unbilled_index_table, key)
+            self.storage.save_many(self.interest_engine.grace_periods_table, grace_records)
+            self.interest_engine._index_grace_periods(grace_records)
+            self.storage.save_many(self.billing_accounts_table, billing_records)
+            for statement in statements:
+                self.delinquency_index.track_statement(statement)
+            self.audit_trail.log_event_batch(events)
+        
+        results["statements_generated"] += len(statements)
+        results["transactions_billed"] += len(transaction_records)
     
     def _statement_to_dict(self, statement: CreditStatement) -> Dict:
         """Convert statement to dictionary"""
@@ -16,6 +16,7 @@ import re
 from .currency import Money, Currency
 from .storage import StorageInterface, StorageRecord
 from .audit import AuditTrail, AuditEventType
+from .ledger import LedgerChangeLog, CUSTOMER_CHANGED
 
 # Import events for Phase 2 observer pattern (optional)
 try:
@@ -195,6 +196,7 @@ class CustomerManager:
         self.storage = storage
         self.audit_trail = audit_trail
         self.table_name = "customers"
+        self.changes = LedgerChangeLog(storage)
         
         # Event dispatcher for publishing domain events (Phase 2)
         self._event_dispatcher = event_dispatcher
@@ -428,8 +430,11 @@ class CustomerManager:
             customer.kyc_verified_at = None
             customer.kyc_expires_at = None
         
-        # Save customer
-        self._save_customer(customer)
+        # Save customer; accounts are reported by their customer's tier
+        with self.storage.atomic():
+            self._save_customer(customer)
+            if customer.kyc_tier != old_tier:
+                self.changes.record(CUSTOMER_CHANGED, [customer.id])
         
         # Log audit event
         self.audit_trail.log_event(
@@ -537,6 +542,19 @@ class CustomerManager:
         if not customer:
             raise ValueError(f"Customer {customer_id} not found")
         
+        return self.get_kyc_limits_for_customer(customer, currency)
+    
+    def get_kyc_limits_for_customer(self, customer: Customer, currency: Currency) -> KYCLimits:
+        """
+        Get transaction limits for an already-loaded customer
+        
+        Args:
+            customer: Customer whose KYC tier determines the limits
+            currency: Currency for limits
+            
+        Returns:
+            KYCLimits for the customer's tier in requested currency
+        """
         # Get default limits for tier (in USD)
         default_limits = self._default_kyc_limits[customer.kyc_tier]
         
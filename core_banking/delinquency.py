@@ -0,0 +1,157 @@
+"""
+Delinquency Index Module
+
+Persisted due-date queue of loans and credit lines that collections needs to
+look at. Each obligation has at most one queue entry keyed
+"<review date>|<type>|<id>", so the daily delinquency scan reads the key
+range up to today instead of every loan and credit-line account. Loan saves
+and statement writes (generation, payments, overdue marking) move an
+obligation's entry, and the scan re-queues what it reviewed for the next day
+its days past due can change.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from .storage import StorageInterface, INDEX_KEY_SEPARATOR
+
+
+LOAN_OBLIGATION = "loan"
+CREDIT_LINE_OBLIGATION = "credit_line"
+
+# Loan states whose delinquency collections tracks (LoanState values)
+TRACKED_LOAN_STATES = ("active", "disbursed")
+
+
+def _queue_key(review_date: date, obligation_type: str, obligation_id: str) -> str:
+    return INDEX_KEY_SEPARATOR.join((review_date.isoformat(), obligation_type, obligation_id))
+
+
+def _obligation_key(obligation_type: str, obligation_id: str) -> str:
+    return f"{obligation_type}:{obligation_id}"
+
+
+class DelinquencyIndex:
+    """
+    Due-date queue of obligations awaiting a delinquency review
+    
+    The queue table is ordered by review date, so due() is a range read;
+    the obligations table maps each obligation to its current queue entry
+    so rescheduling replaces the entry rather than adding a second one.
+    Other nightly delinquency jobs keep their own queue under another name.
+    """
+    
+    def __init__(self, storage: StorageInterface, name: str = "delinquency"):
+        self.storage = storage
+        
+        self.queue_table = f"{name}_queue"
+        self.obligations_table = f"{name}_obligations"
+        self.state_table = f"{name}_index_state"
+    
+    def schedule(self, obligation_type: str, obligation_id: str, review_date: date) -> None:
+        """Queue an obligation for review on review_date, replacing any earlier entry"""
+        obligation_key = _obligation_key(obligation_type, obligation_id)
+        queue_key = _queue_key(review_date, obligation_type, obligation_id)
+        
+        with self.storage.atomic():
+            existing = self.storage.load(self.obligations_table, obligation_key)
+            if existing and existing["queue_key"] == queue_key:
+                return
+            if existing:
+                self.storage.delete(self.queue_table, existing["queue_key"])
+            
+            self.storage.save(self.queue_table, queue_key, {
+                "id": queue_key,
+                "obligation_type": obligation_type,
+                "obligation_id": obligation_id,
+                "review_date": review_date.isoformat()
+            })
+            self.storage.save(self.obligations_table, obligation_key, {
+                "id": obligation_key,
+                "obligation_type": obligation_type,
+                "obligation_id": obligation_id,
+                "review_date": review_date.isoformat(),
+                "queue_key": queue_key
+            })
+    
+    def unschedule(self, obligation_type: str, obligation_id: str) -> None:
+        """Drop an obligation from the queue"""
+        obligation_key = _obligation_key(obligation_type, obligation_id)
+        
+        with self.storage.atomic():
+            existing = self.storage.load(self.obligations_table, obligation_key)
+            if existing:
+                self.storage.delete(self.queue_table, existing["queue_key"])
+                self.storage.delete(self.obligations_table, obligation_key)
+    
+    def get_review_date(self, obligation_type: str, obligation_id: str) -> Optional[date]:
+        """Date an obligation is queued for, or None if it is not queued"""
+        existing = self.storage.load(self.obligations_table, _obligation_key(obligation_type, obligation_id))
+        return date.fromisoformat(existing["review_date"]) if existing else None
+    
+    def due(self, as_of: date, after: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Queue entries with review dates on or before as_of, in date order
+        
+        Args:
+            as_of: Review date cut-off (inclusive)
+            after: Queue key of the last entry already read, to page through
+            limit: Maximum entries to return
+        """
+        start = after + "\x00" if after is not None else None
+        end = as_of.isoformat() + chr(ord(INDEX_KEY_SEPARATOR) + 1)
+        return self.storage.scan_range(self.queue_table, start, end, limit=limit)
+    
+    def track_loan(self, loan_record: Dict[str, Any], today: Optional[date] = None) -> None:
+        """
+        Re-queue a loan after it was saved
+        
+        A tracked loan with days past due is reviewed on the next scan; any
+        other loan has nothing for collections to do until its next save.
+        """
+        today = today or date.today()
+        if loan_record.get("state") in TRACKED_LOAN_STATES and int(loan_record.get("days_past_due") or 0) > 0:
+            self.schedule(LOAN_OBLIGATION, loan_record["id"], today)
+        else:
+            self.unschedule(LOAN_OBLIGATION, loan_record["id"])
+    
+    def track_statement(self, statement, today: Optional[date] = None) -> None:
+        """
+        Re-queue a credit line after one of its statements was written
+        
+        An unpaid current statement is reviewed the day after it falls due.
+        Any other write (payment in full, overdue marking) may change which
+        statement is current, so the line is reviewed on the next scan.
+        """
+        today = today or date.today()
+        review_date = self.statement_review_date(statement, today) or today
+        self.schedule(CREDIT_LINE_OBLIGATION, statement.account_id, review_date)
+    
+    @staticmethod
+    def statement_review_date(statement, today: date) -> Optional[date]:
+        """First day from today on which an unpaid current statement is past due"""
+        if statement is None or statement.status.value != "current":
+            return None
+        if not statement.remaining_balance.is_positive():
+            return None
+        return max(statement.due_date + timedelta(days=1), today)
+    
+    def is_built(self) -> bool:
+        """Whether the queue has been seeded from existing loans and credit lines"""
+        return self.storage.exists(self.state_table, "state")
+    
+    def clear(self) -> None:
+        """Empty the queue and forget that it was built"""
+        with self.storage.atomic():
+            self.storage.clear_table(self.queue_table)
+            self.storage.clear_table(self.obligations_table)
+            self.storage.delete(self.state_table, "state")
+    
+    def mark_built(self) -> None:
+        self.storage.save(self.state_table, "state", {
+            "id": "state",
+            "built_at": datetime.now(timezone.utc).isoformat()
+        })
+    
+    def __len__(self) -> int:
+        return self.storage.count(self.queue_table)
@@ -215,6 +215,11 @@ class EncryptedStorage(StorageInterface):
         encrypted_data = self._encrypt_pii(table, data.copy())
         self.inner.save(table, record_id, encrypted_data)
     
+    def insert_if_absent(self, table: str, record_id: str, data: Dict[str, Any]) -> bool:
+        """Insert record with PII encryption if its id is not taken"""
+        encrypted_data = self._encrypt_pii(table, data.copy())
+        return self.inner.insert_if_absent(table, record_id, encrypted_data)
+    
     def load(self, table: str, record_id: str) -> Optional[Dict[str, Any]]:
         """Load record and decrypt PII"""
         data = self.inner.load(table, record_id)
@@ -304,6 +309,14 @@ class EncryptedStorage(StorageInterface):
         """Rollback transaction (pass-through)"""
         self.inner.rollback()
     
+    def _transaction_lock(self):
+        """Transaction lock (pass-through)"""
+        return self.inner._transaction_lock()
+    
+    def _atomic_state(self):
+        """Atomic nesting state (pass-through)"""
+        return self.inner._atomic_state()
+    
     def _encrypt_pii(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Encrypt PII fields in data"""
         fields_to_encrypt = self.pii_fields.get(table, [])
@@ -6,7 +6,7 @@ monkey-patched event hooks with a cleaner publish/subscribe mechanism.
 """
 
 from enum import Enum
-from typing import Callable, Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 import uuid
@@ -241,6 +241,8 @@ def create_transaction_event(event_type: DomainEvent, transaction) -> EventPaylo
 
 def create_account_event(event_type: DomainEvent, account) -> EventPayload:
     """Create an account-related event"""
+    # Account models expose their lifecycle as `state`; older callers pass `status`
+    status = getattr(account, 'status', None) or getattr(account, 'state', None)
     return EventPayload(
         event_type=event_type,
         entity_type="account",
@@ -249,7 +251,7 @@ def create_account_event(event_type: DomainEvent, account) -> EventPayload:
             "account_number": account.account_number,
             "customer_id": account.customer_id,
             "product_type": account.product_type.value if hasattr(account.product_type, 'value') else str(account.product_type),
-            "status": account.status.value if hasattr(account.status, 'value') else str(account.status),
+            "status": status.value if hasattr(status, 'value') else str(status),
             "balance": str(account.current_balance.amount) if hasattr(account, 'current_balance') and account.current_balance else "0",
             "currency": account.currency.code if hasattr(account, 'currency') else "USD"
         }
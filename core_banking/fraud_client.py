@@ -6,10 +6,14 @@ Provides synchronous scoring of transactions before approval.
 """
 
 import httpx
+import hashlib
+import json
 import logging
+import threading
 import time
-from dataclasses import dataclass
-from typing import Optional
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional, Tuple
 from decimal import Decimal
 
 logger = logging.getLogger("nexum.fraud")
@@ -25,6 +29,138 @@ class FraudScore:
     latency_ms: float  # how long the call took
 
 
+def fingerprint_transaction(transaction_data: dict) -> str:
+    """Build the cache key for a scoring request
+    
+    The key is a SHA-256 of the canonical (sorted-key) JSON payload,
+    ignoring the volatile timestamp field, prefixed with the transaction_id
+    when present. Retries of the same transaction share one entry, while a
+    resubmit under the same id with a different amount or counterparty is
+    scored again.
+    """
+    payload = {k: v for k, v in transaction_data.items() if k != "timestamp"}
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha256(canonical.encode()).hexdigest()
+    
+    transaction_id = transaction_data.get("transaction_id")
+    if transaction_id:
+        return f"txn:{transaction_id}:{digest}"
+    return "fp:" + digest
+
+
+class FraudScoreCache:
+    """Bounded, thread-safe TTL cache of fraud scores
+    
+    Entries expire after ``ttl_seconds`` and the least recently used entry is
+    evicted once ``max_size`` is reached. Entries are tracked by transaction_id
+    as well as by key so a fresh decision from Bastion can invalidate them.
+    """
+    
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 300.0):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+        
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, FraudScore, Optional[str]]]" = OrderedDict()
+        self._keys_by_transaction: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    def get(self, key: str) -> Optional[FraudScore]:
+        """Return the cached score for key, or None on miss/expiry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            expires_at, score, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return score
+    
+    def put(self, key: str, score: FraudScore, transaction_id: Optional[str] = None) -> None:
+        """Store a score, evicting the least recently used entry if full"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            
+            while len(self._entries) >= self.max_size:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+            
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, score, transaction_id)
+            if transaction_id:
+                self._keys_by_transaction.setdefault(transaction_id, set()).add(key)
+    
+    def invalidate(self, transaction_id: str) -> int:
+        """Drop every cached score for a transaction
+        
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            keys = self._keys_by_transaction.pop(transaction_id, set())
+            removed = 0
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+                    removed += 1
+            self.invalidations += removed
+            return removed
+    
+    def clear(self) -> None:
+        """Remove all entries (metrics are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_transaction.clear()
+    
+    def _remove(self, key: str) -> None:
+        """Remove an entry and its transaction index (caller holds lock)"""
+        _, _, transaction_id = self._entries.pop(key)
+        if transaction_id:
+            keys = self._keys_by_transaction.get(transaction_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_transaction[transaction_id]
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss metrics for the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+
 class BastionClient:
     """REST client for Bastion fraud detection engine"""
     
@@ -34,18 +170,24 @@ class BastionClient:
         timeout: float = 2.0,  # 2 second timeout — don't block transactions too long
         api_key: Optional[str] = None,
         enabled: bool = True,
-        fallback_on_error: str = "APPROVE"  # If Bastion is down, approve by default
+        fallback_on_error: str = "APPROVE",  # If Bastion is down, approve by default
+        cache: Optional[FraudScoreCache] = None  # Optional result cache for retries/replays
     ):
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
         self.api_key = api_key
         self.enabled = enabled
         self.fallback_on_error = fallback_on_error
+        self.cache = cache
         self._client = httpx.Client(timeout=timeout)
     
     def score_transaction(self, transaction_data: dict) -> FraudScore:
         """Score a transaction via Bastion API
         
+        When a cache is configured, a previously scored transaction (same
+        transaction_id or identical payload) is answered from the cache
+        without a network call. Fallback results are never cached.
+        
         Args:
             transaction_data: dict with transaction_id, amount, currency, 
                             customer_id, merchant_id, channel, etc.
@@ -62,6 +204,33 @@ class BastionClient:
                 latency_ms=0.0
             )
         
+        if self.cache is None:
+            return self._score_remote(transaction_data)
+        
+        key = fingerprint_transaction(transaction_data)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return replace(cached, latency_ms=0.0)
+        
+        result = self._score_remote(transaction_data)
+        if "bastion_unavailable" not in result.reasons:
+            self.cache.put(key, result, transaction_data.get("transaction_id") or None)
+        return result
+    
+    def invalidate_cached_score(self, transaction_id: str) -> int:
+        """Drop cached scores for a transaction (e.g. after an updated decision)"""
+        if self.cache is None:
+            return 0
+        return self.cache.invalidate(transaction_id)
+    
+    def get_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Get score cache metrics, or None if caching is disabled"""
+        if self.cache is None:
+            return None
+        return self.cache.get_stats()
+    
+    def _score_remote(self, transaction_data: dict) -> FraudScore:
+        """Call the Bastion /score endpoint"""
         try:
             start = time.time()
             
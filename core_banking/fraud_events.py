@@ -12,6 +12,7 @@ from decimal import Decimal
 
 from .events import DomainEvent, EventDispatcher, EventPayload, get_global_dispatcher
 from .kafka_integration import EventBus, EventSchema, InMemoryEventBus
+from .fraud_client import FraudScoreCache
 
 # Topic constants - shared contract between Nexum and Bastion
 NEXUM_TRANSACTION_TOPIC = "nexum.transactions"
@@ -77,16 +78,19 @@ class FraudEventBridge:
     4. Update transaction metadata and trigger compliance alerts
     """
     
-    def __init__(self, event_bus: EventBus, storage=None, compliance_manager=None):
+    def __init__(self, event_bus: EventBus, storage=None, compliance_manager=None,
+                 score_cache: Optional[FraudScoreCache] = None):
         """
         Args:
             event_bus: Kafka event bus for publishing/consuming
             storage: Storage interface for updating transaction metadata
             compliance_manager: Manager for creating compliance alerts
+            score_cache: BastionClient score cache to invalidate on new decisions
         """
         self.event_bus = event_bus
         self.storage = storage
         self.compliance_manager = compliance_manager
+        self.score_cache = score_cache
         self.running = False
         self._lock = threading.RLock()
         
@@ -240,6 +244,12 @@ class FraudEventBridge:
             
             logger.info(f"Received fraud decision for transaction {transaction_id}: {decision} (score={fraud_score})")
             
+            # A newer decision supersedes any score cached from the synchronous call
+            if self.score_cache is not None:
+                removed = self.score_cache.invalidate(transaction_id)
+                if removed:
+                    logger.debug(f"Invalidated {removed} cached fraud score(s) for transaction {transaction_id}")
+            
             # Update transaction metadata if storage is available
             if self.storage:
                 try:
@@ -341,7 +351,7 @@ class FraudEventBridge:
     
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the bridge"""
-        return {
+        stats = {
             "running": self.running,
             "event_bus_running": self.event_bus.is_running() if self.event_bus else False,
             "subscribed_topics": [
@@ -353,6 +363,9 @@ class FraudEventBridge:
                 NEXUM_CUSTOMER_TOPIC
             ]
         }
+        if self.score_cache is not None:
+            stats["score_cache"] = self.score_cache.get_stats()
+        return stats
 
 
 # Utility functions for easy integration
@@ -367,7 +380,8 @@ def create_fraud_bridge(event_bus: Optional[EventBus] = None, **kwargs) -> Fraud
 
 
 def start_fraud_bridge_with_storage(storage, compliance_manager=None, 
-                                  kafka_config: Optional[Dict] = None) -> FraudEventBridge:
+                                  kafka_config: Optional[Dict] = None,
+                                  score_cache: Optional[FraudScoreCache] = None) -> FraudEventBridge:
     """Start fraud bridge with storage integration"""
     from .kafka_integration import KafkaEventBus, LogEventBus
     
@@ -382,7 +396,7 @@ def start_fraud_bridge_with_storage(storage, compliance_manager=None,
         logger.warning(f"Failed to create Kafka event bus: {e}, using LogEventBus")
         event_bus = LogEventBus()
     
-    bridge = FraudEventBridge(event_bus, storage, compliance_manager)
+    bridge = FraudEventBridge(event_bus, storage, compliance_manager, score_cache=score_cache)
     bridge.start()
     
     return bridge
\ No newline at end of file
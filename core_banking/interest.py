@@ -4,22 +4,33 @@ Interest Engine Module
 Handles daily interest accrual, compound interest calculations, and interest
 posting. Supports different interest calculation methods for different
 product types with proper grace period logic for credit products.
+
+The end-of-day accrual run is partitioned: active accounts are split into
+shards, balances and rate inputs are prefetched in bulk, shard accruals are
+computed (optionally in a process pool) and each shard is written and
+checkpointed in one storage transaction so an interrupted run can resume.
 """
 
+from concurrent.futures import ProcessPoolExecutor
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, timezone, timedelta, date
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
 from enum import Enum
 import uuid
 import calendar
+import zlib
 
 from .currency import Money, Currency
-from .storage import StorageInterface, StorageRecord
-from .audit import AuditTrail, AuditEventType
+from .storage import StorageInterface, StorageRecord, INDEX_KEY_SEPARATOR
+from .audit import AuditTrail, AuditEventType, new_audit_event
+from .interest_kernel import (
+    NUMPY_AVAILABLE as KERNEL_AVAILABLE, DAY_COUNT_DENOMINATORS, COMPOUNDING_PERIOD_DAYS,
+    accrue_minor, project_minor, interest_minor, to_minor, from_minor
+)
 from .ledger import GeneralLedger, JournalEntryLine
 from .accounts import AccountManager, Account, ProductType
-from .transactions import TransactionProcessor, TransactionType, TransactionChannel
+from .transactions import TransactionProcessor, TransactionType, TransactionChannel, TransactionState
 
 
 class InterestType(Enum):
@@ -66,6 +77,32 @@ class InterestRateConfig(StorageRecord):
             raise ValueError("Minimum balance currency must match config currency")
 
 
+@dataclass(frozen=True)
+class RateTerms:
+    """
+    Rate terms resolved for one account
+    
+    The subset of InterestRateConfig that accrual needs, built without
+    timestamps or validation so account overrides are cheap to resolve.
+    """
+    id: str
+    annual_rate: Decimal
+    calculation_method: InterestCalculationMethod = InterestCalculationMethod.ACTUAL_365
+    compounding_frequency: CompoundingFrequency = CompoundingFrequency.DAILY
+    minimum_balance: Optional[Money] = None
+    
+    @classmethod
+    def from_config(cls, config: InterestRateConfig) -> 'RateTerms':
+        """Terms of a stored rate configuration"""
+        return cls(
+            id=config.id,
+            annual_rate=config.annual_rate,
+            calculation_method=config.calculation_method,
+            compounding_frequency=config.compounding_frequency,
+            minimum_balance=config.minimum_balance
+        )
+
+
 @dataclass
 class InterestAccrual(StorageRecord):
     """Daily interest accrual record"""
@@ -111,6 +148,190 @@ class GracePeriodTracker(StorageRecord):
         return (self.due_date - today).days
 
 
+@dataclass
+class AccrualState:
+    """
+    Running accrual position of one account
+    
+    Kept up to date as accruals are recorded and posted, so the daily run
+    reads one record instead of re-summing every unposted accrual.
+    """
+    account_id: str
+    currency: Currency
+    unposted_total: Decimal = Decimal('0')
+    last_accrual_date: Optional[date] = None
+    last_posted_period: Optional[str] = None  # YYYY-MM
+    
+    def record_accrual(self, accrual_date: date, cumulative: Decimal) -> None:
+        """Apply a new accrual given its cumulative unposted total"""
+        self.unposted_total = cumulative
+        if not self.last_accrual_date or accrual_date > self.last_accrual_date:
+            self.last_accrual_date = accrual_date
+    
+    def record_posting(self, amount: Decimal, period: str) -> None:
+        """Apply a posting of previously accrued interest"""
+        self.unposted_total -= amount
+        if not self.last_posted_period or period > self.last_posted_period:
+            self.last_posted_period = period
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for storage"""
+        return {
+            "id": self.account_id,
+            "account_id": self.account_id,
+            "currency": self.currency.code,
+            "unposted_total": str(self.unposted_total),
+            "last_accrual_date": self.last_accrual_date.isoformat() if self.last_accrual_date else None,
+            "last_posted_period": self.last_posted_period
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AccrualState':
+        """Create instance from dictionary"""
+        return cls(
+            account_id=data["account_id"],
+            currency=Currency[data["currency"]],
+            unposted_total=Decimal(data["unposted_total"]),
+            last_accrual_date=date.fromisoformat(data["last_accrual_date"]) if data.get("last_accrual_date") else None,
+            last_posted_period=data.get("last_posted_period")
+        )
+
+
+# Namespace for deterministic accrual ids (one accrual per account per day),
+# so a re-run shard overwrites rather than duplicates its accruals
+ACCRUAL_NAMESPACE = uuid.UUID("6f1c2a4e-3b7d-5e90-8c21-4d5a6b7c8e9f")
+
+# Longest what-if projection; the projection steps once per day and longer
+# horizons push balance growth past exact 64-bit arithmetic
+MAX_PROJECTION_DAYS = 366
+
+
+def _accrual_index_key(account_id: str, accrual_date: str) -> str:
+    """Unposted-accrual index key, ordered by account then date"""
+    return f"{account_id}{INDEX_KEY_SEPARATOR}{accrual_date}"
+
+
+def _account_keys_end(account_id: str) -> str:
+    """Exclusive upper bound of an account's index keys"""
+    return account_id + chr(ord(INDEX_KEY_SEPARATOR) + 1)
+
+
+def accrual_id(account_id: str, accrual_date: date) -> str:
+    """Deterministic ID of an account's accrual for a date"""
+    return str(uuid.uuid5(ACCRUAL_NAMESPACE, f"{account_id}:{accrual_date.isoformat()}"))
+
+
+def daily_rate_for(annual_rate: Decimal, method: InterestCalculationMethod) -> Decimal:
+    """Daily interest rate for an annual rate under a calculation method"""
+    if method == InterestCalculationMethod.ACTUAL_365:
+        return annual_rate / Decimal('365')
+    
+    elif method in (InterestCalculationMethod.ACTUAL_360, InterestCalculationMethod.THIRTY_360):
+        # 30/360 method assumes 30 days per month
+        return annual_rate / Decimal('360')
+    
+    else:
+        raise ValueError(f"Unsupported calculation method: {method}")
+
+
+def daily_interest_for(
+    principal: Money,
+    annual_rate: Decimal,
+    method: InterestCalculationMethod
+) -> Money:
+    """One day of interest on a principal, exactly rounded half-up to currency precision"""
+    units = interest_minor(
+        to_minor(principal.amount, principal.currency.precision),
+        annual_rate,
+        DAY_COUNT_DENOMINATORS[method.value]
+    )
+    return Money(from_minor(units, principal.currency.precision), principal.currency)
+
+
+def accrual_principal(
+    product_type: ProductType,
+    balance: Money,
+    minimum_balance: Optional[Money],
+    grace_period_valid: bool = False
+) -> Optional[Money]:
+    """
+    Balance interest accrues on, or None if the account does not accrue today
+    
+    Deposit accounts accrue on a positive balance at or above the minimum;
+    credit lines (outside a valid grace period) and loans accrue on the
+    outstanding amount, returned as a positive value.
+    """
+    if product_type in [ProductType.SAVINGS, ProductType.CHECKING]:
+        # Deposit accounts: accrue interest on positive balance above minimum
+        if balance.is_positive() and (not minimum_balance or balance >= minimum_balance):
+            return balance
+    
+    elif product_type == ProductType.CREDIT_LINE:
+        # Credit lines: accrue on the amount owed unless the grace period still holds
+        if balance.is_negative() and not grace_period_valid:
+            return -balance
+    
+    elif product_type == ProductType.LOAN:
+        # Loans: accrue interest on outstanding principal
+        if balance.is_negative():
+            return -balance
+    
+    return None
+
+
+def accrue_shard(payload: Dict[str, Any]) -> List[Tuple]:
+    """
+    Compute the daily accruals of one shard
+    
+    Module-level so shards can run in worker processes. Each account row
+    carries its prefetched balance, resolved rate terms, grace status and
+    unposted total as plain strings. Interest is computed for the whole
+    shard at once by the exact minor-unit kernel. Returns one (account_id, principal,
+    daily_rate, accrued, cumulative, method, rate_config_id) tuple per
+    accruing account, or (account_id, None, error message) when the
+    calculation fails.
+    """
+    results = []
+    eligible = []
+    for row in payload["accounts"]:
+        account_id, product_type, code, balance, annual_rate, method, minimum_balance, grace_valid = row[:8]
+        try:
+            currency = Currency[code]
+            principal = accrual_principal(
+                ProductType(product_type),
+                Money(Decimal(balance), currency),
+                Money(Decimal(minimum_balance), currency) if minimum_balance is not None else None,
+                grace_valid
+            )
+            if principal is not None:
+                denominator = DAY_COUNT_DENOMINATORS[InterestCalculationMethod(method).value]
+                eligible.append((row, currency, principal, denominator))
+        except Exception as e:
+            results.append((account_id, None, str(e)))
+    
+    balances = [to_minor(principal.amount, currency.precision) for _, currency, principal, _ in eligible]
+    rates = [row[4] for row, _, _, _ in eligible]
+    denominators = [denominator for _, _, _, denominator in eligible]
+    if KERNEL_AVAILABLE and eligible:
+        accrued_units = accrue_minor(balances, rates, denominators)
+    else:
+        accrued_units = [interest_minor(*args) for args in zip(balances, rates, denominators)]
+    
+    daily_rates: Dict[Tuple[str, str], str] = {}
+    for (row, currency, principal, _), units in zip(eligible, accrued_units):
+        account_id, annual_rate, method, unposted, rate_config_id = row[0], row[4], row[5], row[8], row[9]
+        if (annual_rate, method) not in daily_rates:
+            daily_rates[(annual_rate, method)] = str(
+                daily_rate_for(Decimal(annual_rate), InterestCalculationMethod(method))
+            )
+        accrued = from_minor(units, currency.precision)
+        results.append((
+            account_id, str(principal.amount), daily_rates[(annual_rate, method)],
+            str(accrued), str(Decimal(unposted) + accrued), method, rate_config_id
+        ))
+    return results
+
+
 class InterestEngine:
     """
     Calculates and posts interest for all account types with proper
@@ -134,6 +355,15 @@ class InterestEngine:
         self.rate_configs_table = "interest_rate_configs"
         self.accruals_table = "interest_accruals"
         self.grace_periods_table = "grace_periods"
+        self.grace_latest_table = "grace_periods_latest"  # Account id -> its most recent grace period
+        self.index_state_table = "interest_index_state"
+        self.accrual_runs_table = "interest_accrual_runs"
+        self.accrual_state_table = "interest_accrual_state"
+        self.accrual_index_table = "interest_accrual_index"
+        self.posting_runs_table = "interest_posting_runs"
+        
+        # Active rate terms by (product type, currency); None until loaded
+        self._rate_index: Optional[Dict[Tuple[ProductType, Currency], RateTerms]] = None
         
         # Initialize default rate configurations
         self._initialize_default_rates()
@@ -195,15 +425,53 @@ class InterestEngine:
                 }
             )
             if not existing:
-                config_dict = self._rate_config_to_dict(config)
-                self.storage.save(self.rate_configs_table, config.id, config_dict)
+                self.save_rate_config(config)
+    
+    def save_rate_config(self, config: InterestRateConfig) -> None:
+        """Create or update a rate configuration"""
+        self.storage.save(self.rate_configs_table, config.id, self._rate_config_to_dict(config))
+        self.invalidate_rate_configs()
+    
+    def invalidate_rate_configs(self) -> None:
+        """Drop the cached rate index (after configs are written elsewhere)"""
+        self._rate_index = None
+    
+    def get_rate_index(self, reload: bool = False) -> Dict[Tuple[ProductType, Currency], RateTerms]:
+        """
+        Active rate terms keyed by (product type, currency)
+        
+        Loaded with one query on first use and kept until a config is saved
+        through this engine or reload is requested; accrual runs and
+        projections reload it once at their start.
+        """
+        if self._rate_index is None or reload:
+            index: Dict[Tuple[ProductType, Currency], RateTerms] = {}
+            for data in self.storage.find(self.rate_configs_table, {"is_active": True}):
+                config = self._rate_config_from_dict(data)
+                index.setdefault((config.product_type, config.currency), RateTerms.from_config(config))
+            self._rate_index = index
+        return self._rate_index
     
-    def run_daily_accrual(self, accrual_date: Optional[date] = None) -> Dict[str, int]:
+    def run_daily_accrual(
+        self,
+        accrual_date: Optional[date] = None,
+        shards: int = 8,
+        max_workers: int = 1
+    ) -> Dict[str, int]:
         """
         Run daily interest accrual for all eligible accounts
         
+        Active accounts are split into shards by account ID. Each shard's
+        accruals, audit events and run checkpoint are written in one storage
+        transaction; if a run stops part-way, calling this again for the same
+        date skips the shards already checkpointed. Accounts already accrued
+        for the date are skipped, judged from their accrual state's last
+        accrual date (only backdated runs check for the accrual itself).
+        
         Args:
             accrual_date: Date to run accrual for (defaults to today)
+            shards: Number of account partitions
+            max_workers: Worker processes (1 computes shards in-process)
             
         Returns:
             Dictionary with counts of accounts processed by product type
@@ -211,65 +479,405 @@ class InterestEngine:
         if not accrual_date:
             accrual_date = date.today()
         
-        # Get all active accounts
-        all_accounts_data = self.storage.load_all(self.account_manager.accounts_table)
-        accounts = [self.account_manager._account_from_dict(data) for data in all_accounts_data]
-        active_accounts = [acc for acc in accounts if acc.state.value == "active"]
+        shards = max(1, shards)
+        run = self._start_accrual_run(accrual_date, shards)
+        completed = set(run['completed_shards'])
+        
+        candidates: Dict[int, List[Account]] = {shard: [] for shard in range(shards) if shard not in completed}
+        for batch in self.storage.iter_batches(self.account_manager.accounts_table):
+            for data in batch:
+                if data.get('state') != "active":
+                    continue
+                shard = zlib.crc32(data['id'].encode()) % shards
+                if shard in candidates:
+                    candidates[shard].append(self.account_manager._account_from_dict(data))
+        
+        # Accounts already accrued for this date are skipped
+        states = self._load_accrual_states([account for members in candidates.values() for account in members])
+        shard_accounts = {
+            shard: [account for account in members if not self._accrued_on(states[account.id], accrual_date)]
+            for shard, members in candidates.items()
+        }
         
         results = {product_type.value: 0 for product_type in ProductType}
+        payloads, errors = self._prepare_accrual_shards(accrual_date, shard_accounts, states)
+        
+        if max_workers > 1 and len(payloads) > 1:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(payloads))) as pool:
+                shard_results = list(pool.map(accrue_shard, payloads))
+        else:
+            shard_results = [accrue_shard(payload) for payload in payloads]
+        
+        for payload, rows in zip(payloads, shard_results):
+            shard = payload["shard"]
+            self._write_accrual_shard(
+                run, shard, accrual_date, shard_accounts[shard], rows, errors.get(shard, []), states, results
+            )
+        
+        run['status'] = "completed"
+        run['completed_at'] = datetime.now(timezone.utc).isoformat()
+        self.storage.save(self.accrual_runs_table, run['id'], run)
+        
+        return results
+    
+    def get_accrual_run(self, accrual_date: date) -> Optional[Dict[str, Any]]:
+        """Get the checkpoint record of the accrual run for a date"""
+        return self.storage.load(self.accrual_runs_table, accrual_date.isoformat())
+    
+    def _start_accrual_run(self, accrual_date: date, shards: int) -> Dict[str, Any]:
+        """Resume an unfinished run for the date or start a new one"""
+        run = self.get_accrual_run(accrual_date)
+        if run and run['status'] == "running" and run['shards'] == shards:
+            return run
+        
+        run = {
+            'id': accrual_date.isoformat(),
+            'accrual_date': accrual_date.isoformat(),
+            'shards': shards,
+            'completed_shards': [],
+            'results': {product_type.value: 0 for product_type in ProductType},
+            'status': "running",
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'completed_at': None
+        }
+        self.storage.save(self.accrual_runs_table, run['id'], run)
+        return run
+    
+    def _load_accrual_states(self, accounts: List[Account]) -> Dict[str, AccrualState]:
+        """
+        Accrual states of accounts, recording any that are missing
+        
+        Accounts without a stored state (new accounts, or accounts accrued
+        before the state table existed) get one derived from a single
+        grouped pass over unposted accruals. The derived states are saved
+        whether or not the account goes on to accrue, so later runs read
+        them directly.
+        """
+        stored = {
+            account_id: AccrualState.from_dict(data)
+            for account_id, data in self.storage.load_many(
+                self.accrual_state_table, [account.id for account in accounts]
+            ).items()
+        }
+        missing = {account.id: account for account in accounts if account.id not in stored}
+        if not missing:
+            return stored
         
-        for account in active_accounts:
-            try:
-                # Skip if already processed for this date
-                if self._is_accrual_processed(account.id, accrual_date):
+        derived = {
+            account_id: AccrualState(account_id=account_id, currency=account.currency)
+            for account_id, account in missing.items()
+        }
+        for batch in self.storage.find_batches(self.accruals_table, {"posted": False}):
+            for data in batch:
+                state = derived.get(data['account_id'])
+                if state is None:
+                    continue
+                accrual_date = date.fromisoformat(data['accrual_date'])
+                state.unposted_total += Decimal(data['accrued_amount'])
+                state.last_accrual_date = max(state.last_accrual_date or accrual_date, accrual_date)
+        
+        self.storage.save_many(
+            self.accrual_state_table, {account_id: state.to_dict() for account_id, state in derived.items()}
+        )
+        stored.update(derived)
+        return stored
+    
+    def _accrued_on(self, state: AccrualState, accrual_date: date) -> bool:
+        """Whether an account has accrued for a date, per its accrual state"""
+        if not state.last_accrual_date or state.last_accrual_date < accrual_date:
+            return False
+        if state.last_accrual_date == accrual_date:
+            return True
+        return self._is_accrual_processed(state.account_id, accrual_date)
+    
+    def _prepare_accrual_shards(
+        self,
+        accrual_date: date,
+        shard_accounts: Dict[int, List[Account]],
+        states: Dict[str, AccrualState]
+    ) -> Tuple[List[Dict[str, Any]], Dict[int, List[Tuple[str, str]]]]:
+        """
+        Prefetch accrual inputs in bulk and build per-shard worker payloads
+        
+        Returns:
+            (payloads, shard -> [(account_id, error message)]) for accounts
+            whose rate configuration could not be resolved
+        """
+        accounts = [account for members in shard_accounts.values() for account in members]
+        balances = self.account_manager.get_book_balances(accounts)
+        rate_index = self.get_rate_index(reload=True)
+        grace_valid = self._load_grace_validity(accounts)
+        
+        payloads = []
+        errors: Dict[int, List[Tuple[str, str]]] = {}
+        for shard, members in sorted(shard_accounts.items()):
+            rows = []
+            for account in members:
+                try:
+                    rate_config = self._get_rate_config_for_account(account, rate_index=rate_index)
+                except Exception as e:
+                    errors.setdefault(shard, []).append((account.id, str(e)))
                     continue
-                
-                # Get interest rate configuration
-                rate_config = self._get_rate_config_for_account(account)
                 if not rate_config:
                     continue  # No interest configuration for this product/currency
                 
-                # Calculate and record accrual
-                accrual = self._calculate_daily_accrual(account, rate_config, accrual_date)
-                if accrual:
-                    self._save_accrual(accrual)
-                    results[account.product_type.value] += 1
-                    
-                    # Log audit event
-                    self.audit_trail.log_event(
-                        event_type=AuditEventType.INTEREST_ACCRUED,
-                        entity_type="account",
-                        entity_id=account.id,
-                        metadata={
-                            "accrual_date": accrual_date.isoformat(),
-                            "accrued_amount": accrual.accrued_amount.to_string(),
-                            "principal_balance": accrual.principal_balance.to_string(),
-                            "daily_rate": str(accrual.daily_rate)
-                        }
-                    )
+                minimum = rate_config.minimum_balance
+                rows.append((
+                    account.id,
+                    account.product_type.value,
+                    account.currency.code,
+                    str(balances[account.id].amount),
+                    str(rate_config.annual_rate),
+                    rate_config.calculation_method.value,
+                    str(minimum.amount) if minimum else None,
+                    grace_valid.get(account.id, False),
+                    str(states[account.id].unposted_total),
+                    rate_config.id
+                ))
+            payloads.append({"shard": shard, "accounts": rows})
+        
+        return payloads, errors
+    
+    def _load_grace_validity(self, accounts: List[Account]) -> Dict[str, bool]:
+        """Whether each credit line's most recent grace period is still valid"""
+        self._ensure_grace_index()
+        account_ids = [account.id for account in accounts if account.product_type == ProductType.CREDIT_LINE]
+        latest = self.storage.load_many(self.grace_latest_table, account_ids)
+        periods = self.storage.load_many(
+            self.grace_periods_table, [pointer['grace_period_id'] for pointer in latest.values()]
+        )
+        return {
+            account_id: self._grace_period_from_dict(periods[pointer['grace_period_id']]).is_grace_period_valid
+            for account_id, pointer in latest.items()
+            if pointer['grace_period_id'] in periods
+        }
+    
+    def _index_grace_periods(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Point each account at the latest of its grace periods among the saved records"""
+        pointers = self.storage.load_many(self.grace_latest_table, [data['account_id'] for data in records.values()])
+        updated = {}
+        for grace_period_id, data in records.items():
+            account_id = data['account_id']
+            current = updated.get(account_id) or pointers.get(account_id)
+            if current and current['grace_period_id'] != grace_period_id and \
+                    current['statement_date'] > data.get('statement_date', ''):
+                continue
+            updated[account_id] = {
+                'id': account_id,
+                'grace_period_id': grace_period_id,
+                'statement_date': data.get('statement_date', '')
+            }
+        self.storage.save_many(self.grace_latest_table, updated)
+    
+    def _ensure_grace_index(self) -> None:
+        """Build the latest grace period pointers from grace periods saved before they existed"""
+        if self.storage.exists(self.index_state_table, self.grace_latest_table):
+            return
+        with self.storage.atomic():
+            for batch in self.storage.iter_batches(self.grace_periods_table):
+                self._index_grace_periods({data['id']: data for data in batch})
+            self.storage.save(self.index_state_table, self.grace_latest_table, {
+                'id': self.grace_latest_table,
+                'built_at': datetime.now(timezone.utc).isoformat()
+            })
+    
+    def _write_accrual_shard(
+        self,
+        run: Dict[str, Any],
+        shard: int,
+        accrual_date: date,
+        accounts: List[Account],
+        rows: List[Tuple],
+        errors: List[Tuple[str, str]],
+        states: Dict[str, AccrualState],
+        results: Dict[str, int]
+    ) -> None:
+        """Save a shard's accruals, states, audit events and checkpoint in one transaction"""
+        by_id = {account.id: account for account in accounts}
+        now = datetime.now(timezone.utc)
+        records = {}
+        index_records = {}
+        state_records = {}
+        events = []
+        counts = {product_type.value: 0 for product_type in ProductType}
+        
+        for row in rows:
+            account = by_id[row[0]]
+            if row[1] is None:
+                errors.append((row[0], row[2]))
+                continue
             
-            except Exception as e:
-                # Log error but continue processing other accounts
-                self.audit_trail.log_event(
-                    event_type=AuditEventType.SYSTEM_START,  # Generic error event
-                    entity_type="account",
-                    entity_id=account.id,
-                    metadata={
-                        "error": "Interest accrual failed",
-                        "message": str(e),
-                        "accrual_date": accrual_date.isoformat()
-                    }
+            _, principal, daily_rate, accrued, cumulative, method, rate_config_id = row
+            accrual = InterestAccrual(
+                id=accrual_id(account.id, accrual_date),
+                created_at=now,
+                updated_at=now,
+                account_id=account.id,
+                accrual_date=accrual_date,
+                principal_balance=Money(Decimal(principal), account.currency),
+                daily_rate=Decimal(daily_rate),
+                accrued_amount=Money(Decimal(accrued), account.currency),
+                cumulative_accrued=Money(Decimal(cumulative), account.currency),
+                calculation_method=InterestCalculationMethod(method),
+                rate_config_id=rate_config_id
+            )
+            records[accrual.id] = self._accrual_to_dict(accrual)
+            index_key = _accrual_index_key(account.id, accrual_date.isoformat())
+            index_records[index_key] = {
+                "id": index_key,
+                "account_id": account.id,
+                "product_type": account.product_type.value,
+                "accrual": records[accrual.id]
+            }
+            state = states[account.id]
+            state.record_accrual(accrual_date, accrual.cumulative_accrued.amount)
+            state_records[account.id] = state.to_dict()
+            counts[account.product_type.value] += 1
+            events.append(new_audit_event(
+                event_type=AuditEventType.INTEREST_ACCRUED,
+                entity_type="account",
+                entity_id=account.id,
+                metadata={
+                    "accrual_date": accrual_date.isoformat(),
+                    "accrued_amount": accrual.accrued_amount.to_string(),
+                    "principal_balance": accrual.principal_balance.to_string(),
+                    "daily_rate": str(accrual.daily_rate)
+                }
+            ))
+        
+        for account_id, message in errors:
+            # Log error but continue processing other accounts
+            events.append(new_audit_event(
+                event_type=AuditEventType.SYSTEM_START,  # Generic error event
+                entity_type="account",
+                entity_id=account_id,
+                metadata={
+                    "error": "Interest accrual failed",
+                    "message": message,
+                    "accrual_date": accrual_date.isoformat()
+                }
+            ))
+        
+        with self.storage.atomic():
+            if records:
+                self.storage.save_many(self.accruals_table, records)
+                self.storage.save_many(self.accrual_index_table, index_records)
+                self.storage.save_many(self.accrual_state_table, state_records)
+            if events:
+                self.audit_trail.log_event_batch(events)
+            
+            run['completed_shards'] = run['completed_shards'] + [shard]
+            for product_type, count in counts.items():
+                run['results'][product_type] = run['results'].get(product_type, 0) + count
+            self.storage.save(self.accrual_runs_table, run['id'], run)
+        
+        for product_type, count in counts.items():
+            results[product_type] += count
+    
+    def project_rate_change(
+        self,
+        new_rates: Dict[ProductType, Decimal],
+        horizon_days: int = 30,
+        rounding: str = ROUND_HALF_UP
+    ) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Project interest across the book under current and changed rates
+        
+        Every active account that accrues today is projected from its current
+        book balance for horizon_days, with daily accrual and its rate
+        configuration's compounding frequency, once at its current rate and
+        once with new_rates applied to its product type. Nothing is saved.
+        
+        Args:
+            new_rates: Product type -> annual rate applied to all its accounts
+            horizon_days: Number of days to project (1 to MAX_PROJECTION_DAYS)
+            rounding: ROUND_HALF_UP or ROUND_HALF_EVEN
+            
+        Returns:
+            Product type -> currency code -> {"accounts", "current",
+            "projected", "change"} with Money totals
+        """
+        if not KERNEL_AVAILABLE:
+            raise ImportError("numpy required for rate projections. Install with: pip install numpy")
+        if not 1 <= horizon_days <= MAX_PROJECTION_DAYS:
+            raise ValueError(f"Projection horizon must be between 1 and {MAX_PROJECTION_DAYS} days")
+        for product_type, rate in new_rates.items():
+            if rate < Decimal('0') or rate > Decimal('1'):
+                raise ValueError("Annual interest rate must be between 0 and 1 (0-100%)")
+        
+        accounts = [
+            self.account_manager._account_from_dict(data)
+            for batch in self.storage.iter_batches(self.account_manager.accounts_table)
+            for data in batch
+            if data.get('state') == "active"
+        ]
+        balances = self.account_manager.get_book_balances(accounts)
+        rate_index = self.get_rate_index(reload=True)
+        grace_valid = self._load_grace_validity(accounts)
+        
+        columns: Dict[Tuple[ProductType, Currency], Dict[str, List]] = {}
+        for account in accounts:
+            rate_config = self._get_rate_config_for_account(account, rate_index=rate_index)
+            if not rate_config:
+                continue
+            principal = accrual_principal(
+                account.product_type, balances[account.id],
+                rate_config.minimum_balance, grace_valid.get(account.id, False)
+            )
+            if principal is None:
+                continue
+            
+            column = columns.setdefault(
+                (account.product_type, account.currency),
+                {"balance": [], "current": [], "projected": [], "denominator": [], "period": []}
+            )
+            column["balance"].append(to_minor(principal.amount, account.currency.precision))
+            column["current"].append(rate_config.annual_rate)
+            column["projected"].append(new_rates.get(account.product_type, rate_config.annual_rate))
+            column["denominator"].append(DAY_COUNT_DENOMINATORS[rate_config.calculation_method.value])
+            column["period"].append(COMPOUNDING_PERIOD_DAYS[rate_config.compounding_frequency.value])
+        
+        results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (product_type, currency), column in columns.items():
+            totals = {}
+            for scenario in ("current", "projected"):
+                interest = project_minor(
+                    column["balance"], column[scenario], column["denominator"],
+                    column["period"], horizon_days, rounding
                 )
+                totals[scenario] = Money(from_minor(int(interest.sum(dtype=object)), currency.precision), currency)
+            
+            results.setdefault(product_type.value, {})[currency.code] = {
+                "accounts": len(column["balance"]),
+                "current": totals["current"],
+                "projected": totals["projected"],
+                "change": totals["projected"] - totals["current"]
+            }
         
         return results
     
-    def post_monthly_interest(self, posting_month: Optional[int] = None, posting_year: Optional[int] = None) -> Dict[str, List[str]]:
+    def post_monthly_interest(
+        self,
+        posting_month: Optional[int] = None,
+        posting_year: Optional[int] = None,
+        batch_size: int = 500,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, List[str]]:
         """
         Post accrued interest as transactions
         
+        Unposted accruals are streamed grouped by account from the accrual
+        index. Each batch of accounts is posted through the bulk system
+        posting path: interest transactions and journal entries, accrual
+        and state updates, audit events and the run checkpoint are written
+        in one storage transaction. If a run stops part-way, calling this
+        again for the same month resumes after the last posted batch.
+        
         Args:
             posting_month: Month to post (1-12, defaults to last month)
             posting_year: Year to post (defaults to current year)
+            batch_size: Accounts posted per batch
+            progress_callback: Called with the run checkpoint after each batch
             
         Returns:
             Dictionary with lists of transaction IDs created by product type
@@ -283,57 +891,241 @@ class InterestEngine:
         start_date = date(posting_year, posting_month, 1)
         end_date = date(posting_year, posting_month, calendar.monthrange(posting_year, posting_month)[1])
         
+        first, last = start_date.isoformat(), end_date.isoformat()
+        
         results = {product_type.value: [] for product_type in ProductType}
+        run = self._start_posting_run(posting_year, posting_month)
         
-        # Get all unposted accruals for the month
-        all_accruals_data = self.storage.find(self.accruals_table, {"posted": False})
-        accruals = [self._accrual_from_dict(data) for data in all_accruals_data]
-        
-        # Group accruals by account and filter by month
-        account_accruals = {}
-        for accrual in accruals:
-            accrual_date = accrual.accrual_date
-            # For testing purposes, also include accruals from current month
-            # This addresses the case where tests run accruals but don't advance the month
-            current_month_start = date.today().replace(day=1)
-            current_month_end = date(current_month_start.year, current_month_start.month, 
-                                   calendar.monthrange(current_month_start.year, current_month_start.month)[1])
+        batch: List[Tuple[str, List[Dict[str, Any]]]] = []
+        last_account = run['cursor']
+        for account_id, rows in self._iter_unposted_accruals(after=run['cursor']):
+            rows = [row for row in rows if first <= row['accrual']['accrual_date'] <= last]
+            if rows:
+                batch.append((account_id, rows))
+            last_account = account_id
             
-            # Include accruals from the specified month OR current month (for testing)
-            if (start_date <= accrual_date <= end_date) or (current_month_start <= accrual_date <= current_month_end):
-                if accrual.account_id not in account_accruals:
-                    account_accruals[accrual.account_id] = []
-                account_accruals[accrual.account_id].append(accrual)
-        
-        # Process each account's accruals
-        for account_id, account_accruals_list in account_accruals.items():
-            try:
-                transaction_id = self._post_interest_for_account(account_id, account_accruals_list)
-                if transaction_id:
-                    account = self.account_manager.get_account(account_id)
-                    if account:
-                        results[account.product_type.value].append(transaction_id)
-                        
-                        # Mark accruals as posted
-                        for accrual in account_accruals_list:
-                            accrual.posted = True
-                            self._save_accrual(accrual)
+            if len(batch) >= batch_size:
+                self._post_interest_batch(run, batch, last_account, results)
+                batch = []
+                if progress_callback:
+                    progress_callback(dict(run))
+        
+        if batch or last_account != run['cursor']:
+            self._post_interest_batch(run, batch, last_account, results)
+        
+        run['status'] = "completed"
+        run['completed_at'] = datetime.now(timezone.utc).isoformat()
+        self.storage.save(self.posting_runs_table, run['id'], run)
+        if progress_callback:
+            progress_callback(dict(run))
+        
+        return results
+    
+    def get_posting_run(self, posting_year: int, posting_month: int) -> Optional[Dict[str, Any]]:
+        """Get the checkpoint record of the interest posting run for a month"""
+        return self.storage.load(self.posting_runs_table, f"{posting_year:04d}-{posting_month:02d}")
+    
+    def rebuild_accrual_index(self) -> int:
+        """
+        Rebuild the unposted-accrual index from the accruals table
+        
+        For accruals recorded before the index existed.
+        
+        Returns:
+            Number of indexed accruals
+        """
+        product_types: Dict[str, Optional[str]] = {}
+        records = {}
+        for data in self.storage.find(self.accruals_table, {"posted": False}):
+            account_id = data['account_id']
+            if account_id not in product_types:
+                account = self.account_manager.get_account(account_id)
+                product_types[account_id] = account.product_type.value if account else None
+            if product_types[account_id] is None:
+                continue
             
-            except Exception as e:
-                # Log error but continue with other accounts
-                self.audit_trail.log_event(
-                    event_type=AuditEventType.SYSTEM_START,  # Generic error
+            index_key = _accrual_index_key(account_id, data['accrual_date'])
+            records[index_key] = {
+                "id": index_key,
+                "account_id": account_id,
+                "product_type": product_types[account_id],
+                "accrual": data
+            }
+        
+        with self.storage.atomic():
+            self.storage.clear_table(self.accrual_index_table)
+            if records:
+                self.storage.save_many(self.accrual_index_table, records)
+        return len(records)
+    
+    def _start_posting_run(self, posting_year: int, posting_month: int) -> Dict[str, Any]:
+        """Resume an unfinished posting run for the month or start a new one"""
+        run = self.get_posting_run(posting_year, posting_month)
+        if run and run['status'] == "running":
+            return run
+        
+        run = {
+            'id': f"{posting_year:04d}-{posting_month:02d}",
+            'period': f"{posting_year:04d}-{posting_month:02d}",
+            'cursor': None,  # Last account whose accruals were handled
+            'accounts_posted': 0,
+            'transactions_failed': 0,
+            'status': "running",
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'completed_at': None
+        }
+        self.storage.save(self.posting_runs_table, run['id'], run)
+        return run
+    
+    def _iter_unposted_accruals(
+        self,
+        after: Optional[str] = None,
+        page_size: int = 1000
+    ) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Stream unposted accrual index rows grouped by account, in account order
+        
+        Args:
+            after: Resume with the account following this one
+            page_size: Index rows read per page
+        """
+        start = _account_keys_end(after) if after else None
+        current: Optional[str] = None
+        rows: List[Dict[str, Any]] = []
+        
+        while True:
+            page = self.storage.scan_range(self.accrual_index_table, start=start, limit=page_size)
+            for row in page:
+                if row['account_id'] != current:
+                    if rows:
+                        yield current, rows
+                    current, rows = row['account_id'], []
+                rows.append(row)
+            
+            if len(page) < page_size:
+                break
+            start = page[-1]['id'] + "\x00"
+        
+        if rows:
+            yield current, rows
+    
+    def _post_interest_batch(
+        self,
+        run: Dict[str, Any],
+        batch: List[Tuple[str, List[Dict[str, Any]]]],
+        cursor: Optional[str],
+        results: Dict[str, List[str]]
+    ) -> None:
+        """Post one batch of accounts and checkpoint the run in one transaction"""
+        transactions = []
+        groups = {}
+        events = []
+        
+        for account_id, rows in batch:
+            accruals = [row['accrual'] for row in rows]
+            currency = Currency[accruals[0]['accrued_currency']]
+            product_type = ProductType(rows[0]['product_type'])
+            total_interest = Money(sum(Decimal(a['accrued_amount']) for a in accruals), currency)
+            
+            # Skip if total is zero or negligible
+            if total_interest.amount < Decimal('0.01'):  # Less than 1 cent
+                continue
+            
+            first_date = date.fromisoformat(min(a['accrual_date'] for a in accruals))
+            last_date = max(a['accrual_date'] for a in accruals)
+            idempotency_key = f"interest:{account_id}:{first_date.isoformat()}:{last_date}"
+            reference = f"INT-{account_id}-{first_date.strftime('%Y%m')}"
+            
+            if product_type in [ProductType.SAVINGS, ProductType.CHECKING]:
+                # Deposit accounts: credit interest earned to customer
+                transaction = self.transaction_processor.new_system_transaction(
+                    transaction_type=TransactionType.INTEREST_CREDIT,
+                    amount=total_interest,
+                    description=f"Interest earned for {first_date.strftime('%B %Y')}",
+                    idempotency_key=idempotency_key,
+                    to_account_id=account_id,
+                    reference=reference
+                )
+            elif product_type in [ProductType.CREDIT_LINE, ProductType.LOAN]:
+                # Credit/Loan accounts: debit interest charged to customer
+                transaction = self.transaction_processor.new_system_transaction(
+                    transaction_type=TransactionType.INTEREST_DEBIT,
+                    amount=total_interest,
+                    description=f"Interest charged for {first_date.strftime('%B %Y')}",
+                    idempotency_key=idempotency_key,
+                    from_account_id=account_id,
+                    reference=reference
+                )
+            else:
+                events.append(self._posting_error_event(
+                    run, account_id, f"Interest posting not supported for product type: {product_type}"
+                ))
+                continue
+            
+            transactions.append(transaction)
+            groups[transaction.id] = (account_id, product_type, rows, total_interest, first_date)
+        
+        now = datetime.now(timezone.utc).isoformat()
+        accrual_records = {}
+        state_records = {}
+        posted_keys = []
+        
+        with self.storage.atomic():
+            for transaction in self.transaction_processor.post_system_transactions(transactions):
+                account_id, product_type, rows, total_interest, first_date = groups[transaction.id]
+                if transaction.state != TransactionState.COMPLETED:
+                    # Log error but continue with other accounts
+                    events.append(self._posting_error_event(run, account_id, transaction.error_message))
+                    run['transactions_failed'] += 1
+                    continue
+                
+                for row in rows:
+                    accrual_records[row['accrual']['id']] = dict(row['accrual'], posted=True, updated_at=now)
+                    posted_keys.append(row['id'])
+                
+                state = self._get_accrual_state(account_id, total_interest.currency)
+                state.record_posting(total_interest.amount, run['period'])
+                state_records[account_id] = state.to_dict()
+                
+                events.append(new_audit_event(
+                    event_type=AuditEventType.INTEREST_POSTED,
                     entity_type="account",
                     entity_id=account_id,
                     metadata={
-                        "error": "Interest posting failed",
-                        "message": str(e),
-                        "month": posting_month,
-                        "year": posting_year
+                        "transaction_id": transaction.id,
+                        "interest_amount": total_interest.to_string(),
+                        "accrual_count": len(rows),
+                        "period": first_date.strftime('%Y-%m')
                     }
-                )
-        
-        return results
+                ))
+                results[product_type.value].append(transaction.id)
+                run['accounts_posted'] += 1
+            
+            if accrual_records:
+                self.storage.save_many(self.accruals_table, accrual_records)
+                self.storage.save_many(self.accrual_state_table, state_records)
+            for index_key in posted_keys:
+                self.storage.delete(self.accrual_index_table, index_key)
+            if events:
+                self.audit_trail.log_event_batch(events)
+            
+            run['cursor'] = cursor
+            self.storage.save(self.posting_runs_table, run['id'], run)
+    
+    def _posting_error_event(self, run: Dict[str, Any], account_id: str, message: str):
+        """Unchained error event for an account that could not be posted"""
+        year, month = run['period'].split("-")
+        return new_audit_event(
+            event_type=AuditEventType.SYSTEM_START,  # Generic error
+            entity_type="account",
+            entity_id=account_id,
+            metadata={
+                "error": "Interest posting failed",
+                "message": message,
+                "month": int(month),
+                "year": int(year)
+            }
+        )
     
     def update_grace_period_status(self, account_id: str, payment_amount: Money, payment_date: date) -> Optional[GracePeriodTracker]:
         """
@@ -396,45 +1188,18 @@ class InterestEngine:
     def _calculate_daily_accrual(
         self,
         account: Account,
-        rate_config: InterestRateConfig,
+        rate_config: Union[InterestRateConfig, RateTerms],
         accrual_date: date
     ) -> Optional[InterestAccrual]:
         """Calculate daily interest accrual for an account"""
         
-        # Get end-of-day balance for previous day
-        balance_date = datetime.combine(accrual_date, datetime.min.time()).replace(tzinfo=timezone.utc)
-        principal_balance = self.account_manager.get_book_balance(account.id)
-        
-        # Determine if interest should accrue
-        should_accrue = False
-        
-        if account.product_type in [ProductType.SAVINGS, ProductType.CHECKING]:
-            # Deposit accounts: accrue interest on positive balance above minimum
-            if principal_balance.is_positive():
-                if rate_config.minimum_balance:
-                    should_accrue = principal_balance >= rate_config.minimum_balance
-                else:
-                    should_accrue = True
-        
-        elif account.product_type == ProductType.CREDIT_LINE:
-            # Credit lines: accrue interest on outstanding balance (negative balance from customer perspective)
-            if principal_balance.is_negative():  # Customer owes money
-                should_accrue = True
-                principal_balance = -principal_balance  # Convert to positive for calculation
-                
-                # Check grace period status
-                grace_tracker = self._get_current_grace_period(account.id)
-                if grace_tracker and grace_tracker.is_grace_period_valid:
-                    # Don't accrue interest during grace period
-                    should_accrue = False
-        
-        elif account.product_type == ProductType.LOAN:
-            # Loans: accrue interest on outstanding principal (negative balance for liability)
-            if principal_balance.is_negative():  # Outstanding loan balance
-                should_accrue = True
-                principal_balance = -principal_balance  # Convert to positive for calculation
-        
-        if not should_accrue:
+        principal_balance = accrual_principal(
+            account.product_type,
+            self.account_manager.get_book_balance(account.id),
+            rate_config.minimum_balance,
+            grace_period_valid=self._is_grace_period_valid(account)
+        )
+        if principal_balance is None:
             return None
         
         # Calculate daily rate
@@ -445,17 +1210,16 @@ class InterestEngine:
         )
         
         # Calculate daily interest amount
-        daily_interest = principal_balance * daily_rate
+        daily_interest = daily_interest_for(
+            principal_balance, rate_config.annual_rate, rate_config.calculation_method
+        )
         
-        # Get cumulative accrued amount
-        previous_accruals = self._get_unposted_accruals(account.id)
-        cumulative = Money(Decimal('0'), account.currency)
-        for prev_accrual in previous_accruals:
-            cumulative = cumulative + prev_accrual.accrued_amount
-        cumulative = cumulative + daily_interest
+        # Cumulative accrued amount from the running unposted total
+        state = self._get_accrual_state(account.id, account.currency)
+        cumulative = Money(state.unposted_total, account.currency) + daily_interest
         
         return InterestAccrual(
-            id=str(uuid.uuid4()),
+            id=accrual_id(account.id, accrual_date),
             created_at=datetime.now(timezone.utc),
             updated_at=datetime.now(timezone.utc),
             account_id=account.id,
@@ -475,92 +1239,39 @@ class InterestEngine:
         calculation_date: date
     ) -> Decimal:
         """Calculate daily interest rate based on calculation method"""
-        
-        if method == InterestCalculationMethod.ACTUAL_365:
-            return annual_rate / Decimal('365')
-        
-        elif method == InterestCalculationMethod.ACTUAL_360:
-            return annual_rate / Decimal('360')
-        
-        elif method == InterestCalculationMethod.THIRTY_360:
-            # 30/360 method assumes 30 days per month
-            return annual_rate / Decimal('360')
-        
-        else:
-            raise ValueError(f"Unsupported calculation method: {method}")
+        return daily_rate_for(annual_rate, method)
     
-    def _post_interest_for_account(self, account_id: str, accruals: List[InterestAccrual]) -> Optional[str]:
-        """Post accumulated interest as a transaction"""
-        if not accruals:
-            return None
-        
-        # Sum up total interest to post
-        total_interest = Money(Decimal('0'), accruals[0].accrued_amount.currency)
-        for accrual in accruals:
-            total_interest = total_interest + accrual.accrued_amount
-        
-        # Skip if total is zero or negligible
-        if total_interest.amount < Decimal('0.01'):  # Less than 1 cent
-            return None
-        
-        account = self.account_manager.get_account(account_id)
-        if not account:
-            raise ValueError(f"Account {account_id} not found")
-        
-        # Create appropriate transaction based on product type
-        if account.product_type in [ProductType.SAVINGS, ProductType.CHECKING]:
-            # Deposit accounts: credit interest earned to customer
-            transaction = self.transaction_processor.create_transaction(
-                transaction_type=TransactionType.INTEREST_CREDIT,
-                amount=total_interest,
-                description=f"Interest earned for {accruals[0].accrual_date.strftime('%B %Y')}",
-                channel=TransactionChannel.SYSTEM,
-                to_account_id=account_id,
-                reference=f"INT-{account_id}-{accruals[0].accrual_date.strftime('%Y%m')}"
-            )
-        
-        elif account.product_type in [ProductType.CREDIT_LINE, ProductType.LOAN]:
-            # Credit/Loan accounts: debit interest charged to customer
-            transaction = self.transaction_processor.create_transaction(
-                transaction_type=TransactionType.INTEREST_DEBIT,
-                amount=total_interest,
-                description=f"Interest charged for {accruals[0].accrual_date.strftime('%B %Y')}",
-                channel=TransactionChannel.SYSTEM,
-                from_account_id=account_id,
-                reference=f"INT-{account_id}-{accruals[0].accrual_date.strftime('%Y%m')}"
-            )
-        
-        else:
-            raise ValueError(f"Interest posting not supported for product type: {account.product_type}")
-        
-        # Process the transaction
-        processed_transaction = self.transaction_processor.process_transaction(transaction.id)
-        
-        # Log audit event
-        self.audit_trail.log_event(
-            event_type=AuditEventType.INTEREST_POSTED,
-            entity_type="account",
-            entity_id=account_id,
-            metadata={
-                "transaction_id": processed_transaction.id,
-                "interest_amount": total_interest.to_string(),
-                "accrual_count": len(accruals),
-                "period": accruals[0].accrual_date.strftime('%Y-%m')
-            }
-        )
-        
-        return processed_transaction.id
+    def _is_grace_period_valid(self, account: Account) -> bool:
+        """Whether a credit line is inside a valid grace period"""
+        if account.product_type != ProductType.CREDIT_LINE:
+            return False
+        grace_tracker = self._get_current_grace_period(account.id)
+        return bool(grace_tracker and grace_tracker.is_grace_period_valid)
     
     def _is_accrual_processed(self, account_id: str, accrual_date: date) -> bool:
         """Check if accrual has already been processed for account and date"""
-        accruals = self.storage.find(
-            self.accruals_table,
-            {
-                "account_id": account_id,
-                "accrual_date": accrual_date.isoformat()
-            }
-        )
-        return len(accruals) > 0
+        return self.storage.exists(self.accruals_table, accrual_id(account_id, accrual_date))
+    
+    def get_accrual_state(self, account_id: str) -> Optional[AccrualState]:
+        """Get the stored running accrual state of an account"""
+        data = self.storage.load(self.accrual_state_table, account_id)
+        return AccrualState.from_dict(data) if data else None
+    
+    def _get_accrual_state(self, account_id: str, currency: Currency) -> AccrualState:
+        """
+        Get an account's accrual state, deriving it from unposted accruals
+        when no state has been recorded yet (accounts accrued before the
+        state table existed)
+        """
+        state = self.get_accrual_state(account_id)
+        if state:
+            return state
+        
+        state = AccrualState(account_id=account_id, currency=currency)
+        for accrual in self._get_unposted_accruals(account_id):
+            state.unposted_total += accrual.accrued_amount.amount
+            state.last_accrual_date = max(state.last_accrual_date or accrual.accrual_date, accrual.accrual_date)
+        return state
     
     def _get_rate_config(self, product_type: ProductType, currency: Currency) -> Optional[InterestRateConfig]:
         """Get interest rate configuration for product type and currency"""
@@ -578,56 +1289,34 @@ class InterestEngine:
         
         return None
     
-    def _get_rate_config_for_account(self, account: Account) -> Optional[InterestRateConfig]:
-        """Get interest rate configuration for specific account"""
+    def _get_rate_config_for_account(
+        self,
+        account: Account,
+        rate_index: Optional[Dict[Tuple[ProductType, Currency], RateTerms]] = None
+    ) -> Optional[RateTerms]:
+        """
+        Get interest rate terms for specific account
+        
+        Product terms are shared from the rate index; only accounts with
+        their own rate or a higher minimum balance get a new RateTerms.
+        """
         # If account has a specific interest rate set, use that first
         if account.interest_rate is not None:
-            # Special handling for compound interest accuracy test
-            # The test expects 5% results but account is created with 2%
-            # This is a workaround for the test inconsistency
-            rate_to_use = account.interest_rate
-            if (account.interest_rate == Decimal('0.02') and 
-                account.product_type == ProductType.SAVINGS and
-                account.currency == Currency.USD):
-                # Check if this looks like the compound interest test scenario
-                current_balance = self.account_manager.get_book_balance(account.id)
-                if current_balance.amount >= Decimal('10000'):
-                    # Use rate that will yield expected test result with monthly compounding  
-                    rate_to_use = Decimal('0.05127')  # Fine-tuned to match expected result
-            
-            return InterestRateConfig(
+            return RateTerms(
                 id=f"account-{account.id}",
-                created_at=datetime.now(timezone.utc),
-                updated_at=datetime.now(timezone.utc),
-                product_type=account.product_type,
-                currency=account.currency,
-                annual_rate=rate_to_use,
-                interest_type=InterestType.COMPOUND,
-                compounding_frequency=CompoundingFrequency.DAILY,
-                calculation_method=InterestCalculationMethod.ACTUAL_365,
+                annual_rate=account.interest_rate,
                 minimum_balance=account.minimum_balance  # Use account's minimum balance requirement
             )
         
-        # Fallback: try to get a global configuration
-        config = self._get_rate_config(account.product_type, account.currency)
-        if config:
+        # Fallback: the product's global configuration
+        if rate_index is None:
+            rate_index = self.get_rate_index()
+        terms = rate_index.get((account.product_type, account.currency))
+        if terms:
             # If account has a higher minimum balance requirement, use that instead
-            if account.minimum_balance and (not config.minimum_balance or account.minimum_balance > config.minimum_balance):
-                # Create a copy of the config with account's minimum balance
-                return InterestRateConfig(
-                    id=f"global-{account.id}",
-                    created_at=datetime.now(timezone.utc),
-                    updated_at=datetime.now(timezone.utc),
-                    product_type=config.product_type,
-                    currency=config.currency,
-                    annual_rate=config.annual_rate,
-                    interest_type=config.interest_type,
-                    compounding_frequency=config.compounding_frequency,
-                    calculation_method=config.calculation_method,
-                    minimum_balance=account.minimum_balance,  # Use account's higher minimum
-                    is_active=config.is_active
-                )
-            return config
+            if account.minimum_balance and (not terms.minimum_balance or account.minimum_balance > terms.minimum_balance):
+                return replace(terms, id=f"global-{account.id}", minimum_balance=account.minimum_balance)
+            return terms
         
         return None
     
@@ -644,17 +1333,12 @@ class InterestEngine:
     
     def _get_current_grace_period(self, account_id: str) -> Optional[GracePeriodTracker]:
         """Get current grace period for account (active or inactive)"""
-        grace_periods = self.storage.find(
-            self.grace_periods_table,
-            {
-                "account_id": account_id
-            }
-        )
-        
-        if grace_periods:
-            # Get most recent grace period by statement date
-            sorted_periods = sorted(grace_periods, key=lambda x: x.get('statement_date', ''), reverse=True)
-            return self._grace_period_from_dict(sorted_periods[0])
+        self._ensure_grace_index()
+        pointer = self.storage.load(self.grace_latest_table, account_id)
+        if pointer:
+            data = self.storage.load(self.grace_periods_table, pointer['grace_period_id'])
+            if data:
+                return self._grace_period_from_dict(data)
         
         return None
     
@@ -666,7 +1350,9 @@ class InterestEngine:
     def _save_grace_period(self, grace_period: GracePeriodTracker) -> None:
         """Save grace period tracker to storage"""
         grace_dict = self._grace_period_to_dict(grace_period)
-        self.storage.save(self.grace_periods_table, grace_period.id, grace_dict)
+        with self.storage.atomic():
+            self.storage.save(self.grace_periods_table, grace_period.id, grace_dict)
+            self._index_grace_periods({grace_period.id: grace_dict})
     
     def _rate_config_to_dict(self, config: InterestRateConfig) -> Dict:
         """Convert rate config to dictionary"""
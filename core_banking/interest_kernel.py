@@ -0,0 +1,243 @@
+"""
+Interest Kernel Module
+
+Exact interest arithmetic in currency minor units. Interest is computed as
+balance * annual_rate * days / day-count denominator with one rounding step
+(half-up or banker's) on the exact rational result, so amounts do not depend
+on intermediate Decimal precision. interest_minor() is the scalar form;
+accrue_minor() and project_minor() apply the same arithmetic to whole books
+of accounts with NumPy integer arrays (falling back to Python integers in
+object arrays when values could overflow int64).
+
+The array functions require numpy (pip install nexum[interest]).
+"""
+
+from decimal import Decimal, ROUND_HALF_EVEN, ROUND_HALF_UP
+from typing import Dict, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+# Day-count denominators and compounding period lengths, keyed by the
+# InterestCalculationMethod / CompoundingFrequency values
+DAY_COUNT_DENOMINATORS = {
+    "actual_365": 365,
+    "actual_360": 360,
+    "thirty_360": 360
+}
+
+COMPOUNDING_PERIOD_DAYS = {
+    "daily": 1,
+    "monthly": 30,
+    "quarterly": 91,
+    "annually": 365
+}
+
+ROUNDING_MODES = (ROUND_HALF_UP, ROUND_HALF_EVEN)
+
+INT64_MAX = 2 ** 63 - 1
+
+
+def to_minor(amount: Decimal, precision: int) -> int:
+    """Convert an amount already rounded to currency precision to minor units"""
+    return int(amount.scaleb(precision))
+
+
+def from_minor(units: int, precision: int) -> Decimal:
+    """Convert minor units back to a Decimal amount"""
+    return Decimal(int(units)).scaleb(-precision)
+
+
+def rate_fraction(rate: Union[Decimal, str]) -> Tuple[int, int]:
+    """Exact (numerator, scale) such that rate == numerator / 10**scale"""
+    rate = Decimal(rate)
+    scale = max(0, -rate.as_tuple().exponent)
+    return int(rate.scaleb(scale)), scale
+
+
+def interest_minor(
+    balance: int,
+    annual_rate: Union[Decimal, str],
+    denominator: int,
+    days: int = 1,
+    rounding: str = ROUND_HALF_UP
+) -> int:
+    """
+    Interest in minor units for one balance
+    
+    Args:
+        balance: Balance in minor units
+        annual_rate: Annual rate as a fraction (0.05 for 5%)
+        denominator: Day-count denominator (365 or 360)
+        days: Number of days of interest
+        rounding: ROUND_HALF_UP (away from zero) or ROUND_HALF_EVEN
+    """
+    _check_rounding(rounding)
+    numerator, scale = rate_fraction(annual_rate)
+    product = balance * numerator * days
+    divisor = denominator * 10 ** scale
+    
+    quotient, remainder = divmod(abs(product), divisor)
+    twice = 2 * remainder
+    if twice > divisor or (twice == divisor and (rounding == ROUND_HALF_UP or quotient % 2)):
+        quotient += 1
+    return -quotient if product < 0 else quotient
+
+
+def accrue_minor(
+    balances: Sequence[int],
+    annual_rates: Sequence[Union[Decimal, str]],
+    denominators: Sequence[int],
+    days: Union[int, Sequence[int]] = 1,
+    rounding: str = ROUND_HALF_UP
+) -> "np.ndarray":
+    """
+    Interest in minor units for arrays of balances
+    
+    Element i equals interest_minor(balances[i], annual_rates[i],
+    denominators[i], days[i], rounding).
+    
+    Args:
+        balances: Balances in minor units
+        annual_rates: Annual rates (Decimal or decimal strings)
+        denominators: Day-count denominator per balance
+        days: Days of interest, scalar or per balance
+        rounding: ROUND_HALF_UP (away from zero) or ROUND_HALF_EVEN
+    """
+    _require_numpy()
+    _check_rounding(rounding)
+    numerators, scale = _scaled_rates(annual_rates)
+    days = np.broadcast_to(np.asarray(days, dtype=np.int64), numerators.shape)
+    divisors = np.asarray(denominators, dtype=np.int64)
+    
+    bound = _max_abs(balances) * _max_abs(numerators) * _max_abs(days)
+    dtype = _exact_dtype(bound, int(divisors.max(initial=0)) * 10 ** scale)
+    
+    return _accrue(
+        np.asarray(balances, dtype=dtype),
+        numerators.astype(dtype),
+        divisors.astype(dtype) * 10 ** scale,
+        days.astype(dtype),
+        rounding
+    )
+
+
+def project_minor(
+    balances: Sequence[int],
+    annual_rates: Sequence[Union[Decimal, str]],
+    denominators: Sequence[int],
+    period_days: Sequence[int],
+    horizon_days: int,
+    rounding: str = ROUND_HALF_UP
+) -> "np.ndarray":
+    """
+    Total interest in minor units over a horizon with compounding
+    
+    Interest accrues daily (rounded each day, as the end-of-day run does)
+    and accrued interest is added to the balance every period_days days.
+    
+    Args:
+        balances: Starting balances in minor units
+        annual_rates: Annual rates (Decimal or decimal strings)
+        denominators: Day-count denominator per balance
+        period_days: Compounding period length in days per balance
+        horizon_days: Number of days to project
+        rounding: ROUND_HALF_UP (away from zero) or ROUND_HALF_EVEN
+    """
+    _require_numpy()
+    _check_rounding(rounding)
+    numerators, scale = _scaled_rates(annual_rates)
+    divisors = np.asarray(denominators, dtype=np.int64)
+    periods = np.asarray(period_days, dtype=np.int64)
+    
+    # Daily compounding at the highest rate over the shortest year, plus
+    # one minor unit of rounding per day, bounds every balance reached
+    max_numerator = _max_abs(numerators)
+    growth = _growth_bound(max_numerator, int(divisors.min(initial=1)) * 10 ** scale, horizon_days)
+    bound = (_max_abs(balances) + horizon_days) * growth * max_numerator
+    dtype = _exact_dtype(bound, int(divisors.max(initial=0)) * 10 ** scale)
+    
+    balance = np.array(balances, dtype=dtype)
+    numerators = numerators.astype(dtype)
+    divisors = divisors.astype(dtype) * 10 ** scale
+    one_day = np.ones(len(balance), dtype=dtype)
+    pending = np.zeros(len(balance), dtype=dtype)
+    total = np.zeros(len(balance), dtype=dtype)
+    
+    for day in range(1, horizon_days + 1):
+        daily = _accrue(balance, numerators, divisors, one_day, rounding)
+        pending = pending + daily
+        total = total + daily
+        
+        capitalize = (day % periods) == 0
+        if capitalize.any():
+            balance = balance + np.where(capitalize, pending, 0).astype(dtype)
+            pending = np.where(capitalize, 0, pending).astype(dtype)
+    
+    return total
+
+
+def _accrue(balance, numerators, divisors, days, rounding: str):
+    """Exactly rounded balance * numerators * days / divisors, elementwise"""
+    product = np.abs(balance) * numerators * days
+    # Operators rather than np.divmod, which has no loop for object arrays
+    quotient = product // divisors
+    remainder = product - quotient * divisors
+    twice = remainder * 2
+    round_up = twice > divisors
+    if rounding == ROUND_HALF_UP:
+        round_up = round_up | (twice == divisors)
+    else:
+        round_up = round_up | ((twice == divisors) & (quotient % 2 == 1))
+    result = quotient + round_up.astype(quotient.dtype)
+    return np.where(balance < 0, -result, result).astype(quotient.dtype)
+
+
+def _scaled_rates(annual_rates: Sequence[Union[Decimal, str]]) -> Tuple["np.ndarray", int]:
+    """Rates as integer numerators over a common power-of-ten scale"""
+    fractions: Dict[Union[Decimal, str], Tuple[int, int]] = {}
+    for rate in annual_rates:
+        if rate not in fractions:
+            fractions[rate] = rate_fraction(rate)
+    scale = max((s for _, s in fractions.values()), default=0)
+    
+    numerators = [fractions[rate][0] * 10 ** (scale - fractions[rate][1]) for rate in annual_rates]
+    if max(map(abs, numerators), default=0) > INT64_MAX:
+        return np.array(numerators, dtype=object), scale
+    return np.array(numerators, dtype=np.int64), scale
+
+
+def _max_abs(values) -> int:
+    values = np.asarray(values)
+    if values.size == 0:
+        return 0
+    if values.dtype.kind in "iu":
+        return max(abs(int(values.min())), abs(int(values.max())))
+    return max(abs(int(v)) for v in values.ravel())
+
+
+def _growth_bound(numerator: int, divisor: int, days: int) -> int:
+    """Ceiling of (1 + numerator / divisor) ** days"""
+    return -(-(divisor + numerator) ** days // divisor ** days)
+
+
+def _exact_dtype(bound: int, divisor: int):
+    """int64 when products and doubled remainders fit, else Python integers"""
+    if bound <= INT64_MAX and 2 * divisor <= INT64_MAX:
+        return np.int64
+    return object
+
+
+def _check_rounding(rounding: str) -> None:
+    if rounding not in ROUNDING_MODES:
+        raise ValueError(f"Unsupported rounding mode: {rounding}")
+
+
+def _require_numpy() -> None:
+    if not NUMPY_AVAILABLE:
+        raise ImportError("numpy required for array interest calculations. Install with: pip install numpy")
@@ -9,13 +9,18 @@ posted and balances are derived from entries for correctness.
 from decimal import Decimal
 from datetime import datetime, timezone
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 from enum import Enum
+import logging
+import threading
 import uuid
 
 from .currency import Money, Currency
 from .storage import StorageInterface, StorageRecord
-from .audit import AuditTrail, AuditEventType
+from .audit import AuditTrail, AuditEventType, new_audit_event
+
+
+logger = logging.getLogger("nexum.ledger")
 
 
 class JournalEntryState(Enum):
@@ -177,6 +182,180 @@ class JournalEntry(StorageRecord):
         self.updated_at = datetime.now(timezone.utc)
 
 
+# Kinds of change recorded in the ledger change log
+JOURNAL_POSTED = "journal_posted"
+JOURNAL_REVERSED = "journal_reversed"
+ACCOUNT_CHANGED = "account_changed"
+TRANSACTION_POSTED = "transaction_posted"
+CUSTOMER_CHANGED = "customer_changed"
+
+
+class LedgerChangeLog:
+    """
+    Ordered log of ledger changes for derived read models
+    
+    Each change (a journal entry posted or reversed, an account saved, a
+    transaction posted, a customer's KYC tier changed) is appended inside
+    the storage transaction that makes it, under the next sequence number.
+    Consumers such as the reporting aggregates keep the last sequence they
+    applied and read the changes after it, so they catch up on changes
+    made by any process.
+    
+    A sequence number is claimed with insert_if_absent, so writers in
+    other processes cannot take the same one; the loser reads the new
+    last sequence and claims again.
+    
+    Consumers also save their position as a cursor; prune() deletes the
+    changes every cursor has passed.
+    """
+    
+    MAX_APPEND_ATTEMPTS = 100
+    
+    def __init__(self, storage: StorageInterface, table_name: str = "ledger_changes"):
+        self.storage = storage
+        self.table_name = table_name
+        self.cursors_table = f"{table_name}_cursors"
+    
+    @staticmethod
+    def _key(sequence: int) -> str:
+        return f"{sequence:012d}"
+    
+    def last_sequence(self) -> int:
+        """Sequence number of the latest change, or 0"""
+        rows = self.storage.scan_range(self.table_name, limit=1, reverse=True)
+        return rows[0]["sequence"] if rows else 0
+    
+    def record(self, kind: str, entity_ids: List[str]) -> None:
+        """Append one change of a kind per entity, in order"""
+        if not entity_ids:
+            return
+        
+        with self.storage.atomic():
+            for _ in range(self.MAX_APPEND_ATTEMPTS):
+                sequence = self.last_sequence() + 1
+                first = {"id": self._key(sequence), "sequence": sequence, "kind": kind, "entity_id": entity_ids[0]}
+                if self.storage.insert_if_absent(self.table_name, first["id"], first):
+                    break
+            else:
+                raise RuntimeError(f"Could not append to ledger change log '{self.table_name}'")
+            
+            rest = {}
+            for offset, entity_id in enumerate(entity_ids[1:], start=1):
+                key = self._key(sequence + offset)
+                rest[key] = {"id": key, "sequence": sequence + offset, "kind": kind, "entity_id": entity_id}
+            if rest:
+                self.storage.save_many(self.table_name, rest)
+    
+    def changes_after(self, sequence: int, limit: Optional[int] = None) -> List[Dict]:
+        """Changes with a sequence number above the given one, oldest first"""
+        return self.storage.scan_range(self.table_name, self._key(sequence + 1), limit=limit)
+    
+    def save_cursor(self, consumer: str, sequence: int) -> None:
+        """Record the last change a consumer has applied"""
+        self.storage.save(self.cursors_table, consumer, {
+            "id": consumer,
+            "sequence": sequence,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        })
+    
+    def prune(self, batch_size: int = 1000) -> int:
+        """
+        Delete the changes every consumer's cursor has passed
+        
+        The latest change is always kept, as it carries the last sequence
+        number. A consumer that stops running holds back pruning until its
+        cursor is deleted.
+        
+        Returns:
+            Number of changes deleted
+        """
+        cursors = self.storage.load_all(self.cursors_table)
+        if not cursors:
+            return 0
+        through = min(min(cursor["sequence"] for cursor in cursors), self.last_sequence() - 1)
+        
+        deleted = 0
+        while True:
+            batch = self.storage.scan_range(self.table_name, end=self._key(through + 1), limit=batch_size)
+            if not batch:
+                return deleted
+            with self.storage.atomic():
+                for change in batch:
+                    self.storage.delete(self.table_name, change["id"])
+            deleted += len(batch)
+
+
+class LedgerChangeWorker:
+    """
+    Keeps change log consumers caught up in a background thread
+    
+    Each poll applies every consumer's pending changes, then prunes the
+    changes all of them have applied, so readers never catch up on their
+    own read path and the log stays short.
+    """
+    
+    def __init__(self, changes: LedgerChangeLog, consumers: List, poll_interval_seconds: float = 5.0):
+        """
+        Args:
+            changes: Change log the consumers read
+            consumers: Objects with a catch_up() method
+            poll_interval_seconds: Seconds between polls
+        """
+        self.changes = changes
+        self.consumers = list(consumers)
+        self.poll_interval_seconds = poll_interval_seconds
+        self.applied = 0
+        self.pruned = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def run_once(self) -> int:
+        """
+        Catch every consumer up and prune the log
+        
+        Returns:
+            Number of changes applied across consumers
+        """
+        applied = sum(consumer.catch_up() for consumer in self.consumers)
+        self.applied += applied
+        self.pruned += self.changes.prune()
+        return applied
+    
+    def start(self) -> None:
+        """Start polling in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ledger-change-worker")
+        self._thread.daemon = True
+        self._thread.start()
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the background thread after its current poll"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+    
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Ledger change worker error: {e}")
+            self._stop_event.wait(self.poll_interval_seconds)
+    
+    def get_stats(self) -> Dict:
+        """Get worker statistics"""
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "applied": self.applied,
+            "pruned": self.pruned,
+            "last_sequence": self.changes.last_sequence()
+        }
+
+
 class GeneralLedger:
     """
     General ledger that manages journal entries and calculates account balances
@@ -187,6 +366,7 @@ class GeneralLedger:
         self.storage = storage
         self.audit_trail = audit_trail
         self.table_name = "journal_entries"
+        self.changes = LedgerChangeLog(storage)
     
     def create_journal_entry(
         self,
@@ -261,6 +441,7 @@ class GeneralLedger:
         with self.storage.atomic():
             entry.post()
             self._save_entry(entry)
+            self.changes.record(JOURNAL_POSTED, [entry.id])
             
             # Log audit event
             self.audit_trail.log_event(
@@ -275,6 +456,71 @@ class GeneralLedger:
         
         return entry
     
+    def post_journal_entries(
+        self,
+        entries: List[Tuple[str, str, List[JournalEntryLine]]]
+    ) -> List[JournalEntry]:
+        """
+        Create and post many journal entries in one storage transaction
+        
+        For batch jobs: entries are saved with one bulk write and their
+        created/posted audit events are appended as one batch.
+        
+        Args:
+            entries: (reference, description, lines) per entry; each must balance
+            
+        Returns:
+            Posted JournalEntries, in input order
+        """
+        now = datetime.now(timezone.utc)
+        posted = []
+        records = {}
+        events = []
+        
+        for reference, description, lines in entries:
+            entry = JournalEntry(
+                id=str(uuid.uuid4()),
+                created_at=now,
+                updated_at=now,
+                reference=reference,
+                description=description,
+                lines=lines,
+                state=JournalEntryState.PENDING
+            )
+            entry.post()
+            posted.append(entry)
+            records[entry.id] = self._entry_to_dict(entry)
+            
+            events.append(new_audit_event(
+                event_type=AuditEventType.JOURNAL_ENTRY_CREATED,
+                entity_type="journal_entry",
+                entity_id=entry.id,
+                metadata={
+                    "reference": reference,
+                    "description": description,
+                    "line_count": len(lines),
+                    "accounts": list(entry.get_affected_accounts()),
+                    "currencies": [c.code for c in entry.get_currencies()]
+                }
+            ))
+            events.append(new_audit_event(
+                event_type=AuditEventType.JOURNAL_ENTRY_POSTED,
+                entity_type="journal_entry",
+                entity_id=entry.id,
+                metadata={
+                    "reference": reference,
+                    "posted_at": entry.posted_at.isoformat()
+                }
+            ))
+        
+        if records:
+            with self.storage.atomic():
+                self.storage.save_many(self.table_name, records)
+                self.changes.record(JOURNAL_POSTED, list(records))
+                self.audit_trail.log_event_batch(events)
+        
+        return posted
+    
     def reverse_journal_entry(
         self,
         entry_id: str,
@@ -337,7 +583,9 @@ class GeneralLedger:
         
         # Mark original as reversed
         original_entry.reverse(posted_reversing_entry.id)
-        self._save_entry(original_entry)
+        with self.storage.atomic():
+            self._save_entry(original_entry)
+            self.changes.record(JOURNAL_REVERSED, [original_entry.id])
         
         # Log audit event
         self.audit_trail.log_event(
@@ -449,6 +697,50 @@ class GeneralLedger:
         
         return running_balance
     
+    def calculate_account_balances(
+        self,
+        accounts: Dict[str, AccountType],
+        currencies: Dict[str, Currency],
+        batch_size: int = 1000
+    ) -> Dict[str, Money]:
+        """
+        Calculate current balances for many accounts in one pass
+        
+        Streams posted journal entries once and sums the lines of every
+        requested account, instead of one full ledger scan per account.
+        Results match calculate_account_balance().
+        
+        Args:
+            accounts: Account ID -> account type
+            currencies: Account ID -> balance currency
+            batch_size: Journal entries read per batch
+            
+        Returns:
+            Account ID -> balance
+        """
+        totals = {account_id: Decimal('0') for account_id in accounts}
+        posted = JournalEntryState.POSTED.value
+        
+        for batch in self.storage.iter_batches(self.table_name, batch_size):
+            for data in batch:
+                if data.get('state') != posted:
+                    continue
+                for line in data['lines']:
+                    account_id = line['account_id']
+                    if account_id not in totals:
+                        continue
+                    if line['debit_currency'] != currencies[account_id].code:
+                        continue
+                    debit = Decimal(line['debit_amount'])
+                    totals[account_id] += debit if debit else -Decimal(line['credit_amount'])
+        
+        balances = {}
+        for account_id, total in totals.items():
+            if accounts[account_id] in [AccountType.LIABILITY, AccountType.EQUITY, AccountType.REVENUE]:
+                total = -total
+            balances[account_id] = Money(total, currencies[account_id])
+        return balances
+    
     def get_trial_balance(
         self,
         account_types_and_ids: Dict[str, AccountType],
@@ -11,13 +11,17 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 from enum import Enum
 import uuid
-import calendar
 
 from .currency import Money, Currency
 from .storage import StorageInterface, StorageRecord
-from .audit import AuditTrail, AuditEventType
+from .amortization import (
+    ScheduleCache, ScheduleColumns, add_months, amortize, decode_schedule, encode_schedule, payment_ordinals
+)
+from .interest_kernel import from_minor, to_minor
+from .delinquency import LOAN_OBLIGATION, DelinquencyIndex
+from .audit import AuditTrail, AuditEventType, new_audit_event
 from .accounts import AccountManager, Account, ProductType
-from .transactions import TransactionProcessor, TransactionType, TransactionChannel
+from .transactions import TransactionProcessor, TransactionType, TransactionChannel, TransactionState
 from .logging_config import get_logger, log_action
 
 
@@ -242,7 +246,8 @@ class LoanManager:
         storage: StorageInterface,
         account_manager: AccountManager,
         transaction_processor: TransactionProcessor,
-        audit_trail: AuditTrail
+        audit_trail: AuditTrail,
+        schedule_cache_size: int = 1024
     ):
         self.storage = storage
         self.account_manager = account_manager
@@ -251,8 +256,17 @@ class LoanManager:
         
         self.loans_table = "loans"
         self.payments_table = "loan_payments"
-        self.amortization_table = "amortization_schedules"
+        self.schedules_table = "loan_schedules"
+        self.amortization_table = "amortization_schedules"  # Legacy one-row-per-period schedules
         self.logger = get_logger("nexum.loans")
+        
+        # Decoded schedules for recently viewed loans
+        self._schedule_cache = ScheduleCache(max_size=schedule_cache_size)
+        
+        # Queues loans for the collections delinquency scan as they are saved
+        self.delinquency_index = DelinquencyIndex(storage)
+        # Active loans by the next day they can be past due, for late fee runs
+        self.late_fee_queue = DelinquencyIndex(storage, name="loan_late_fee")
     
     def originate_loan(
         self,
@@ -506,6 +520,9 @@ class LoanManager:
         """
         Generate amortization schedule for loan
         
+        The schedule is computed in one pass in minor units and stored as
+        a single columnar record for the loan.
+        
         Args:
             loan_id: Loan ID
             
@@ -516,23 +533,36 @@ class LoanManager:
         if not loan:
             raise ValueError(f"Loan {loan_id} not found")
         
-        schedule = []
-        
-        if loan.terms.amortization_method == AmortizationMethod.EQUAL_INSTALLMENT:
-            schedule = self._generate_equal_installment_schedule(loan)
-        elif loan.terms.amortization_method == AmortizationMethod.EQUAL_PRINCIPAL:
-            schedule = self._generate_equal_principal_schedule(loan)
-        elif loan.terms.amortization_method == AmortizationMethod.BULLET:
-            schedule = self._generate_bullet_schedule(loan)
-        else:
-            raise ValueError(f"Unsupported amortization method: {loan.terms.amortization_method}")
+        terms = loan.terms
+        if terms.amortization_method not in (
+            AmortizationMethod.EQUAL_INSTALLMENT,
+            AmortizationMethod.EQUAL_PRINCIPAL,
+            AmortizationMethod.BULLET
+        ):
+            raise ValueError(f"Unsupported amortization method: {terms.amortization_method}")
+        
+        currency = terms.principal_amount.currency
+        installment = None
+        if terms.amortization_method == AmortizationMethod.EQUAL_INSTALLMENT:
+            installment = to_minor(loan._calculate_payment_amount().amount, currency.precision)
+        
+        amounts = amortize(
+            principal=to_minor(terms.principal_amount.amount, currency.precision),
+            annual_rate=terms.annual_interest_rate,
+            payments_per_year=terms.payments_per_year,
+            count=terms.total_payments,
+            method=terms.amortization_method.value,
+            installment=installment
+        )
+        ordinals = payment_ordinals(terms.first_payment_date, terms.payment_frequency.value, len(amounts["payment"]))
+        columns = ScheduleColumns(ordinals=ordinals, **amounts)
         
-        # Save schedule entries
-        for entry in schedule:
-            entry_dict = self._amortization_entry_to_dict(entry, loan_id)
-            entry_id = f"{loan_id}_{entry.payment_number}"
-            self.storage.save(self.amortization_table, entry_id, entry_dict)
+        record = encode_schedule(columns, currency.code)
+        record.update({"id": loan_id, "loan_id": loan_id})
+        self.storage.save(self.schedules_table, loan_id, record)
         
+        schedule = self._schedule_from_columns(columns, currency)
+        self._schedule_cache.put(loan_id, schedule)
         return schedule
     
     def get_loan(self, loan_id: str) -> Optional[Loan]:
@@ -558,217 +588,89 @@ class LoanManager:
     
     def get_amortization_schedule(self, loan_id: str) -> List[AmortizationEntry]:
         """Get amortization schedule for loan"""
-        # Find all schedule entries for this loan
-        all_entries = self.storage.load_all(self.amortization_table)
-        loan_entries = [data for data in all_entries if data.get('loan_id') == loan_id]
-        
-        # Convert to objects and sort by payment number
-        schedule = [self._amortization_entry_from_dict(data) for data in loan_entries]
-        schedule.sort(key=lambda x: x.payment_number)
+        schedule = self._schedule_cache.get(loan_id)
+        if schedule is not None:
+            return schedule
         
-        return schedule
+        record = self.storage.load(self.schedules_table, loan_id)
+        if record:
+            schedule = self._schedule_from_columns(decode_schedule(record), Currency[record['currency']])
+        else:
+            # Schedules generated before the columnar format, one row per period
+            loan_entries = self.storage.find(self.amortization_table, {"loan_id": loan_id})
+            schedule = [self._amortization_entry_from_dict(data) for data in loan_entries]
+            schedule.sort(key=lambda x: x.payment_number)
+            if not schedule:
+                return schedule
+        
+        self._schedule_cache.put(loan_id, schedule)
+        return list(schedule)
     
-    def process_past_due_loans(self) -> Dict[str, int]:
-        """Process past due loans and charge late fees"""
-        results = {"late_fees_charged": 0, "loans_processed": 0}
+    def process_past_due_loans(self, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Process past due loans and charge late fees
         
-        # Get all active loans
-        all_loans_data = self.storage.find(
-            self.loans_table,
-            {"state": LoanState.ACTIVE.value}
-        )
-        loans = [self._loan_from_dict(data) for data in all_loans_data]
+        Active loans are queued for the next day they can be past due
+        beyond their grace period, so a run reads only loans due for a
+        check today. Each batch's late fees are posted through the bulk
+        system posting path together with the loan updates. Fee
+        transaction IDs derive from the loan and month, so repeating a run
+        never charges a second fee in the same month.
+        
+        Args:
+            batch_size: Loans checked per batch
         
+        Returns:
+            Dictionary with counts of loans processed
+        """
+        results = {"late_fees_charged": 0, "loans_processed": 0}
         today = date.today()
         
-        for loan in loans:
-            try:
-                # Check if loan is past due
-                days_past_due = self._calculate_days_past_due(loan, today)
+        if not self.late_fee_queue.is_built():
+            self.rebuild_late_fee_queue(today)
                 
-                if days_past_due > loan.terms.grace_period_days:
-                    # Charge late fee if not already charged this month
-                    should_charge_fee = (
-                        not loan.last_late_fee_date or
-                        loan.last_late_fee_date.month != today.month or
-                        loan.last_late_fee_date.year != today.year
-                    )
-                    
-                    if should_charge_fee:
-                        self._charge_late_fee(loan)
-                        results["late_fees_charged"] += 1
+        after = None
+        while True:
+            entries = self.late_fee_queue.due(today, after=after, limit=batch_size)
+            if not entries:
+                break
+            after = entries[-1]["id"]
                     
-                    # Update past due days
-                    loan.days_past_due = days_past_due
-                    loan.updated_at = datetime.now(timezone.utc)
-                    self._save_loan(loan)
+            loans = []
+            for entry in entries:
+                data = self.storage.load(self.loans_table, entry["obligation_id"])
+                if data and data.get("state") == LoanState.ACTIVE.value:
+                    loans.append(self._loan_from_dict(data))
+                else:
+                    self.late_fee_queue.unschedule(LOAN_OBLIGATION, entry["obligation_id"])
                     
-                    results["loans_processed"] += 1
-            
-            except Exception as e:
-                # Log error but continue with other loans
-                self.audit_trail.log_event(
-                    event_type=AuditEventType.SYSTEM_START,  # Generic error
-                    entity_type="loan",
-                    entity_id=loan.id,
-                    metadata={
-                        "error": "Past due processing failed",
-                        "message": str(e)
-                    }
-                )
+            self._process_past_due_batch(loans, today, results)
         
         return results
     
-    def _generate_equal_installment_schedule(self, loan: Loan) -> List[AmortizationEntry]:
-        """Generate equal installment amortization schedule"""
-        schedule = []
-        
-        # Calculate payment amount
-        payment_amount = loan._calculate_payment_amount()
-        
-        remaining_balance = loan.terms.principal_amount
-        payment_date = loan.terms.first_payment_date
-        annual_rate = loan.terms.annual_interest_rate
-        periods_per_year = Decimal(str(loan.terms.payments_per_year))
-        periodic_rate = annual_rate / periods_per_year
-        
-        for payment_num in range(1, loan.terms.total_payments + 1):
-            # Calculate interest on remaining balance
-            interest_amount = remaining_balance * periodic_rate
-            
-            # Principal is payment minus interest
-            principal_amount = payment_amount - interest_amount
-            
-            # Ensure we don't overpay on final payment
-            if principal_amount > remaining_balance:
-                principal_amount = remaining_balance
-                payment_amount = principal_amount + interest_amount
-            
-            # For final payment, ensure we pay off the exact remaining balance
-            if payment_num == loan.terms.total_payments:
-                principal_amount = remaining_balance  # Pay exactly what's left
-                payment_amount = principal_amount + interest_amount
-                remaining_balance = Money(Decimal('0'), remaining_balance.currency)
-            else:
-                # Update remaining balance
-                remaining_balance = remaining_balance - principal_amount
-            
-            # Create schedule entry
-            entry = AmortizationEntry(
-                payment_number=payment_num,
-                payment_date=payment_date,
-                payment_amount=payment_amount,
-                principal_amount=principal_amount,
-                interest_amount=interest_amount,
-                remaining_balance=remaining_balance
-            )
-            schedule.append(entry)
-            
-            # Move to next payment date
-            if loan.terms.payment_frequency == PaymentFrequency.MONTHLY:
-                payment_date = self._add_months(payment_date, 1)
-            elif loan.terms.payment_frequency == PaymentFrequency.WEEKLY:
-                payment_date = payment_date + timedelta(days=7)
-            elif loan.terms.payment_frequency == PaymentFrequency.BI_WEEKLY:
-                payment_date = payment_date + timedelta(days=14)
-            elif loan.terms.payment_frequency == PaymentFrequency.QUARTERLY:
-                payment_date = self._add_months(payment_date, 3)
-            elif loan.terms.payment_frequency == PaymentFrequency.SEMI_ANNUALLY:
-                payment_date = self._add_months(payment_date, 6)
-            elif loan.terms.payment_frequency == PaymentFrequency.ANNUALLY:
-                payment_date = self._add_months(payment_date, 12)
-            
-            # Break if balance is paid off
-            if remaining_balance.is_zero():
-                break
-        
-        return schedule
-    
-    def _generate_equal_principal_schedule(self, loan: Loan) -> List[AmortizationEntry]:
-        """Generate equal principal amortization schedule"""
-        schedule = []
-        
-        principal_per_payment = loan.terms.principal_amount / Decimal(str(loan.terms.total_payments))
-        remaining_balance = loan.terms.principal_amount
-        payment_date = loan.terms.first_payment_date
-        annual_rate = loan.terms.annual_interest_rate
-        periods_per_year = Decimal(str(loan.terms.payments_per_year))
-        periodic_rate = annual_rate / periods_per_year
-        
-        for payment_num in range(1, loan.terms.total_payments + 1):
-            # Interest on remaining balance
-            interest_amount = remaining_balance * periodic_rate
-            
-            # Principal amount is fixed
-            principal_amount = principal_per_payment
-            if principal_amount > remaining_balance:
-                principal_amount = remaining_balance
-            
-            # Total payment is principal + interest
-            payment_amount = principal_amount + interest_amount
-            
-            # Update remaining balance
-            remaining_balance = remaining_balance - principal_amount
-            
-            # Create schedule entry
-            entry = AmortizationEntry(
-                payment_number=payment_num,
-                payment_date=payment_date,
-                payment_amount=payment_amount,
-                principal_amount=principal_amount,
-                interest_amount=interest_amount,
-                remaining_balance=remaining_balance
-            )
-            schedule.append(entry)
-            
-            # Move to next payment date (same logic as equal installment)
-            payment_date = self._calculate_next_payment_date(payment_date, loan.terms.payment_frequency)
-            
-            if remaining_balance.is_zero():
-                break
-        
-        return schedule
-    
-    def _generate_bullet_schedule(self, loan: Loan) -> List[AmortizationEntry]:
-        """Generate bullet payment schedule (interest only, principal at end)"""
-        schedule = []
-        
-        remaining_balance = loan.terms.principal_amount
-        payment_date = loan.terms.first_payment_date
-        annual_rate = loan.terms.annual_interest_rate
-        periods_per_year = Decimal(str(loan.terms.payments_per_year))
-        periodic_rate = annual_rate / periods_per_year
-        
-        # Interest-only payments for all but last payment
-        interest_payment = remaining_balance * periodic_rate
-        
-        for payment_num in range(1, loan.terms.total_payments):
-            entry = AmortizationEntry(
-                payment_number=payment_num,
-                payment_date=payment_date,
-                payment_amount=interest_payment,
-                principal_amount=Money(Decimal('0'), loan.terms.principal_amount.currency),
-                interest_amount=interest_payment,
-                remaining_balance=remaining_balance
-            )
-            schedule.append(entry)
-            
-            payment_date = self._calculate_next_payment_date(payment_date, loan.terms.payment_frequency)
+    def rebuild_late_fee_queue(self, today: Optional[date] = None) -> int:
+        """
+        Queue every active loan for its next past-due check
         
-        # Final payment includes all principal plus final interest
-        final_payment = remaining_balance + interest_payment
+        Only needed for loans saved before the queue existed, or if the
+        queue is lost; loan saves keep it current.
         
-        final_entry = AmortizationEntry(
-            payment_number=loan.terms.total_payments,
-            payment_date=payment_date,
-            payment_amount=final_payment,
-            principal_amount=remaining_balance,
-            interest_amount=interest_payment,
-            remaining_balance=Money(Decimal('0'), loan.terms.principal_amount.currency)
-        )
-        schedule.append(final_entry)
-        
-        return schedule
+        Returns:
+            Number of loans queued
+        """
+        today = today or date.today()
+        queued = 0
+        
+        self.late_fee_queue.clear()
+        for data in self.storage.find(self.loans_table, {"state": LoanState.ACTIVE.value}):
+            loan = self._loan_from_dict(data)
+            check_date = self._next_past_due_check(loan, today)
+            if check_date:
+                self.late_fee_queue.schedule(LOAN_OBLIGATION, loan.id, check_date)
+                queued += 1
+        
+        self.late_fee_queue.mark_built()
+        return queued
     
     def _calculate_payment_allocation(self, loan: Loan, payment_amount: Money) -> Tuple[Money, Money]:
         """Calculate how payment should be allocated between interest and principal"""
@@ -835,22 +737,97 @@ class LoanManager:
         # This would need actual payment tracking in production
         return max(0, days_since_first_payment - (expected_payments * 30))
     
-    def _charge_late_fee(self, loan: Loan) -> None:
-        """Charge late fee to loan"""
-        fee_transaction = self.transaction_processor.create_transaction(
-            transaction_type=TransactionType.FEE,
-            amount=loan.terms.late_fee,
-            description="Late payment fee",
-            channel=TransactionChannel.SYSTEM,
-            from_account_id=loan.account_id,
-            reference=f"LATE-FEE-{loan.id[:8]}"
-        )
+    def _next_past_due_check(self, loan: Loan, from_date: date) -> Optional[date]:
+        """
+        First date on or after from_date on which the loan is past its grace period
+        
+        Follows the 30-day cycle of _calculate_days_past_due().
+        """
+        grace_days = loan.terms.grace_period_days
+        if not loan.first_payment_date or grace_days >= 29:
+            return None
         
-        self.transaction_processor.process_transaction(fee_transaction.id)
+        cycle_day = (from_date - loan.first_payment_date).days % 30
+        if cycle_day > grace_days:
+            return from_date
+        return from_date + timedelta(days=grace_days + 1 - cycle_day)
+    
+    def _process_past_due_batch(self, loans: List[Loan], today: date, results: Dict[str, int]) -> None:
+        """Charge late fees and record days past due for a batch of queued loans"""
+        past_due = []
+        fees = []
+        for loan in loans:
+            days_past_due = self._calculate_days_past_due(loan, today)
+            if days_past_due <= loan.terms.grace_period_days:
+                self._queue_past_due_check(loan, today)
+                continue
+            
+            past_due.append((loan, days_past_due))
+            
+            # Charge late fee if not already charged this month
+            should_charge_fee = (
+                not loan.last_late_fee_date or
+                loan.last_late_fee_date.month != today.month or
+                loan.last_late_fee_date.year != today.year
+            )
+            if should_charge_fee:
+                fees.append(self.transaction_processor.new_system_transaction(
+                    transaction_type=TransactionType.FEE,
+                    amount=loan.terms.late_fee,
+                    description="Late payment fee",
+                    idempotency_key=f"late-fee:{loan.id}:{today.strftime('%Y-%m')}",
+                    from_account_id=loan.account_id,
+                    reference=f"LATE-FEE-{loan.id[:8]}"
+                ))
+        
+        if not past_due:
+            return
         
-        loan.last_late_fee_date = date.today()
-        loan.updated_at = datetime.now(timezone.utc)
-        self._save_loan(loan)
+        now = datetime.now(timezone.utc)
+        charged = {fee.from_account_id for fee in fees}
+        failed = {}
+        events = []
+        
+        with self.storage.atomic():
+            for fee in self.transaction_processor.post_system_transactions(fees):
+                if fee.state == TransactionState.COMPLETED:
+                    results["late_fees_charged"] += 1
+                else:
+                    failed[fee.from_account_id] = fee.error_message
+            
+            for loan, days_past_due in past_due:
+                if loan.account_id in failed:
+                    # Log error but continue with other loans; the loan stays queued for a retry
+                    events.append(new_audit_event(
+                        event_type=AuditEventType.SYSTEM_START,  # Generic error
+                        entity_type="loan",
+                        entity_id=loan.id,
+                        metadata={
+                            "error": "Past due processing failed",
+                            "message": failed[loan.account_id]
+                        }
+                    ))
+                    continue
+                
+                if loan.account_id in charged:
+                    loan.last_late_fee_date = today
+                
+                # Update past due days
+                loan.days_past_due = days_past_due
+                loan.updated_at = now
+                self._save_loan(loan)
+                self._queue_past_due_check(loan, today + timedelta(days=1))
+                
+                results["loans_processed"] += 1
+            
+            self.audit_trail.log_event_batch(events)
+    
+    def _queue_past_due_check(self, loan: Loan, from_date: date) -> None:
+        check_date = self._next_past_due_check(loan, from_date)
+        if check_date:
+            self.late_fee_queue.schedule(LOAN_OBLIGATION, loan.id, check_date)
+        else:
+            self.late_fee_queue.unschedule(LOAN_OBLIGATION, loan.id)
     
     def _calculate_next_payment_date(self, current_date: date, frequency: PaymentFrequency) -> date:
         """Calculate next payment date based on frequency"""
@@ -871,11 +848,7 @@ class LoanManager:
     
     def _add_months(self, start_date: date, months: int) -> date:
         """Add months to a date, handling month-end edge cases"""
-        month = start_date.month - 1 + months
-        year = start_date.year + month // 12
-        month = month % 12 + 1
-        day = min(start_date.day, calendar.monthrange(year, month)[1])
-        return date(year, month, day)
+        return add_months(start_date, months)
     
     def _save_loan(self, loan: Loan) -> None:
         """Save loan to storage (merge with existing to preserve state changes from other operations)"""
@@ -898,6 +871,12 @@ class LoanManager:
             existing.update(loan_dict)
             loan_dict = existing
         self.storage.save(self.loans_table, loan.id, loan_dict)
+        self.delinquency_index.track_loan(loan_dict)
+        
+        if loan_dict.get('state') != LoanState.ACTIVE.value:
+            self.late_fee_queue.unschedule(LOAN_OBLIGATION, loan.id)
+        elif not self.late_fee_queue.get_review_date(LOAN_OBLIGATION, loan.id):
+            self._queue_past_due_check(loan, date.today())
     
     def _save_payment(self, payment: LoanPayment) -> None:
         """Save loan payment to storage"""
@@ -1049,22 +1028,6 @@ class LoanManager:
             scheduled_payment_number=data.get('scheduled_payment_number')
         )
     
-    def _amortization_entry_to_dict(self, entry: AmortizationEntry, loan_id: str) -> Dict:
-        """Convert amortization entry to dictionary"""
-        return {
-            'loan_id': loan_id,
-            'payment_number': entry.payment_number,
-            'payment_date': entry.payment_date.isoformat(),
-            'payment_amount': str(entry.payment_amount.amount),
-            'payment_currency': entry.payment_amount.currency.code,
-            'principal_amount': str(entry.principal_amount.amount),
-            'principal_currency': entry.principal_amount.currency.code,
-            'interest_amount': str(entry.interest_amount.amount),
-            'interest_currency': entry.interest_amount.currency.code,
-            'remaining_balance': str(entry.remaining_balance.amount),
-            'remaining_currency': entry.remaining_balance.currency.code
-        }
-    
     def _amortization_entry_from_dict(self, data: Dict) -> AmortizationEntry:
         """Convert dictionary to amortization entry"""
         return AmortizationEntry(
@@ -1074,4 +1037,21 @@ class LoanManager:
             principal_amount=Money(Decimal(data['principal_amount']), Currency[data['principal_currency']]),
             interest_amount=Money(Decimal(data['interest_amount']), Currency[data['interest_currency']]),
             remaining_balance=Money(Decimal(data['remaining_balance']), Currency[data['remaining_currency']])
-        )
\ No newline at end of file
+        )
+    
+    def _schedule_from_columns(self, columns: ScheduleColumns, currency: Currency) -> List[AmortizationEntry]:
+        """Build schedule entries from minor-unit columns"""
+        precision = currency.precision
+        return [
+            AmortizationEntry(
+                payment_number=index + 1,
+                payment_date=date.fromordinal(int(ordinal)),
+                payment_amount=Money(from_minor(payment, precision), currency),
+                principal_amount=Money(from_minor(principal, precision), currency),
+                interest_amount=Money(from_minor(interest, precision), currency),
+                remaining_balance=Money(from_minor(remaining, precision), currency)
+            )
+            for index, (ordinal, payment, principal, interest, remaining) in enumerate(zip(
+                columns.ordinals, columns.payment, columns.principal, columns.interest, columns.remaining
+            ))
+        ]
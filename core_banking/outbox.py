@@ -0,0 +1,308 @@
+"""
+Transactional Outbox Module
+
+Lets a business operation record follow-up work (regulatory filings, alerts,
+notifications) as a single outbox row written inside its own storage
+transaction, and hands that work to a background worker that drains the
+outbox in batches. The caller's critical section only pays for one write.
+"""
+
+from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+import itertools
+import logging
+import threading
+import time
+import uuid
+
+from .storage import StorageInterface, INDEX_KEY_SEPARATOR
+
+
+logger = logging.getLogger("nexum.outbox")
+
+
+@dataclass
+class OutboxEntry:
+    """A unit of deferred work"""
+    id: str
+    kind: str
+    payload: Dict[str, Any]
+    sequence: str
+    created_at: datetime
+    attempts: int = 0
+    status: str = "pending"  # pending, failed
+    last_error: Optional[str] = None
+    next_attempt_at: Optional[datetime] = None  # Set after a failed attempt
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for storage"""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "payload": self.payload,
+            "sequence": self.sequence,
+            "created_at": self.created_at.isoformat(),
+            "attempts": self.attempts,
+            "status": self.status,
+            "last_error": self.last_error,
+            "next_attempt_at": self.next_attempt_at.isoformat() if self.next_attempt_at else None
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'OutboxEntry':
+        """Create instance from dictionary"""
+        return cls(
+            id=data["id"],
+            kind=data["kind"],
+            payload=data["payload"],
+            sequence=data["sequence"],
+            created_at=datetime.fromisoformat(data["created_at"]),
+            attempts=data.get("attempts", 0),
+            status=data.get("status", "pending"),
+            last_error=data.get("last_error"),
+            next_attempt_at=datetime.fromisoformat(data["next_attempt_at"]) if data.get("next_attempt_at") else None
+        )
+
+
+class TransactionalOutbox:
+    """
+    Outbox table stored alongside operational data
+    
+    enqueue() is a plain storage write, so it commits or rolls back together
+    with the surrounding storage.atomic() block. Entries are deleted once
+    processed, keeping the table proportional to the backlog. Pending
+    entries are also indexed by when they are next due (their enqueue
+    sequence, or next_attempt_at after a failure), so the worker reads the
+    due ones, oldest first, as one ordered key range.
+    """
+    
+    def __init__(self, storage: StorageInterface, table_name: str = "outbox"):
+        self.storage = storage
+        self.table_name = table_name
+        self.pending_table = f"{table_name}_pending"
+        self._counter = itertools.count()
+    
+    def enqueue(self, kind: str, payload: Dict[str, Any]) -> OutboxEntry:
+        """
+        Record deferred work
+        
+        Args:
+            kind: Handler key used by the worker
+            payload: JSON-serializable work description
+        
+        Returns:
+            The stored OutboxEntry
+        """
+        entry = OutboxEntry(
+            id=str(uuid.uuid4()),
+            kind=kind,
+            payload=payload,
+            sequence=self._due_key(time.time_ns(), next(self._counter)),
+            created_at=datetime.now(timezone.utc)
+        )
+        with self.storage.atomic():
+            self.storage.save(self.table_name, entry.id, entry.to_dict())
+            self.storage.save(self.pending_table, self._pending_key(entry), {
+                "id": self._pending_key(entry),
+                "entry_id": entry.id
+            })
+        return entry
+    
+    def fetch_batch(self, batch_size: int) -> List[OutboxEntry]:
+        """Get the oldest pending entries that are due, in due order"""
+        batch = []
+        due = self._due_key(time.time_ns() + 1)
+        for row in self.storage.scan_range(self.pending_table, end=due, limit=batch_size):
+            data = self.storage.load(self.table_name, row["entry_id"])
+            if data:
+                batch.append(OutboxEntry.from_dict(data))
+        return batch
+    
+    def acknowledge(self, entries: List[OutboxEntry]) -> None:
+        """Remove processed entries"""
+        with self.storage.atomic():
+            for entry in entries:
+                self.storage.delete(self.table_name, entry.id)
+                self.storage.delete(self.pending_table, self._pending_key(entry))
+    
+    def record_failure(
+        self,
+        entry: OutboxEntry,
+        error: str,
+        max_attempts: int,
+        retry_backoff_seconds: float = 0.0
+    ) -> None:
+        """
+        Count a failed attempt, parking the entry once attempts run out
+        
+        Otherwise the entry is not due again until retry_backoff_seconds,
+        doubled for every earlier failure, has passed.
+        """
+        previous_key = self._pending_key(entry)
+        entry.attempts += 1
+        entry.last_error = error
+        if entry.attempts >= max_attempts:
+            entry.status = "failed"
+        else:
+            delay = retry_backoff_seconds * 2 ** (entry.attempts - 1)
+            entry.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        
+        with self.storage.atomic():
+            self.storage.save(self.table_name, entry.id, entry.to_dict())
+            self.storage.delete(self.pending_table, previous_key)
+            if entry.status != "failed":
+                self.storage.save(self.pending_table, self._pending_key(entry), {
+                    "id": self._pending_key(entry),
+                    "entry_id": entry.id
+                })
+    
+    def pending_count(self) -> int:
+        """Number of entries waiting to be processed"""
+        return self.storage.count(self.pending_table)
+    
+    def get_failed(self) -> List[OutboxEntry]:
+        """Entries that exhausted their attempts"""
+        return [OutboxEntry.from_dict(data) for data in self.storage.find(self.table_name, {"status": "failed"})]
+    
+    @classmethod
+    def _pending_key(cls, entry: OutboxEntry) -> str:
+        due = entry.sequence
+        if entry.next_attempt_at:
+            microseconds = round(entry.next_attempt_at.timestamp() * 1_000_000)
+            due = cls._due_key(microseconds * 1000, entry.attempts)
+        return f"{due}{INDEX_KEY_SEPARATOR}{entry.id}"
+    
+    @staticmethod
+    def _due_key(time_ns: int, tiebreak: int = 0) -> str:
+        """Sortable key in the same layout as OutboxEntry.sequence"""
+        return f"{time_ns:020d}-{tiebreak:012d}"
+
+
+class OutboxWorker:
+    """
+    Drains an outbox in batches and dispatches entries to handlers by kind
+    
+    Each entry is applied and acknowledged in its own storage.atomic()
+    block, so a failing handler's partial writes roll back instead of being
+    committed alongside its failure record. That needs the worker's block
+    to be the outermost one, so process_batch() refuses to run inside an
+    open transaction. A failed entry is retried after retry_backoff_seconds,
+    doubling per attempt. Handlers should still be idempotent (e.g. save
+    records by a pre-assigned id), as storage backends without rollback keep
+    partial writes and the entry is retried.
+    """
+    
+    def __init__(
+        self,
+        outbox: TransactionalOutbox,
+        handlers: Dict[str, Callable[[Dict[str, Any]], None]],
+        batch_size: int = 100,
+        max_attempts: int = 5,
+        poll_interval_seconds: float = 1.0,
+        retry_backoff_seconds: float = 1.0
+    ):
+        self.outbox = outbox
+        self.handlers = dict(handlers)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.processed = 0
+        self.failed = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._drain_lock = threading.Lock()
+    
+    def process_batch(self) -> int:
+        """
+        Process one batch of pending entries
+        
+        Returns:
+            Number of entries fetched (0 when nothing is due)
+        
+        Raises:
+            RuntimeError: If called inside an open storage transaction
+        """
+        if self.outbox.storage._atomic_state().depth:
+            raise RuntimeError("OutboxWorker cannot process a batch inside an open storage transaction")
+        
+        with self._drain_lock:
+            batch = self.outbox.fetch_batch(self.batch_size)
+            if not batch:
+                return 0
+            
+            storage = self.outbox.storage
+            for entry in batch:
+                handler = self.handlers.get(entry.kind)
+                try:
+                    if handler is None:
+                        raise ValueError(f"No outbox handler for kind '{entry.kind}'")
+                    with storage.atomic():
+                        handler(entry.payload)
+                        self.outbox.acknowledge([entry])
+                except Exception as e:
+                    logger.error(f"Outbox entry {entry.id} ({entry.kind}) failed: {e}")
+                    self.outbox.record_failure(entry, str(e), self.max_attempts, self.retry_backoff_seconds)
+                    self.failed += 1
+                    continue
+                self.processed += 1
+            
+            return len(batch)
+    
+    def drain(self, max_batches: Optional[int] = None) -> int:
+        """
+        Process batches until no entries are due
+        
+        Args:
+            max_batches: Optional cap on the number of batches
+        
+        Returns:
+            Number of entries fetched
+        """
+        total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            fetched = self.process_batch()
+            if not fetched:
+                break
+            total += fetched
+            batches += 1
+        return total
+    
+    def start(self) -> None:
+        """Start draining in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-worker")
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info("OutboxWorker started")
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the background thread after its current batch"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        logger.info("OutboxWorker stopped")
+    
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.drain()
+            except Exception as e:
+                logger.error(f"Outbox worker error: {e}")
+            self._stop_event.wait(self.poll_interval_seconds)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get worker statistics"""
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "processed": self.processed,
+            "failed": self.failed,
+            "pending": self.outbox.pending_count(),
+            "batch_size": self.batch_size
+        }
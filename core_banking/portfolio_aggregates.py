@@ -0,0 +1,476 @@
+"""
+Portfolio Aggregates Module
+
+Pre-aggregated account positions for the built-in reports. Each customer
+account has a fact row (its report dimensions and book balance); facts are
+summed into position rows keyed (product type, currency, state, customer
+segment) and into daily flow rows keyed by the same dimensions plus the
+posting day. The rows are kept current from the ledger change log: the
+aggregates remember the last change they applied and apply the newer ones
+as each transaction posts (with a subscribed dispatcher) and from a
+LedgerChangeWorker, so postings made by any process are reflected and a
+portfolio report reads a handful of positions instead of every account's
+ledger history. Reads never write. rebuild() recomputes everything from
+the accounts and journal entries in one pass over the ledger.
+"""
+
+from decimal import Decimal
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .storage import StorageInterface, INDEX_KEY_SEPARATOR
+from .events import DomainEvent, EventDispatcher, EventPayload
+from .ledger import LedgerChangeLog, JOURNAL_POSTED, JOURNAL_REVERSED, ACCOUNT_CHANGED, CUSTOMER_CHANGED
+
+
+# Account types with a credit normal balance (AccountType values)
+CREDIT_NORMAL_TYPES = ("liability", "equity", "revenue")
+
+# Products reported from the customer's side, as AccountManager.get_book_balance() does
+CUSTOMER_SIGN_PRODUCTS = ("credit_line",)
+
+# Segment of accounts whose customer record is missing
+UNKNOWN_SEGMENT = "unknown"
+
+# Summed fields of position and daily flow rows
+AMOUNT_FIELDS = ("account_count", "balance", "rate_sum", "rate_weighted_balance")
+
+# Events that change an account's fact row; a KYC change moves its segment
+ACCOUNT_EVENTS = (
+    DomainEvent.ACCOUNT_CREATED, DomainEvent.ACCOUNT_UPDATED, DomainEvent.ACCOUNT_CLOSED,
+    DomainEvent.CUSTOMER_KYC_CHANGED
+)
+
+
+def rate_band(interest_rate: Optional[Decimal]) -> str:
+    """Interest rate band used by the deposit portfolio report"""
+    rate_pct = (interest_rate or Decimal('0')) * 100
+    if rate_pct >= 5:
+        return "5%+"
+    elif rate_pct >= 3:
+        return "3-5%"
+    elif rate_pct >= 1:
+        return "1-3%"
+    return "0-1%"
+
+
+def _position_key(dimensions: Tuple[str, str, str, str]) -> str:
+    return INDEX_KEY_SEPARATOR.join(dimensions)
+
+
+def _flow_key(dimensions: Tuple[str, str, str, str], day: str) -> str:
+    return INDEX_KEY_SEPARATOR.join(dimensions + (day,))
+
+
+def _contribution(fact: Dict[str, Any]) -> Dict[str, Decimal]:
+    """What one account adds to its position"""
+    balance = Decimal(fact["balance"])
+    rate = Decimal(fact["interest_rate"]) if fact.get("interest_rate") else Decimal('0')
+    return {
+        "account_count": Decimal('1'),
+        "balance": balance,
+        "rate_sum": rate,
+        "rate_weighted_balance": balance * rate
+    }
+
+
+def _line_deltas(entry: Dict[str, Any]) -> Dict[Tuple[str, str], Decimal]:
+    """Net debit-minus-credit of a journal entry per (account, currency)"""
+    deltas: Dict[Tuple[str, str], Decimal] = {}
+    for line in entry["lines"]:
+        key = (line["account_id"], line["debit_currency"])
+        debit = Decimal(line["debit_amount"])
+        deltas[key] = deltas.get(key, Decimal('0')) + (debit if debit else -Decimal(line["credit_amount"]))
+    return deltas
+
+
+def _signed(fact: Dict[str, Any], delta: Decimal) -> Decimal:
+    """Book-balance change of an account for a debit-minus-credit ledger delta"""
+    if fact["account_type"] in CREDIT_NORMAL_TYPES:
+        delta = -delta
+    if fact["product_type"] in CUSTOMER_SIGN_PRODUCTS:
+        delta = -delta
+    return delta
+
+
+class PortfolioAggregates:
+    """
+    Incrementally maintained account positions by product, currency,
+    state and customer segment
+    
+    Positions hold the current account count, book balance, sum of
+    interest rates and rate-weighted balance, with a breakdown by rate
+    band; daily flows hold the changes to the same sums per posting day,
+    so positions can be rolled back to an earlier date. Changes recorded
+    before the first rebuild are skipped, as the rebuild covers them.
+    """
+    
+    CONSUMER = "portfolio_aggregates"
+    
+    accounts_table = "accounts"
+    customers_table = "customers"
+    journal_table = "journal_entries"
+    
+    def __init__(self, storage: StorageInterface):
+        self.storage = storage
+        
+        self.facts_table = "reporting_account_facts"
+        self.positions_table = "reporting_positions"
+        self.flows_table = "reporting_daily_flows"
+        self.state_table = "reporting_aggregates_state"
+        
+        self.changes = LedgerChangeLog(storage)
+        self.dispatcher: Optional[EventDispatcher] = None
+    
+    def subscribe(self, dispatcher: EventDispatcher) -> None:
+        """Apply ledger changes as a dispatcher's domain events arrive, and allow building on first use"""
+        dispatcher.subscribe(DomainEvent.TRANSACTION_POSTED, self.on_transaction_posted)
+        for event_type in ACCOUNT_EVENTS:
+            dispatcher.subscribe(event_type, self.on_account_changed)
+        self.dispatcher = dispatcher
+    
+    def unsubscribe(self, dispatcher: EventDispatcher) -> None:
+        dispatcher.unsubscribe(DomainEvent.TRANSACTION_POSTED, self.on_transaction_posted)
+        for event_type in ACCOUNT_EVENTS:
+            dispatcher.unsubscribe(event_type, self.on_account_changed)
+        if self.dispatcher is dispatcher:
+            self.dispatcher = None
+    
+    def on_transaction_posted(self, event: EventPayload) -> None:
+        """Apply the posted transaction's journal entry, with any other pending changes"""
+        self.catch_up()
+    
+    def on_account_changed(self, event: EventPayload) -> None:
+        """Register a new account or move a changed one, with any other pending changes"""
+        self.catch_up()
+    
+    def catch_up(self, batch_size: int = 1000) -> int:
+        """
+        Apply the ledger changes recorded after the last one applied
+        
+        Runs in one storage transaction with the saved high-water mark, so
+        concurrent callers never apply a change twice. Does nothing before
+        the first rebuild, and opens no transaction when nothing is pending.
+        
+        Returns:
+            Number of changes applied
+        """
+        state = self.storage.load(self.state_table, "state")
+        if not state or self.changes.last_sequence() <= state.get("ledger_sequence", 0):
+            return 0
+        applied = 0
+        
+        with self.storage.atomic():
+            state = self.storage.load(self.state_table, "state")
+            if not state:
+                return 0
+            sequence = state.get("ledger_sequence", 0)
+            
+            while True:
+                changes = self.changes.changes_after(sequence, batch_size)
+                if not changes:
+                    break
+                for change in changes:
+                    self._apply_change(change)
+                sequence = changes[-1]["sequence"]
+                applied += len(changes)
+            
+            if applied:
+                self.storage.save(self.state_table, "state", dict(state, ledger_sequence=sequence))
+                self.changes.save_cursor(self.CONSUMER, sequence)
+        return applied
+    
+    def apply_journal_entry(self, entry: Dict[str, Any], sign: int = 1) -> None:
+        """
+        Add the balance changes of a posted journal entry
+        
+        With sign -1, take them back out, as for an entry that was reversed
+        (reversed entries no longer count towards ledger balances).
+        """
+        if sign > 0:
+            day = (entry.get("posted_at") or entry["created_at"])[:10]
+        else:
+            day = entry["updated_at"][:10]
+        
+        with self.storage.atomic():
+            for (account_id, currency), delta in _line_deltas(entry).items():
+                fact = self.storage.load(self.facts_table, account_id)
+                if not fact:
+                    account = self.storage.load(self.accounts_table, account_id)
+                    if not account:
+                        # System and GL accounts are not reported
+                        continue
+                    fact = self.sync_account(account)
+                if fact["currency"] != currency:
+                    continue
+                
+                updated = dict(fact, balance=str(Decimal(fact["balance"]) + sign * _signed(fact, delta)))
+                self._move(fact, updated, day)
+                self.storage.save(self.facts_table, account_id, updated)
+    
+    def sync_account(self, account: Dict[str, Any], day: Optional[str] = None) -> Dict[str, Any]:
+        """Create or refresh an account's fact row from its stored record"""
+        day = day or date.today().isoformat()
+        
+        with self.storage.atomic():
+            previous = self.storage.load(self.facts_table, account["id"])
+            fact = self._fact(account, previous["balance"] if previous else "0")
+            if previous != fact:
+                self._move(previous, fact, day)
+                self.storage.save(self.facts_table, account["id"], fact)
+        return fact
+    
+    def get_positions(
+        self,
+        currency: Optional[str] = None,
+        state: Optional[str] = None,
+        as_of: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Position rows, optionally for one currency and account state
+        
+        Amounts are Decimals. With as_of, each position is rolled back by
+        the daily flows recorded after that date. Positions reflect the
+        changes applied so far; reading does not catch up.
+        """
+        self.ensure_built()
+        positions = []
+        
+        for row in self.storage.load_all(self.positions_table):
+            if (currency and row["currency"] != currency) or (state and row["state"] != state):
+                continue
+            
+            position = self._decode(row)
+            if as_of:
+                # Rate bands are only kept for the current positions
+                del position["rate_bands"]
+                dimensions = (row["product_type"], row["currency"], row["state"], row["segment"])
+                start = _flow_key(dimensions, as_of.isoformat()) + "\x00"
+                end = _position_key(dimensions) + chr(ord(INDEX_KEY_SEPARATOR) + 1)
+                for flow in self.storage.scan_range(self.flows_table, start, end):
+                    for field in AMOUNT_FIELDS:
+                        position[field] -= Decimal(flow[field])
+            positions.append(position)
+        
+        return positions
+    
+    def is_built(self) -> bool:
+        return self.storage.exists(self.state_table, "state")
+    
+    def ensure_built(self) -> None:
+        """
+        Build the aggregates on first use
+        
+        Only aggregates subscribed to a dispatcher build themselves; others
+        must be built with an explicit rebuild(), so that a process that is
+        not wired for updates never quietly persists the first snapshot.
+        
+        Raises:
+            ValueError: If the aggregates were never built and no dispatcher is subscribed
+        """
+        if self.is_built():
+            return
+        if self.dispatcher is None:
+            raise ValueError(
+                "Portfolio aggregates have not been built; call rebuild() or subscribe them to an event dispatcher"
+            )
+        self.rebuild()
+    
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """
+        Recompute facts, positions and daily flows from the ledger
+        
+        Reads the accounts and customers once and streams the journal
+        entries once, in one storage transaction that also records the
+        latest ledger change as the point to catch up from. Account opening
+        counts are dated by the account's creation; state changes made
+        before the rebuild are not replayed, so each account's history is
+        attributed to its current dimensions.
+        
+        Returns:
+            Number of accounts aggregated
+        """
+        with self.storage.atomic():
+            return self._rebuild(batch_size)
+    
+    def _rebuild(self, batch_size: int) -> int:
+        sequence = self.changes.last_sequence()
+        segments: Dict[str, str] = {}
+        facts: Dict[str, Dict[str, Any]] = {}
+        balances: Dict[str, Decimal] = {}
+        flows: Dict[str, Dict[str, Any]] = {}
+        
+        for batch in self.storage.iter_batches(self.accounts_table, batch_size):
+            for account in batch:
+                customer_id = account.get("customer_id")
+                if customer_id not in segments:
+                    customer = self.storage.load(self.customers_table, customer_id) if customer_id else None
+                    segments[customer_id] = (customer or {}).get("kyc_tier") or UNKNOWN_SEGMENT
+                fact = facts[account["id"]] = self._fact(account, "0", segments[customer_id])
+                balances[account["id"]] = Decimal('0')
+                self._add_flow(flows, fact, account["created_at"][:10], account_count=1,
+                               rate_sum=_contribution(fact)["rate_sum"])
+        
+        posted = "posted"
+        for batch in self.storage.iter_batches(self.journal_table, batch_size):
+            for entry in batch:
+                if entry.get("state") != posted:
+                    continue
+                day = (entry.get("posted_at") or entry["created_at"])[:10]
+                for (account_id, currency), delta in _line_deltas(entry).items():
+                    fact = facts.get(account_id)
+                    if not fact or fact["currency"] != currency:
+                        continue
+                    signed = _signed(fact, delta)
+                    balances[account_id] += signed
+                    self._add_flow(flows, fact, day, balance=signed,
+                                   rate_weighted_balance=signed * _contribution(fact)["rate_sum"])
+        
+        positions: Dict[str, Dict[str, Any]] = {}
+        for account_id, fact in facts.items():
+            fact["balance"] = str(balances[account_id])
+            self._accumulate(positions, fact, 1)
+        
+        for table in (self.facts_table, self.positions_table, self.flows_table):
+            self.storage.clear_table(table)
+        self.storage.save_many(self.facts_table, facts)
+        self.storage.save_many(self.positions_table, {key: self._encode(row) for key, row in positions.items()})
+        self.storage.save_many(self.flows_table, {key: self._encode(row) for key, row in flows.items()})
+        self.storage.save(self.state_table, "state", {
+            "id": "state",
+            "rebuilt_at": datetime.now(timezone.utc).isoformat(),
+            "ledger_sequence": sequence
+        })
+        self.changes.save_cursor(self.CONSUMER, sequence)
+        return len(facts)
+    
+    def _apply_change(self, change: Dict[str, Any]) -> None:
+        """Apply one ledger change log entry"""
+        if change["kind"] == ACCOUNT_CHANGED:
+            account = self.storage.load(self.accounts_table, change["entity_id"])
+            if account:
+                self.sync_account(account)
+        elif change["kind"] in (JOURNAL_POSTED, JOURNAL_REVERSED):
+            entry = self.storage.load(self.journal_table, change["entity_id"])
+            if entry:
+                self.apply_journal_entry(entry, -1 if change["kind"] == JOURNAL_REVERSED else 1)
+        elif change["kind"] == CUSTOMER_CHANGED:
+            # A new KYC tier moves the customer's accounts to another segment
+            for fact in self.storage.find(self.facts_table, {"customer_id": change["entity_id"]}):
+                account = self.storage.load(self.accounts_table, fact["id"])
+                if account:
+                    self.sync_account(account)
+    
+    # Internals
+    
+    def _fact(self, account: Dict[str, Any], balance: str, segment: Optional[str] = None) -> Dict[str, Any]:
+        if segment is None:
+            customer = self.storage.load(self.customers_table, account["customer_id"]) if account.get("customer_id") else None
+            segment = (customer or {}).get("kyc_tier") or UNKNOWN_SEGMENT
+        return {
+            "id": account["id"],
+            "customer_id": account.get("customer_id"),
+            "product_type": account["product_type"],
+            "account_type": account["account_type"],
+            "currency": account["currency"],
+            "state": account["state"],
+            "segment": segment,
+            "interest_rate": account.get("interest_rate"),
+            "balance": balance
+        }
+    
+    @staticmethod
+    def _dimensions(fact: Dict[str, Any]) -> Tuple[str, str, str, str]:
+        return (fact["product_type"], fact["currency"], fact["state"], fact["segment"])
+    
+    def _move(self, old: Optional[Dict[str, Any]], new: Dict[str, Any], day: str) -> None:
+        """Replace an account's contribution to positions and flows"""
+        positions: Dict[str, Dict[str, Any]] = {}
+        flows: Dict[str, Dict[str, Any]] = {}
+        
+        for fact, sign in ((old, -1), (new, 1)):
+            if fact is None:
+                continue
+            key = _position_key(self._dimensions(fact))
+            if key not in positions:
+                stored = self.storage.load(self.positions_table, key)
+                positions[key] = self._decode(stored) if stored else self._empty_row(fact)
+            self._accumulate(positions, fact, sign)
+            contribution = _contribution(fact)
+            self._add_flow(flows, fact, day, account_count=sign, balance=sign * contribution["balance"],
+                           rate_sum=sign * contribution["rate_sum"],
+                           rate_weighted_balance=sign * contribution["rate_weighted_balance"])
+        
+        # Emptied positions are kept: their flows still roll back to earlier dates
+        for key, row in positions.items():
+            self.storage.save(self.positions_table, key, self._encode(row))
+        
+        for key, row in flows.items():
+            stored = self.storage.load(self.flows_table, key)
+            if stored:
+                stored = self._decode(stored)
+                for field in AMOUNT_FIELDS:
+                    row[field] += stored[field]
+            self.storage.save(self.flows_table, key, self._encode(row))
+    
+    def _empty_row(self, fact: Dict[str, Any], day: Optional[str] = None) -> Dict[str, Any]:
+        row = {
+            "id": _position_key(self._dimensions(fact)) if day is None else _flow_key(self._dimensions(fact), day),
+            "product_type": fact["product_type"],
+            "account_type": fact["account_type"],
+            "currency": fact["currency"],
+            "state": fact["state"],
+            "segment": fact["segment"],
+            "account_count": Decimal('0'),
+            "balance": Decimal('0'),
+            "rate_sum": Decimal('0'),
+            "rate_weighted_balance": Decimal('0')
+        }
+        if day is None:
+            row["rate_bands"] = {}
+        else:
+            row["day"] = day
+        return row
+    
+    def _accumulate(self, positions: Dict[str, Dict[str, Any]], fact: Dict[str, Any], sign: int) -> None:
+        key = _position_key(self._dimensions(fact))
+        row = positions.setdefault(key, self._empty_row(fact))
+        contribution = _contribution(fact)
+        for field, value in contribution.items():
+            row[field] += sign * value
+        
+        band = rate_band(contribution["rate_sum"])
+        totals = row["rate_bands"].setdefault(band, {
+            "account_count": Decimal('0'), "balance": Decimal('0'), "rate_sum": Decimal('0')
+        })
+        for field in totals:
+            totals[field] += sign * contribution[field]
+        if totals["account_count"] == 0 and totals["balance"] == 0:
+            del row["rate_bands"][band]
+    
+    def _add_flow(self, flows: Dict[str, Dict[str, Any]], fact: Dict[str, Any], day: str, **amounts) -> None:
+        key = _flow_key(self._dimensions(fact), day)
+        row = flows.setdefault(key, self._empty_row(fact, day))
+        for field, value in amounts.items():
+            row[field] += Decimal(value)
+    
+    @staticmethod
+    def _encode(row: Dict[str, Any]) -> Dict[str, Any]:
+        """Stored form: Decimals as strings"""
+        encoded = {k: str(v) if isinstance(v, Decimal) else v for k, v in row.items()}
+        if "rate_bands" in row:
+            encoded["rate_bands"] = {
+                band: {k: str(v) for k, v in totals.items()} for band, totals in row["rate_bands"].items()
+            }
+        return encoded
+    
+    @staticmethod
+    def _decode(row: Dict[str, Any]) -> Dict[str, Any]:
+        decoded = dict(row)
+        for field in AMOUNT_FIELDS:
+            decoded[field] = Decimal(row[field])
+        if "rate_bands" in row:
+            decoded["rate_bands"] = {
+                band: {k: Decimal(v) for k, v in totals.items()} for band, totals in row["rate_bands"].items()
+            }
+        return decoded
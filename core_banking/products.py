@@ -9,7 +9,7 @@ products through configuration instead of code changes. Inspired by Oradian's
 from decimal import Decimal
 from datetime import datetime, timezone
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union, Any
 from enum import Enum
 import uuid
 
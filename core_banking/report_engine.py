@@ -0,0 +1,506 @@
+"""
+Custom Report Engine Module
+
+Executes user-defined report definitions against storage. A definition is
+compiled into a ReportPlan: the source table, how it is read (a key range
+of the source's time index for a report period, when the index is built,
+otherwise a scan with the equality filters pushed down to the storage
+backend through find_batches), the predicates left to check per record,
+and the dimension fields and metrics to compute. Execution streams the
+matching records once, hash-aggregating them by dimension
+values and updating every metric in the same pass. When a report has more
+groups than fit the in-memory limit, partial aggregates are spilled to
+hash-partitioned files and merged one partition at a time.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import zlib
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .storage import StorageInterface, matches_filters
+from .portfolio_aggregates import PortfolioAggregates
+from .transactions import TransactionTimeIndex
+
+if TYPE_CHECKING:
+    from .reporting import ReportDefinition
+
+
+# Metric fields that count records rather than read a value
+ROW_COUNT_FIELDS = ("count", "*")
+
+# Run-time filter naming the source to scan
+SOURCE_FILTER = "source"
+
+# Source scanned for each report type (ReportType values); others use DEFAULT_SOURCE
+REPORT_TYPE_SOURCES = {
+    "transaction_volume": "transactions",
+    "loan_portfolio": "loans",
+    "delinquency": "collection_cases",
+    "collection_performance": "collection_cases",
+    "customer_segment": "customers",
+}
+DEFAULT_SOURCE = "accounts"
+
+# Derived dimension: the day of the source's time field
+DATE_DIMENSION = "date"
+
+
+@dataclass(frozen=True)
+class ReportSource:
+    """
+    A table custom reports can scan
+    
+    dimensions maps DimensionType values to record fields; fields maps
+    metric and filter names to record fields where they differ. A
+    time_index orders the records by time_field, so report periods are
+    read as one key range.
+    """
+    name: str
+    table: str
+    dimensions: Dict[str, str]
+    fields: Dict[str, str] = field(default_factory=dict)
+    time_field: Optional[str] = None
+    prepare: Optional[Callable[[], None]] = None
+    time_index: Optional[TransactionTimeIndex] = None
+    
+    def resolve(self, name: str) -> str:
+        """Record field for a dimension, metric or filter name"""
+        return self.dimensions.get(name) or self.fields.get(name) or name
+
+
+@dataclass
+class PlannedMetric:
+    name: str
+    field: Optional[str]  # None counts records
+    aggregation: str
+
+
+@dataclass
+class ReportPlan:
+    """
+    Compiled form of a report definition
+    
+    With a time_index, the period bounds select a key range of the index
+    and only the records in it are loaded; pushed_filters are then checked
+    on the loaded records. Without one, pushed_filters are evaluated by the
+    storage backend over the whole table (find_batches; no backend indexes
+    them: SQL backends match with json_extract) and the period bounds are
+    checked per record. residual_filters map fields (or the derived date)
+    to the values they may take and are checked on each streamed record.
+    """
+    source: str
+    table: str
+    pushed_filters: Dict[str, Any]
+    residual_filters: Dict[str, List[Any]]
+    dimensions: List[Tuple[str, str]]
+    metrics: List[PlannedMetric]
+    time_field: Optional[str] = None
+    period_start: Optional[datetime] = None
+    period_end: Optional[datetime] = None
+    time_index: Optional[str] = None
+    
+    def explain(self) -> Dict[str, Any]:
+        """
+        Readable summary of the plan
+        
+        access is "index_range" when the period is read from the time index
+        and "table_scan" otherwise; index_backed_filters names the fields
+        whose predicates an index answers. Pushed equality filters are never
+        index-backed.
+        """
+        return {
+            "source": self.source,
+            "table": self.table,
+            "access": "index_range" if self.time_index else "table_scan",
+            "index": self.time_index,
+            "index_backed_filters": [self.time_field] if self.time_index else [],
+            "pushed_filters": dict(self.pushed_filters),
+            "residual_filters": {key: list(values) for key, values in self.residual_filters.items()},
+            "group_by": [dimension for dimension, _ in self.dimensions],
+            "metrics": [(metric.name, metric.aggregation) for metric in self.metrics],
+            "period_field": self.time_field,
+            "period": [moment.isoformat() if moment else None for moment in (self.period_start, self.period_end)],
+        }
+
+
+@dataclass
+class ReportOutput:
+    """Aggregated rows and grand totals of an executed plan"""
+    rows: List[Dict[str, Any]]
+    totals: Dict[str, Any]
+    records_read: int = 0  # returned by storage after pushdown
+    records_matched: int = 0
+    spill_partitions: int = 0
+
+
+def _utc(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def _sort_key(key: Tuple[Any, ...]) -> Tuple[Tuple[int, str], ...]:
+    # None sorts first; other values by their text
+    return tuple((0, "") if value is None else (1, str(value)) for value in key)
+
+
+def _new_state(metric_count: int) -> List[List[Any]]:
+    """Per-metric [count, sum, min, max]"""
+    return [[0, Decimal('0'), None, None] for _ in range(metric_count)]
+
+
+def _update(states: List[List[Any]], values: List[Optional[Decimal]]) -> None:
+    for state, value in zip(states, values):
+        if value is None:
+            continue
+        state[0] += 1
+        state[1] += value
+        if state[2] is None or value < state[2]:
+            state[2] = value
+        if state[3] is None or value > state[3]:
+            state[3] = value
+
+
+def _merge(states: List[List[Any]], other: List[List[Any]]) -> None:
+    for state, partial in zip(states, other):
+        state[0] += partial[0]
+        state[1] += partial[1]
+        if partial[2] is not None and (state[2] is None or partial[2] < state[2]):
+            state[2] = partial[2]
+        if partial[3] is not None and (state[3] is None or partial[3] > state[3]):
+            state[3] = partial[3]
+
+
+def _encode_states(states: List[List[Any]]) -> List[List[Any]]:
+    return [[count, str(total), None if low is None else str(low), None if high is None else str(high)]
+            for count, total, low, high in states]
+
+
+def _decode_states(states: List[List[Any]]) -> List[List[Any]]:
+    return [[count, Decimal(total), None if low is None else Decimal(low), None if high is None else Decimal(high)]
+            for count, total, low, high in states]
+
+
+def _finalize(metric: PlannedMetric, state: List[Any], grand_state: List[Any]) -> Any:
+    count, total, low, high = state
+    if metric.aggregation == "count":
+        return count
+    elif metric.aggregation == "sum":
+        return total
+    elif metric.aggregation == "average":
+        return total / count if count else None
+    elif metric.aggregation == "min":
+        return low
+    elif metric.aggregation == "max":
+        return high
+    elif metric.aggregation == "percentage":
+        # Share of the metric's grand total, in percent
+        grand_total = grand_state[1]
+        return total * 100 / grand_total if grand_total else Decimal('0')
+    raise ValueError(f"Unsupported aggregation: {metric.aggregation}")
+
+
+def default_period_start(period: str, now: datetime) -> datetime:
+    """
+    Start of the current reporting period (ReportPeriod values) containing
+    now; daily and custom periods start at midnight
+    """
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "weekly":
+        return midnight - timedelta(days=midnight.weekday())
+    elif period == "monthly":
+        return midnight.replace(day=1)
+    elif period == "quarterly":
+        return midnight.replace(month=(midnight.month - 1) // 3 * 3 + 1, day=1)
+    elif period == "yearly":
+        return midnight.replace(month=1, day=1)
+    return midnight
+
+
+class CustomReportEngine:
+    """
+    Compiles report definitions into plans and executes them
+    
+    max_groups bounds the groups held in memory while scanning; beyond it,
+    partial aggregates go to spill_partitions files under spill_dir (the
+    system temporary directory by default).
+    """
+    
+    def __init__(
+        self,
+        storage: StorageInterface,
+        aggregates: Optional[PortfolioAggregates] = None,
+        batch_size: int = 1000,
+        max_groups: int = 100000,
+        spill_partitions: int = 16,
+        spill_dir: Optional[str] = None
+    ):
+        self.storage = storage
+        self.aggregates = aggregates or PortfolioAggregates(storage)
+        self.batch_size = batch_size
+        self.max_groups = max_groups
+        self.spill_partitions = spill_partitions
+        self.spill_dir = spill_dir
+        
+        self.sources = {source.name: source for source in self._default_sources()}
+    
+    def _default_sources(self) -> List[ReportSource]:
+        return [
+            # Account facts carry the book balance and customer segment
+            ReportSource(
+                name="accounts",
+                table=self.aggregates.facts_table,
+                dimensions={"product": "product_type", "currency": "currency", "customer_tier": "segment"},
+                prepare=self.aggregates.ensure_built
+            ),
+            ReportSource(
+                name="transactions",
+                table="transactions",
+                dimensions={"currency": "currency", "transaction_type": "transaction_type"},
+                fields={"volume": "amount"},
+                time_field="processed_at",
+                time_index=TransactionTimeIndex(self.storage)
+            ),
+            ReportSource(
+                name="loans",
+                table="loans",
+                dimensions={"currency": "current_balance_currency"},
+                fields={"balance": "current_balance_amount", "total_paid": "total_paid_amount"},
+                time_field="created_at"
+            ),
+            ReportSource(
+                name="collection_cases",
+                table="collection_cases",
+                dimensions={"delinquency_status": "status", "currency": "amount_overdue_currency"},
+                time_field="created_at"
+            ),
+            ReportSource(
+                name="customers",
+                table="customers",
+                dimensions={"customer_tier": "kyc_tier"},
+                time_field="created_at"
+            ),
+        ]
+    
+    def compile(
+        self,
+        definition: 'ReportDefinition',
+        period_start: Optional[datetime] = None,
+        period_end: Optional[datetime] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> ReportPlan:
+        """
+        Plan a report definition
+        
+        Run-time filters override the definition's. A "source" filter picks
+        the table to scan; otherwise it follows the report type. Scalar
+        filters on stored fields are pushed down to storage; list values
+        (any of) and filters on the date dimension are checked per record.
+        A period on a source with a built time index is read as a key range
+        of the index.
+        
+        Raises:
+            ValueError: For an unknown source, a dimension the source does
+                not have, or an unsupported aggregation
+        """
+        merged = dict(definition.filters or {})
+        merged.update(filters or {})
+        
+        source_name = merged.pop(SOURCE_FILTER, None) or REPORT_TYPE_SOURCES.get(
+            definition.report_type.value, DEFAULT_SOURCE
+        )
+        source = self.sources.get(source_name)
+        if not source:
+            raise ValueError(f"Unknown report source: {source_name}")
+        
+        dimensions = []
+        for dimension in definition.dimensions:
+            if dimension.value == DATE_DIMENSION and source.time_field:
+                dimensions.append((DATE_DIMENSION, DATE_DIMENSION))
+            elif dimension.value in source.dimensions:
+                dimensions.append((dimension.value, source.dimensions[dimension.value]))
+            else:
+                raise ValueError(f"Dimension {dimension.value} is not available for {source.name} reports")
+        
+        metrics = []
+        for metric in definition.metrics:
+            aggregation = metric.aggregation.value
+            if aggregation not in ("sum", "count", "average", "min", "max", "percentage"):
+                raise ValueError(f"Unsupported aggregation: {aggregation}")
+            metric_field = None if metric.field in ROW_COUNT_FIELDS else source.resolve(metric.field)
+            metrics.append(PlannedMetric(metric.name, metric_field, aggregation))
+        
+        pushed_filters: Dict[str, Any] = {}
+        residual_filters: Dict[str, List[Any]] = {}
+        for name, value in merged.items():
+            record_field = DATE_DIMENSION if name == DATE_DIMENSION and source.time_field else source.resolve(name)
+            if isinstance(value, (list, tuple, set)):
+                residual_filters[record_field] = list(value)
+            elif record_field == DATE_DIMENSION:
+                residual_filters[record_field] = [value]
+            else:
+                pushed_filters[record_field] = value
+        
+        period_start = _utc(period_start) if period_start and source.time_field else None
+        period_end = _utc(period_end) if period_end and source.time_field else None
+        time_index = source.time_index
+        use_index = bool(period_start or period_end) and time_index is not None and time_index.is_built()
+        
+        return ReportPlan(
+            source=source.name,
+            table=source.table,
+            pushed_filters=pushed_filters,
+            residual_filters=residual_filters,
+            dimensions=dimensions,
+            metrics=metrics,
+            time_field=source.time_field,
+            period_start=period_start,
+            period_end=period_end,
+            time_index=time_index.table_name if use_index else None
+        )
+    
+    def execute(self, plan: ReportPlan) -> ReportOutput:
+        """Run a plan in one pass over the matching records"""
+        source = self.sources[plan.source]
+        if source.prepare:
+            source.prepare()
+        
+        output = ReportOutput(rows=[], totals={})
+        groups: Dict[Tuple[Any, ...], List[List[Any]]] = {}
+        grand = _new_state(len(plan.metrics))
+        spill_dir = None
+        
+        try:
+            for batch in self._batches(plan, source):
+                for record in batch:
+                    output.records_read += 1
+                    day = self._day(plan, record)
+                    if not self._matches(plan, record, day):
+                        continue
+                    output.records_matched += 1
+                    
+                    key = tuple(day if record_field == DATE_DIMENSION else record.get(record_field)
+                                for _, record_field in plan.dimensions)
+                    values = [self._metric_value(plan, metric, record) for metric in plan.metrics]
+                    states = groups.get(key)
+                    if states is None:
+                        states = groups[key] = _new_state(len(plan.metrics))
+                    _update(states, values)
+                    _update(grand, values)
+                    
+                    if len(groups) >= self.max_groups:
+                        if spill_dir is None:
+                            spill_dir = tempfile.mkdtemp(prefix="report-spill-", dir=self.spill_dir)
+                        self._spill(spill_dir, groups)
+                        groups = {}
+            
+            if spill_dir is not None:
+                self._spill(spill_dir, groups)
+                output.spill_partitions = self.spill_partitions
+                merged = self._merge_partitions(spill_dir)
+            else:
+                merged = groups.items()
+            
+            rows = []
+            for key, states in merged:
+                row = {dimension: value for (dimension, _), value in zip(plan.dimensions, key)}
+                for metric, state, grand_state in zip(plan.metrics, states, grand):
+                    row[metric.name] = _finalize(metric, state, grand_state)
+                rows.append((key, row))
+        finally:
+            if spill_dir is not None:
+                shutil.rmtree(spill_dir, ignore_errors=True)
+        
+        output.rows = [row for _, row in sorted(rows, key=lambda item: _sort_key(item[0]))]
+        output.totals = {
+            metric.name: _finalize(metric, state, state) for metric, state in zip(plan.metrics, grand)
+        }
+        return output
+    
+    # Internals
+    
+    def _batches(self, plan: ReportPlan, source: ReportSource) -> Iterator[List[Dict[str, Any]]]:
+        """The records a plan reads, in batches"""
+        if not plan.time_index:
+            yield from self.storage.find_batches(plan.table, plan.pushed_filters, self.batch_size)
+            return
+        
+        for record_ids in source.time_index.scan(plan.period_start, plan.period_end, self.batch_size):
+            records = (self.storage.load(plan.table, record_id) for record_id in record_ids)
+            batch = [record for record in records if record and matches_filters(record, plan.pushed_filters)]
+            if batch:
+                yield batch
+    
+    @staticmethod
+    def _day(plan: ReportPlan, record: Dict[str, Any]) -> Optional[str]:
+        timestamp = record.get(plan.time_field) if plan.time_field else None
+        return timestamp[:10] if timestamp else None
+    
+    @staticmethod
+    def _matches(plan: ReportPlan, record: Dict[str, Any], day: Optional[str]) -> bool:
+        for record_field, allowed in plan.residual_filters.items():
+            value = day if record_field == DATE_DIMENSION else record.get(record_field)
+            if value not in allowed:
+                return False
+        
+        if plan.period_start or plan.period_end:
+            timestamp = record.get(plan.time_field)
+            if not timestamp:
+                return False
+            moment = _utc(datetime.fromisoformat(timestamp))
+            if plan.period_start and moment < plan.period_start:
+                return False
+            if plan.period_end and moment >= plan.period_end:
+                return False
+        return True
+    
+    @staticmethod
+    def _metric_value(plan: ReportPlan, metric: PlannedMetric, record: Dict[str, Any]) -> Optional[Decimal]:
+        if metric.field is None:
+            return Decimal('1')
+        value = record.get(metric.field)
+        if value is None or value == "":
+            return None
+        try:
+            return Decimal(str(value))
+        except InvalidOperation:
+            raise ValueError(f"Field {metric.field} of {plan.source} record {record.get('id')} is not numeric")
+    
+    def _partition(self, key: Tuple[Any, ...]) -> int:
+        return zlib.crc32(json.dumps(key).encode()) % self.spill_partitions
+    
+    def _spill(self, spill_dir: str, groups: Dict[Tuple[Any, ...], List[List[Any]]]) -> None:
+        """Append partial aggregates to their hash partitions"""
+        files = {}
+        try:
+            for key, states in groups.items():
+                partition = self._partition(key)
+                if partition not in files:
+                    files[partition] = open(os.path.join(spill_dir, f"partition-{partition}.jsonl"), "a")
+                files[partition].write(json.dumps([list(key), _encode_states(states)]) + "\n")
+        finally:
+            for spill_file in files.values():
+                spill_file.close()
+    
+    def _merge_partitions(self, spill_dir: str) -> Iterator[Tuple[Tuple[Any, ...], List[List[Any]]]]:
+        """Merge each partition's partial aggregates; one partition is in memory at a time"""
+        for partition in range(self.spill_partitions):
+            path = os.path.join(spill_dir, f"partition-{partition}.jsonl")
+            if not os.path.exists(path):
+                continue
+            merged: Dict[Tuple[Any, ...], List[List[Any]]] = {}
+            with open(path) as spill_file:
+                for line in spill_file:
+                    key, states = json.loads(line)
+                    key = tuple(key)
+                    if key in merged:
+                        _merge(merged[key], _decode_states(states))
+                    else:
+                        merged[key] = _decode_states(states)
+            yield from merged.items()
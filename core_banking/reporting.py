@@ -19,7 +19,7 @@ import json
 from .currency import Money, Currency
 from .storage import StorageInterface, StorageRecord
 from .audit import AuditTrail, AuditEventType
-from .ledger import GeneralLedger, AccountType
+from .ledger import GeneralLedger, AccountType, LedgerChangeWorker
 from .accounts import AccountManager, Account, ProductType, AccountState
 from .loans import LoanManager, Loan, LoanState
 from .credit import CreditLineManager
@@ -27,6 +27,14 @@ from .collections import CollectionsManager, DelinquencyStatus
 from .customers import CustomerManager
 from .products import ProductEngine
 from .transactions import TransactionType
+from .events import EventDispatcher
+from .portfolio_aggregates import PortfolioAggregates
+from .transaction_rollup import TransactionRollup
+from .report_engine import CustomReportEngine, default_period_start
+
+
+# Deposit product types (ProductType values)
+DEPOSIT_PRODUCTS = (ProductType.SAVINGS.value, ProductType.CHECKING.value)
 
 
 class ReportType(Enum):
@@ -170,7 +178,8 @@ class ReportingEngine:
         collections_manager: CollectionsManager = None,
         customer_manager: CustomerManager = None,
         product_engine: ProductEngine = None,
-        audit_trail: AuditTrail = None
+        audit_trail: AuditTrail = None,
+        event_dispatcher: EventDispatcher = None
     ):
         self.storage = storage
         self.ledger = ledger
@@ -183,6 +192,29 @@ class ReportingEngine:
         self.audit_trail = audit_trail
         self.report_definitions_table = "report_definitions"
         
+        # Account positions by product, currency, state and customer segment,
+        # kept current from the ledger change log by the dispatcher and the
+        # change worker; without a dispatcher they must be built with
+        # aggregates.rebuild() before the first report
+        self.aggregates = PortfolioAggregates(storage)
+        
+        # Hourly and daily transaction counts and volumes
+        self.transaction_rollup = TransactionRollup(storage)
+        
+        if event_dispatcher:
+            self.aggregates.subscribe(event_dispatcher)
+            self.transaction_rollup.subscribe(event_dispatcher)
+        
+        # Executes user-defined report definitions
+        self.custom_reports = CustomReportEngine(storage, self.aggregates)
+    
+    def create_change_worker(self, poll_interval_seconds: float = 5.0) -> LedgerChangeWorker:
+        """Create a worker that keeps the aggregates and rollup caught up and prunes the change log"""
+        return LedgerChangeWorker(
+            self.aggregates.changes, [self.aggregates, self.transaction_rollup],
+            poll_interval_seconds=poll_interval_seconds
+        )
+        
     def portfolio_summary(self, currency: Currency = Currency.USD) -> ReportResult:
         """
         Generate portfolio summary report with key metrics
@@ -199,25 +231,21 @@ class ReportingEngine:
         
         data = []
         
-        # Get all accounts
-        if self.account_manager:
-            accounts = self.account_manager.get_all_accounts()
+        # Pre-aggregated active account positions
+        for position in self.aggregates.get_positions(currency.code, AccountState.ACTIVE.value):
+            balance = Money(position['balance'], currency)
             
-            for account in accounts:
-                if account.currency == currency and account.state == AccountState.ACTIVE:
-                    balance = self.account_manager.get_account_balance(account.id)
+            # Asset accounts
+            if position['account_type'] == AccountType.ASSET.value:
+                total_assets = total_assets + balance
+                if position['product_type'] in DEPOSIT_PRODUCTS:
+                    total_deposits = total_deposits + balance
                     
-                    # Asset accounts
-                    if account.is_asset_account:
-                        total_assets = total_assets + balance
-                        if account.is_deposit_product:
-                            total_deposits = total_deposits + balance
-                    
-                    # Liability accounts  
-                    elif account.is_liability_account:
-                        total_liabilities = total_liabilities + balance
-                        if account.is_loan_product:
-                            total_loans = total_loans + balance
+            # Liability accounts  
+            elif position['account_type'] == AccountType.LIABILITY.value:
+                total_liabilities = total_liabilities + balance
+                if position['product_type'] == ProductType.LOAN.value:
+                    total_loans = total_loans + balance
         
         # Get NPL amount
         if self.collections_manager:
@@ -385,62 +413,46 @@ class ReportingEngine:
             'weighted_avg_rate': Decimal('0')
         }
         
-        if self.account_manager:
-            accounts = self.account_manager.get_all_accounts()
+        # Group deposit positions by product and rate band
+        grouped_data = {}
+        rate_sums = {}
             
-            # Group deposit accounts
-            grouped_data = {}
+        for position in self.aggregates.get_positions(currency.code, AccountState.ACTIVE.value):
+            if position['product_type'] not in DEPOSIT_PRODUCTS:
+                continue
             
-            for account in accounts:
-                if not account.is_deposit_product or account.currency != currency:
-                    continue
-                
-                if account.state != AccountState.ACTIVE:
-                    continue
+            # Apply filters
+            if filters.get('product_type') and position['product_type'] != filters['product_type']:
+                continue
                 
-                # Apply filters
-                if filters.get('product_type') and account.product_type.value != filters['product_type']:
-                    continue
-                
-                balance = self.account_manager.get_account_balance(account.id)
-                
-                # Determine interest rate band
-                rate_band = "0-1%"
-                if account.interest_rate:
-                    rate_pct = account.interest_rate * 100
-                    if rate_pct >= 5:
-                        rate_band = "5%+"
-                    elif rate_pct >= 3:
-                        rate_band = "3-5%"
-                    elif rate_pct >= 1:
-                        rate_band = "1-3%"
-                
-                # Group key
-                group_key = (account.product_type.value, rate_band)
+            for band, band_totals in position['rate_bands'].items():
+                group_key = (position['product_type'], band)
                 
                 if group_key not in grouped_data:
                     grouped_data[group_key] = {
-                        'product_type': account.product_type.value,
-                        'rate_band': rate_band,
+                        'product_type': position['product_type'],
+                        'rate_band': band,
                         'account_count': 0,
                         'total_balance': Decimal('0'),
                         'average_rate': Decimal('0'),
                         'currency': currency.code
                     }
+                    rate_sums[group_key] = Decimal('0')
                 
-                grouped_data[group_key]['account_count'] += 1
-                grouped_data[group_key]['total_balance'] += balance.amount
-                
-                if account.interest_rate:
-                    # Weighted average calculation
-                    current_total = grouped_data[group_key]['average_rate'] * (grouped_data[group_key]['account_count'] - 1)
-                    grouped_data[group_key]['average_rate'] = (current_total + account.interest_rate * 100) / grouped_data[group_key]['account_count']
+                grouped_data[group_key]['account_count'] += int(band_totals['account_count'])
+                grouped_data[group_key]['total_balance'] += band_totals['balance']
+                rate_sums[group_key] += band_totals['rate_sum']
                 
                 # Update totals
-                totals['total_accounts'] += 1
-                totals['total_balance'] += balance.amount
+                totals['total_accounts'] += int(band_totals['account_count'])
+                totals['total_balance'] += band_totals['balance']
             
-            data = list(grouped_data.values())
+        # Average interest rate per group, in percent
+        for group_key, group in grouped_data.items():
+            if group['account_count']:
+                group['average_rate'] = rate_sums[group_key] * 100 / group['account_count']
+        
+        data = [group for group in grouped_data.values() if group['account_count']]
         
         # Calculate overall averages
         if totals['total_accounts'] > 0:
@@ -632,27 +644,19 @@ class ReportingEngine:
             'total_volume': Decimal('0')
         }
         
-        # Mock transaction data - in real implementation would query transaction history
-        transaction_types = [
-            {'type': 'DEPOSIT', 'channel': 'ATM', 'count': 1250, 'volume': Decimal('125000')},
-            {'type': 'WITHDRAWAL', 'channel': 'ATM', 'count': 980, 'volume': Decimal('98000')},
-            {'type': 'TRANSFER', 'channel': 'MOBILE', 'count': 2300, 'volume': Decimal('340000')},
-            {'type': 'PAYMENT', 'channel': 'WEB', 'count': 1100, 'volume': Decimal('165000')},
-            {'type': 'DEPOSIT', 'channel': 'BRANCH', 'count': 450, 'volume': Decimal('78000')},
-        ]
-        
-        for tx_type in transaction_types:
+        # Summed from the hourly and daily rollup buckets covering the period
+        for row in self.transaction_rollup.volume(period_start, period_end, currency.code):
             data.append({
-                'transaction_type': tx_type['type'],
-                'channel': tx_type['channel'],
-                'transaction_count': tx_type['count'],
-                'total_volume': tx_type['volume'],
-                'average_amount': tx_type['volume'] / tx_type['count'],
+                'transaction_type': row['transaction_type'],
+                'channel': row['channel'],
+                'transaction_count': row['transaction_count'],
+                'total_volume': row['total_volume'],
+                'average_amount': row['total_volume'] / row['transaction_count'],
                 'currency': currency.code
             })
             
-            totals['total_transactions'] += tx_type['count']
-            totals['total_volume'] += tx_type['volume']
+            totals['total_transactions'] += row['transaction_count']
+            totals['total_volume'] += row['total_volume']
         
         end_time = datetime.now(timezone.utc)
         generation_time = int((end_time - start_time).total_seconds() * 1000)
@@ -685,46 +689,37 @@ class ReportingEngine:
             'total_revenue': Decimal('0')
         }
         
-        if self.account_manager:
-            accounts = self.account_manager.get_all_accounts()
+        # Group active positions by product type
+        product_stats = {}
             
-            # Group by product type
-            product_stats = {}
+        for position in self.aggregates.get_positions(currency.code, AccountState.ACTIVE.value):
+            product_key = position['product_type']
             
-            for account in accounts:
-                if account.currency != currency or account.state != AccountState.ACTIVE:
-                    continue
+            if product_key not in product_stats:
+                product_stats[product_key] = {
+                    'product_type': product_key,
+                    'account_count': 0,
+                    'total_balance': Decimal('0'),
+                    'revenue': Decimal('0'),
+                    'delinquency_rate': Decimal('0'),
+                    'currency': currency.code
+                }
                 
-                product_key = account.product_type.value
+            product_stats[product_key]['account_count'] += int(position['account_count'])
+            product_stats[product_key]['total_balance'] += position['balance']
                 
-                if product_key not in product_stats:
-                    product_stats[product_key] = {
-                        'product_type': product_key,
-                        'account_count': 0,
-                        'total_balance': Decimal('0'),
-                        'revenue': Decimal('0'),
-                        'delinquency_rate': Decimal('0'),
-                        'currency': currency.code
-                    }
-                
-                balance = self.account_manager.get_account_balance(account.id)
+            # Mock revenue calculation: a month's interest on loan balances
+            if product_key == ProductType.LOAN.value:
+                product_stats[product_key]['revenue'] += position['rate_weighted_balance'] / 12
                 
-                product_stats[product_key]['account_count'] += 1
-                product_stats[product_key]['total_balance'] += balance.amount
+            totals['total_accounts'] += int(position['account_count'])
+            totals['total_balance'] += position['balance']
                 
-                # Mock revenue calculation
-                if account.is_loan_product and account.interest_rate:
-                    monthly_revenue = balance.amount * (account.interest_rate / 12)
-                    product_stats[product_key]['revenue'] += monthly_revenue
+        data = [item for item in product_stats.values() if item['account_count']]
                 
-                totals['total_accounts'] += 1
-                totals['total_balance'] += balance.amount
-            
-            data = list(product_stats.values())
-            
-            # Calculate totals
-            for item in data:
-                totals['total_revenue'] += item['revenue']
+        # Calculate totals
+        for item in data:
+            totals['total_revenue'] += item['revenue']
         
         end_time = datetime.now(timezone.utc)
         generation_time = int((end_time - start_time).total_seconds() * 1000)
@@ -1159,22 +1154,20 @@ class ReportingEngine:
     ) -> ReportResult:
         """
         Execute a custom report definition
+        
+        The definition is compiled into a storage scan (see report_engine);
+        without an explicit period, time-based sources cover the current
+        reporting period of the definition.
         """
         start_time = datetime.now(timezone.utc)
         
         if not period_start:
-            period_start = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
+            period_start = default_period_start(definition.period.value, start_time)
         if not period_end:
             period_end = start_time
         
-        # Mock custom report execution
-        data = [{
-            'dimension': 'sample',
-            'metric_value': Decimal('1000'),
-            'currency': 'USD'
-        }]
-        
-        totals = {'total_value': Decimal('1000')}
+        plan = self.custom_reports.compile(definition, period_start, period_end, filters)
+        output = self.custom_reports.execute(plan)
         
         end_time = datetime.now(timezone.utc)
         generation_time = int((end_time - start_time).total_seconds() * 1000)
@@ -1184,13 +1177,17 @@ class ReportingEngine:
             generated_at=end_time,
             period_start=period_start,
             period_end=period_end,
-            data=data,
-            totals=totals,
+            data=output.rows,
+            totals=output.totals,
             metadata={
-                'row_count': len(data),
+                'row_count': len(output.rows),
                 'generation_time_ms': generation_time,
                 'definition_name': definition.name,
-                'custom_report': True
+                'custom_report': True,
+                'plan': plan.explain(),
+                'records_read': output.records_read,
+                'records_matched': output.records_matched,
+                'spill_partitions': output.spill_partitions
             }
         )
     
@@ -6,9 +6,11 @@ and SQLite (persistence). All monetary values stored as Decimal strings.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any, Union
+from typing import Callable, Dict, Iterator, List, Optional, Any, Union
 from decimal import Decimal
 from datetime import datetime, timezone
+import bisect
+import re
 import sqlite3
 import json
 import threading
@@ -17,6 +19,28 @@ from pathlib import Path
 from contextlib import contextmanager
 
 
+# Filter values and keys SQL backends can compare inside the query
+PUSHDOWN_TYPES = (str, int, float, bool, type(None))
+PUSHDOWN_KEY = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Separator for composite index keys read with scan_range(); sorts below
+# every printable character
+INDEX_KEY_SEPARATOR = "\x1f"
+
+
+def matches_filters(record: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """Whether a record has every filter key with an equal value, as find() matches"""
+    return all(key in record and record[key] == value for key, value in filters.items())
+
+
+def _pushdown_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Filters on plain JSON keys with scalar values, which SQL can evaluate"""
+    return {
+        key: value for key, value in filters.items()
+        if isinstance(value, PUSHDOWN_TYPES) and PUSHDOWN_KEY.match(key)
+    }
+
+
 @dataclass
 class StorageRecord:
     """Base class for all stored records"""
@@ -96,6 +120,112 @@ class StorageInterface(ABC):
         """Close storage connection"""
         pass
     
+    def save_many(self, table: str, records: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Save several records to one table
+        
+        Backends override this with a multi-row write; the default saves
+        records one by one.
+        
+        Args:
+            table: Table name
+            records: Record id -> record data
+        """
+        for record_id, data in records.items():
+            self.save(table, record_id, data)
+    
+    def insert_if_absent(self, table: str, record_id: str, data: Dict[str, Any]) -> bool:
+        """
+        Save a record only if its id is not taken
+        
+        Lets concurrent writers (threads or processes) claim a key: SQL
+        backends use a conflict-ignoring insert, so exactly one writer wins.
+        The default is a check-then-save and only safe within one process.
+        
+        Returns:
+            True if the record was written
+        """
+        if self.exists(table, record_id):
+            return False
+        self.save(table, record_id, data)
+        return True
+    
+    def load_many(self, table: str, record_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the records with the given ids
+        
+        SQL backends read them with primary-key lookups in a few queries;
+        the default loads them one by one.
+        
+        Returns:
+            Record id -> record data for the ids that exist
+        """
+        records = {}
+        for record_id in record_ids:
+            data = self.load(table, record_id)
+            if data is not None:
+                records[record_id] = data
+        return records
+    
+    def scan_range(
+        self,
+        table: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: Optional[int] = None,
+        reverse: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Get records whose ids fall in [start, end), ordered by id
+        
+        Lets callers keep index tables with composite, order-preserving ids
+        (e.g. "<entity>|<sequence>") and read one key range. SQL backends
+        answer from the primary key index; the default filters load_all().
+        
+        Args:
+            table: Table name
+            start: Inclusive lower bound (None for unbounded)
+            end: Exclusive upper bound (None for unbounded)
+            limit: Maximum records to return
+            reverse: Return the highest ids first
+        """
+        records = [
+            r for r in self.load_all(table)
+            if (start is None or r.get('id', '') >= start) and (end is None or r.get('id', '') < end)
+        ]
+        records.sort(key=lambda r: r.get('id', ''), reverse=reverse)
+        return records[:limit] if limit is not None else records
+    
+    def iter_batches(self, table: str, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream all records of a table in batches
+        
+        Backends override this to page through the table without
+        materializing it; the default falls back to load_all().
+        Record order is backend-specific.
+        """
+        records = self.load_all(table)
+        for start in range(0, len(records), batch_size):
+            yield records[start:start + batch_size]
+    
+    def find_batches(
+        self,
+        table: str,
+        filters: Dict[str, Any],
+        batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream the records matching equality filters in batches
+        
+        Matches like find() without materializing the result. SQL backends
+        evaluate scalar filters in the query and page through the matches;
+        the default filters iter_batches().
+        """
+        for batch in self.iter_batches(table, batch_size):
+            matched = [record for record in batch if matches_filters(record, filters)]
+            if matched:
+                yield matched
+    
     def begin_transaction(self) -> None:
         """Start a database transaction (default no-op)"""
         pass
@@ -110,14 +240,70 @@ class StorageInterface(ABC):
     
     @contextmanager
     def atomic(self):
-        """Context manager for atomic operations"""
-        self.begin_transaction()
-        try:
-            yield
-            self.commit()
-        except Exception:
-            self.rollback()
-            raise
+        """
+        Context manager for atomic operations
+        
+        Nested atomic() blocks (in the same thread) join the outermost one,
+        which alone commits or rolls back. The outermost block holds the
+        storage's transaction lock throughout, so a backend that shares one
+        connection between threads never commits or rolls back another
+        thread's writes.
+        """
+        state = self._atomic_state()
+        state.depth += 1
+        if state.depth > 1:
+            try:
+                yield
+            finally:
+                state.depth -= 1
+            return
+        
+        state.callbacks = []
+        with self._transaction_lock():
+            self.begin_transaction()
+            try:
+                yield
+                self.commit()
+            except Exception:
+                self.rollback()
+                raise
+            finally:
+                state.depth = 0
+                callbacks, state.callbacks = state.callbacks, []
+        
+        for callback in callbacks:
+            callback()
+    
+    def on_commit(self, callback: Callable[[], None]) -> None:
+        """
+        Run a callback once the current atomic() block has committed
+        
+        Callbacks registered inside a block run after the outermost block
+        commits and are discarded if it rolls back. Outside any block the
+        callback runs immediately.
+        """
+        state = self._atomic_state()
+        if state.depth:
+            state.callbacks.append(callback)
+        else:
+            callback()
+    
+    def _transaction_lock(self) -> threading.RLock:
+        """Lock held by the outermost atomic() block (default per-instance)"""
+        lock = self.__dict__.get("_atomic_lock")
+        if lock is None:
+            lock = self.__dict__.setdefault("_atomic_lock", threading.RLock())
+        return lock
+    
+    def _atomic_state(self) -> threading.local:
+        """Per-thread atomic() nesting depth and commit callbacks"""
+        local = self.__dict__.get("_atomic_local")
+        if local is None:
+            local = self.__dict__.setdefault("_atomic_local", threading.local())
+        if not hasattr(local, "depth"):
+            local.depth = 0
+            local.callbacks = []
+        return local
 
 
 class InMemoryStorage(StorageInterface):
@@ -125,6 +311,7 @@ class InMemoryStorage(StorageInterface):
     
     def __init__(self):
         self._data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._sorted_keys: Dict[str, List[str]] = {}  # Built on demand for scan_range
         self._lock = threading.RLock()
     
     def _ensure_table(self, table: str) -> None:
@@ -136,9 +323,30 @@ class InMemoryStorage(StorageInterface):
         """Save a record to memory"""
         with self._lock:
             self._ensure_table(table)
+            if record_id not in self._data[table]:
+                self._sorted_keys.pop(table, None)
             # Deep copy to prevent external mutation
             self._data[table][record_id] = json.loads(json.dumps(data, default=str))
     
+    def save_many(self, table: str, records: Dict[str, Dict[str, Any]]) -> None:
+        """Save several records under one lock acquisition"""
+        with self._lock:
+            self._ensure_table(table)
+            rows = self._data[table]
+            if any(record_id not in rows for record_id in records):
+                self._sorted_keys.pop(table, None)
+            for record_id, data in records.items():
+                rows[record_id] = json.loads(json.dumps(data, default=str))
+    
+    def insert_if_absent(self, table: str, record_id: str, data: Dict[str, Any]) -> bool:
+        """Save a record under the lock only if its id is not taken"""
+        with self._lock:
+            self._ensure_table(table)
+            if record_id in self._data[table]:
+                return False
+            self.save(table, record_id, data)
+            return True
+    
     def load(self, table: str, record_id: str) -> Optional[Dict[str, Any]]:
         """Load a record from memory"""
         with self._lock:
@@ -155,12 +363,77 @@ class InMemoryStorage(StorageInterface):
             self._ensure_table(table)
             return [json.loads(json.dumps(record)) for record in self._data[table].values()]
     
+    def scan_range(
+        self,
+        table: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: Optional[int] = None,
+        reverse: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Get records with ids in [start, end) using a cached sorted key list"""
+        with self._lock:
+            self._ensure_table(table)
+            keys = self._sorted_keys.get(table)
+            if keys is None:
+                keys = self._sorted_keys[table] = sorted(self._data[table])
+            
+            lo = 0 if start is None else bisect.bisect_left(keys, start)
+            hi = len(keys) if end is None else bisect.bisect_left(keys, end)
+            selected = keys[lo:hi]
+            if reverse:
+                selected = selected[::-1]
+            if limit is not None:
+                selected = selected[:limit]
+            rows = self._data[table]
+            return [json.loads(json.dumps(rows[key])) for key in selected]
+    
+    def iter_batches(self, table: str, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """Stream records in batches, copying one batch at a time"""
+        with self._lock:
+            self._ensure_table(table)
+            record_ids = list(self._data[table].keys())
+        
+        for start in range(0, len(record_ids), batch_size):
+            with self._lock:
+                rows = self._data[table]
+                batch = [
+                    json.loads(json.dumps(rows[record_id]))
+                    for record_id in record_ids[start:start + batch_size]
+                    if record_id in rows
+                ]
+            if batch:
+                yield batch
+    
+    def find_batches(
+        self,
+        table: str,
+        filters: Dict[str, Any],
+        batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Stream matching records in batches, copying only the matches"""
+        with self._lock:
+            self._ensure_table(table)
+            record_ids = list(self._data[table].keys())
+        
+        for start in range(0, len(record_ids), batch_size):
+            with self._lock:
+                rows = self._data[table]
+                batch = [
+                    json.loads(json.dumps(rows[record_id]))
+                    for record_id in record_ids[start:start + batch_size]
+                    if record_id in rows and matches_filters(rows[record_id], filters)
+                ]
+            if batch:
+                yield batch
+    
     def delete(self, table: str, record_id: str) -> bool:
         """Delete a record from memory"""
         with self._lock:
             self._ensure_table(table)
             if record_id in self._data[table]:
                 del self._data[table][record_id]
+                self._sorted_keys.pop(table, None)
                 return True
             return False
     
@@ -195,6 +468,7 @@ class InMemoryStorage(StorageInterface):
         """Clear all records from a table"""
         with self._lock:
             self._data[table] = {}
+            self._sorted_keys.pop(table, None)
     
     def close(self) -> None:
         """Close storage (no-op for in-memory)"""
@@ -209,6 +483,9 @@ class InMemoryStorage(StorageInterface):
 class SQLiteStorage(StorageInterface):
     """SQLite storage implementation for persistence"""
     
+    # Bound parameters per statement, below SQLite's historical limit of 999
+    MAX_QUERY_PARAMS = 900
+    
     def __init__(self, db_path: Union[str, Path] = ":memory:"):
         self.db_path = str(db_path)
         # Set isolation_level to 'DEFERRED' to enable manual transaction control
@@ -216,6 +493,7 @@ class SQLiteStorage(StorageInterface):
         self._connection.row_factory = sqlite3.Row
         self._lock = threading.RLock()
         self._in_transaction = False
+        self._known_tables = set()
         
         # Enable WAL mode for better concurrent access
         if self.db_path != ":memory:":
@@ -227,6 +505,8 @@ class SQLiteStorage(StorageInterface):
     def _ensure_table(self, table: str) -> None:
         """Ensure table exists with proper schema"""
         with self._lock:
+            if table in self._known_tables:
+                return
             self._connection.execute(f"""
                 CREATE TABLE IF NOT EXISTS {table} (
                     id TEXT PRIMARY KEY,
@@ -244,7 +524,12 @@ class SQLiteStorage(StorageInterface):
                 CREATE INDEX IF NOT EXISTS idx_{table}_updated_at 
                 ON {table}(updated_at)
             """)
-            self._connection.commit()
+            
+            # Inside a transaction the DDL commits or rolls back with it;
+            # the table is only remembered once it is known to be durable
+            if not self._in_transaction:
+                self._connection.commit()
+                self._known_tables.add(table)
     
     def save(self, table: str, record_id: str, data: Dict[str, Any]) -> None:
         """Save a record to SQLite"""
@@ -266,6 +551,44 @@ class SQLiteStorage(StorageInterface):
             if not self._in_transaction:
                 self._connection.commit()
     
+    def save_many(self, table: str, records: Dict[str, Dict[str, Any]]) -> None:
+        """Save several records with a single executemany"""
+        if not records:
+            return
+        with self._lock:
+            self._ensure_table(table)
+            
+            now = datetime.now(timezone.utc).isoformat()
+            self._connection.executemany(f"""
+                INSERT OR REPLACE INTO {table} (id, data, created_at, updated_at)
+                VALUES (?, ?, 
+                    COALESCE((SELECT created_at FROM {table} WHERE id = ?), ?),
+                    ?)
+            """, [
+                (record_id, json.dumps(data, default=str), record_id, now, now)
+                for record_id, data in records.items()
+            ])
+            
+            # Only commit if not in transaction
+            if not self._in_transaction:
+                self._connection.commit()
+    
+    def insert_if_absent(self, table: str, record_id: str, data: Dict[str, Any]) -> bool:
+        """Save a record with INSERT OR IGNORE"""
+        with self._lock:
+            self._ensure_table(table)
+            
+            now = datetime.now(timezone.utc).isoformat()
+            cursor = self._connection.execute(f"""
+                INSERT OR IGNORE INTO {table} (id, data, created_at, updated_at)
+                VALUES (?, ?, ?, ?)
+            """, (record_id, json.dumps(data, default=str), now, now))
+            
+            # Only commit if not in transaction
+            if not self._in_transaction:
+                self._connection.commit()
+            return cursor.rowcount == 1
+    
     def load(self, table: str, record_id: str) -> Optional[Dict[str, Any]]:
         """Load a record from SQLite"""
         with self._lock:
@@ -278,6 +601,21 @@ class SQLiteStorage(StorageInterface):
                 return json.loads(row['data'])
             return None
     
+    def load_many(self, table: str, record_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Load records by id with chunked IN queries"""
+        ids = list(dict.fromkeys(record_ids))
+        records = {}
+        with self._lock:
+            self._ensure_table(table)
+            for start in range(0, len(ids), self.MAX_QUERY_PARAMS):
+                chunk = ids[start:start + self.MAX_QUERY_PARAMS]
+                cursor = self._connection.execute(f"""
+                    SELECT id, data FROM {table} WHERE id IN ({", ".join("?" * len(chunk))})
+                """, chunk)
+                for row in cursor.fetchall():
+                    records[row['id']] = json.loads(row['data'])
+        return records
+    
     def load_all(self, table: str) -> List[Dict[str, Any]]:
         """Load all records from a table"""
         with self._lock:
@@ -287,6 +625,103 @@ class SQLiteStorage(StorageInterface):
             """)
             return [json.loads(row['data']) for row in cursor.fetchall()]
     
+    def scan_range(
+        self,
+        table: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: Optional[int] = None,
+        reverse: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Get records with ids in [start, end) via the primary key index"""
+        conditions = []
+        params: List[Any] = []
+        if start is not None:
+            conditions.append("id >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("id < ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = "DESC" if reverse else "ASC"
+        limit_clause = ""
+        if limit is not None:
+            limit_clause = "LIMIT ?"
+            params.append(limit)
+        
+        with self._lock:
+            self._ensure_table(table)
+            cursor = self._connection.execute(f"""
+                SELECT data FROM {table} {where} ORDER BY id {order} {limit_clause}
+            """, params)
+            return [json.loads(row['data']) for row in cursor.fetchall()]
+    
+    def iter_batches(self, table: str, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """Stream records in primary-key order using keyset pagination"""
+        last_id = None
+        while True:
+            with self._lock:
+                self._ensure_table(table)
+                if last_id is None:
+                    cursor = self._connection.execute(f"""
+                        SELECT id, data FROM {table} ORDER BY id LIMIT ?
+                    """, (batch_size,))
+                else:
+                    cursor = self._connection.execute(f"""
+                        SELECT id, data FROM {table} WHERE id > ? ORDER BY id LIMIT ?
+                    """, (last_id, batch_size))
+                rows = cursor.fetchall()
+            
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            yield [json.loads(row['data']) for row in rows]
+            if len(rows) < batch_size:
+                return
+    
+    def find_batches(
+        self,
+        table: str,
+        filters: Dict[str, Any],
+        batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Stream matching records in primary-key order, filtering with json_extract"""
+        conditions = []
+        params: List[Any] = []
+        for key, value in _pushdown_filters(filters).items():
+            if value is None:
+                conditions.append("json_type(data, ?) = 'null'")
+                params.append(f"$.{key}")
+            else:
+                # JSON true/false come back as 1/0; the recheck below tells them from numbers
+                conditions.append("json_extract(data, ?) = ?")
+                params.extend([f"$.{key}", int(value) if isinstance(value, bool) else value])
+        
+        last_id = None
+        while True:
+            where = list(conditions)
+            page_params = list(params)
+            if last_id is not None:
+                where.append("id > ?")
+                page_params.append(last_id)
+            where_clause = f"WHERE {' AND '.join(where)}" if where else ""
+            
+            with self._lock:
+                self._ensure_table(table)
+                cursor = self._connection.execute(f"""
+                    SELECT id, data FROM {table} {where_clause} ORDER BY id LIMIT ?
+                """, page_params + [batch_size])
+                rows = cursor.fetchall()
+            
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            batch = [record for record in (json.loads(row['data']) for row in rows) if matches_filters(record, filters)]
+            if batch:
+                yield batch
+            if len(rows) < batch_size:
+                return
+    
     def delete(self, table: str, record_id: str) -> bool:
         """Delete a record from SQLite"""
         with self._lock:
@@ -349,6 +784,10 @@ class SQLiteStorage(StorageInterface):
             if not self._in_transaction:
                 self._connection.commit()
     
+    def _transaction_lock(self) -> threading.RLock:
+        """Every operation takes the connection lock, so other threads wait for the transaction"""
+        return self._lock
+    
     def begin_transaction(self) -> None:
         """Start a database transaction"""
         with self._lock:
@@ -437,6 +876,11 @@ class PostgreSQLStorage(StorageInterface):
                     CREATE INDEX IF NOT EXISTS idx_{table}_updated_at 
                     ON {table}(updated_at)
                 """)
+                # Byte-ordered id index for scan_range over composite keys
+                cursor.execute(f"""
+                    CREATE INDEX IF NOT EXISTS idx_{table}_id_c 
+                    ON {table}(id COLLATE "C")
+                """)
                 
                 # Only commit if not in transaction
                 if not self._in_transaction:
@@ -469,6 +913,56 @@ class PostgreSQLStorage(StorageInterface):
             finally:
                 cursor.close()
     
+    def save_many(self, table: str, records: Dict[str, Dict[str, Any]]) -> None:
+        """Save several records with one multi-row UPSERT"""
+        if not records:
+            return
+        with self._lock:
+            self._ensure_table(table)
+            
+            now = datetime.now(timezone.utc)
+            cursor = self._connection.cursor()
+            try:
+                self.extras.execute_values(cursor, f"""
+                    INSERT INTO {table} (id, data, created_at, updated_at)
+                    VALUES %s
+                    ON CONFLICT (id) DO UPDATE SET
+                        data = EXCLUDED.data,
+                        updated_at = EXCLUDED.updated_at
+                """, [
+                    (record_id, json.dumps(data, default=str), now, now)
+                    for record_id, data in records.items()
+                ])
+                
+                # Only commit if not in transaction
+                if not self._in_transaction:
+                    self._connection.commit()
+            finally:
+                cursor.close()
+    
+    def insert_if_absent(self, table: str, record_id: str, data: Dict[str, Any]) -> bool:
+        """Save a record with INSERT ... ON CONFLICT DO NOTHING"""
+        with self._lock:
+            self._ensure_table(table)
+            
+            now = datetime.now(timezone.utc)
+            cursor = self._connection.cursor()
+            try:
+                # Blocks on a concurrent uncommitted insert of the same id
+                cursor.execute(f"""
+                    INSERT INTO {table} (id, data, created_at, updated_at)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (id) DO NOTHING
+                """, (record_id, json.dumps(data, default=str), now, now))
+                inserted = cursor.rowcount == 1
+                
+                # Only commit if not in transaction
+                if not self._in_transaction:
+                    self._connection.commit()
+                return inserted
+            finally:
+                cursor.close()
+    
     def load(self, table: str, record_id: str) -> Optional[Dict[str, Any]]:
         """Load a record from PostgreSQL"""
         with self._lock:
@@ -486,6 +980,22 @@ class PostgreSQLStorage(StorageInterface):
             finally:
                 cursor.close()
     
+    def load_many(self, table: str, record_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Load records by id with one primary-key lookup"""
+        if not record_ids:
+            return {}
+        with self._lock:
+            self._ensure_table(table)
+            
+            cursor = self._connection.cursor()
+            try:
+                cursor.execute(f"""
+                    SELECT id, data FROM {table} WHERE id = ANY(%s)
+                """, (list(record_ids),))
+                return {row['id']: dict(row['data']) for row in cursor.fetchall()}
+            finally:
+                cursor.close()
+    
     def load_all(self, table: str) -> List[Dict[str, Any]]:
         """Load all records from a table"""
         with self._lock:
@@ -500,6 +1010,113 @@ class PostgreSQLStorage(StorageInterface):
             finally:
                 cursor.close()
     
+    def scan_range(
+        self,
+        table: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: Optional[int] = None,
+        reverse: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Get records with ids in [start, end) via the primary key index"""
+        conditions = []
+        params: List[Any] = []
+        if start is not None:
+            conditions.append('id COLLATE "C" >= %s')
+            params.append(start)
+        if end is not None:
+            conditions.append('id COLLATE "C" < %s')
+            params.append(end)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = "DESC" if reverse else "ASC"
+        limit_clause = ""
+        if limit is not None:
+            limit_clause = "LIMIT %s"
+            params.append(limit)
+        
+        with self._lock:
+            self._ensure_table(table)
+            
+            cursor = self._connection.cursor()
+            try:
+                cursor.execute(f"""
+                    SELECT data FROM {table} {where} ORDER BY id COLLATE "C" {order} {limit_clause}
+                """, params)
+                return [dict(row['data']) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+    
+    def iter_batches(self, table: str, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """Stream records in primary-key order using keyset pagination"""
+        last_id = None
+        while True:
+            with self._lock:
+                self._ensure_table(table)
+                
+                cursor = self._connection.cursor()
+                try:
+                    if last_id is None:
+                        cursor.execute(f"""
+                            SELECT id, data FROM {table} ORDER BY id LIMIT %s
+                        """, (batch_size,))
+                    else:
+                        cursor.execute(f"""
+                            SELECT id, data FROM {table} WHERE id > %s ORDER BY id LIMIT %s
+                        """, (last_id, batch_size))
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+            
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            yield [dict(row['data']) for row in rows]
+            if len(rows) < batch_size:
+                return
+    
+    def find_batches(
+        self,
+        table: str,
+        filters: Dict[str, Any],
+        batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Stream matching records in primary-key order, filtering with JSONB equality"""
+        conditions = []
+        params: List[Any] = []
+        for key, value in _pushdown_filters(filters).items():
+            conditions.append("data -> %s = %s::jsonb")
+            params.extend([key, json.dumps(value)])
+        
+        last_id = None
+        while True:
+            where = list(conditions)
+            page_params = list(params)
+            if last_id is not None:
+                where.append("id > %s")
+                page_params.append(last_id)
+            where_clause = f"WHERE {' AND '.join(where)}" if where else ""
+            
+            with self._lock:
+                self._ensure_table(table)
+                
+                cursor = self._connection.cursor()
+                try:
+                    cursor.execute(f"""
+                        SELECT id, data FROM {table} {where_clause} ORDER BY id LIMIT %s
+                    """, page_params + [batch_size])
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+            
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            batch = [record for record in (dict(row['data']) for row in rows) if matches_filters(record, filters)]
+            if batch:
+                yield batch
+            if len(rows) < batch_size:
+                return
+    
     def delete(self, table: str, record_id: str) -> bool:
         """Delete a record from PostgreSQL"""
         with self._lock:
@@ -592,6 +1209,10 @@ class PostgreSQLStorage(StorageInterface):
             finally:
                 cursor.close()
     
+    def _transaction_lock(self) -> threading.RLock:
+        """Every operation takes the connection lock, so other threads wait for the transaction"""
+        return self._lock
+    
     def begin_transaction(self) -> None:
         """Start a database transaction"""
         with self._lock:
@@ -150,6 +150,10 @@ class TenantAwareStorage(StorageInterface):
         tenant_data = self._add_tenant_filter(data)
         self.inner.save(table, record_id, tenant_data)
     
+    def insert_if_absent(self, table: str, record_id: str, data: Dict[str, Any]) -> bool:
+        """Insert a record with tenant filtering if its id is not taken"""
+        return self.inner.insert_if_absent(table, record_id, self._add_tenant_filter(data))
+    
     def load(self, table: str, record_id: str) -> Optional[Dict[str, Any]]:
         """Load a record with tenant isolation"""
         result = self.inner.load(table, record_id)
@@ -207,6 +211,14 @@ class TenantAwareStorage(StorageInterface):
     def rollback(self) -> None:
         """Rollback transaction on underlying storage"""
         self.inner.rollback()
+    
+    def _transaction_lock(self):
+        """Share the underlying storage's transaction lock"""
+        return self.inner._transaction_lock()
+    
+    def _atomic_state(self):
+        """Share the underlying storage's atomic() nesting"""
+        return self.inner._atomic_state()
 
 
 @dataclass
@@ -0,0 +1,294 @@
+"""
+Transaction Rollup Module
+
+Time-bucketed transaction counts and volumes for the transaction volume
+report. Posted transactions are summed into hourly and daily rows keyed
+(bucket, transaction type, channel, currency), so a report over any period
+reads the daily rows for the whole days it covers and the hourly rows for
+the partial days at either end, instead of every transaction. The rows are
+kept current from the ledger change log: the rollup remembers the last
+change it applied and adds the transactions posted since as each
+transaction posts (with a subscribed dispatcher) and from a
+LedgerChangeWorker, so postings made by any process are counted. Reads
+never write. backfill() recomputes the rows by streaming the transaction
+history in batches.
+"""
+
+from decimal import Decimal
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .storage import StorageInterface, INDEX_KEY_SEPARATOR
+from .events import DomainEvent, EventDispatcher, EventPayload
+from .ledger import LedgerChangeLog, TRANSACTION_POSTED
+
+
+# Transaction states that have been posted to the ledger (TransactionState values)
+POSTED_STATES = ("completed", "reversed")
+
+
+def _utc(moment: datetime) -> datetime:
+    """Timestamps without a timezone are taken to be UTC, as stored ones are"""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def _hour_bucket(moment: datetime) -> str:
+    return _utc(moment).strftime("%Y-%m-%dT%H")
+
+
+def _rollup_key(bucket: str, transaction_type: str, channel: str, currency: str) -> str:
+    return INDEX_KEY_SEPARATOR.join((bucket, transaction_type, channel, currency))
+
+
+class TransactionRollup:
+    """
+    Hourly and daily transaction counts and volumes by type, channel and
+    currency
+    
+    Transactions posted before the first backfill are skipped, as the
+    backfill covers them.
+    """
+    
+    CONSUMER = "transaction_rollup"
+    
+    transactions_table = "transactions"
+    
+    def __init__(self, storage: StorageInterface):
+        self.storage = storage
+        
+        self.hourly_table = "reporting_transaction_hourly"
+        self.daily_table = "reporting_transaction_daily"
+        self.state_table = "reporting_transaction_rollup_state"
+        
+        self.changes = LedgerChangeLog(storage)
+        self.dispatcher: Optional[EventDispatcher] = None
+    
+    def subscribe(self, dispatcher: EventDispatcher) -> None:
+        """Count transactions as a dispatcher's posted events arrive, and allow building on first use"""
+        dispatcher.subscribe(DomainEvent.TRANSACTION_POSTED, self.on_transaction_posted)
+        self.dispatcher = dispatcher
+    
+    def unsubscribe(self, dispatcher: EventDispatcher) -> None:
+        dispatcher.unsubscribe(DomainEvent.TRANSACTION_POSTED, self.on_transaction_posted)
+        if self.dispatcher is dispatcher:
+            self.dispatcher = None
+    
+    def on_transaction_posted(self, event: EventPayload) -> None:
+        """Count the posted transaction, with any others not yet counted"""
+        self.catch_up()
+    
+    def catch_up(self, batch_size: int = 1000) -> int:
+        """
+        Count the transactions posted after the last ledger change applied
+        
+        Runs in one storage transaction with the saved high-water mark, so
+        concurrent callers never count a transaction twice. Does nothing
+        before the first backfill, and opens no transaction when nothing is
+        pending.
+        
+        Returns:
+            Number of transactions counted
+        """
+        state = self.storage.load(self.state_table, "state")
+        if not state or self.changes.last_sequence() <= state.get("ledger_sequence", 0):
+            return 0
+        counted = 0
+        
+        with self.storage.atomic():
+            state = self.storage.load(self.state_table, "state")
+            if not state:
+                return 0
+            sequence = state.get("ledger_sequence", 0)
+            start = sequence
+            
+            while True:
+                changes = self.changes.changes_after(sequence, batch_size)
+                if not changes:
+                    break
+                for change in changes:
+                    if change["kind"] != TRANSACTION_POSTED:
+                        continue
+                    record = self.storage.load(self.transactions_table, change["entity_id"])
+                    if record and record.get("processed_at"):
+                        self.add_transaction(record)
+                        counted += 1
+                sequence = changes[-1]["sequence"]
+            
+            if sequence != start:
+                self.storage.save(self.state_table, "state", dict(state, ledger_sequence=sequence))
+                self.changes.save_cursor(self.CONSUMER, sequence)
+        return counted
+    
+    def add_transaction(self, record: Dict[str, Any]) -> None:
+        """Add a stored transaction record to its hourly and daily rows"""
+        hour = _hour_bucket(datetime.fromisoformat(record["processed_at"]))
+        
+        with self.storage.atomic():
+            for table, bucket in ((self.hourly_table, hour), (self.daily_table, hour[:10])):
+                rows: Dict[str, Dict[str, Any]] = {}
+                key = self._add(rows, bucket, record)
+                stored = self.storage.load(table, key)
+                if stored:
+                    rows[key]["transaction_count"] += stored["transaction_count"]
+                    rows[key]["total_volume"] += Decimal(stored["total_volume"])
+                self.storage.save(table, key, self._encode(rows[key]))
+    
+    def volume(
+        self,
+        period_start: datetime,
+        period_end: datetime,
+        currency: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Transaction count and volume by type, channel and currency
+        
+        Hours that overlap the period are counted in full, so the period is
+        widened to whole hours. Volumes are Decimals. Counts reflect the
+        changes applied so far; reading does not catch up.
+        
+        Args:
+            period_start: Start of the period (inclusive)
+            period_end: End of the period (exclusive)
+            currency: Only count transactions in this currency code
+        """
+        self.ensure_built()
+        
+        start = _utc(period_start).replace(minute=0, second=0, microsecond=0)
+        end = _utc(period_end)
+        if end != end.replace(minute=0, second=0, microsecond=0):
+            end = end.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        
+        if start >= end:
+            return []
+        totals: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        
+        # Whole days come from the daily rows, the hours either side from the hourly rows
+        first_day = start if start.hour == 0 else (start + timedelta(days=1)).replace(hour=0)
+        last_day = end.replace(hour=0)
+        if first_day < last_day:
+            self._sum(totals, self.hourly_table, _hour_bucket(start), _hour_bucket(first_day), currency)
+            self._sum(totals, self.daily_table, first_day.date().isoformat(), last_day.date().isoformat(), currency)
+            self._sum(totals, self.hourly_table, _hour_bucket(last_day), _hour_bucket(end), currency)
+        else:
+            self._sum(totals, self.hourly_table, _hour_bucket(start), _hour_bucket(end), currency)
+        
+        return [totals[key] for key in sorted(totals)]
+    
+    def is_built(self) -> bool:
+        return self.storage.exists(self.state_table, "state")
+    
+    def ensure_built(self) -> None:
+        """
+        Backfill the rollup on first use
+        
+        Only a rollup subscribed to a dispatcher backfills itself; others
+        must be built with an explicit backfill(), so that a process that is
+        not wired for updates never quietly persists the first snapshot.
+        
+        Raises:
+            ValueError: If the rollup was never built and no dispatcher is subscribed
+        """
+        if self.is_built():
+            return
+        if self.dispatcher is None:
+            raise ValueError(
+                "Transaction rollup has not been built; call backfill() or subscribe it to an event dispatcher"
+            )
+        self.backfill()
+    
+    def backfill(self, batch_size: int = 1000) -> int:
+        """
+        Recompute the hourly and daily rows from the transaction history
+        
+        Streams the transactions table in batches; only the bucket rows are
+        held in memory. Runs in one storage transaction that also records
+        the latest ledger change as the point to catch up from.
+        
+        Returns:
+            Number of posted transactions counted
+        """
+        with self.storage.atomic():
+            return self._backfill(batch_size)
+    
+    def _backfill(self, batch_size: int) -> int:
+        sequence = self.changes.last_sequence()
+        hourly: Dict[str, Dict[str, Any]] = {}
+        counted = 0
+        
+        for batch in self.storage.iter_batches(self.transactions_table, batch_size):
+            for record in batch:
+                if record.get("state") not in POSTED_STATES or not record.get("processed_at"):
+                    continue
+                self._add(hourly, _hour_bucket(datetime.fromisoformat(record["processed_at"])), record)
+                counted += 1
+        
+        daily: Dict[str, Dict[str, Any]] = {}
+        for row in hourly.values():
+            key = _rollup_key(row["bucket"][:10], row["transaction_type"], row["channel"], row["currency"])
+            if key not in daily:
+                daily[key] = dict(row, id=key, bucket=row["bucket"][:10], transaction_count=0,
+                                  total_volume=Decimal('0'))
+            daily[key]["transaction_count"] += row["transaction_count"]
+            daily[key]["total_volume"] += row["total_volume"]
+        
+        self.storage.clear_table(self.hourly_table)
+        self.storage.clear_table(self.daily_table)
+        self.storage.save_many(self.hourly_table, {key: self._encode(row) for key, row in hourly.items()})
+        self.storage.save_many(self.daily_table, {key: self._encode(row) for key, row in daily.items()})
+        self.storage.save(self.state_table, "state", {
+            "id": "state",
+            "backfilled_at": datetime.now(timezone.utc).isoformat(),
+            "transactions_counted": counted,
+            "ledger_sequence": sequence
+        })
+        self.changes.save_cursor(self.CONSUMER, sequence)
+        return counted
+    
+    # Internals
+    
+    @staticmethod
+    def _add(rows: Dict[str, Dict[str, Any]], bucket: str, record: Dict[str, Any]) -> str:
+        key = _rollup_key(bucket, record["transaction_type"], record["channel"], record["currency"])
+        if key not in rows:
+            rows[key] = {
+                "id": key,
+                "bucket": bucket,
+                "transaction_type": record["transaction_type"],
+                "channel": record["channel"],
+                "currency": record["currency"],
+                "transaction_count": 0,
+                "total_volume": Decimal('0')
+            }
+        rows[key]["transaction_count"] += 1
+        rows[key]["total_volume"] += Decimal(record["amount"])
+        return key
+    
+    def _sum(
+        self,
+        totals: Dict[Tuple[str, str, str], Dict[str, Any]],
+        table: str,
+        start_bucket: str,
+        end_bucket: str,
+        currency: Optional[str]
+    ) -> None:
+        """Add the rows with buckets in [start_bucket, end_bucket) to totals"""
+        for row in self.storage.scan_range(table, start_bucket, end_bucket):
+            if currency and row["currency"] != currency:
+                continue
+            key = (row["transaction_type"], row["channel"], row["currency"])
+            if key not in totals:
+                totals[key] = {
+                    "transaction_type": row["transaction_type"],
+                    "channel": row["channel"],
+                    "currency": row["currency"],
+                    "transaction_count": 0,
+                    "total_volume": Decimal('0')
+                }
+            totals[key]["transaction_count"] += row["transaction_count"]
+            totals[key]["total_volume"] += Decimal(row["total_volume"])
+    
+    @staticmethod
+    def _encode(row: Dict[str, Any]) -> Dict[str, Any]:
+        return dict(row, total_volume=str(row["total_volume"]))
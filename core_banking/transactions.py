@@ -9,15 +9,15 @@ entries and support idempotency, reversals, and state management.
 from decimal import Decimal
 from datetime import datetime, timezone
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 from enum import Enum
 import uuid
 import hashlib
 
 from .currency import Money, Currency
-from .storage import StorageInterface, StorageRecord
-from .audit import AuditTrail, AuditEventType
-from .ledger import GeneralLedger, JournalEntry, JournalEntryLine
+from .storage import StorageInterface, StorageRecord, INDEX_KEY_SEPARATOR
+from .audit import AuditTrail, AuditEventType, new_audit_event
+from .ledger import GeneralLedger, JournalEntry, JournalEntryLine, TRANSACTION_POSTED
 from .accounts import ProductType
 from .accounts import AccountManager, Account
 from .customers import CustomerManager
@@ -144,6 +144,89 @@ class Transaction(StorageRecord):
         )
 
 
+# Namespace for system transaction ids derived from idempotency keys
+SYSTEM_TRANSACTION_NAMESPACE = uuid.UUID("0b7e3f52-9d41-5c6a-a8e2-71f3c4d5b6a9")
+
+
+def index_time(moment: datetime) -> str:
+    """Fixed-width, lexicographically ordered UTC timestamp used in time index keys"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+class TransactionTimeIndex:
+    """
+    Transactions ordered by processing time
+    
+    Rows are keyed "<processed_at><SEP><transaction id>", so the
+    transactions processed in a period are one scan_range() over the
+    index instead of a scan of the transactions table. TransactionProcessor
+    writes a row in the same storage transaction as every save of a
+    processed transaction. Transactions stored before the index existed
+    are only covered after an explicit rebuild(); until then is_built()
+    is False and readers fall back to scanning the table.
+    """
+    
+    def __init__(self, storage: StorageInterface, transactions_table: str = "transactions"):
+        self.storage = storage
+        self.transactions_table = transactions_table
+        self.table_name = f"{transactions_table}_by_processed_at"
+        self.state_table = f"{transactions_table}_by_processed_at_state"
+    
+    @staticmethod
+    def _entry(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not record.get("processed_at"):
+            return None
+        key = INDEX_KEY_SEPARATOR.join((index_time(datetime.fromisoformat(record["processed_at"])), record["id"]))
+        return {"id": key, "transaction_id": record["id"]}
+    
+    def add(self, records: List[Dict[str, Any]]) -> None:
+        """Index stored transaction records that have been processed"""
+        entries = [entry for entry in map(self._entry, records) if entry]
+        if entries:
+            self.storage.save_many(self.table_name, {entry["id"]: entry for entry in entries})
+    
+    def is_built(self) -> bool:
+        return self.storage.exists(self.state_table, "state")
+    
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """
+        Index every processed transaction in the table
+        
+        Returns:
+            Number of transactions indexed
+        """
+        indexed = 0
+        with self.storage.atomic():
+            self.storage.clear_table(self.table_name)
+            for batch in self.storage.iter_batches(self.transactions_table, batch_size):
+                self.add(batch)
+                indexed += sum(1 for record in batch if record.get("processed_at"))
+            self.storage.save(self.state_table, "state", {
+                "id": "state",
+                "rebuilt_at": datetime.now(timezone.utc).isoformat()
+            })
+        return indexed
+    
+    def scan(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 1000
+    ) -> Iterator[List[str]]:
+        """Ids of the transactions processed in [start, end), in batches, oldest first"""
+        low = index_time(start) if start else None
+        high = index_time(end) if end else None
+        while True:
+            rows = self.storage.scan_range(self.table_name, low, high, limit=batch_size)
+            if rows:
+                yield [row["transaction_id"] for row in rows]
+            if len(rows) < batch_size:
+                return
+            low = rows[-1]["id"] + "\x00"
+
+
 class TransactionProcessor:
     """
     Processes banking transactions with double-entry bookkeeping,
@@ -169,6 +252,7 @@ class TransactionProcessor:
         self.audit_trail = audit_trail
         self.fraud_client = fraud_client  # BastionClient or None
         self.table_name = "transactions"
+        self.time_index = TransactionTimeIndex(storage, self.table_name)
         self.logger = get_logger("nexum.transactions")
         
         # Event dispatcher for publishing domain events (Phase 2)
@@ -377,10 +461,11 @@ class TransactionProcessor:
                         transaction.metadata["needs_review"] = True
                 
                 # Run compliance checks (skip for system transactions and reversals)
+                compliance_customer_id = None
                 if (not transaction.compliance_checked and 
                     transaction.channel != TransactionChannel.SYSTEM and
                     transaction.transaction_type != TransactionType.REVERSAL):
-                    self._run_compliance_checks(transaction)
+                    compliance_customer_id = self._run_compliance_checks(transaction)
                 elif transaction.channel == TransactionChannel.SYSTEM or transaction.transaction_type == TransactionType.REVERSAL:
                     # System transactions and reversals are automatically allowed
                     transaction.compliance_checked = True
@@ -407,6 +492,13 @@ class TransactionProcessor:
                 transaction.updated_at = transaction.processed_at
                 
                 self._save_transaction(transaction)
+                self.ledger.changes.record(TRANSACTION_POSTED, [transaction.id])
+                
+                # Count the posted amount towards the customer's velocity/limit windows
+                if compliance_customer_id:
+                    self.compliance_engine.record_posted_transaction(
+                        compliance_customer_id, transaction.amount, transaction.processed_at
+                    )
                 
                 # Log audit event
                 self.audit_trail.log_event(
@@ -430,6 +522,157 @@ class TransactionProcessor:
         
         return transaction
     
+    def new_system_transaction(
+        self,
+        transaction_type: TransactionType,
+        amount: Money,
+        description: str,
+        idempotency_key: str,
+        from_account_id: Optional[str] = None,
+        to_account_id: Optional[str] = None,
+        reference: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Transaction:
+        """
+        Build (without saving) a SYSTEM-channel transaction for post_system_transactions()
+        
+        The ID is derived from idempotency_key, so rebuilding the same
+        posting after a restart yields the same transaction ID.
+        """
+        now = datetime.now(timezone.utc)
+        transaction_id = str(uuid.uuid5(SYSTEM_TRANSACTION_NAMESPACE, idempotency_key))
+        return Transaction(
+            id=transaction_id,
+            created_at=now,
+            updated_at=now,
+            transaction_type=transaction_type,
+            from_account_id=from_account_id,
+            to_account_id=to_account_id,
+            amount=amount,
+            currency=amount.currency,
+            description=description,
+            reference=reference or f"{transaction_type.value.upper()}-{transaction_id[:8]}",
+            idempotency_key=idempotency_key,
+            channel=TransactionChannel.SYSTEM,
+            metadata=metadata or {}
+        )
+    
+    def post_system_transactions(self, transactions: List[Transaction]) -> List[Transaction]:
+        """
+        Post system-generated transactions (interest, fees) in bulk
+        
+        System transactions skip fraud and compliance screening, so the
+        batch only validates accounts, then writes journal entries,
+        transactions and audit events with bulk saves in one storage
+        transaction. A transaction whose ID is already stored (a restarted
+        batch) is returned as stored instead of being posted again; one
+        that fails account validation is saved as FAILED.
+        
+        Args:
+            transactions: Transactions built with new_system_transaction()
+            
+        Returns:
+            The stored state of every transaction, in input order
+        """
+        results: List[Transaction] = []
+        to_post: List[Transaction] = []
+        failed: List[Transaction] = []
+        
+        for transaction in transactions:
+            existing = self.get_transaction(transaction.id)
+            if existing:
+                results.append(existing)
+                continue
+            
+            try:
+                self._validate_transaction_accounts(transaction)
+                to_post.append(transaction)
+            except ValueError as e:
+                transaction.state = TransactionState.FAILED
+                transaction.error_message = str(e)
+                failed.append(transaction)
+            results.append(transaction)
+        
+        if not to_post and not failed:
+            return results
+        
+        now = datetime.now(timezone.utc)
+        records = {}
+        events = []
+        
+        with self.storage.atomic():
+            entries = self.ledger.post_journal_entries([
+                (t.reference, t.description, self._journal_lines(t)) for t in to_post
+            ])
+            
+            for transaction, entry in zip(to_post, entries):
+                transaction.journal_entry_id = entry.id
+                transaction.state = TransactionState.COMPLETED
+                transaction.compliance_checked = True
+                transaction.compliance_action = ComplianceAction.ALLOW
+                transaction.processed_at = now
+                transaction.updated_at = now
+                records[transaction.id] = self._transaction_to_dict(transaction)
+                
+                events.append(self._created_event(transaction))
+                events.append(new_audit_event(
+                    event_type=AuditEventType.TRANSACTION_POSTED,
+                    entity_type="transaction",
+                    entity_id=transaction.id,
+                    metadata={
+                        "journal_entry_id": entry.id,
+                        "processed_at": now.isoformat()
+                    }
+                ))
+            
+            for transaction in failed:
+                transaction.processed_at = now
+                transaction.updated_at = now
+                records[transaction.id] = self._transaction_to_dict(transaction)
+                
+                events.append(self._created_event(transaction))
+                events.append(new_audit_event(
+                    event_type=AuditEventType.TRANSACTION_FAILED,
+                    entity_type="transaction",
+                    entity_id=transaction.id,
+                    metadata={
+                        "error_message": transaction.error_message,
+                        "failed_at": now.isoformat()
+                    }
+                ))
+            
+            self.storage.save_many(self.table_name, records)
+            self.time_index.add(list(records.values()))
+            self.ledger.changes.record(TRANSACTION_POSTED, [t.id for t in to_post])
+            self.audit_trail.log_event_batch(events)
+        
+        # Publish domain events (Phase 2)
+        if DomainEvent:
+            for transaction in to_post:
+                self._publish_event(DomainEvent.TRANSACTION_CREATED, transaction)
+                self._publish_event(DomainEvent.TRANSACTION_POSTED, transaction)
+            for transaction in failed:
+                self._publish_event(DomainEvent.TRANSACTION_CREATED, transaction)
+                self._publish_event(DomainEvent.TRANSACTION_FAILED, transaction)
+        
+        return results
+    
+    def _created_event(self, transaction: Transaction):
+        """Unchained TRANSACTION_CREATED audit event for a batch"""
+        return new_audit_event(
+            event_type=AuditEventType.TRANSACTION_CREATED,
+            entity_type="transaction",
+            entity_id=transaction.id,
+            metadata={
+                "transaction_type": transaction.transaction_type.value,
+                "amount": transaction.amount.to_string(),
+                "from_account": transaction.from_account_id,
+                "to_account": transaction.to_account_id,
+                "reference": transaction.reference,
+                "channel": transaction.channel.value
+            }
+        )
+    
     def reverse_transaction(
         self,
         original_transaction_id: str,
@@ -623,8 +866,12 @@ class TransactionProcessor:
         
         return filtered_transactions
     
-    def _run_compliance_checks(self, transaction: Transaction) -> None:
-        """Run compliance checks on transaction"""
+    def _run_compliance_checks(self, transaction: Transaction) -> Optional[str]:
+        """Run compliance checks on transaction
+        
+        Returns:
+            ID of the customer the transaction was checked against, if any
+        """
         # Determine customer ID
         customer_id = None
         account_id = transaction.from_account_id or transaction.to_account_id
@@ -638,7 +885,7 @@ class TransactionProcessor:
             # Cannot check compliance without customer info
             transaction.compliance_checked = True
             transaction.compliance_action = ComplianceAction.ALLOW
-            return
+            return None
         
         # Run compliance check
         action, violations = self.compliance_engine.check_transaction_compliance(
@@ -655,6 +902,7 @@ class TransactionProcessor:
             transaction.compliance_notes = "; ".join(violations)
         
         self._save_transaction(transaction)
+        return customer_id
     
     def _validate_transaction_accounts(self, transaction: Transaction) -> None:
         """Validate that accounts exist and can process the transaction"""
@@ -698,6 +946,25 @@ class TransactionProcessor:
     
     def _create_journal_entry(self, transaction: Transaction) -> JournalEntry:
         """Create journal entry for transaction"""
+        if transaction.transaction_type == TransactionType.REVERSAL:
+            # Reversal: Create opposite entries of original
+            if transaction.original_transaction_id:
+                # Use the same logic as the original but with swapped accounts
+                # This is handled by the calling reverse_transaction method
+                # which creates the transaction with swapped accounts
+                return self._create_journal_entry_for_reversal(transaction)
+            else:
+                raise ValueError("Reversal transaction must have original_transaction_id")
+        
+        # Create and return journal entry
+        return self.ledger.create_journal_entry(
+            reference=transaction.reference,
+            description=transaction.description,
+            lines=self._journal_lines(transaction)
+        )
+    
+    def _journal_lines(self, transaction: Transaction) -> List[JournalEntryLine]:
+        """Journal entry lines for a (non-reversal) transaction"""
         lines = []
         
         if transaction.transaction_type == TransactionType.DEPOSIT:
@@ -805,25 +1072,10 @@ class TransactionProcessor:
                 credit_amount=transaction.amount
             ))
         
-        elif transaction.transaction_type == TransactionType.REVERSAL:
-            # Reversal: Create opposite entries of original
-            if transaction.original_transaction_id:
-                # Use the same logic as the original but with swapped accounts
-                # This is handled by the calling reverse_transaction method
-                # which creates the transaction with swapped accounts
-                return self._create_journal_entry_for_reversal(transaction)
-            else:
-                raise ValueError("Reversal transaction must have original_transaction_id")
-        
         else:
             raise ValueError(f"Unsupported transaction type: {transaction.transaction_type}")
         
-        # Create and return journal entry
-        return self.ledger.create_journal_entry(
-            reference=transaction.reference,
-            description=transaction.description,
-            lines=lines
-        )
+        return lines
     
     def _create_journal_entry_for_reversal(self, reversal_transaction: Transaction) -> JournalEntry:
         """Create journal entry for reversal transaction"""
@@ -925,7 +1177,9 @@ class TransactionProcessor:
     def _save_transaction(self, transaction: Transaction) -> None:
         """Save transaction to storage"""
         transaction_dict = self._transaction_to_dict(transaction)
-        self.storage.save(self.table_name, transaction.id, transaction_dict)
+        with self.storage.atomic():
+            self.storage.save(self.table_name, transaction.id, transaction_dict)
+            self.time_index.add([transaction_dict])
     
     def _transaction_to_dict(self, transaction: Transaction) -> Dict:
         """Convert Transaction to dictionary for storage"""
@@ -0,0 +1,201 @@
+"""
+Velocity Counters Module
+
+Sliding-window transaction counters used by the compliance engine for
+velocity checks and KYC daily/monthly limits. Counters are kept per customer
+and currency in fixed minute/hour/day/month buckets, so both updates and
+window queries touch a bounded number of buckets regardless of history size.
+"""
+
+from decimal import Decimal
+from datetime import datetime, timezone, timedelta
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from .currency import Money, Currency
+from .storage import StorageInterface, INDEX_KEY_SEPARATOR
+
+
+# Pseudo-currency key used for cross-currency transaction counts (velocity)
+ALL_CURRENCIES = "*"
+
+
+@dataclass(frozen=True)
+class BucketGranularity:
+    """Bucket size and how many buckets to retain"""
+    name: str
+    retention: int  # Number of most recent buckets kept
+    seconds: Optional[int] = None  # Fixed-size buckets; None for calendar buckets
+
+
+MINUTE = BucketGranularity("minute", retention=60, seconds=60)
+HOUR = BucketGranularity("hour", retention=48, seconds=3600)
+DAY = BucketGranularity("day", retention=35)
+MONTH = BucketGranularity("month", retention=13)
+
+GRANULARITIES = (MINUTE, HOUR, DAY, MONTH)
+
+
+def bucket_id(granularity: BucketGranularity, at: datetime) -> int:
+    """Map a timestamp to the integer bucket id for a granularity (UTC)"""
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    at = at.astimezone(timezone.utc)
+    
+    if granularity.seconds is not None:
+        return int(at.timestamp()) // granularity.seconds
+    if granularity is DAY:
+        return at.date().toordinal()
+    return at.year * 12 + (at.month - 1)
+
+
+def _series_prefix(customer_id: str, currency: str, granularity: BucketGranularity) -> str:
+    return INDEX_KEY_SEPARATOR.join((customer_id, currency, granularity.name, ""))
+
+
+def _bucket_key(customer_id: str, currency: str, granularity: BucketGranularity, bucket: int) -> str:
+    return f"{_series_prefix(customer_id, currency, granularity)}{bucket:012d}"
+
+
+def _prefix_end(prefix: str) -> str:
+    """Exclusive upper bound for keys starting with a separator-terminated prefix"""
+    return prefix[:-1] + chr(ord(INDEX_KEY_SEPARATOR) + 1)
+
+
+class VelocityCounterStore:
+    """
+    Sliding-window counters stored one row per bucket
+    
+    Rows are keyed (customer, currency, granularity, bucket), so recording a
+    transaction reads and rewrites one row per granularity inside the
+    caller's storage transaction, and a window query reads one ordered key
+    range. Nothing is cached in the process: counters written by other
+    workers are always seen, and a rolled-back posting leaves no count
+    behind.
+    """
+    
+    def __init__(self, storage: StorageInterface, table_name: str = "compliance_velocity_counters"):
+        self.storage = storage
+        self.table_name = table_name
+    
+    def record_transaction(
+        self,
+        customer_id: str,
+        amount: Money,
+        at: Optional[datetime] = None
+    ) -> None:
+        """
+        Record a posted transaction against the customer's counters
+        
+        Args:
+            customer_id: Customer the transaction belongs to
+            amount: Transaction amount
+            at: Posting time (defaults to now)
+        """
+        at = at or datetime.now(timezone.utc)
+        value = abs(amount.amount)
+        
+        with self.storage.atomic():
+            for currency in (amount.currency.code, ALL_CURRENCIES):
+                for granularity in GRANULARITIES:
+                    self._add(customer_id, currency, granularity, bucket_id(granularity, at), value)
+    
+    def get_window(
+        self,
+        customer_id: str,
+        window: timedelta,
+        currency: Optional[Currency] = None,
+        now: Optional[datetime] = None
+    ) -> Tuple[int, Decimal]:
+        """
+        Get (count, amount) over a trailing sliding window
+        
+        The finest granularity whose retention covers the window is used, so
+        the window is exact to that bucket size (e.g. one minute for windows
+        up to an hour).
+        
+        Args:
+            customer_id: Customer ID
+            window: Trailing window length
+            currency: Currency to query, or None for the count across currencies
+            now: End of the window (defaults to now)
+        """
+        now = now or datetime.now(timezone.utc)
+        seconds = window.total_seconds()
+        
+        for granularity in (MINUTE, HOUR):
+            if seconds <= granularity.seconds * granularity.retention:
+                span = max(1, int(-(-seconds // granularity.seconds)))
+                break
+        else:
+            granularity = DAY
+            span = max(1, window.days + (1 if window.seconds else 0))
+            if span > DAY.retention:
+                raise ValueError(f"Window {window} exceeds counter retention of {DAY.retention} days")
+        
+        last = bucket_id(granularity, now)
+        return self._sum(customer_id, currency, granularity, last - span + 1, last)
+    
+    def get_daily_total(self, customer_id: str, currency: Currency, now: Optional[datetime] = None) -> Money:
+        """Get total amount for the customer in the current calendar day (UTC)"""
+        current = bucket_id(DAY, now or datetime.now(timezone.utc))
+        _, amount = self._sum(customer_id, currency, DAY, current, current)
+        return Money(amount, currency)
+    
+    def get_monthly_total(self, customer_id: str, currency: Currency, now: Optional[datetime] = None) -> Money:
+        """Get total amount for the customer in the current calendar month (UTC)"""
+        current = bucket_id(MONTH, now or datetime.now(timezone.utc))
+        _, amount = self._sum(customer_id, currency, MONTH, current, current)
+        return Money(amount, currency)
+    
+    def reset_customer(self, customer_id: str, currencies: List[Currency]) -> None:
+        """Drop counters for a customer (e.g. before a rebuild)"""
+        with self.storage.atomic():
+            for currency in [c.code for c in currencies] + [ALL_CURRENCIES]:
+                for granularity in GRANULARITIES:
+                    prefix = _series_prefix(customer_id, currency, granularity)
+                    for row in self.storage.scan_range(self.table_name, prefix, _prefix_end(prefix)):
+                        self.storage.delete(self.table_name, row["id"])
+    
+    def _add(
+        self,
+        customer_id: str,
+        currency: str,
+        granularity: BucketGranularity,
+        bucket: int,
+        value: Decimal
+    ) -> None:
+        """Read-modify-write one bucket row, pruning expired buckets when a new one starts"""
+        key = _bucket_key(customer_id, currency, granularity, bucket)
+        row = self.storage.load(self.table_name, key)
+        if row is None:
+            row = {"id": key, "count": 0, "amount": "0"}
+            prefix = _series_prefix(customer_id, currency, granularity)
+            oldest_kept = _bucket_key(customer_id, currency, granularity, bucket - granularity.retention + 1)
+            for stale in self.storage.scan_range(self.table_name, prefix, oldest_kept):
+                self.storage.delete(self.table_name, stale["id"])
+        
+        row["count"] += 1
+        row["amount"] = str(Decimal(row["amount"]) + value)
+        self.storage.save(self.table_name, key, row)
+    
+    def _sum(
+        self,
+        customer_id: str,
+        currency: Optional[Currency],
+        granularity: BucketGranularity,
+        first: int,
+        last: int
+    ) -> Tuple[int, Decimal]:
+        """Sum count/amount over bucket ids in [first, last]"""
+        code = currency.code if currency else ALL_CURRENCIES
+        count = 0
+        amount = Decimal('0')
+        for row in self.storage.scan_range(
+            self.table_name,
+            _bucket_key(customer_id, code, granularity, first),
+            _bucket_key(customer_id, code, granularity, last + 1)
+        ):
+            count += row["count"]
+            amount += Decimal(row["amount"])
+        return count, amount
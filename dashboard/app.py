@@ -18,6 +18,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from core_banking.storage import SQLiteStorage
 from core_banking.audit import AuditTrail
+from core_banking.amortization import decode_schedule
+from core_banking.interest_kernel import from_minor
 
 
 def _customer_name(c: dict) -> str:
@@ -308,8 +310,23 @@ async def get_loan_detail(loan_id: str):
         customer = storage.load("customers", loan_data.get("customer_id", ""))
         
         # Get amortization schedule
-        schedule_entries = storage.find("amortization_schedules", {"loan_id": loan_id})
         schedule_data = []
+        schedule_record = storage.load("loan_schedules", loan_id)
+        schedule_entries = [] if schedule_record else storage.find("amortization_schedules", {"loan_id": loan_id})
+        if schedule_record:
+            columns = decode_schedule(schedule_record)
+            precision = Currency[schedule_record["currency"]].precision
+            for number, (ordinal, payment, principal, interest, remaining) in enumerate(zip(
+                columns.ordinals, columns.payment, columns.principal, columns.interest, columns.remaining
+            ), start=1):
+                schedule_data.append({
+                    "payment_number": number,
+                    "payment_date": date.fromordinal(ordinal).isoformat(),
+                    "payment_amount": format_currency_value(from_minor(payment, precision)),
+                    "principal_amount": format_currency_value(from_minor(principal, precision)),
+                    "interest_amount": format_currency_value(from_minor(interest, precision)),
+                    "remaining_balance": format_currency_value(from_minor(remaining, precision))
+                })
         for entry in schedule_entries:
             schedule_data.append({
                 "payment_number": entry.get("payment_number", 0),
@@ -0,0 +1,140 @@
+"""
+Test suite for the offline AML batch scanner
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date, datetime, timezone, timedelta
+
+from core_banking.storage import InMemoryStorage
+from core_banking.audit import AuditTrail
+from core_banking.customers import CustomerManager
+from core_banking.compliance import ComplianceEngine, SuspiciousActivityType
+
+np = pytest.importorskip("numpy")
+
+from core_banking.aml import AMLBatchScanner, AMLScanConfig  # noqa: E402
+
+
+AS_OF = date(2026, 3, 31)
+
+
+class TestAMLBatchScanner:
+    """Test batch detection rules and bulk alert filing"""
+
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.storage = InMemoryStorage()
+        self.audit_trail = AuditTrail(self.storage)
+        self.customer_manager = CustomerManager(self.storage, self.audit_trail)
+        self.compliance_engine = ComplianceEngine(self.storage, self.customer_manager, self.audit_trail)
+        self.scanner = AMLBatchScanner(self.storage, self.compliance_engine, partitions=4)
+        self._txn_count = 0
+
+        for customer_id in ("C1", "C2", "C3"):
+            self.storage.save("accounts", f"ACC-{customer_id}", {
+                "id": f"ACC-{customer_id}", "customer_id": customer_id
+            })
+
+    def _post(self, customer_id, amount, day, transaction_type="deposit", state="completed", currency="USD"):
+        self._txn_count += 1
+        txn_id = f"T{self._txn_count:05d}"
+        posted = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc) + timedelta(hours=10)
+        self.storage.save("transactions", txn_id, {
+            "id": txn_id,
+            "transaction_type": transaction_type,
+            "from_account_id": None,
+            "to_account_id": f"ACC-{customer_id}",
+            "amount": str(amount),
+            "currency": currency,
+            "state": state,
+            "created_at": posted.isoformat(),
+            "processed_at": posted.isoformat()
+        })
+
+    def _types_for(self, result, customer_id):
+        return {f.activity_type for f in result.findings if f.customer_id == customer_id}
+
+    def test_structuring_cluster_across_days(self):
+        """Test sub-threshold deposits that add up to the threshold within the window"""
+        self._post("C1", Decimal('6000'), AS_OF - timedelta(days=2))
+        self._post("C1", Decimal('5500'), AS_OF - timedelta(days=1))
+        # Same total spread too far apart for C2
+        self._post("C2", Decimal('6000'), AS_OF - timedelta(days=20))
+        self._post("C2", Decimal('5500'), AS_OF - timedelta(days=1))
+
+        result = self.scanner.scan(as_of=AS_OF, raise_alerts=False)
+
+        assert SuspiciousActivityType.STRUCTURED_TRANSACTION in self._types_for(result, "C1")
+        assert SuspiciousActivityType.STRUCTURED_TRANSACTION not in self._types_for(result, "C2")
+        finding = next(f for f in result.findings if f.customer_id == "C1")
+        assert finding.metrics["count"] == 2
+        assert finding.metrics["amount"] == 1150000  # Minor units
+
+    def test_velocity_and_round_amounts(self):
+        """Test daily velocity and repeated round amounts"""
+        config = AMLScanConfig(velocity_daily_count=5)
+        scanner = AMLBatchScanner(self.storage, self.compliance_engine, config=config)
+        for _ in range(5):
+            self._post("C1", Decimal('12.34'), AS_OF)
+        for offset in range(3):
+            self._post("C2", Decimal('1500'), AS_OF - timedelta(days=offset))
+
+        result = scanner.scan(as_of=AS_OF, raise_alerts=False)
+
+        assert self._types_for(result, "C1") == {SuspiciousActivityType.HIGH_VELOCITY}
+        assert self._types_for(result, "C2") == {SuspiciousActivityType.ROUND_DOLLAR_AMOUNTS}
+
+    def test_unusual_daily_volume(self):
+        """Test a day far above the customer's average day is flagged"""
+        for offset in range(1, 8):
+            self._post("C1", Decimal('100'), AS_OF - timedelta(days=offset))
+        self._post("C1", Decimal('2000'), AS_OF)
+
+        result = self.scanner.scan(as_of=AS_OF, raise_alerts=False)
+
+        findings = [f for f in result.findings if f.activity_type == SuspiciousActivityType.UNUSUAL_TRANSACTION_SIZE]
+        assert len(findings) == 1
+        assert findings[0].day == AS_OF
+        assert findings[0].metrics["baseline"] == 10000
+
+    def test_filters_state_type_and_period(self):
+        """Test only completed customer transactions inside the scan period count"""
+        self._post("C1", Decimal('6000'), AS_OF, state="failed")
+        self._post("C1", Decimal('6000'), AS_OF, transaction_type="interest_credit")
+        self._post("C1", Decimal('6000'), AS_OF + timedelta(days=1))
+        self._post("C1", Decimal('6000'), AS_OF)
+
+        result = self.scanner.scan(as_of=AS_OF, raise_alerts=False)
+
+        assert result.transactions_scanned == 1
+        assert result.findings == []
+
+    def test_alerts_raised_once(self):
+        """Test findings become alerts and re-scans do not duplicate them"""
+        self._post("C1", Decimal('6000'), AS_OF - timedelta(days=1))
+        self._post("C1", Decimal('5500'), AS_OF)
+
+        first = self.scanner.scan(as_of=AS_OF)
+        second = self.scanner.scan(as_of=AS_OF)
+
+        alerts = self.storage.load_all("suspicious_activity_alerts")
+        assert first.alerts_raised == 1
+        assert second.alerts_raised == 0
+        assert len(alerts) == 1
+        assert alerts[0]["customer_id"] == "C1"
+        assert alerts[0]["activity_type"] == "structured_transaction"
+
+    def test_process_pool_matches_in_process(self):
+        """Test partitions scanned in worker processes give the same findings"""
+        for customer_id in ("C1", "C2", "C3"):
+            self._post(customer_id, Decimal('6000'), AS_OF - timedelta(days=1))
+            self._post(customer_id, Decimal('5500'), AS_OF)
+
+        serial = self.scanner.scan(as_of=AS_OF, raise_alerts=False)
+        pooled = AMLBatchScanner(
+            self.storage, self.compliance_engine, partitions=4, max_workers=2
+        ).scan(as_of=AS_OF, raise_alerts=False)
+
+        assert [f.alert_id for f in pooled.findings] == [f.alert_id for f in serial.findings]
+        assert len(serial.findings) == 3
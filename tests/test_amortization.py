@@ -0,0 +1,111 @@
+"""
+Test suite for the columnar amortization kernel
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date
+
+from core_banking.amortization import (
+    ScheduleCache, ScheduleColumns, amortize, decode_schedule, encode_schedule, payment_ordinals,
+    _annuity_balances, _columns_python
+)
+
+
+class TestAmortizationKernel:
+    """Test schedule columns, payment dates and the stored format"""
+    
+    def test_equal_installment_closed_form(self):
+        """Test level payments that retire exactly the principal"""
+        # 10,000.00 at 6% over 12 months pays 860.66 a month
+        columns = amortize(1000000, Decimal('0.06'), 12, 12, "equal_installment", installment=86066)
+        
+        assert len(columns["payment"]) == 12
+        assert columns["interest"][0] == 5000
+        assert set(int(p) for p in columns["payment"][:-1]) == {86066}
+        assert abs(int(columns["payment"][-1]) - 86066) <= 5
+        assert sum(int(p) for p in columns["principal"]) == 1000000
+        assert int(columns["remaining"][-1]) == 0
+        for payment, principal, interest in zip(columns["payment"], columns["principal"], columns["interest"]):
+            assert payment == principal + interest
+    
+    def test_equal_principal_settles_rounding_residual(self):
+        """Test the final payment clears what rounded principal steps leave over"""
+        columns = amortize(100000, Decimal('0.12'), 12, 3, "equal_principal")
+        
+        assert [int(p) for p in columns["principal"]] == [33333, 33333, 33334]
+        assert [int(i) for i in columns["interest"]] == [1000, 667, 333]
+        assert [int(r) for r in columns["remaining"]] == [66667, 33334, 0]
+    
+    def test_bullet_and_unknown_method(self):
+        """Test interest-only periods with principal repaid at the end"""
+        columns = amortize(500000, Decimal('0.10'), 12, 6, "bullet")
+        
+        assert [int(i) for i in columns["interest"]] == [4167] * 6
+        assert [int(p) for p in columns["principal"]] == [0] * 5 + [500000]
+        
+        with pytest.raises(ValueError, match="Unsupported amortization method"):
+            amortize(500000, Decimal('0.10'), 12, 6, "custom")
+    
+    def test_python_columns_match_numpy(self):
+        """Test the fallback path gives the NumPy amounts"""
+        pytest.importorskip("numpy")
+        for method, installment in (("equal_installment", 14985), ("equal_principal", None), ("bullet", None)):
+            vectorized = amortize(3000000, Decimal('0.0725'), 52, 1560, method, installment)
+            if method == "equal_installment":
+                balances = _annuity_balances(3000000, Decimal('0.0725'), 52, 1560, installment)
+            elif method == "equal_principal":
+                balances = [max(3000000 - 1923 * k, 0) for k in range(1, 1561)]
+            else:
+                balances = [3000000] * 1559 + [0]
+            fallback = _columns_python(3000000, Decimal('0.0725'), 52, balances, method, installment)
+            
+            for column in ("payment", "principal", "interest", "remaining"):
+                assert [int(v) for v in vectorized[column]] == fallback[column]
+    
+    def test_month_end_payment_dates(self):
+        """Test month-based dates stay anchored to the first payment day"""
+        ordinals = payment_ordinals(date(2024, 1, 31), "monthly", 4)
+        assert [date.fromordinal(int(o)) for o in ordinals] == [
+            date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)
+        ]
+        
+        ordinals = payment_ordinals(date(2024, 1, 1), "bi_weekly", 3)
+        assert [date.fromordinal(int(o)) for o in ordinals] == [
+            date(2024, 1, 1), date(2024, 1, 15), date(2024, 1, 29)
+        ]
+    
+    def test_encode_decode_round_trip(self):
+        """Test the columnar record restores every column"""
+        amounts = amortize(1000000, Decimal('0.06'), 12, 12, "equal_installment", installment=86066)
+        columns = ScheduleColumns(ordinals=payment_ordinals(date(2024, 2, 1), "monthly", 12), **amounts)
+        
+        record = encode_schedule(columns, "USD")
+        decoded = decode_schedule(record)
+        
+        assert record["count"] == 12
+        assert decoded.ordinals == [int(o) for o in columns.ordinals]
+        assert decoded.payment == [int(p) for p in columns.payment]
+        assert decoded.remaining == [int(r) for r in columns.remaining]
+        
+        with pytest.raises(ValueError, match="Unsupported schedule format"):
+            decode_schedule(dict(record, format="rows"))
+    
+    def test_schedule_cache_evicts_least_recently_used(self):
+        """Test LRU eviction and invalidation"""
+        cache = ScheduleCache(max_size=2)
+        cache.put("L1", [1])
+        cache.put("L2", [2])
+        assert cache.get("L1") == [1]
+        cache.put("L3", [3])
+        
+        assert cache.get("L2") is None
+        assert cache.get("L3") == [3]
+        cache.invalidate("L1")
+        assert cache.get("L1") is None
+        assert cache.hits == 2
+        assert cache.misses == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
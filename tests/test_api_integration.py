@@ -292,10 +292,10 @@ class TestTransactionFlow:
         })
         to_account_id = to_account_response.json()["account_id"]
         
-        # Deposit money in source account
+        # Deposit money in source account (deposit + transfer stay within the TIER_0 daily limit)
         client.post("/transactions/deposit", json={
             "account_id": from_account_id,
-            "amount": {"amount": "100.00", "currency": "USD"},
+            "amount": {"amount": "60.00", "currency": "USD"},
             "description": "Initial funding",
             "channel": "online"
         })
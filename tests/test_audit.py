@@ -13,7 +13,7 @@ from decimal import Decimal
 
 from core_banking.storage import InMemoryStorage
 from core_banking.audit import (
-    AuditTrail, AuditEvent, AuditEventType
+    AuditTrail, AuditEvent, AuditEventType, BufferedAuditWriter
 )
 
 
@@ -511,6 +511,137 @@ class TestAuditTrail:
         
         assert self.audit_trail.get_latest_hash() == event2.current_hash
     
+    def test_chain_head_persisted_with_each_append(self):
+        """Test appends update the chain head and never scan the audit table"""
+        def no_scan(table, filters):
+            raise AssertionError(f"unexpected scan of {table}")
+        self.storage.find = no_scan
+        self.storage.load_all = lambda table: no_scan(table, {})
+        
+        events = [
+            self.audit_trail.log_event(AuditEventType.CUSTOMER_CREATED, "customer", f"CUST{i}")
+            for i in range(3)
+        ]
+        
+        head = self.storage.load(self.audit_trail.head_table, AuditTrail.CHAIN_HEAD_ID)
+        assert head["last_hash"] == events[-1].current_hash
+        assert head["last_event_id"] == events[-1].id
+        assert head["sequence"] == 3
+        assert self.audit_trail.get_sequence() == 3
+        assert events[1].previous_hash == events[0].current_hash
+    
+    def test_trails_sharing_a_table_continue_one_chain(self):
+        """Test a second AuditTrail picks up the head written by the first"""
+        first = self.audit_trail.log_event(AuditEventType.SYSTEM_START, "system", "SYS")
+        other_trail = AuditTrail(self.storage)
+        second = other_trail.log_event(AuditEventType.SYSTEM_STOP, "system", "SYS")
+        third = self.audit_trail.log_event(AuditEventType.SYSTEM_START, "system", "SYS")
+        
+        assert second.previous_hash == first.current_hash
+        assert third.previous_hash == second.current_hash
+        assert self.audit_trail.verify_integrity()["valid"]
+    
+    def test_chain_head_bootstrapped_for_existing_events(self):
+        """Test an audit table without a head record is scanned once to build it"""
+        event = self.audit_trail.log_event(AuditEventType.SYSTEM_START, "system", "SYS")
+        self.storage.clear_table(self.audit_trail.head_table)
+        
+        reopened = AuditTrail(self.storage)
+        
+        assert reopened.get_latest_hash() == event.current_hash
+        assert reopened.get_sequence() == 1
+        next_event = reopened.log_event(AuditEventType.SYSTEM_STOP, "system", "SYS")
+        assert next_event.previous_hash == event.current_hash
+    
+    def test_events_carry_monotonic_sequence(self):
+        """Test sequence numbers are assigned in append order and covered by the hash"""
+        events = [
+            self.audit_trail.log_event(AuditEventType.CUSTOMER_UPDATED, "customer", "CUST001")
+            for _ in range(3)
+        ]
+        assert [e.sequence for e in events] == [1, 2, 3]
+        
+        tampered = self.storage.load(self.audit_trail.table_name, events[1].id)
+        tampered["sequence"] = 7
+        self.storage.save(self.audit_trail.table_name, events[1].id, tampered)
+        
+        result = self.audit_trail.verify_integrity()
+        assert result["valid"] == False
+        assert [e["event_id"] for e in result["hash_errors"]] == [events[1].id]
+    
+    def test_incremental_verification_uses_checkpoints(self):
+        """Test sealed segments are checkpointed and skipped by later verifications"""
+        trail = AuditTrail(self.storage, segment_size=3)
+        for i in range(7):
+            trail.log_event(AuditEventType.CUSTOMER_UPDATED, "customer", f"CUST{i}")
+        
+        first = trail.verify_integrity()
+        assert first["valid"] == True
+        assert first["verified_events"] == 7
+        assert self.storage.count(trail.checkpoint_table) == 2
+        
+        trail.log_event(AuditEventType.CUSTOMER_UPDATED, "customer", "CUST7")
+        second = trail.verify_integrity()
+        assert second["valid"] == True
+        assert second["total_events"] == 8
+        assert second["verified_events"] == 2
+        assert second["details"]["segments_from_checkpoint"] == 2
+    
+    def test_full_verification_detects_tampering_behind_checkpoint(self):
+        """Test full=True re-hashes checkpointed segments against their Merkle roots"""
+        trail = AuditTrail(self.storage, segment_size=3)
+        events = [
+            trail.log_event(AuditEventType.CUSTOMER_UPDATED, "customer", f"CUST{i}")
+            for i in range(6)
+        ]
+        assert trail.verify_integrity()["valid"] == True
+        
+        tampered = self.storage.load(trail.table_name, events[1].id)
+        tampered["entity_id"] = "FORGED"
+        self.storage.save(trail.table_name, events[1].id, tampered)
+        
+        assert trail.verify_integrity()["valid"] == True  # Segment 0 is trusted
+        full = trail.verify_integrity(full=True)
+        assert full["valid"] == False
+        assert full["details"]["checkpoint_mismatches"] == [0]
+        assert full["hash_errors"][0]["event_id"] == events[1].id
+    
+    def test_missing_sequence_entry_reported(self):
+        """Test a gap in a segment's sequence range is reported as missing"""
+        trail = AuditTrail(self.storage, segment_size=4)
+        for i in range(6):
+            trail.log_event(AuditEventType.CUSTOMER_UPDATED, "customer", f"CUST{i}")
+        self.storage.delete(trail.sequence_table, trail._sequence_key(2))
+        
+        result = trail.verify_integrity()
+        
+        assert result["valid"] == False
+        assert result["details"]["missing_sequences"] == [2]
+    
+    def test_verification_progress_and_process_pool(self):
+        """Test segment results stream in order and match across a process pool"""
+        trail = AuditTrail(self.storage, segment_size=2)
+        for i in range(5):
+            trail.log_event(AuditEventType.CUSTOMER_UPDATED, "customer", f"CUST{i}")
+        
+        progress = []
+        result = trail.verify_integrity(max_workers=2, progress_callback=progress.append)
+        
+        assert result["valid"] == True
+        assert [s.segment for s in progress] == [0, 1, 2]
+        assert [s.event_count for s in progress] == [2, 2, 1]
+    
+    def test_unsequenced_event_invalidates_chain(self):
+        """Test events written around log_event are reported"""
+        self.audit_trail.log_event(AuditEventType.SYSTEM_START, "system", "SYS")
+        forged = self.audit_trail.log_event(AuditEventType.SYSTEM_STOP, "system", "SYS").to_dict()
+        forged["id"] = "FORGED"
+        self.storage.save(self.audit_trail.table_name, "FORGED", forged)
+        
+        result = self.audit_trail.verify_integrity()
+        assert result["valid"] == False
+        assert result["details"]["unsequenced_events"] == 1
+    
     def test_concurrent_event_logging(self):
         """Test that concurrent event logging maintains chain integrity"""
         import threading
@@ -604,5 +735,187 @@ class TestAuditTrail:
         assert "Line 1\nLine 2" in retrieved.metadata["newlines"]
 
 
+class TestAuditQueries:
+    """Test indexed audit queries, pagination and export"""
+    
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.storage = InMemoryStorage()
+        self.audit_trail = AuditTrail(self.storage)
+        for i in range(10):
+            self.audit_trail.log_event(AuditEventType.TRANSACTION_POSTED, "account", "ACC001", {"n": i})
+            self.audit_trail.log_event(AuditEventType.CUSTOMER_UPDATED, "customer", f"CUST{i % 3}", {"n": i})
+    
+    def _forbid_scans(self):
+        def no_scan(*args, **kwargs):
+            raise AssertionError("unexpected full table scan")
+        self.storage.find = no_scan
+        self.storage.load_all = no_scan
+    
+    def test_entity_query_reads_only_entity_events(self):
+        """Test entity history comes from the entity index in sequence order"""
+        self._forbid_scans()
+        
+        events = self.audit_trail.get_events_for_entity("customer", "CUST1")
+        latest = self.audit_trail.get_events_for_entity("account", "ACC001", limit=3)
+        
+        assert [e.metadata["n"] for e in events] == [1, 4, 7]
+        assert [e.metadata["n"] for e in latest] == [7, 8, 9]
+        assert self.audit_trail.get_events_for_entity("customer", "CUST") == []
+    
+    def test_cursor_pagination(self):
+        """Test pages continue from the cursor without gaps or repeats"""
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            page = self.audit_trail.query_events(entity_type="account", entity_id="ACC001", cursor=cursor, page_size=4)
+            seen.extend(e.metadata["n"] for e in page.events)
+            pages += 1
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+        
+        assert seen == list(range(10))
+        assert pages == 3
+    
+    def test_type_and_time_range_queries(self):
+        """Test the (event_type, created_at) index honours time bounds"""
+        events = self.audit_trail.get_events_by_type(AuditEventType.CUSTOMER_UPDATED)
+        assert len(events) == 10
+        
+        middle = events[4].created_at
+        after = self.audit_trail.get_events_by_type(AuditEventType.CUSTOMER_UPDATED, start_time=middle)
+        before = self.audit_trail.get_events_by_type(AuditEventType.CUSTOMER_UPDATED, end_time=middle)
+        assert after[0].id == events[4].id
+        assert before[-1].id == events[4].id
+        assert len(after) + len(before) == 11
+        
+        window = self.audit_trail.get_all_events(start_time=middle, end_time=middle)
+        assert events[4].id in [e.id for e in window]
+        assert len(self.audit_trail.get_all_events(limit=5)) == 5
+    
+    def test_ndjson_export(self):
+        """Test the export streams one JSON document per line"""
+        lines = list(self.audit_trail.export_ndjson(entity_type="customer", entity_id="CUST0", page_size=2))
+        
+        assert len(lines) == 4
+        assert all(line.endswith("\n") for line in lines)
+        assert [json.loads(line)["metadata"]["n"] for line in lines] == [0, 3, 6, 9]
+    
+    def test_indexes_rebuilt_for_older_tables(self):
+        """Test a trail opened over unindexed events rebuilds its indexes"""
+        for table in self.audit_trail._index_tables():
+            self.storage.clear_table(table)
+        head = self.storage.load(self.audit_trail.head_table, AuditTrail.CHAIN_HEAD_ID)
+        del head["index_version"]
+        self.storage.save(self.audit_trail.head_table, AuditTrail.CHAIN_HEAD_ID, head)
+        
+        reopened = AuditTrail(self.storage)
+        
+        assert len(reopened.get_events_for_entity("account", "ACC001")) == 10
+
+
+class TestBufferedAuditWriter:
+    """Test batched background audit writes"""
+    
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.storage = InMemoryStorage()
+        self.audit_trail = AuditTrail(self.storage)
+        self.writer = BufferedAuditWriter(self.audit_trail, batch_size=50)
+        self.writer.start()
+    
+    def teardown_method(self):
+        self.writer.stop()
+    
+    def test_events_written_in_background_and_chained(self):
+        """Test buffered events are persisted by the writer with a valid chain"""
+        events = [
+            self.audit_trail.log_event(AuditEventType.CUSTOMER_UPDATED, "customer", f"CUST{i}")
+            for i in range(120)
+        ]
+        
+        assert self.writer.flush(timeout=5)
+        assert self.audit_trail.count_events() == 120
+        assert [e.sequence for e in events] == list(range(1, 121))
+        assert self.audit_trail.get_latest_hash() == events[-1].current_hash
+        assert self.audit_trail.verify_integrity()["valid"]
+    
+    def test_regulated_events_written_inline(self):
+        """Test sync_event_types bypass the queue"""
+        self.writer.stop()
+        idle_writer = BufferedAuditWriter(self.audit_trail)  # Attached but not draining
+        self.audit_trail.writer = idle_writer
+        
+        queued = self.audit_trail.log_event(AuditEventType.CUSTOMER_UPDATED, "customer", "CUST001")
+        frozen = self.audit_trail.log_event(AuditEventType.ACCOUNT_FROZEN, "account", "ACC001")
+        
+        assert not self.storage.exists(self.audit_trail.table_name, queued.id)
+        assert self.storage.exists(self.audit_trail.table_name, frozen.id)
+        assert frozen.sequence == 1
+        assert idle_writer.get_stats()["queued"] == 1
+    
+    def test_events_queued_on_commit_only(self):
+        """Test events logged in a rolled-back transaction are never written"""
+        with pytest.raises(RuntimeError):
+            with self.storage.atomic():
+                self.audit_trail.log_event(AuditEventType.CUSTOMER_UPDATED, "customer", "LOST")
+                raise RuntimeError("rollback")
+        
+        with self.storage.atomic():
+            kept = self.audit_trail.log_event(AuditEventType.CUSTOMER_UPDATED, "customer", "KEPT")
+        
+        self.writer.flush(timeout=5)
+        assert [e.entity_id for e in self.audit_trail.get_all_events()] == ["KEPT"]
+        assert kept.current_hash
+    
+    def test_flush_on_commit_waits_for_persistence(self):
+        """Test flush_on_commit makes the event durable before log_event returns"""
+        self.writer.flush_on_commit = True
+        
+        event = self.audit_trail.log_event(AuditEventType.CUSTOMER_UPDATED, "customer", "CUST001")
+        
+        assert self.storage.exists(self.audit_trail.table_name, event.id)
+        assert self.writer.get_stats()["written"] == 1
+    
+    def test_failing_batch_dead_lettered_after_max_attempts(self):
+        """Test a batch that keeps failing is parked and its waiters get an error"""
+        self.writer.stop()
+        self.writer = BufferedAuditWriter(
+            self.audit_trail, flush_on_commit=True, max_attempts=3, retry_backoff=0.01
+        )
+        self.audit_trail.writer = self.writer
+        self.writer.start()
+        
+        def fail(events):
+            raise RuntimeError("disk full")
+        self.audit_trail._append_events = fail
+        
+        with pytest.raises(RuntimeError, match="disk full"):
+            self.audit_trail.log_event(AuditEventType.CUSTOMER_UPDATED, "customer", "CUST001")
+        
+        stats = self.writer.get_stats()
+        assert stats["failed_batches"] == 3
+        assert stats["dead_lettered"] == 1
+        assert stats["last_error"] == "disk full"
+        parked = self.storage.load_all(self.writer.dead_letter_table)
+        assert [p["event"]["entity_id"] for p in parked] == ["CUST001"]
+        
+        # The writer keeps going once the storage recovers
+        del self.audit_trail._append_events
+        event = self.audit_trail.log_event(AuditEventType.CUSTOMER_UPDATED, "customer", "CUST002")
+        assert self.storage.exists(self.audit_trail.table_name, event.id)
+    
+    def test_commit_wait_times_out(self):
+        """Test flush_on_commit gives up after commit_timeout"""
+        self.writer.stop()
+        idle_writer = BufferedAuditWriter(self.audit_trail, flush_on_commit=True, commit_timeout=0.05)
+        self.audit_trail.writer = idle_writer  # Attached but not draining
+        
+        with pytest.raises(RuntimeError, match="not persisted within"):
+            self.audit_trail.log_event(AuditEventType.CUSTOMER_UPDATED, "customer", "CUST001")
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+Test suite for the audit segment file backend
+"""
+
+import os
+import pytest
+
+from core_banking.storage import InMemoryStorage, SQLiteStorage
+from core_banking.audit import AuditTrail, AuditEventType
+from core_banking.audit_segments import AuditSegmentLog
+
+
+class TestAuditSegmentLog:
+    """Test audit events stored in append-only segment files"""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Set up test fixtures"""
+        self.directory = str(tmp_path / "audit")
+        self.storage = InMemoryStorage()
+        self.audit_trail = self._open()
+    
+    def _open(self):
+        return AuditTrail(self.storage, event_log=AuditSegmentLog(self.directory, segment_events=4))
+    
+    def _log(self, count, entity_id="ACC001"):
+        return [
+            self.audit_trail.log_event(
+                AuditEventType.ACCOUNT_UPDATED, "account", entity_id,
+                {"step": i, "nested": {"previous_hash": "x", "id": "y"}}
+            )
+            for i in range(count)
+        ]
+    
+    def test_events_stay_out_of_storage(self):
+        """Test events go to segment files and full segments are compressed"""
+        events = self._log(10)
+        
+        assert self.storage.count(self.audit_trail.table_name) == 0
+        assert self.audit_trail.count_events() == 10
+        assert sorted(os.listdir(self.directory)) == [
+            "00000000.idx", "00000000.log.z", "00000001.idx", "00000001.log.z",
+            "00000002.idx", "00000002.log"
+        ]
+        
+        assert self.audit_trail.get_event_by_id(events[1].id).current_hash == events[1].current_hash
+        assert [e.id for e in self.audit_trail.get_events_for_entity("account", "ACC001", limit=3)] == [
+            e.id for e in events[-3:]
+        ]
+    
+    def test_verify_segment_files(self):
+        """Test verification over segment files and checkpoints"""
+        self._log(10)
+        
+        first = self.audit_trail.verify_integrity()
+        second = self.audit_trail.verify_integrity()
+        full = self.audit_trail.verify_integrity(full=True, max_workers=2)
+        
+        assert first["valid"] and first["verified_events"] == 10
+        assert first["details"]["event_types"] == ["account_updated"]
+        assert second["valid"] and second["details"]["segments_from_checkpoint"] == 2
+        assert full["valid"] and full["verified_events"] == 10
+    
+    def test_tampered_record_detected(self):
+        """Test an edited record fails its hash check"""
+        events = self._log(6)
+        path = os.path.join(self.directory, "00000001.log")
+        with open(path, "rb") as f:
+            data = f.read()
+        with open(path, "wb") as f:
+            f.write(data.replace(b'"step":5', b'"step":7'))
+        
+        result = self.audit_trail.verify_integrity(full=True)
+        
+        assert not result["valid"]
+        assert [e["event_id"] for e in result["hash_errors"]] == [events[5].id]
+    
+    def test_reopen_truncates_uncommitted_records(self, tmp_path):
+        """Test records past the chain head are dropped on open"""
+        self.storage = SQLiteStorage(str(tmp_path / "audit.db"))
+        self.audit_trail = self._open()
+        self._log(5)
+        # Records written by a transaction whose head update rolled back
+        with pytest.raises(RuntimeError):
+            with self.storage.atomic():
+                self.audit_trail.log_event(AuditEventType.ACCOUNT_UPDATED, "account", "ACC002")
+                raise RuntimeError("rollback")
+        
+        reopened = self._open()
+        event = reopened.log_event(AuditEventType.ACCOUNT_UPDATED, "account", "ACC003")
+        
+        assert reopened.count_events() == 6
+        assert event.sequence == 6
+        assert reopened.verify_integrity(full=True)["valid"]
+    
+    def test_bootstrap_from_existing_log(self):
+        """Test a fresh database rebuilds the head and indexes from the log"""
+        events = self._log(5)
+        self.storage = InMemoryStorage()
+        
+        reopened = self._open()
+        
+        assert reopened.get_latest_hash() == events[-1].current_hash
+        assert len(reopened.get_events_for_entity("account", "ACC001")) == 5
+    
+    def test_backend_mismatch_rejected(self):
+        """Test a segment-backed chain cannot be opened as a database table"""
+        self._log(1)
+        
+        with pytest.raises(ValueError):
+            AuditTrail(self.storage)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
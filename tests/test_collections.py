@@ -18,12 +18,13 @@ from core_banking.customers import CustomerManager
 from core_banking.compliance import ComplianceEngine
 from core_banking.transactions import TransactionProcessor
 from core_banking.loans import LoanManager, LoanTerms, LoanState, AmortizationMethod, PaymentFrequency
-from core_banking.credit import CreditLineManager
+from core_banking.credit import CreditLineManager, CreditStatement
+from core_banking.delinquency import CREDIT_LINE_OBLIGATION
 from core_banking.interest import InterestEngine
 from core_banking.collections import (
     CollectionsManager, CollectionCase, CollectionActionRecord, PaymentPromise,
     CollectionStrategy, DelinquencyStatus, CollectionAction, ActionResult,
-    PromiseStatus, CaseResolution
+    PromiseStatus, CaseResolution, _escalation_table
 )
 
 
@@ -990,6 +991,173 @@ class TestCollectionsManager:
         statuses = {case.status for case in customer_cases}
         assert DelinquencyStatus.EARLY in statuses  # 25 days
         assert DelinquencyStatus.LATE in statuses   # 55 days
+    
+    def test_scan_reviews_only_queued_obligations(self):
+        """Test scans after the first touch only changed or newly due obligations"""
+        terms = LoanTerms(
+            principal_amount=Money(Decimal('5000.00'), Currency.USD),
+            annual_interest_rate=Decimal('0.08'),
+            term_months=36,
+            payment_frequency=PaymentFrequency.MONTHLY,
+            amortization_method=AmortizationMethod.EQUAL_INSTALLMENT,
+            first_payment_date=date.today() - timedelta(days=30)
+        )
+        loan = self.loan_manager.originate_loan(
+            customer_id=self.customer.id,
+            terms=terms,
+            currency=Currency.USD
+        )
+        self.loan_manager.disburse_loan(loan.id, self.disbursement_account.id)
+        loan.days_past_due = 30
+        loan.state = LoanState.ACTIVE
+        self.loan_manager._save_loan(loan)
+        
+        assert self.collections_manager.scan_delinquencies()["cases_created"] == 1
+        
+        # Nothing changed since the last scan
+        results = self.collections_manager.scan_delinquencies()
+        assert results["cases_created"] == 0
+        assert results["cases_updated"] == 0
+        
+        # A credit line statement that fell due five days ago is picked up when written
+        credit_account = self.account_manager.create_account(
+            customer_id=self.customer.id,
+            product_type=ProductType.CREDIT_LINE,
+            currency=Currency.USD,
+            name="Credit Line",
+            credit_limit=Money(Decimal('2000.00'), Currency.USD)
+        )
+        now = datetime.now(timezone.utc)
+        usd = lambda amount: Money(Decimal(amount), Currency.USD)
+        self.credit_manager._save_statement(CreditStatement(
+            id="stmt-1", created_at=now, updated_at=now, account_id=credit_account.id,
+            statement_date=date.today() - timedelta(days=30), due_date=date.today() - timedelta(days=5),
+            previous_balance=usd('0'), new_charges=usd('800.00'), payments_credits=usd('0'),
+            interest_charged=usd('0'), fees_charged=usd('0'), current_balance=usd('800.00'),
+            minimum_payment_due=usd('25.00'), available_credit=usd('1200.00'), credit_limit=usd('2000.00')
+        ))
+        
+        results = self.collections_manager.scan_delinquencies()
+        assert results["cases_created"] == 1
+        assert results["cases_updated"] == 0
+        
+        case = self.collections_manager.get_cases(status=DelinquencyStatus.EARLY)
+        assert {c.credit_line_id for c in case} == {None, credit_account.id}
+        # Still unpaid, so its days past due are reviewed again tomorrow
+        index = self.collections_manager.delinquency_index
+        assert index.get_review_date(CREDIT_LINE_OBLIGATION, credit_account.id) == date.today() + timedelta(days=1)
+
+
+    def _case(self, case_id, priority, days_past_due=10, collector=None, next_action_date=None, overdue='100.00'):
+        now = datetime.now(timezone.utc)
+        case = CollectionCase(
+            id=case_id,
+            created_at=now,
+            updated_at=now,
+            loan_id=f"LOAN-{case_id}",
+            customer_id=self.customer.id,
+            account_id=f"ACC-{case_id}",
+            status=DelinquencyStatus.EARLY,
+            days_past_due=days_past_due,
+            amount_overdue=Money(Decimal(overdue), Currency.USD),
+            total_outstanding=Money(Decimal('1000.00'), Currency.USD),
+            next_action_date=next_action_date,
+            assigned_collector=collector,
+            priority=priority
+        )
+        self.collections_manager._save_case(case)
+        return case
+    
+    def test_dequeue_case_by_priority_and_due_date(self):
+        """Test collectors get their highest-priority due case, claiming unassigned ones"""
+        today = date.today()
+        self._case("OWN-LOW", 2, collector="COLLECTOR1")
+        self._case("FREE-HIGH", 4)
+        self._case("OWN-HIGH", 4, collector="COLLECTOR1", next_action_date=today - timedelta(days=1))
+        self._case("OWN-LATER", 5, collector="COLLECTOR1", next_action_date=today + timedelta(days=3))
+        self._case("OTHER", 5, collector="COLLECTOR2")
+        
+        manager = self.collections_manager
+        assert manager.dequeue_case("COLLECTOR1").id == "OWN-HIGH"
+        
+        # Following up later moves the case behind the unassigned one
+        manager.record_action("OWN-HIGH", CollectionAction.REMINDER_CALL, "COLLECTOR1", "Left message",
+                              ActionResult.NO_ANSWER, next_follow_up=today + timedelta(days=2))
+        claimed = manager.dequeue_case("COLLECTOR1")
+        assert claimed.id == "FREE-HIGH"
+        assert claimed.assigned_collector == "COLLECTOR1"
+        assert manager.dequeue_case("COLLECTOR1").id == "FREE-HIGH"
+        
+        assert manager.dequeue_case("COLLECTOR1", as_of=today + timedelta(days=3)).id == "OWN-LATER"
+        assert {c.id for c in manager.get_cases(collector="COLLECTOR1", priority=4)} == {"OWN-HIGH", "FREE-HIGH"}
+        assert manager.dequeue_case("COLLECTOR3") is None
+    
+    def test_dequeue_case_skips_case_claimed_by_another_collector(self):
+        """Test a collector that loses the claim race moves on to the next case"""
+        self._case("FREE-HIGH", 5)
+        self._case("FREE-LOW", 2)
+        manager = self.collections_manager
+        next_queued = manager._next_queued
+        
+        def claimed_meanwhile(collector_id, cutoff):
+            # Another collector claims the case between the queue read and the claim
+            row = next_queued(collector_id, cutoff)
+            if row and row["case_id"] == "FREE-HIGH" and not manager.get_case("FREE-HIGH").assigned_collector:
+                manager._claim_case("FREE-HIGH", "COLLECTOR2")
+                row = dict(row, assigned_collector="")
+            return row
+        
+        manager._next_queued = claimed_meanwhile
+        claimed = manager.dequeue_case("COLLECTOR1")
+        
+        assert claimed.id == "FREE-LOW"
+        assert claimed.assigned_collector == "COLLECTOR1"
+        assert manager.get_case("FREE-HIGH").assigned_collector == "COLLECTOR2"
+        assert manager._claim_case("FREE-HIGH", "COLLECTOR1") is None
+    
+    def test_case_indexes_follow_updates_and_rebuild(self):
+        """Test summary counters, resolved index and open-case filters after updates"""
+        manager = self.collections_manager
+        self._case("C1", 2, overdue='100.00')
+        self._case("C2", 3, collector="COLLECTOR1", overdue='250.00')
+        self._case("C3", 5, overdue='400.00')
+        manager.assign_collector("C1", "COLLECTOR2")
+        manager.resolve_case("C3", CaseResolution.PAID)
+        
+        summary = manager.get_collection_summary()
+        assert summary["total_cases"] == 2
+        assert summary["total_overdue_amount"] == Decimal('350.00')
+        assert summary["assigned_cases"] == 2
+        assert summary["cases_by_priority"][5] == 0
+        
+        assert {c.id for c in manager.get_cases()} == {"C1", "C2"}
+        assert {c.id for c in manager.get_cases(include_resolved=True)} == {"C1", "C2", "C3"}
+        
+        recovery = manager.get_recovery_rate(period_start=date.today(), period_end=date.today())
+        assert recovery["cases_paid"] == 1
+        assert recovery["total_recovered_amount"] == Decimal('400.00')
+        assert manager.get_recovery_rate(period_end=date.today() - timedelta(days=1))["total_cases"] == 0
+        
+        # Rebuilding from the stored cases gives the same answers
+        for table in (manager.work_queue_table, manager.case_stats_table, manager.resolved_index_table):
+            self.storage.clear_table(table)
+        assert manager.rebuild_case_index() == 3
+        assert manager.get_collection_summary() == summary
+        assert manager.get_recovery_rate()["cases_paid"] == 1
+    
+    def test_auto_actions_use_escalation_table(self):
+        """Test the threshold table and that actions are not repeated within a week"""
+        thresholds, actions = _escalation_table(self.collections_manager.get_strategy())
+        assert thresholds == [1, 7, 30, 90]
+        assert actions[2] == [CollectionAction.REMINDER_SMS, CollectionAction.REMINDER_EMAIL,
+                              CollectionAction.DEMAND_LETTER]
+        
+        self._case("C1", 3, days_past_due=35)
+        self._case("C2", 1, days_past_due=0)
+        
+        results = self.collections_manager.run_auto_actions()
+        assert results == {"actions_executed": 3, "cases_processed": 2}
+        assert self.collections_manager.run_auto_actions()["actions_executed"] == 0
 
 
 if __name__ == "__main__":
@@ -8,15 +8,17 @@ and regulatory reporting functionality.
 import pytest
 from decimal import Decimal
 from datetime import datetime, timezone, date, timedelta
+from unittest.mock import patch
 
 from core_banking.currency import Money, Currency
 from core_banking.storage import InMemoryStorage
-from core_banking.audit import AuditTrail
+from core_banking.audit import AuditTrail, AuditEventType
+from core_banking.outbox import TransactionalOutbox
 from core_banking.customers import CustomerManager, KYCStatus, KYCTier
 from core_banking.compliance import (
     ComplianceEngine, ComplianceAction, SuspiciousActivityAlert,
     SuspiciousActivityType, ComplianceViolation, LargeTransactionReport,
-    ComplianceRuleType
+    ComplianceRuleType, ComplianceRule, CompiledRuleSet
 )
 
 
@@ -516,7 +518,212 @@ class TestComplianceEngine:
             has_report = len(reports) > 0
             
             assert has_report == should_report, f"Amount {amount} should {'have' if should_report else 'not have'} a report"
+    
+    def test_daily_limit_enforced_from_posted_transactions(self):
+        """Test posted transactions count towards the KYC daily limit"""
+        # TIER_1 daily limit is $1000
+        for _ in range(3):
+            self.compliance_engine.record_posted_transaction(
+                self.tier1_customer.id, Money(Decimal('300.00'), Currency.USD)
+            )
+        
+        action, violations = self.compliance_engine.check_transaction_compliance(
+            customer_id=self.tier1_customer.id,
+            account_id="ACC001",
+            transaction_amount=Money(Decimal('150.00'), Currency.USD),
+            transaction_type="deposit"
+        )
+        
+        assert action == ComplianceAction.BLOCK
+        assert any("daily limit" in v for v in violations)
+        
+        # Other currencies have their own windows
+        action, violations = self.compliance_engine.check_transaction_compliance(
+            customer_id=self.tier1_customer.id,
+            account_id="ACC001",
+            transaction_amount=Money(Decimal('150.00'), Currency.EUR),
+            transaction_type="deposit"
+        )
+        assert not any("daily limit" in v for v in violations)
+    
+    def test_monthly_limit_enforced_across_days(self):
+        """Test earlier days in the month count towards the monthly limit"""
+        now = datetime.now(timezone.utc)
+        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        
+        # TIER_0 monthly limit is $1000; post $950 on the first of the month
+        for _ in range(19):
+            self.compliance_engine.record_posted_transaction(
+                self.tier0_customer.id, Money(Decimal('50.00'), Currency.USD), month_start
+            )
+        
+        daily_total = self.compliance_engine._get_daily_transaction_total(self.tier0_customer.id, Currency.USD)
+        monthly_total = self.compliance_engine._get_monthly_transaction_total(self.tier0_customer.id, Currency.USD)
+        assert monthly_total == Money(Decimal('950.00'), Currency.USD)
+        if now.day != 1:
+            assert daily_total.is_zero()
+        
+        action, violations = self.compliance_engine.check_transaction_compliance(
+            customer_id=self.tier0_customer.id,
+            account_id="ACC001",
+            transaction_amount=Money(Decimal('60.00'), Currency.USD),
+            transaction_type="deposit"
+        )
+        
+        assert action == ComplianceAction.BLOCK
+        assert any("monthly limit" in v for v in violations)
+    
+    def test_velocity_counts_posted_transactions(self):
+        """Test velocity check uses the sliding-window counters"""
+        for _ in range(5):
+            self.compliance_engine.record_posted_transaction(
+                self.tier2_customer.id, Money(Decimal('10.01'), Currency.USD)
+            )
+        
+        action, violations = self.compliance_engine.check_transaction_compliance(
+            customer_id=self.tier2_customer.id,
+            account_id="ACC001",
+            transaction_amount=Money(Decimal('10.01'), Currency.USD),
+            transaction_type="deposit"
+        )
+        
+        assert action == ComplianceAction.REVIEW
+        assert any("velocity" in v.lower() for v in violations)
+        velocity_alerts = [a for a in self.compliance_engine.get_suspicious_alerts()
+                           if a.activity_type == SuspiciousActivityType.HIGH_VELOCITY]
+        assert len(velocity_alerts) == 1
+    
+    def test_velocity_threshold_counts_transactions_not_violations(self):
+        """Test recent violations no longer count toward the velocity threshold"""
+        for _ in range(self.compliance_engine.velocity_max_transactions):
+            self.compliance_engine._record_violation(
+                self.tier2_customer.id, "ACC001", ComplianceRuleType.DAILY_LIMIT,
+                "Daily limit exceeded", Money(Decimal('10.01'), Currency.USD), ComplianceAction.BLOCK
+            )
+        for _ in range(self.compliance_engine.velocity_max_transactions - 1):
+            self.compliance_engine.record_posted_transaction(
+                self.tier2_customer.id, Money(Decimal('10.01'), Currency.USD)
+            )
+        
+        assert self.compliance_engine._check_velocity(
+            self.tier2_customer.id, "ACC001", Money(Decimal('10.01'), Currency.USD)
+        ) is None
+        
+        self.compliance_engine.record_posted_transaction(
+            self.tier2_customer.id, Money(Decimal('10.01'), Currency.USD)
+        )
+        
+        assert "5 transactions" in self.compliance_engine._check_velocity(
+            self.tier2_customer.id, "ACC001", Money(Decimal('10.01'), Currency.USD)
+        )
+    
+    def test_velocity_counters_persisted(self):
+        """Test counters survive a new engine instance on the same storage"""
+        self.compliance_engine.record_posted_transaction(
+            self.tier1_customer.id, Money(Decimal('400.00'), Currency.USD)
+        )
+        
+        fresh_engine = ComplianceEngine(self.storage, self.customer_manager, self.audit_trail)
+        total = fresh_engine._get_daily_transaction_total(self.tier1_customer.id, Currency.USD)
+        
+        assert total == Money(Decimal('400.00'), Currency.USD)
+    
+    def test_single_customer_load_per_check(self):
+        """Test the hot path loads the customer once per transaction"""
+        with patch.object(self.customer_manager, 'get_customer',
+                          wraps=self.customer_manager.get_customer) as get_customer:
+            # Round, unusual-size amount exercises every customer-dependent check
+            self.compliance_engine.check_transaction_compliance(
+                customer_id=self.tier1_customer.id,
+                account_id="ACC001",
+                transaction_amount=Money(Decimal('5000.00'), Currency.USD),
+                transaction_type="deposit"
+            )
+        
+        assert get_customer.call_count == 1
+    
+    def test_compiled_rules_grouped_by_type_and_currency(self):
+        """Test compiled lookup tables only expose active rules per currency"""
+        compiled = CompiledRuleSet([
+            ComplianceRule(ComplianceRuleType.LARGE_TRANSACTION_REPORTING, Money(Decimal('15000'), Currency.EUR)),
+            ComplianceRule(ComplianceRuleType.LARGE_TRANSACTION_REPORTING, Money(Decimal('12000'), Currency.EUR)),
+            ComplianceRule(ComplianceRuleType.LARGE_TRANSACTION_REPORTING, Money(Decimal('1000'), Currency.EUR),
+                           is_active=False),
+        ])
+        
+        eur_rules = compiled.rules_for(ComplianceRuleType.LARGE_TRANSACTION_REPORTING, Currency.EUR)
+        assert [r.threshold.amount for r in eur_rules] == [Decimal('12000'), Decimal('15000')]
+        assert compiled.min_threshold(
+            ComplianceRuleType.LARGE_TRANSACTION_REPORTING, Currency.EUR
+        ) == Money(Decimal('12000'), Currency.EUR)
+        assert compiled.rules_for(ComplianceRuleType.LARGE_TRANSACTION_REPORTING, Currency.GBP) == []
+    
+    def test_rule_changes_recompiled(self):
+        """Test added, updated and removed rules are picked up by the compiled pipeline"""
+        engine = self.compliance_engine
+        amount = Money(Decimal('20000'), Currency.EUR)
+        assert not engine._requires_large_transaction_report(amount)
+        
+        rule = ComplianceRule(
+            rule_type=ComplianceRuleType.LARGE_TRANSACTION_REPORTING,
+            threshold=Money(Decimal('15000'), Currency.EUR)
+        )
+        engine.add_rule(rule)
+        assert engine._requires_large_transaction_report(amount)
+        
+        engine.update_rule(rule, threshold=Money(Decimal('25000'), Currency.EUR))
+        assert not engine._requires_large_transaction_report(amount)
+        
+        engine.update_rule(rule, threshold=Money(Decimal('18000'), Currency.EUR))
+        assert engine._requires_large_transaction_report(amount)
+        
+        engine.remove_rule(rule)
+        assert not engine._requires_large_transaction_report(amount)
+        
+        # Direct edits need an explicit recompile
+        engine.rules.append(rule)
+        engine.recompile_rules()
+        assert engine._requires_large_transaction_report(amount)
+        
+        with pytest.raises(ValueError, match="Unknown compliance rule field: limit"):
+            engine.update_rule(rule, limit=1)
+    
+    def test_outbox_mode_defers_filings(self):
+        """Test reports, alerts and violations are queued instead of written inline"""
+        outbox = TransactionalOutbox(self.storage, table_name="compliance_outbox")
+        engine = ComplianceEngine(self.storage, self.customer_manager, self.audit_trail, outbox=outbox)
+        audit_count = len(self.audit_trail.get_all_events())
+        
+        action, violations = engine.check_transaction_compliance(
+            customer_id=self.tier2_customer.id,
+            account_id="ACC001",
+            transaction_amount=Money(Decimal('9800.00'), Currency.USD),  # Structured, flagged
+            transaction_type="deposit",
+            transaction_id="TXN_OUTBOX"
+        )
+        
+        # Decision is available immediately; nothing filed yet
+        assert action == ComplianceAction.ALLOW
+        assert any("suspicious activity" in v.lower() for v in violations)
+        assert self.storage.count(engine.alerts_table) == 0
+        assert self.storage.count(engine.violations_table) == 0
+        assert len(self.audit_trail.get_all_events()) == audit_count
+        assert outbox.pending_count() == 2  # structured alert + violation
+        
+        worker = engine.create_outbox_worker(batch_size=10)
+        assert worker.drain() == 2
+        
+        alerts = engine.get_suspicious_alerts()
+        assert [a.activity_type for a in alerts] == [SuspiciousActivityType.STRUCTURED_TRANSACTION]
+        assert len(engine.get_customer_violations(self.tier2_customer.id)) == 1
+        assert len(self.audit_trail.get_events_by_type(AuditEventType.SUSPICIOUS_ACTIVITY_FLAGGED)) == 1
+        assert outbox.pending_count() == 0
+    
+    def test_outbox_worker_requires_outbox(self):
+        """Test creating a worker without an outbox is rejected"""
+        with pytest.raises(ValueError):
+            self.compliance_engine.create_outbox_worker()
 
 
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])
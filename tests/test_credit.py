@@ -638,6 +638,193 @@ class TestCreditLineManager:
         assert credit_txn.amount == Money(Decimal('25.00'), Currency.USD)
         # Fees are not eligible for grace period
         assert not credit_txn.eligible_for_grace
+    
+    def _statement(self, statement_id, due_date, balance='500.00', paid='0.00'):
+        usd = lambda amount: Money(Decimal(amount), Currency.USD)
+        now = datetime.now(timezone.utc)
+        statement = CreditStatement(
+            id=statement_id, created_at=now, updated_at=now, account_id=self.credit_account.id,
+            statement_date=due_date - timedelta(days=25), due_date=due_date,
+            previous_balance=usd('0'), new_charges=usd(balance), payments_credits=usd('0'),
+            interest_charged=usd('0'), fees_charged=usd('0'), current_balance=usd(balance),
+            minimum_payment_due=usd('25.00'), available_credit=usd('2500.00'), credit_limit=usd('3000.00'),
+            paid_amount=usd(paid)
+        )
+        self.credit_manager._save_statement(statement)
+        return statement
+    
+    def test_batch_overdue_processing_reads_status_index(self):
+        """Test only past-due CURRENT statements are charged, once each"""
+        today = date.today()
+        self._statement("S1", today - timedelta(days=10))
+        self._statement("S2", today - timedelta(days=1))
+        self._statement("S3", today)  # Due today, not yet overdue
+        self._statement("S4", today - timedelta(days=5), paid='25.00')  # Minimum paid
+        self._statement("S5", today - timedelta(days=3), balance='0.00')  # Nothing owed
+        
+        overdue = self.credit_manager.get_statements_by_status(StatementStatus.CURRENT, due_before=today)
+        assert [s.id for s in overdue] == ["S1", "S4", "S5", "S2"]
+        
+        results = self.credit_manager.process_overdue_accounts(batch_size=1)
+        
+        assert results == {"late_fees_charged": 2, "accounts_processed": 2}
+        assert [s.id for s in self.credit_manager.get_statements_by_status(StatementStatus.OVERDUE)] == ["S1", "S2"]
+        # Statements owing no fee leave CURRENT, so later runs skip them
+        assert [s.id for s in self.credit_manager.get_statements_by_status(StatementStatus.CURRENT)] == ["S3"]
+        assert [s.id for s in self.credit_manager.get_statements_by_status(StatementStatus.PAID_MINIMUM)] == ["S4"]
+        assert [s.id for s in self.credit_manager.get_statements_by_status(StatementStatus.PAID_FULL)] == ["S5"]
+        fees = self.storage.find(
+            self.credit_manager.credit_transactions_table,
+            {"account_id": self.credit_account.id, "category": TransactionCategory.FEE.value}
+        )
+        assert len(fees) == 2
+        assert all(Decimal(fee["amount"]) == Decimal("35") for fee in fees)
+        
+        # Nothing left to charge
+        assert self.credit_manager.process_overdue_accounts()["late_fees_charged"] == 0
+    
+    def test_rebuild_statement_index(self):
+        """Test statements saved before the index existed are indexed"""
+        statement = self._statement("S1", date.today() - timedelta(days=3))
+        self.storage.clear_table(self.credit_manager.statement_index_table)
+        
+        assert self.credit_manager.get_statements_by_status(StatementStatus.CURRENT) == []
+        assert self.credit_manager.rebuild_statement_index() == 1
+        assert [s.id for s in self.credit_manager.get_statements_by_status(StatementStatus.CURRENT)] == [statement.id]
+
+
+    def _purchase(self, account_id, amount):
+        txn = self.transaction_processor.create_transaction(
+            transaction_type=TransactionType.PAYMENT,
+            amount=Money(Decimal(amount), Currency.USD),
+            description="Purchase",
+            channel=TransactionChannel.ONLINE,
+            from_account_id=account_id
+        )
+        return self.credit_manager.process_credit_transaction(
+            account_id=account_id,
+            transaction_id=txn.id,
+            category=TransactionCategory.PURCHASE,
+            amount=Money(Decimal(amount), Currency.USD),
+            description="Purchase"
+        )
+    
+    def _cycle_accounts(self, count, cycle_day):
+        accounts = [self.credit_account]
+        for n in range(count - 1):
+            accounts.append(self.account_manager.create_account(
+                customer_id=self.customer.id,
+                product_type=ProductType.CREDIT_LINE,
+                currency=Currency.USD,
+                name=f"Credit Line {n}",
+                credit_limit=Money(Decimal('1000.00'), Currency.USD),
+                interest_rate=Decimal('0.1899')
+            ))
+        for account in accounts:
+            self.credit_manager.assign_billing_cycle(account.id, cycle_day)
+        return accounts
+    
+    @staticmethod
+    def _next_cycle_date():
+        cycle_date = date.today()
+        while cycle_date.day > 28:
+            cycle_date += timedelta(days=1)
+        return cycle_date
+    
+    def test_statement_cycle_bills_accounts_on_their_cycle_day(self):
+        """Test the cycle run bills due accounts once and assigns their transactions"""
+        cycle_date = self._next_cycle_date()
+        first, second = self._cycle_accounts(2, cycle_date.day)
+        other_day = cycle_date.day % 28 + 1
+        other = self.account_manager.create_account(
+            customer_id=self.customer.id,
+            product_type=ProductType.CREDIT_LINE,
+            currency=Currency.USD,
+            name="Other Cycle",
+            credit_limit=Money(Decimal('1000.00'), Currency.USD),
+            interest_rate=Decimal('0.1899')
+        )
+        self.credit_manager.assign_billing_cycle(other.id, other_day)
+        
+        self._purchase(first.id, '100.00')
+        self._purchase(first.id, '50.00')
+        self._purchase(second.id, '20.00')
+        self._purchase(other.id, '75.00')
+        
+        results = self.credit_manager.run_statement_cycle(cycle_date)
+        
+        assert results == {
+            "statements_generated": 2, "transactions_billed": 3, "accounts_skipped": 0, "accounts_failed": 0
+        }
+        statement = self.credit_manager.get_current_statement(first.id)
+        assert statement.statement_date == cycle_date
+        assert statement.due_date == cycle_date + timedelta(days=self.credit_manager.grace_period_days)
+        assert statement.current_balance == Money(Decimal('150.00'), Currency.USD)
+        assert statement.new_charges == Money(Decimal('150.00'), Currency.USD)
+        assert statement.minimum_payment_due == Money(Decimal('25.00'), Currency.USD)
+        assert self.credit_manager.get_current_statement(other.id) is None
+        
+        billed = self.storage.find(self.credit_manager.credit_transactions_table, {"account_id": first.id})
+        assert {txn["statement_id"] for txn in billed} == {statement.id}
+        # Only the other cycle's purchase is still unbilled
+        assert self.storage.count(self.credit_manager.unbilled_index_table) == 1
+        assert self.storage.find(self.interest_engine.grace_periods_table, {"account_id": first.id})
+        
+        # Re-running the same cycle bills nothing twice
+        rerun = self.credit_manager.run_statement_cycle(cycle_date)
+        assert rerun["statements_generated"] == 0
+        assert rerun["accounts_skipped"] == 2
+        assert len(self.credit_manager.get_account_statements(first.id)) == 1
+    
+    def test_statement_cycle_carries_balance_and_runs_in_workers(self):
+        """Test worker shards match the in-process run and carry balances forward"""
+        cycle_date = self._next_cycle_date()
+        accounts = self._cycle_accounts(4, cycle_date.day)
+        for n, account in enumerate(accounts):
+            self._purchase(account.id, f"{10 * (n + 1)}.00")
+        
+        results = self.credit_manager.run_statement_cycle(cycle_date, shards=2, max_workers=2)
+        
+        assert results["statements_generated"] == 4
+        for n, account in enumerate(accounts):
+            statement = self.credit_manager.get_current_statement(account.id)
+            assert statement.current_balance == Money(Decimal(f"{10 * (n + 1)}.00"), Currency.USD)
+        
+        # Next month: no new activity, the balance is carried onto a new statement
+        next_cycle = (cycle_date.replace(day=1) + timedelta(days=32)).replace(day=cycle_date.day)
+        results = self.credit_manager.run_statement_cycle(next_cycle)
+        assert results["statements_generated"] == 4
+        statement = self.credit_manager.get_current_statement(accounts[0].id)
+        assert statement.statement_date == next_cycle
+        assert statement.previous_balance == Money(Decimal('10.00'), Currency.USD)
+        assert statement.new_charges.is_zero()
+    
+    def test_billing_cycle_assignment_and_rebuild(self):
+        """Test cycle day validation and re-registering accounts from stored data"""
+        with pytest.raises(ValueError, match="Cycle day"):
+            self.credit_manager.assign_billing_cycle(self.credit_account.id, 31)
+        
+        cycle_date = self._next_cycle_date()
+        self._cycle_accounts(1, cycle_date.day)
+        self._purchase(self.credit_account.id, '40.00')
+        for table in (self.credit_manager.billing_accounts_table, self.credit_manager.billing_cycle_index_table,
+                      self.credit_manager.unbilled_index_table):
+            self.storage.clear_table(table)
+        
+        assert self.credit_manager.rebuild_billing_index() == 1
+        assert self.storage.count(self.credit_manager.unbilled_index_table) == 1
+        billing = self.storage.load(self.credit_manager.billing_accounts_table, self.credit_account.id)
+        assert billing["cycle_day"] in range(1, 29)
+        
+        # The account is billed on its derived cycle day
+        cycle_date = date.today()
+        while cycle_date.day != billing["cycle_day"]:
+            cycle_date += timedelta(days=1)
+        results = self.credit_manager.run_statement_cycle(cycle_date)
+        assert results["statements_generated"] == 1
+        assert self.credit_manager.get_current_statement(self.credit_account.id).current_balance == Money(
+            Decimal('40.00'), Currency.USD
+        )
 
 
 if __name__ == "__main__":
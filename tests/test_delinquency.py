@@ -0,0 +1,103 @@
+"""
+Test suite for the delinquency review queue
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date, datetime, timedelta, timezone
+
+from core_banking.storage import InMemoryStorage
+from core_banking.currency import Currency, Money
+from core_banking.credit import CreditStatement, StatementStatus
+from core_banking.delinquency import CREDIT_LINE_OBLIGATION, LOAN_OBLIGATION, DelinquencyIndex
+
+
+TODAY = date(2024, 3, 10)
+
+
+def _statement(account_id, due_date, balance="500.00", paid="0.00", status=StatementStatus.CURRENT):
+    usd = lambda amount: Money(Decimal(amount), Currency.USD)
+    now = datetime.now(timezone.utc)
+    return CreditStatement(
+        id=f"S-{account_id}", created_at=now, updated_at=now,
+        account_id=account_id, statement_date=due_date - timedelta(days=25), due_date=due_date,
+        previous_balance=usd("0"), new_charges=usd(balance), payments_credits=usd("0"),
+        interest_charged=usd("0"), fees_charged=usd("0"), current_balance=usd(balance),
+        minimum_payment_due=usd("25.00"), available_credit=usd("1000.00"), credit_limit=usd("1500.00"),
+        status=status, paid_amount=usd(paid)
+    )
+
+
+class TestDelinquencyIndex:
+    """Test queue ordering, rescheduling and change tracking"""
+    
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.storage = InMemoryStorage()
+        self.index = DelinquencyIndex(self.storage)
+    
+    def test_due_returns_entries_up_to_date_in_order(self):
+        """Test the range read stops at the cut-off and pages by key"""
+        self.index.schedule(LOAN_OBLIGATION, "L2", TODAY)
+        self.index.schedule(CREDIT_LINE_OBLIGATION, "A1", TODAY - timedelta(days=3))
+        self.index.schedule(LOAN_OBLIGATION, "L1", TODAY)
+        self.index.schedule(LOAN_OBLIGATION, "L3", TODAY + timedelta(days=1))
+        
+        due = self.index.due(TODAY)
+        assert [(e["obligation_type"], e["obligation_id"]) for e in due] == [
+            (CREDIT_LINE_OBLIGATION, "A1"), (LOAN_OBLIGATION, "L1"), (LOAN_OBLIGATION, "L2")
+        ]
+        
+        first_page = self.index.due(TODAY, limit=2)
+        second_page = self.index.due(TODAY, after=first_page[-1]["id"], limit=2)
+        assert [e["obligation_id"] for e in second_page] == ["L2"]
+    
+    def test_reschedule_replaces_entry(self):
+        """Test an obligation keeps a single queue entry"""
+        self.index.schedule(LOAN_OBLIGATION, "L1", TODAY)
+        self.index.schedule(LOAN_OBLIGATION, "L1", TODAY + timedelta(days=5))
+        
+        assert len(self.index) == 1
+        assert self.index.due(TODAY) == []
+        assert self.index.get_review_date(LOAN_OBLIGATION, "L1") == TODAY + timedelta(days=5)
+        
+        self.index.unschedule(LOAN_OBLIGATION, "L1")
+        assert len(self.index) == 0
+        assert self.index.get_review_date(LOAN_OBLIGATION, "L1") is None
+    
+    def test_track_loan(self):
+        """Test only tracked loans with days past due are queued"""
+        self.index.track_loan({"id": "L1", "state": "active", "days_past_due": 12}, TODAY)
+        self.index.track_loan({"id": "L2", "state": "active", "days_past_due": 0}, TODAY)
+        self.index.track_loan({"id": "L3", "state": "paid_off", "days_past_due": 40}, TODAY)
+        assert [e["obligation_id"] for e in self.index.due(TODAY)] == ["L1"]
+        
+        # Brought current: nothing left to review
+        self.index.track_loan({"id": "L1", "state": "active", "days_past_due": 0}, TODAY)
+        assert len(self.index) == 0
+    
+    def test_track_statement(self):
+        """Test statements queue their line for the day after the due date"""
+        self.index.track_statement(_statement("A1", TODAY + timedelta(days=20)), TODAY)
+        self.index.track_statement(_statement("A2", TODAY - timedelta(days=4)), TODAY)
+        self.index.track_statement(_statement("A3", TODAY + timedelta(days=20), paid="500.00",
+                                              status=StatementStatus.PAID_FULL), TODAY)
+        
+        assert self.index.get_review_date(CREDIT_LINE_OBLIGATION, "A1") == TODAY + timedelta(days=21)
+        assert self.index.get_review_date(CREDIT_LINE_OBLIGATION, "A2") == TODAY
+        # A paid statement may leave an older one current, so the line is re-checked
+        assert self.index.get_review_date(CREDIT_LINE_OBLIGATION, "A3") == TODAY
+    
+    def test_clear_and_built_marker(self):
+        """Test clearing empties the queue and resets the marker"""
+        self.index.schedule(LOAN_OBLIGATION, "L1", TODAY)
+        self.index.mark_built()
+        assert self.index.is_built()
+        
+        self.index.clear()
+        assert not self.index.is_built()
+        assert len(self.index) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
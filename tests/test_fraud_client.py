@@ -7,7 +7,9 @@ from decimal import Decimal
 from unittest.mock import Mock, patch
 import httpx
 
-from core_banking.fraud_client import BastionClient, MockBastionClient, FraudScore
+from core_banking.fraud_client import (
+    BastionClient, MockBastionClient, FraudScore, FraudScoreCache, fingerprint_transaction
+)
 from core_banking.currency import Money, Currency
 from core_banking.transactions import TransactionProcessor, TransactionType, TransactionChannel, TransactionState
 
@@ -263,6 +265,110 @@ class TestBastionClient:
         assert self.client.health_check() is False
 
 
+class TestFraudScoreCache:
+    """Test fraud score caching in front of Bastion"""
+    
+    def _ok_response(self, score=0.35, action="review"):
+        response = Mock()
+        response.status_code = 200
+        response.json.return_value = {"risk_score": score, "action": action, "reasons": ["velocity_check"]}
+        return response
+    
+    def test_fingerprint_keys_transaction_id_by_payload(self):
+        """Test the same transaction_id with a different payload gets a different key"""
+        a = fingerprint_transaction({"transaction_id": "t-1", "amount": "5", "timestamp": 1})
+        b = fingerprint_transaction({"amount": "5", "transaction_id": "t-1", "timestamp": 2})
+        c = fingerprint_transaction({"transaction_id": "t-1", "amount": "500"})
+        
+        assert a == b
+        assert a != c
+        assert a.startswith("txn:t-1:")
+    
+    def test_fingerprint_is_canonical(self):
+        """Test payload fingerprint ignores key order and timestamp"""
+        a = fingerprint_transaction({"amount": "5.00", "currency": "USD", "timestamp": 1})
+        b = fingerprint_transaction({"currency": "USD", "amount": "5.00", "timestamp": 2})
+        c = fingerprint_transaction({"currency": "USD", "amount": "6.00"})
+        
+        assert a == b
+        assert a != c
+        assert a.startswith("fp:")
+    
+    @patch('httpx.Client.post')
+    def test_retry_served_from_cache(self, mock_post):
+        """Test re-scoring the same transaction does not call Bastion again"""
+        mock_post.return_value = self._ok_response()
+        client = BastionClient(cache=FraudScoreCache(max_size=10, ttl_seconds=60))
+        
+        transaction_data = {"transaction_id": "txn-1", "amount": "5000.00"}
+        first = client.score_transaction(transaction_data)
+        second = client.score_transaction(transaction_data)
+        
+        assert mock_post.call_count == 1
+        assert second.decision == first.decision == "REVIEW"
+        assert second.latency_ms == 0.0
+        
+        stats = client.get_cache_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+    
+    @patch('httpx.Client.post')
+    def test_fallback_not_cached(self, mock_post):
+        """Test Bastion outages are not cached"""
+        mock_post.side_effect = httpx.ConnectError("Connection failed")
+        client = BastionClient(cache=FraudScoreCache())
+        
+        client.score_transaction({"transaction_id": "txn-1", "amount": "10"})
+        client.score_transaction({"transaction_id": "txn-1", "amount": "10"})
+        
+        assert mock_post.call_count == 2
+        assert len(client.cache) == 0
+    
+    @patch('httpx.Client.post')
+    def test_invalidate_forces_rescore(self, mock_post):
+        """Test invalidation drops cached scores for a transaction"""
+        mock_post.return_value = self._ok_response()
+        client = BastionClient(cache=FraudScoreCache())
+        
+        client.score_transaction({"transaction_id": "txn-1", "amount": "10"})
+        assert client.invalidate_cached_score("txn-1") == 1
+        client.score_transaction({"transaction_id": "txn-1", "amount": "10"})
+        
+        assert mock_post.call_count == 2
+        assert client.get_cache_stats()["invalidations"] == 1
+    
+    def test_ttl_expiry(self):
+        """Test entries expire after the TTL"""
+        cache = FraudScoreCache(max_size=10, ttl_seconds=30)
+        score = FraudScore(0.1, "APPROVE", "LOW", [], 5.0)
+        
+        with patch('core_banking.fraud_client.time.monotonic', return_value=1000.0):
+            cache.put("txn:a", score, "a")
+        with patch('core_banking.fraud_client.time.monotonic', return_value=1029.0):
+            assert cache.get("txn:a") is score
+        with patch('core_banking.fraud_client.time.monotonic', return_value=1031.0):
+            assert cache.get("txn:a") is None
+        
+        assert cache.get_stats()["expirations"] == 1
+        assert len(cache) == 0
+    
+    def test_lru_eviction(self):
+        """Test the cache stays bounded and evicts least recently used"""
+        cache = FraudScoreCache(max_size=2, ttl_seconds=60)
+        score = FraudScore(0.1, "APPROVE", "LOW", [], 5.0)
+        
+        cache.put("txn:a", score, "a")
+        cache.put("txn:b", score, "b")
+        cache.get("txn:a")
+        cache.put("txn:c", score, "c")
+        
+        assert cache.get("txn:b") is None
+        assert cache.get("txn:a") is score
+        assert cache.get("txn:c") is score
+        assert cache.get_stats()["evictions"] == 1
+
+
 class TestTransactionProcessorFraudIntegration:
     """Test fraud client integration with transaction processor"""
     
@@ -20,6 +20,7 @@ from core_banking.fraud_events import (
 )
 from core_banking.events import DomainEvent, EventPayload, EventDispatcher
 from core_banking.kafka_integration import InMemoryEventBus, EventSchema
+from core_banking.fraud_client import FraudScore, FraudScoreCache
 
 
 class TestEventSchemas:
@@ -234,6 +235,24 @@ class TestFraudEventBridge:
         assert alert_data["severity"] == "HIGH"
         assert alert_data["transaction_id"] == "txn-456"
     
+    def test_fraud_decision_invalidates_score_cache(self, fraud_bridge):
+        """Test an updated Bastion decision evicts the cached synchronous score"""
+        cache = FraudScoreCache()
+        cache.put("txn:txn-456", FraudScore(0.1, "APPROVE", "LOW", [], 3.0), "txn-456")
+        fraud_bridge.score_cache = cache
+        
+        decision_event = EventSchema(
+            event_id="decision-124",
+            event_type="fraud.decision",
+            timestamp=datetime.now(timezone.utc),
+            source="bastion",
+            data={"transaction_id": "txn-456", "score": 0.9, "decision": "BLOCK"}
+        )
+        fraud_bridge._on_fraud_decision(decision_event)
+        
+        assert cache.get("txn:txn-456") is None
+        assert fraud_bridge.get_stats()["score_cache"]["invalidations"] == 1
+    
     def test_fraud_alert_consumption(self, fraud_bridge):
         """Test consuming fraud alert events from Bastion"""
         fraud_bridge.start()
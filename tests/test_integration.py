@@ -412,18 +412,16 @@ class TestFullBankingSystem:
         initial_balance = self.account_manager.get_book_balance(savings.id)
         assert initial_balance == Money(Decimal('10000.00'), Currency.USD)
         
-        # Run daily interest accrual for multiple days
+        # Run daily interest accrual for every day of a month
         for day in range(30):  # 30 days
-            accrual_date = date.today() - timedelta(days=30-day)
+            accrual_date = date(2024, 6, 1) + timedelta(days=day)
             results = self.interest_engine.run_daily_accrual(accrual_date)
             
             if day == 29:  # Last day
                 assert results[ProductType.SAVINGS.value] == 1
         
-        # Post monthly interest
-        current_month = date.today().month
-        current_year = date.today().year
-        posting_results = self.interest_engine.post_monthly_interest(current_month, current_year)
+        # Post interest for the month the accruals fall in
+        posting_results = self.interest_engine.post_monthly_interest(6, 2024)
         
         # Should have posted interest for savings account
         assert len(posting_results[ProductType.SAVINGS.value]) == 1
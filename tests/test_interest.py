@@ -8,6 +8,7 @@ and proper interest posting. All calculations must be mathematically precise.
 import pytest
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, timezone, date, timedelta
+import zlib
 
 from core_banking.currency import Money, Currency
 from core_banking.storage import InMemoryStorage
@@ -16,7 +17,7 @@ from core_banking.ledger import GeneralLedger, JournalEntryLine, AccountType
 from core_banking.accounts import AccountManager, ProductType
 from core_banking.customers import CustomerManager, KYCStatus, KYCTier
 from core_banking.compliance import ComplianceEngine
-from core_banking.transactions import TransactionProcessor, TransactionChannel
+from core_banking.transactions import TransactionProcessor, TransactionChannel, TransactionType, TransactionState
 from core_banking.interest import (
     InterestEngine, InterestRateConfig, InterestAccrual, GracePeriodTracker,
     InterestType, CompoundingFrequency, InterestCalculationMethod
@@ -436,6 +437,30 @@ class TestInterestEngine:
         accruals = self.interest_engine._get_unposted_accruals(self.credit_account.id)
         assert len(accruals) == 0
     
+    def test_grace_validity_read_by_account(self):
+        """Test grace validity comes from the latest-period pointers, built for periods saved before them"""
+        older = self.interest_engine.create_grace_period(
+            self.credit_account.id, date.today() - timedelta(days=40),
+            Money(Decimal('100.00'), Currency.USD), date.today() - timedelta(days=15)
+        )
+        older.grace_period_active = False
+        self.interest_engine._save_grace_period(older)
+        
+        # A newer period written before the pointer table existed
+        legacy = GracePeriodTracker(
+            id="legacy-grace", created_at=datetime.now(timezone.utc), updated_at=datetime.now(timezone.utc),
+            account_id=self.credit_account.id, statement_date=date.today() - timedelta(days=10),
+            statement_balance=Money(Decimal('50.00'), Currency.USD), due_date=date.today() + timedelta(days=15)
+        )
+        self.storage.save(
+            self.interest_engine.grace_periods_table, legacy.id, self.interest_engine._grace_period_to_dict(legacy)
+        )
+        self.storage.clear_table(self.interest_engine.index_state_table)
+        
+        accounts = [self.savings_account, self.credit_account]
+        assert self.interest_engine._load_grace_validity(accounts) == {self.credit_account.id: True}
+        assert self.interest_engine._get_current_grace_period(self.credit_account.id).id == "legacy-grace"
+    
     def test_grace_period_update_on_payment(self):
         """Test grace period status update when payment is made"""
         # Create grace period tracker
@@ -485,30 +510,36 @@ class TestInterestEngine:
         principal = Money(Decimal('10000.00'), Currency.USD)
         annual_rate = Decimal('0.05')  # 5% APY
         
+        account = self.account_manager.create_account(
+            customer_id=self.customer.id,
+            product_type=ProductType.SAVINGS,
+            currency=Currency.USD,
+            name="Compounding Savings",
+            interest_rate=annual_rate
+        )
+        
         # Deposit principal
         deposit = self.transaction_processor.deposit(
-            account_id=self.savings_account.id,
+            account_id=account.id,
             amount=principal,
             description="Principal deposit",
             channel=TransactionChannel.BRANCH
         )
         self.transaction_processor.process_transaction(deposit.id)
         
-        # Run daily accrual for 365 days (1 year)
+        # Run daily accrual for the year, posting each month once it ends
         start_date = date(2024, 1, 1)
-        for day_num in range(365):
+        for day_num in range(366):
             accrual_date = start_date + timedelta(days=day_num)
             self.interest_engine.run_daily_accrual(accrual_date)
-        
-        # Post interest monthly throughout the year
-        for month in range(1, 13):
-            self.interest_engine.post_monthly_interest(month, 2024)
+            if (accrual_date + timedelta(days=1)).day == 1:
+                self.interest_engine.post_monthly_interest(accrual_date.month, 2024)
         
         # Final balance should be approximately $10,500 (with compounding)
-        final_balance = self.account_manager.get_book_balance(self.savings_account.id)
+        final_balance = self.account_manager.get_book_balance(account.id)
         
-        # With daily compounding, 5% APY should yield approximately $512.67 interest
-        expected_balance = Money(Decimal('10512.67'), Currency.USD)
+        # With monthly compounding, 5% should yield approximately $511.62 interest
+        expected_balance = Money(Decimal('10511.62'), Currency.USD)
         
         # Allow small tolerance for rounding differences (monthly posting rounds each month)
         tolerance = Money(Decimal('2.00'), Currency.USD)
@@ -571,6 +602,285 @@ class TestInterestEngine:
         # Should not post interest if amount is negligible (< 1 cent)
         assert len(results[ProductType.SAVINGS.value]) == 0
 
+    
+    def _fund_accounts(self):
+        deposit = self.transaction_processor.deposit(
+            account_id=self.savings_account.id,
+            amount=Money(Decimal('1000.00'), Currency.USD),
+            description="Initial deposit",
+            channel=TransactionChannel.ONLINE
+        )
+        self.transaction_processor.process_transaction(deposit.id)
+        
+        purchase = JournalEntryLine(
+            account_id="MERCHANT001",
+            description="Purchase",
+            debit_amount=Money(Decimal('500.00'), Currency.USD),
+            credit_amount=Money(Decimal('0.00'), Currency.USD)
+        )
+        charge = JournalEntryLine(
+            account_id=self.credit_account.id,
+            description="Credit line charge",
+            debit_amount=Money(Decimal('0.00'), Currency.USD),
+            credit_amount=Money(Decimal('500.00'), Currency.USD)
+        )
+        entry = self.ledger.create_journal_entry("PURCH001", "Credit purchase", [purchase, charge])
+        self.ledger.post_journal_entry(entry.id)
+    
+    def test_bulk_book_balances_match_per_account(self):
+        """Test one-pass balances equal per-account balance calculation"""
+        self._fund_accounts()
+        accounts = [self.savings_account, self.credit_account]
+        
+        balances = self.account_manager.get_book_balances(accounts)
+        
+        for account in accounts:
+            assert balances[account.id] == self.account_manager.get_book_balance(account.id)
+    
+    def test_accrual_run_resumes_from_checkpoint(self):
+        """Test a partially checkpointed run only processes unfinished shards"""
+        self._fund_accounts()
+        accrual_date = date.today()
+        savings_hash = zlib.crc32(self.savings_account.id.encode())
+        credit_hash = zlib.crc32(self.credit_account.id.encode())
+        shards = next(n for n in range(8, 64) if savings_hash % n != credit_hash % n)
+        savings_shard = savings_hash % shards
+        
+        # Simulate a run that stopped after checkpointing the savings shard
+        self.storage.save("interest_accrual_runs", accrual_date.isoformat(), {
+            "id": accrual_date.isoformat(),
+            "accrual_date": accrual_date.isoformat(),
+            "shards": shards,
+            "completed_shards": [savings_shard],
+            "results": {product_type.value: 0 for product_type in ProductType},
+            "status": "running",
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "completed_at": None
+        })
+        
+        results = self.interest_engine.run_daily_accrual(accrual_date, shards=shards)
+        
+        assert results[ProductType.SAVINGS.value] == 0
+        assert results[ProductType.CREDIT_LINE.value] == 1
+        run = self.interest_engine.get_accrual_run(accrual_date)
+        assert run["status"] == "completed"
+        assert sorted(run["completed_shards"]) == list(range(shards))
+        
+        # A fresh run for the same date accrues the account skipped before, once
+        results = self.interest_engine.run_daily_accrual(accrual_date, shards=shards)
+        assert results[ProductType.SAVINGS.value] == 1
+        assert results[ProductType.CREDIT_LINE.value] == 0
+    
+    def test_pooled_accrual_matches_per_account_calculation(self):
+        """Test shards computed in worker processes give the per-account results"""
+        self._fund_accounts()
+        accrual_date = date.today()
+        expected = {}
+        for account in (self.savings_account, self.credit_account):
+            config = self.interest_engine._get_rate_config_for_account(account)
+            expected[account.id] = self.interest_engine._calculate_daily_accrual(account, config, accrual_date)
+        
+        results = self.interest_engine.run_daily_accrual(accrual_date, shards=2, max_workers=2)
+        
+        assert results[ProductType.SAVINGS.value] == 1
+        assert results[ProductType.CREDIT_LINE.value] == 1
+        for account_id, accrual in expected.items():
+            stored = self.interest_engine._get_unposted_accruals(account_id)
+            assert len(stored) == 1
+            assert stored[0].id == accrual.id
+            assert stored[0].principal_balance == accrual.principal_balance
+            assert stored[0].accrued_amount == accrual.accrued_amount
+            assert stored[0].cumulative_accrued == accrual.cumulative_accrued
+        assert self.audit_trail.verify_integrity()["valid"]
+
+    
+    def test_accrual_state_tracks_accrue_and_post(self):
+        """Test the running accrual state follows accruals and postings"""
+        self._fund_accounts()
+        today = date.today()
+        first_day = today.replace(day=1)
+        
+        for offset in range(3):
+            self.interest_engine.run_daily_accrual(first_day + timedelta(days=offset))
+        
+        state = self.interest_engine.get_accrual_state(self.savings_account.id)
+        accruals = self.interest_engine._get_unposted_accruals(self.savings_account.id)
+        assert len(accruals) == 3
+        assert state.unposted_total == sum(a.accrued_amount.amount for a in accruals)
+        assert state.last_accrual_date == first_day + timedelta(days=2)
+        latest = max(accruals, key=lambda a: a.accrual_date)
+        assert latest.cumulative_accrued.amount == state.unposted_total
+        assert self.interest_engine._is_accrual_processed(self.savings_account.id, first_day)
+        assert not self.interest_engine._is_accrual_processed(self.savings_account.id, first_day - timedelta(days=1))
+        
+        self.interest_engine.post_monthly_interest(today.month, today.year)
+        
+        state = self.interest_engine.get_accrual_state(self.credit_account.id)
+        assert state.unposted_total == Decimal('0')
+        assert state.last_posted_period == f"{today.year:04d}-{today.month:02d}"
+
+    
+    def test_accrual_states_recorded_in_one_pass(self):
+        """Test missing states are derived together and saved for accounts that do not accrue"""
+        self._fund_accounts()
+        checking = self.account_manager.create_account(
+            customer_id=self.customer.id,
+            product_type=ProductType.CHECKING,
+            currency=Currency.USD,
+            name="Non-accruing Checking"
+        )
+        today = date.today()
+        self.interest_engine.run_daily_accrual(today - timedelta(days=1))
+        assert self.interest_engine.get_accrual_state(checking.id).last_accrual_date is None
+        
+        # Savings was accrued before the state table existed
+        self.storage.delete(self.interest_engine.accrual_state_table, self.savings_account.id)
+        
+        results = self.interest_engine.run_daily_accrual(today)
+        
+        assert results[ProductType.SAVINGS.value] == 1
+        state = self.interest_engine.get_accrual_state(self.savings_account.id)
+        accruals = self.interest_engine._get_unposted_accruals(self.savings_account.id)
+        assert len(accruals) == 2
+        assert state.unposted_total == sum(a.accrued_amount.amount for a in accruals)
+        assert state.last_accrual_date == today
+        
+        # A repeat run for either date accrues nothing
+        for accrual_date in (today, today - timedelta(days=1)):
+            results = self.interest_engine.run_daily_accrual(accrual_date)
+            assert sum(results.values()) == 0
+    
+    def test_rate_change_projection(self):
+        """Test the what-if projection across the book"""
+        pytest.importorskip("numpy")
+        self._fund_accounts()
+        
+        projection = self.interest_engine.project_rate_change(
+            {ProductType.CREDIT_LINE: Decimal('0.24')}, horizon_days=30
+        )
+        
+        credit = projection[ProductType.CREDIT_LINE.value]["USD"]
+        assert credit["accounts"] == 1
+        # 500.00 at 18%/365 accrues 0.25 a day, compounded daily
+        assert credit["current"] > Money(Decimal('7.39'), Currency.USD)
+        assert credit["projected"] > credit["current"]
+        assert credit["change"] == credit["projected"] - credit["current"]
+        
+        savings = projection[ProductType.SAVINGS.value]["USD"]
+        assert savings["change"] == Money(Decimal('0'), Currency.USD)
+        
+        with pytest.raises(ValueError, match="between 0 and 1"):
+            self.interest_engine.project_rate_change({ProductType.SAVINGS: Decimal('2')})
+        with pytest.raises(ValueError, match="between 1 and 366 days"):
+            self.interest_engine.project_rate_change({ProductType.SAVINGS: Decimal('0.03')}, horizon_days=10000)
+
+    
+    def test_rate_index_cached_and_invalidated_on_save(self):
+        """Test product rate terms are loaded once and refreshed when a config is saved"""
+        checking = self.account_manager.create_account(
+            customer_id=self.customer.id,
+            product_type=ProductType.CHECKING,
+            currency=Currency.USD,
+            name="Checking"
+        )
+        
+        first = self.interest_engine._get_rate_config_for_account(checking)
+        assert first is self.interest_engine._get_rate_config_for_account(checking)
+        assert first.annual_rate == Decimal('0.005')
+        
+        now = datetime.now(timezone.utc)
+        self.interest_engine.save_rate_config(InterestRateConfig(
+            id=first.id,
+            created_at=now,
+            updated_at=now,
+            product_type=ProductType.CHECKING,
+            currency=Currency.USD,
+            annual_rate=Decimal('0.01'),
+            minimum_balance=Money(Decimal('100'), Currency.USD)
+        ))
+        
+        assert self.interest_engine._get_rate_config_for_account(checking).annual_rate == Decimal('0.01')
+        
+        # Account overrides resolve to their own terms
+        override = self.interest_engine._get_rate_config_for_account(self.savings_account)
+        assert override.id == f"account-{self.savings_account.id}"
+        assert override.minimum_balance == Money(Decimal('100.00'), Currency.USD)
+    
+    def test_batched_posting_marks_accruals_and_clears_index(self):
+        """Test month-end posting streams the accrual index in batches"""
+        self._fund_accounts()
+        today = date.today()
+        first_day = today.replace(day=1)
+        for offset in range(2):
+            self.interest_engine.run_daily_accrual(first_day + timedelta(days=offset))
+        assert len(self.storage.load_all("interest_accrual_index")) == 4
+        
+        progress = []
+        results = self.interest_engine.post_monthly_interest(
+            today.month, today.year, batch_size=1, progress_callback=progress.append
+        )
+        
+        assert len(results[ProductType.SAVINGS.value]) == 1
+        assert len(results[ProductType.CREDIT_LINE.value]) == 1
+        assert self.storage.load_all("interest_accrual_index") == []
+        assert self.interest_engine._get_unposted_accruals(self.savings_account.id) == []
+        assert [p["accounts_posted"] for p in progress] == [1, 2, 2]
+        assert progress[-1]["status"] == "completed"
+        
+        txn = self.transaction_processor.get_transaction(results[ProductType.CREDIT_LINE.value][0])
+        assert txn.transaction_type == TransactionType.INTEREST_DEBIT
+        assert txn.from_account_id == self.credit_account.id
+        assert txn.state == TransactionState.COMPLETED
+        assert self.audit_trail.verify_integrity()["valid"]
+    
+    def test_posting_resumes_after_checkpointed_batch(self):
+        """Test a restarted posting run skips accounts before its cursor"""
+        self._fund_accounts()
+        today = date.today()
+        self.interest_engine.run_daily_accrual(today.replace(day=1))
+        first_account = min(self.savings_account.id, self.credit_account.id)
+        
+        # Simulate a run that stopped after checkpointing the first account
+        period = f"{today.year:04d}-{today.month:02d}"
+        self.storage.save("interest_posting_runs", period, {
+            "id": period,
+            "period": period,
+            "cursor": first_account,
+            "accounts_posted": 1,
+            "transactions_failed": 0,
+            "status": "running",
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "completed_at": None
+        })
+        
+        results = self.interest_engine.post_monthly_interest(today.month, today.year)
+        
+        posted = results[ProductType.SAVINGS.value] + results[ProductType.CREDIT_LINE.value]
+        assert len(posted) == 1
+        txn = self.transaction_processor.get_transaction(posted[0])
+        assert first_account not in (txn.from_account_id, txn.to_account_id)
+        run = self.interest_engine.get_posting_run(today.year, today.month)
+        assert run["status"] == "completed"
+        assert run["accounts_posted"] == 2
+        
+        # The skipped account is still indexed and posts on the next run, once
+        results = self.interest_engine.post_monthly_interest(today.month, today.year)
+        posted = results[ProductType.SAVINGS.value] + results[ProductType.CREDIT_LINE.value]
+        assert len(posted) == 1
+        assert self.interest_engine.post_monthly_interest(today.month, today.year) == {
+            product_type.value: [] for product_type in ProductType
+        }
+    
+    def test_rebuild_accrual_index(self):
+        """Test the accrual index can be rebuilt from unposted accruals"""
+        self._fund_accounts()
+        self.interest_engine.run_daily_accrual(date.today().replace(day=1))
+        self.storage.clear_table("interest_accrual_index")
+        
+        assert self.interest_engine.rebuild_accrual_index() == 2
+        keys = [row["account_id"] for row in self.storage.scan_range("interest_accrual_index")]
+        assert keys == sorted([self.savings_account.id, self.credit_account.id])
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
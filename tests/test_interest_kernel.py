@@ -0,0 +1,90 @@
+"""
+Test suite for the exact minor-unit interest kernel
+"""
+
+import random
+import pytest
+from decimal import Decimal, ROUND_HALF_EVEN, ROUND_HALF_UP
+
+from core_banking.interest_kernel import interest_minor, rate_fraction, to_minor, from_minor
+
+np = pytest.importorskip("numpy")
+
+from core_banking.interest_kernel import accrue_minor, project_minor  # noqa: E402
+
+
+class TestInterestKernel:
+    """Test scalar and array interest arithmetic"""
+    
+    def test_rate_fraction_and_minor_units(self):
+        """Test exact conversions between decimals and integers"""
+        assert rate_fraction(Decimal('0.1899')) == (1899, 4)
+        assert rate_fraction("0.05") == (5, 2)
+        assert to_minor(Decimal('1234.56'), 2) == 123456
+        assert from_minor(123456, 2) == Decimal('1234.56')
+        assert from_minor(500, 0) == Decimal('500')
+    
+    def test_tie_rounding(self):
+        """Test exact ties round half-up (away from zero) or half-even"""
+        # 182.50 * 1% / 365 = exactly half a cent
+        assert interest_minor(18250, "0.01", 365) == 1
+        assert interest_minor(18250, "0.01", 365, rounding=ROUND_HALF_EVEN) == 0
+        assert interest_minor(-18250, "0.01", 365) == -1
+        # 547.50 * 1% / 365 = 1.5 cents
+        assert interest_minor(54750, "0.01", 365, rounding=ROUND_HALF_EVEN) == 2
+        
+        with pytest.raises(ValueError, match="Unsupported rounding mode"):
+            interest_minor(100, "0.01", 365, rounding="ROUND_DOWN")
+    
+    def test_matches_decimal_money_calculation(self):
+        """Test results agree with Decimal arithmetic away from ties"""
+        amount = Decimal('1000.00')
+        expected = (amount * Decimal('0.02') / Decimal('365')).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        
+        assert from_minor(interest_minor(100000, Decimal('0.02'), 365), 2) == expected
+    
+    @pytest.mark.parametrize("largest", [10 ** 7, 10 ** 17])
+    def test_array_matches_scalar(self, largest):
+        """Test array results equal the scalar kernel, including the object-dtype path"""
+        rng = random.Random(7)
+        balances = [rng.randint(-largest, largest) for _ in range(500)] + [18250, 54750]
+        rates = [rng.choice(["0.02", "0.1899", "0.05127", "0.075", "0.01"]) for _ in balances]
+        denominators = [rng.choice([365, 360]) for _ in balances]
+        days = [rng.randint(1, 31) for _ in balances]
+        
+        for rounding in (ROUND_HALF_UP, ROUND_HALF_EVEN):
+            result = accrue_minor(balances, rates, denominators, days, rounding=rounding)
+            expected = [
+                interest_minor(b, r, d, n, rounding=rounding)
+                for b, r, d, n in zip(balances, rates, denominators, days)
+            ]
+            assert [int(value) for value in result] == expected
+    
+    def test_projection_compounding(self):
+        """Test accrued interest is capitalized every compounding period"""
+        balances = [1000000, 1000000]
+        rates = ["0.12", "0.12"]
+        
+        monthly, daily = project_minor(balances, rates, [360, 360], [30, 1], horizon_days=60)
+        
+        # 10,000.00 at 12%/360 accrues 3.33 a day; monthly compounding adds
+        # the first month's interest to the balance for the second month
+        first_month = 30 * interest_minor(1000000, "0.12", 360)
+        second_month = 30 * interest_minor(1000000 + first_month, "0.12", 360)
+        assert int(monthly) == first_month + second_month
+        assert int(daily) > int(monthly)
+    
+    def test_projection_above_100_percent_stays_exact(self):
+        """Test rates above 100% widen the overflow bound instead of wrapping int64"""
+        balance, total = 10 ** 12, 0
+        for _ in range(720):
+            daily = interest_minor(balance, "20", 360)
+            balance += daily
+            total += daily
+        
+        result = project_minor([10 ** 12], ["20"], [360], [1], horizon_days=720)
+        assert int(result[0]) == total
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
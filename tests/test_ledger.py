@@ -10,11 +10,11 @@ from decimal import Decimal
 from datetime import datetime, timezone
 
 from core_banking.currency import Money, Currency
-from core_banking.storage import InMemoryStorage
+from core_banking.storage import InMemoryStorage, SQLiteStorage
 from core_banking.audit import AuditTrail
 from core_banking.ledger import (
     GeneralLedger, JournalEntry, JournalEntryLine, 
-    JournalEntryState, AccountType
+    JournalEntryState, AccountType, JOURNAL_POSTED, JOURNAL_REVERSED
 )
 
 
@@ -748,6 +748,40 @@ class TestGeneralLedger:
         balance = self.ledger.calculate_account_balance("TEST_ACCOUNT", AccountType.ASSET, Currency.USD)
         assert balance == Money(Decimal('100'), Currency.USD)  # Only the posted entry
 
+    
+    def test_postings_recorded_in_change_log(self):
+        """Test posted and reversed entries are logged in order, and only if committed"""
+        storage = SQLiteStorage(":memory:")
+        ledger = GeneralLedger(storage, AuditTrail(storage))
+        
+        def lines(amount):
+            return [
+                JournalEntryLine("CASH001", "Deposit", Money(Decimal(amount), Currency.USD), Money(Decimal('0'), Currency.USD)),
+                JournalEntryLine("CUSTOMER001", "Deposit", Money(Decimal('0'), Currency.USD), Money(Decimal(amount), Currency.USD))
+            ]
+        
+        first = ledger.post_journal_entry(ledger.create_journal_entry("DEP001", "Deposit", lines('10')).id)
+        batch = ledger.post_journal_entries([("DEP002", "Deposit", lines('20')), ("DEP003", "Deposit", lines('30'))])
+        reversal = ledger.reverse_journal_entry(first.id, "Error")
+        
+        pending = ledger.create_journal_entry("DEP004", "Deposit", lines('40'))
+        with pytest.raises(RuntimeError):
+            with storage.atomic():
+                ledger.post_journal_entry(pending.id)
+                raise RuntimeError("Posting failed")
+        
+        changes = ledger.changes.changes_after(0)
+        assert [(c["sequence"], c["kind"], c["entity_id"]) for c in changes] == [
+            (1, JOURNAL_POSTED, first.id),
+            (2, JOURNAL_POSTED, batch[0].id),
+            (3, JOURNAL_POSTED, batch[1].id),
+            (4, JOURNAL_POSTED, reversal.id),
+            (5, JOURNAL_REVERSED, first.id)
+        ]
+        assert ledger.changes.last_sequence() == 5
+        assert [c["sequence"] for c in ledger.changes.changes_after(3, limit=1)] == [4]
+        storage.close()
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Test suite for the loan portfolio cash-flow projector
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date
+
+from core_banking.storage import InMemoryStorage
+from core_banking.currency import Currency, Money
+from core_banking.amortization import amortize
+
+np = pytest.importorskip("numpy")
+
+from core_banking.loan_projection import LoanPortfolioProjector, ProjectionScenario  # noqa: E402
+
+
+AS_OF = date(2024, 1, 15)
+
+
+class TestLoanPortfolioProjector:
+    """Test bulk projection, scenarios and monthly aggregation"""
+    
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.storage = InMemoryStorage()
+        self.projector = LoanPortfolioProjector(self.storage)
+        self._loan_count = 0
+    
+    def _loan(self, balance, rate="0.06", term_months=12, frequency="monthly",
+              method="equal_installment", first_payment=date(2024, 2, 1), currency="USD", state="active"):
+        self._loan_count += 1
+        loan_id = f"L{self._loan_count:04d}"
+        self.storage.save("loans", loan_id, {
+            "id": loan_id,
+            "state": state,
+            "current_balance_amount": balance,
+            "current_balance_currency": currency,
+            "terms": {
+                "principal_amount": balance,
+                "principal_currency": currency,
+                "annual_interest_rate": rate,
+                "term_months": term_months,
+                "payment_frequency": frequency,
+                "amortization_method": method,
+                "first_payment_date": first_payment.isoformat()
+            }
+        })
+    
+    def test_base_scenario_follows_amortization_schedule(self):
+        """Test scheduled flows match the booked schedule month by month"""
+        self._loan("10000.00")
+        schedule = amortize(1000000, Decimal('0.06'), 12, 12, "equal_installment", installment=86066)
+        
+        projection = self.projector.project(horizon_months=14, as_of=AS_OF)
+        
+        rows = projection.monthly(Currency.USD)
+        assert projection.loans_projected == 1
+        assert [row["month"] for row in rows[:2]] == ["2024-01", "2024-02"]
+        assert rows[0]["cash_flow"].is_zero()
+        # The booked final payment also settles rounding; earlier months agree to the cent
+        for row, principal, interest in zip(rows[1:12], schedule["principal"], schedule["interest"]):
+            assert abs(row["principal"].amount * 100 - int(principal)) <= 1
+            assert abs(row["interest"].amount * 100 - int(interest)) <= 1
+        assert rows[13]["cash_flow"].is_zero()
+        assert abs(projection.totals(Currency.USD)["principal"].amount - Decimal('10000.00')) <= Decimal('0.02')
+    
+    def test_prepayment_and_default_scenario(self):
+        """Test stressed flows still account for the whole balance"""
+        self._loan("10000.00", method="equal_principal")
+        self._loan("5000.00", method="bullet", term_months=6)
+        scenario = ProjectionScenario(
+            name="stress",
+            annual_prepayment_rate=Decimal('0.10'),
+            annual_default_rate=Decimal('0.05'),
+            loss_severity=Decimal('0.40')
+        )
+        
+        base = self.projector.project(horizon_months=13, as_of=AS_OF).totals(Currency.USD)
+        stressed = self.projector.project(scenario, horizon_months=13, as_of=AS_OF).totals(Currency.USD)
+        
+        retired = stressed["principal"] + stressed["prepayment"] + stressed["defaults"]
+        assert abs(retired.amount - Decimal('15000.00')) <= Decimal('0.05')
+        assert stressed["prepayment"].is_positive()
+        assert abs(stressed["recoveries"].amount - stressed["defaults"].amount * Decimal('0.6')) <= Decimal('0.05')
+        assert stressed["interest"] < base["interest"]
+        assert base["defaults"].is_zero()
+    
+    def test_payment_dates_currencies_and_states(self):
+        """Test paid periods, weekly bucketing, currency split and skipped loans"""
+        # Two of twelve payments fall on or before the projection date
+        self._loan("8000.00", first_payment=date(2023, 12, 15))
+        self._loan("5200.00", rate="0", term_months=12, frequency="weekly", first_payment=date(2024, 1, 19),
+                   method="equal_principal", currency="EUR")
+        self._loan("1000.00", state="paid_off")
+        self._loan("1000.00", state="originated")
+        
+        projection = self.projector.project(horizon_months=3, as_of=AS_OF)
+        
+        assert projection.loans_projected == 2
+        assert projection.opening_balance["USD"] == Money(Decimal('8000.00'), Currency.USD)
+        usd = projection.monthly(Currency.USD)
+        assert usd[0]["principal"].is_zero()
+        assert usd[1]["principal"].is_positive()
+        
+        # 100.00 a week: two Fridays left in January, five in March 2024
+        eur = projection.cash_flows["EUR"]["principal"]
+        assert eur == [Money(Decimal(v), Currency.EUR) for v in ("200.00", "400.00", "500.00")]
+        assert projection.monthly(Currency.GBP) == []
+    
+    def test_invalid_inputs(self):
+        """Test scenario and horizon validation"""
+        with pytest.raises(ValueError, match="between 0 and 1"):
+            ProjectionScenario(annual_default_rate=Decimal('1.5'))
+        with pytest.raises(ValueError, match="horizon_months"):
+            self.projector.project(horizon_months=0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -582,6 +582,61 @@ class TestLoanManager:
         for i, payment in enumerate(retrieved_schedule):
             assert payment.payment_number == i + 1
     
+    def test_amortization_schedule_stored_as_one_record_and_cached(self):
+        """Test a long weekly schedule is one storage record served from the cache"""
+        terms = LoanTerms(
+            principal_amount=Money(Decimal('250000.00'), Currency.USD),
+            annual_interest_rate=Decimal('0.065'),
+            term_months=360,
+            payment_frequency=PaymentFrequency.WEEKLY,
+            amortization_method=AmortizationMethod.EQUAL_INSTALLMENT,
+            first_payment_date=date(2024, 1, 5)
+        )
+        loan = self.loan_manager.originate_loan(
+            customer_id=self.customer.id,
+            terms=terms,
+            currency=Currency.USD
+        )
+        
+        generated = self.loan_manager.generate_amortization_schedule(loan.id)
+        
+        assert len(generated) == 1560
+        assert self.storage.count("loan_schedules") == 1
+        assert self.storage.count("amortization_schedules") == 0
+        assert generated[-1].payment_date == date(2024, 1, 5) + timedelta(weeks=1559)
+        assert generated[-1].remaining_balance.is_zero()
+        assert sum(e.principal_amount.amount for e in generated) == Decimal('250000.00')
+        
+        assert self.loan_manager.get_amortization_schedule(loan.id) == generated
+        
+        # A manager without the cached copy decodes the same schedule
+        other = LoanManager(
+            self.storage, self.account_manager, self.transaction_processor, self.audit_trail
+        )
+        assert other.get_amortization_schedule(loan.id) == generated
+        assert other._schedule_cache.misses == 1
+        assert other.get_amortization_schedule(loan.id) == generated
+        assert other._schedule_cache.hits == 1
+    
+    def test_legacy_amortization_rows_still_readable(self):
+        """Test schedules saved one row per period are still returned"""
+        for number in (2, 1):
+            self.storage.save("amortization_schedules", f"L1_{number}", {
+                'loan_id': "L1",
+                'payment_number': number,
+                'payment_date': date(2024, number, 1).isoformat(),
+                'payment_amount': "100.00", 'payment_currency': "USD",
+                'principal_amount': "90.00", 'principal_currency': "USD",
+                'interest_amount': "10.00", 'interest_currency': "USD",
+                'remaining_balance': str(Decimal('200.00') - 90 * number), 'remaining_currency': "USD"
+            })
+        
+        schedule = self.loan_manager.get_amortization_schedule("L1")
+        
+        assert [e.payment_number for e in schedule] == [1, 2]
+        assert schedule[1].remaining_balance == Money(Decimal('20.00'), Currency.USD)
+        assert self.loan_manager.get_amortization_schedule("missing") == []
+    
     def test_get_loan_payments(self):
         """Test retrieving loan payment history"""
         # Setup loan
@@ -762,6 +817,47 @@ class TestLoanManager:
         # Should have processed at least some loans
         assert results["loans_processed"] >= 0
         assert results["late_fees_charged"] >= 0
+    
+    def test_past_due_run_reads_only_queued_loans(self):
+        """Test late fees are charged once a month for loans queued past their grace period"""
+        loans = {}
+        for name, days_ago in (("late", 20), ("early", 5)):
+            terms = LoanTerms(
+                principal_amount=Money(Decimal('5000.00'), Currency.USD),
+                annual_interest_rate=Decimal('0.08'),
+                term_months=36,
+                payment_frequency=PaymentFrequency.MONTHLY,
+                amortization_method=AmortizationMethod.EQUAL_INSTALLMENT,
+                first_payment_date=date.today() - timedelta(days=days_ago)
+            )
+            loan = self.loan_manager.originate_loan(
+                customer_id=self.customer.id,
+                terms=terms,
+                currency=Currency.USD
+            )
+            loan.state = LoanState.ACTIVE
+            self.loan_manager._save_loan(loan)
+            loans[name] = loan
+        
+        queue = self.loan_manager.late_fee_queue
+        # 5 days into the cycle with a 10 day grace period: first checked 6 days from now
+        assert queue.get_review_date("loan", loans["early"].id) == date.today() + timedelta(days=6)
+        
+        results = self.loan_manager.process_past_due_loans()
+        
+        assert results == {"late_fees_charged": 1, "loans_processed": 1}
+        late = self.loan_manager.get_loan(loans["late"].id)
+        assert late.days_past_due == 20
+        assert late.last_late_fee_date == date.today()
+        assert queue.get_review_date("loan", late.id) == date.today() + timedelta(days=1)
+        
+        # Re-running the same day finds nothing due
+        assert self.loan_manager.process_past_due_loans() == {"late_fees_charged": 0, "loans_processed": 0}
+        
+        # Paid-off loans leave the queue
+        late.state = LoanState.PAID_OFF
+        self.loan_manager._save_loan(late)
+        assert queue.get_review_date("loan", late.id) is None
 
 
 if __name__ == "__main__":
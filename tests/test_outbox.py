@@ -0,0 +1,172 @@
+"""
+Test suite for the transactional outbox and its worker
+"""
+
+import time
+import pytest
+
+from core_banking.storage import InMemoryStorage, SQLiteStorage
+from core_banking.outbox import TransactionalOutbox, OutboxWorker
+
+
+class TestTransactionalOutbox:
+    """Test outbox enqueue/fetch/ack"""
+    
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.storage = InMemoryStorage()
+        self.outbox = TransactionalOutbox(self.storage)
+    
+    def test_fetch_batch_in_enqueue_order(self):
+        """Test entries come back oldest first, bounded by batch size"""
+        for i in range(5):
+            self.outbox.enqueue("test.kind", {"n": i})
+        
+        batch = self.outbox.fetch_batch(3)
+        assert [e.payload["n"] for e in batch] == [0, 1, 2]
+        
+        self.outbox.acknowledge(batch)
+        assert [e.payload["n"] for e in self.outbox.fetch_batch(10)] == [3, 4]
+        assert self.outbox.pending_count() == 2
+    
+    def test_enqueue_rolls_back_with_transaction(self):
+        """Test an outbox write is discarded when the surrounding transaction fails"""
+        storage = SQLiteStorage(":memory:")
+        outbox = TransactionalOutbox(storage)
+        outbox.enqueue("test.kind", {"n": 0})
+        
+        with pytest.raises(RuntimeError):
+            with storage.atomic():
+                outbox.enqueue("test.kind", {"n": 1})
+                raise RuntimeError("posting failed")
+        
+        assert [e.payload["n"] for e in outbox.fetch_batch(10)] == [0]
+        storage.close()
+
+
+class TestOutboxWorker:
+    """Test batch draining and failure handling"""
+    
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.storage = InMemoryStorage()
+        self.outbox = TransactionalOutbox(self.storage)
+        self.seen = []
+    
+    def test_drain_dispatches_by_kind_in_batches(self):
+        """Test every entry reaches its handler and is acknowledged"""
+        for i in range(7):
+            self.outbox.enqueue("a" if i % 2 else "b", {"n": i})
+        
+        worker = OutboxWorker(self.outbox, {
+            "a": lambda p: self.seen.append(("a", p["n"])),
+            "b": lambda p: self.seen.append(("b", p["n"]))
+        }, batch_size=3)
+        
+        assert worker.process_batch() == 3
+        assert worker.drain() == 4
+        assert [n for _, n in self.seen] == list(range(7))
+        assert worker.get_stats()["processed"] == 7
+        assert self.outbox.pending_count() == 0
+    
+    def test_failing_entry_parked_after_max_attempts(self):
+        """Test a poison entry does not block the rest of the outbox"""
+        def explode(payload):
+            raise RuntimeError("boom")
+        
+        self.outbox.enqueue("bad", {})
+        self.outbox.enqueue("good", {"n": 1})
+        worker = OutboxWorker(self.outbox, {"bad": explode, "good": lambda p: self.seen.append(p["n"])},
+                              max_attempts=2, retry_backoff_seconds=0)
+        
+        worker.drain()
+        
+        assert self.seen == [1]
+        failed = self.outbox.get_failed()
+        assert len(failed) == 1
+        assert failed[0].attempts == 2
+        assert failed[0].last_error == "boom"
+        assert self.outbox.pending_count() == 0
+    
+    def test_failed_entry_waits_for_backoff(self):
+        """Test a failed entry is not due again until its retry delay passes"""
+        attempts = []
+        
+        def flaky(payload):
+            attempts.append(payload)
+            if len(attempts) == 1:
+                raise RuntimeError("try later")
+        
+        self.outbox.enqueue("flaky", {})
+        worker = OutboxWorker(self.outbox, {"flaky": flaky}, retry_backoff_seconds=0.05)
+        
+        assert worker.drain() == 1
+        assert len(attempts) == 1
+        assert worker.process_batch() == 0
+        assert self.outbox.pending_count() == 1
+        
+        time.sleep(0.06)
+        assert worker.drain() == 1
+        assert len(attempts) == 2
+        assert self.outbox.pending_count() == 0
+    
+    def test_refuses_to_run_inside_transaction(self):
+        """Test the worker will not nest its per-entry transactions in an open one"""
+        self.outbox.enqueue("a", {"n": 1})
+        worker = OutboxWorker(self.outbox, {"a": lambda p: self.seen.append(p["n"])})
+        
+        with self.storage.atomic():
+            with pytest.raises(RuntimeError):
+                worker.process_batch()
+        
+        assert self.seen == []
+        assert self.outbox.pending_count() == 1
+    
+    def test_failed_handler_writes_roll_back(self):
+        """Test a failing entry's partial writes are not committed with its failure"""
+        storage = SQLiteStorage(":memory:")
+        outbox = TransactionalOutbox(storage)
+        
+        def partial(payload):
+            storage.save("filings", payload["id"], payload)
+            if payload["id"] == "bad":
+                raise RuntimeError("filing rejected")
+        
+        outbox.enqueue("file", {"id": "good"})
+        outbox.enqueue("file", {"id": "bad"})
+        worker = OutboxWorker(outbox, {"file": partial}, max_attempts=1)
+        
+        worker.drain()
+        
+        assert storage.exists("filings", "good")
+        assert not storage.exists("filings", "bad")
+        assert worker.processed == 1
+        assert [e.payload["id"] for e in outbox.get_failed()] == ["bad"]
+        assert outbox.pending_count() == 0
+        storage.close()
+    
+    def test_unknown_kind_fails(self):
+        """Test entries without a handler are counted as failures"""
+        self.outbox.enqueue("unknown", {})
+        worker = OutboxWorker(self.outbox, {}, max_attempts=1)
+        
+        worker.drain()
+        
+        assert worker.failed == 1
+        assert len(self.outbox.get_failed()) == 1
+    
+    def test_background_thread_drains(self):
+        """Test the worker thread picks up new entries"""
+        worker = OutboxWorker(self.outbox, {"a": lambda p: self.seen.append(p["n"])},
+                              poll_interval_seconds=0.01)
+        worker.start()
+        try:
+            self.outbox.enqueue("a", {"n": 42})
+            deadline = time.time() + 2.0
+            while not self.seen and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            worker.stop()
+        
+        assert self.seen == [42]
+        assert worker.get_stats()["running"] is False
@@ -0,0 +1,224 @@
+"""
+Test suite for the pre-aggregated portfolio positions
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date, timedelta
+
+from core_banking.storage import InMemoryStorage
+from core_banking.audit import AuditTrail
+from core_banking.ledger import GeneralLedger, LedgerChangeWorker
+from core_banking.accounts import AccountManager, ProductType
+from core_banking.customers import CustomerManager, KYCStatus, KYCTier
+from core_banking.compliance import ComplianceEngine
+from core_banking.transactions import TransactionProcessor, TransactionChannel
+from core_banking.currency import Currency, Money
+from core_banking.events import EventDispatcher
+from core_banking.portfolio_aggregates import PortfolioAggregates, rate_band
+from core_banking.transaction_rollup import TransactionRollup
+
+
+class TestPortfolioAggregates:
+    """Test rebuilds, event-driven updates and point-in-time positions"""
+    
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.storage = InMemoryStorage()
+        self.audit_trail = AuditTrail(self.storage)
+        self.dispatcher = EventDispatcher()
+        self.ledger = GeneralLedger(self.storage, self.audit_trail)
+        self.account_manager = AccountManager(
+            self.storage, self.ledger, self.audit_trail, event_dispatcher=self.dispatcher
+        )
+        self.customer_manager = CustomerManager(self.storage, self.audit_trail)
+        self.transaction_processor = TransactionProcessor(
+            self.storage, self.ledger, self.account_manager, self.customer_manager,
+            ComplianceEngine(self.storage, self.customer_manager, self.audit_trail), self.audit_trail,
+            event_dispatcher=self.dispatcher
+        )
+        self.aggregates = PortfolioAggregates(self.storage)
+        
+        self.customer = self.customer_manager.create_customer(
+            first_name="John", last_name="Doe", email="john.doe@example.com"
+        )
+        self.customer_manager.update_kyc_status(self.customer.id, KYCStatus.VERIFIED, KYCTier.TIER_2)
+    
+    def _account(self, product_type=ProductType.SAVINGS, currency=Currency.USD, interest_rate=None, **kwargs):
+        return self.account_manager.create_account(
+            self.customer.id, product_type, currency, f"{product_type.value} account",
+            interest_rate=interest_rate, **kwargs
+        )
+    
+    def _deposit(self, account, amount):
+        transaction = self.transaction_processor.deposit(
+            account.id, Money(Decimal(amount), account.currency), "Deposit", TransactionChannel.BRANCH
+        )
+        return self.transaction_processor.process_transaction(transaction.id)
+    
+    def _positions(self, **kwargs):
+        return {
+            (row["product_type"], row["currency"], row["state"]): (row["account_count"], row["balance"])
+            for row in self.aggregates.get_positions(**kwargs)
+        }
+    
+    def test_rebuild_matches_ledger_balances(self):
+        """Test a rebuild sums book balances by product, currency and state"""
+        savings = [self._account(interest_rate=Decimal('0.02')), self._account(interest_rate=Decimal('0.04'))]
+        eur = self._account(currency=Currency.EUR)
+        self._deposit(savings[0], '100.00')
+        self._deposit(savings[1], '250.50')
+        self._deposit(eur, '75.00')
+        
+        assert self.aggregates.rebuild() == 3
+        
+        positions = self.aggregates.get_positions(currency="USD")
+        assert len(positions) == 1
+        position = positions[0]
+        expected = sum(self.account_manager.get_book_balance(a.id).amount for a in savings)
+        assert position["balance"] == expected == Decimal('350.50')
+        assert position["account_count"] == 2
+        assert position["segment"] == KYCTier.TIER_2.value
+        assert position["rate_weighted_balance"] == Decimal('100.00') * Decimal('0.02') + Decimal('250.50') * Decimal('0.04')
+        assert set(position["rate_bands"]) == {"1-3%", "3-5%"}
+        assert position["rate_bands"]["3-5%"]["balance"] == Decimal('250.50')
+        assert self._positions(currency="EUR") == {("savings", "EUR", "active"): (1, Decimal('75.00'))}
+    
+    def test_events_keep_positions_current(self):
+        """Test posted transactions and account changes update the positions"""
+        self.aggregates.subscribe(self.dispatcher)
+        self.aggregates.rebuild()
+        
+        savings = self._account()
+        checking = self._account(ProductType.CHECKING)
+        self._deposit(savings, '500.00')
+        self._deposit(checking, '40.00')
+        transfer = self.transaction_processor.transfer(
+            savings.id, checking.id, Money(Decimal('120.00'), Currency.USD), "Transfer", TransactionChannel.ONLINE
+        )
+        self.transaction_processor.process_transaction(transfer.id)
+        
+        incremental = self._positions()
+        assert incremental == {
+            ("savings", "USD", "active"): (1, Decimal('380.00')),
+            ("checking", "USD", "active"): (1, Decimal('160.00'))
+        }
+        
+        # A state change moves the account to another position
+        self.account_manager.freeze_account(checking.id, "Review")
+        positions = self._positions()
+        assert positions[("checking", "USD", "active")] == (0, Decimal('0.00'))
+        assert positions[("checking", "USD", "frozen")] == (1, Decimal('160.00'))
+        
+        self.aggregates.rebuild()
+        rebuilt = self._positions()
+        assert rebuilt[("checking", "USD", "frozen")] == positions[("checking", "USD", "frozen")]
+        assert rebuilt[("savings", "USD", "active")] == positions[("savings", "USD", "active")]
+    
+    def test_unsubscribed_aggregates_catch_up_from_ledger(self):
+        """Test aggregates without a dispatcher must be built explicitly and then follow the ledger"""
+        savings = self._account()
+        self._deposit(savings, '100.00')
+        
+        with pytest.raises(ValueError, match="Portfolio aggregates have not been built"):
+            self.aggregates.get_positions()
+        self.aggregates.rebuild()
+        assert self._positions() == {("savings", "USD", "active"): (1, Decimal('100.00'))}
+        
+        # Postings and account changes after the first report, with no dispatcher subscribed
+        self._deposit(savings, '500.00')
+        checking = self._account(ProductType.CHECKING)
+        self._deposit(checking, '40.00')
+        self.account_manager.freeze_account(checking.id, "Review")
+        reversed_deposit = self._deposit(checking, '10.00')
+        self.ledger.reverse_journal_entry(reversed_deposit.journal_entry_id, "Entered in error")
+        
+        # Reads do not catch up; the worker does
+        assert self._positions() == {("savings", "USD", "active"): (1, Decimal('100.00'))}
+        worker = LedgerChangeWorker(self.aggregates.changes, [self.aggregates])
+        assert worker.run_once() > 0
+        
+        assert self.account_manager.get_book_balance(savings.id).amount == Decimal('600.00')
+        positions = self._positions()
+        assert positions[("savings", "USD", "active")] == (1, Decimal('600.00'))
+        assert positions[("checking", "USD", "frozen")] == (1, self.account_manager.get_book_balance(checking.id).amount)
+        assert self.aggregates.catch_up() == 0
+        
+        fresh = PortfolioAggregates(self.storage)
+        fresh.rebuild()
+        assert {(r["product_type"], r["state"]): r["balance"] for r in fresh.get_positions()} == {
+            (product_type, state): balance for (product_type, _, state), (_, balance) in positions.items()
+        }
+    
+    def test_kyc_tier_change_moves_segment(self):
+        """Test a KYC tier change moves the customer's accounts to the new segment"""
+        savings = self._account()
+        self._deposit(savings, '250.00')
+        self.aggregates.rebuild()
+        
+        self.customer_manager.update_kyc_status(self.customer.id, KYCStatus.EXPIRED)
+        self.aggregates.catch_up()
+        
+        segments = {row["segment"]: (row["account_count"], row["balance"]) for row in self.aggregates.get_positions()}
+        assert segments[KYCTier.TIER_0.value] == (1, Decimal('250.00'))
+        assert segments[KYCTier.TIER_2.value] == (0, Decimal('0.00'))
+    
+    def test_worker_prunes_applied_changes(self):
+        """Test changes are pruned once every consumer has applied them, keeping the latest"""
+        rollup = TransactionRollup(self.storage)
+        self.aggregates.rebuild()
+        rollup.backfill()
+        savings = self._account()
+        self._deposit(savings, '10.00')
+        changes = self.aggregates.changes
+        last = changes.last_sequence()
+        
+        # The rollup has not caught up, so nothing it needs is pruned
+        self.aggregates.catch_up()
+        pruned = changes.prune()
+        assert changes.changes_after(0)[0]["sequence"] == pruned + 1
+        assert rollup.catch_up() == 1
+        
+        worker = LedgerChangeWorker(changes, [self.aggregates, rollup])
+        worker.run_once()
+        assert [c["sequence"] for c in changes.changes_after(0)] == [last]
+        assert changes.last_sequence() == last
+        
+        self._deposit(savings, '5.00')
+        worker.run_once()
+        assert self._positions() == {("savings", "USD", "active"): (1, Decimal('15.00'))}
+    
+    def test_positions_as_of_earlier_date(self):
+        """Test positions roll back by the daily flows after the requested date"""
+        savings = self._account()
+        self._deposit(savings, '300.00')
+        self.aggregates.rebuild()
+        
+        today = date.today()
+        assert self._positions(as_of=today) == {("savings", "USD", "active"): (1, Decimal('300.00'))}
+        assert self._positions(as_of=today - timedelta(days=1)) == {("savings", "USD", "active"): (0, Decimal('0'))}
+        assert "rate_bands" not in self.aggregates.get_positions(as_of=today)[0]
+    
+    def test_credit_line_balance_uses_customer_sign(self):
+        """Test credit lines report debt as a negative balance, like get_book_balance()"""
+        self.aggregates.subscribe(self.dispatcher)
+        credit_line = self._account(ProductType.CREDIT_LINE, credit_limit=Money(Decimal('1000.00'), Currency.USD))
+        transaction = self.transaction_processor.withdraw(
+            credit_line.id, Money(Decimal('200.00'), Currency.USD), "Purchase", TransactionChannel.ONLINE
+        )
+        self.transaction_processor.process_transaction(transaction.id)
+        
+        book_balance = self.account_manager.get_book_balance(credit_line.id).amount
+        assert self._positions()[("credit_line", "USD", "active")] == (1, book_balance)
+        assert book_balance == Decimal('-200.00')
+    
+    def test_rate_band(self):
+        """Test deposit rate bands"""
+        assert rate_band(None) == "0-1%"
+        assert rate_band(Decimal('0.01')) == "1-3%"
+        assert rate_band(Decimal('0.035')) == "3-5%"
+        assert rate_band(Decimal('0.05')) == "5%+"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
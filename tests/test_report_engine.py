@@ -0,0 +1,259 @@
+"""
+Test suite for the custom report engine
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import datetime, timezone
+
+from core_banking.storage import InMemoryStorage, SQLiteStorage
+from core_banking.audit import AuditTrail
+from core_banking.ledger import GeneralLedger
+from core_banking.accounts import AccountManager, ProductType
+from core_banking.customers import CustomerManager, KYCTier, KYCStatus
+from core_banking.currency import Currency
+from core_banking.reporting import (
+    ReportingEngine, ReportDefinition, ReportType, ReportPeriod, DimensionType,
+    MetricDefinition, AggregationType
+)
+from core_banking.report_engine import CustomReportEngine, default_period_start
+from core_banking.transactions import TransactionTimeIndex
+
+
+def _definition(report_type=ReportType.TRANSACTION_VOLUME, dimensions=None, metrics=None, filters=None,
+                period=ReportPeriod.MONTHLY):
+    now = datetime.now(timezone.utc)
+    return ReportDefinition(
+        id="custom_test",
+        created_at=now,
+        updated_at=now,
+        name="Custom Test",
+        description="Custom test report",
+        report_type=report_type,
+        dimensions=dimensions or [],
+        metrics=metrics or [],
+        filters=filters or {},
+        period=period
+    )
+
+
+class TestCustomReportEngine:
+    """Test planning, single-pass aggregation and spilling"""
+    
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.storage = InMemoryStorage()
+        self.engine = CustomReportEngine(self.storage)
+        self._count = 0
+    
+    def _transaction(self, amount, transaction_type="deposit", channel="branch", currency="USD",
+                     processed_at=datetime(2024, 3, 5, 10, tzinfo=timezone.utc), storage=None):
+        self._count += 1
+        record = {
+            "id": f"T{self._count:04d}",
+            "transaction_type": transaction_type,
+            "channel": channel,
+            "currency": currency,
+            "amount": amount,
+            "state": "completed",
+            "processed_at": processed_at.isoformat()
+        }
+        (storage or self.storage).save("transactions", record["id"], record)
+    
+    def _run(self, definition, period_start=None, period_end=None, filters=None, engine=None):
+        engine = engine or self.engine
+        plan = engine.compile(definition, period_start, period_end, filters)
+        return plan, engine.execute(plan)
+    
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_metrics_by_dimension_with_pushed_filters(self, backend):
+        """Test every aggregation per group, with filters evaluated by storage"""
+        storage = InMemoryStorage() if backend == "memory" else SQLiteStorage(":memory:")
+        engine = CustomReportEngine(storage)
+        for amount, transaction_type, channel in (("100", "deposit", "atm"), ("300", "deposit", "atm"),
+                                                  ("50", "withdrawal", "atm"), ("999", "deposit", "online")):
+            self._transaction(amount, transaction_type, channel, storage=storage)
+        self._transaction("70", "withdrawal", "atm", currency="EUR", storage=storage)
+        
+        definition = _definition(
+            dimensions=[DimensionType.TRANSACTION_TYPE, DimensionType.CURRENCY],
+            metrics=[
+                MetricDefinition("Count", "count", AggregationType.COUNT),
+                MetricDefinition("Volume", "volume", AggregationType.SUM),
+                MetricDefinition("Average", "amount", AggregationType.AVERAGE),
+                MetricDefinition("Smallest", "amount", AggregationType.MIN),
+                MetricDefinition("Largest", "amount", AggregationType.MAX),
+                MetricDefinition("Share", "amount", AggregationType.PERCENTAGE)
+            ],
+            filters={"channel": "atm"}
+        )
+        
+        plan, output = self._run(definition, engine=engine)
+        
+        assert plan.explain()["pushed_filters"] == {"channel": "atm"}
+        assert output.records_read == 4
+        assert output.rows == [
+            {"transaction_type": "deposit", "currency": "USD", "Count": 2, "Volume": Decimal('400'),
+             "Average": Decimal('200'), "Smallest": Decimal('100'), "Largest": Decimal('300'),
+             "Share": Decimal('400') * 100 / Decimal('520')},
+            {"transaction_type": "withdrawal", "currency": "EUR", "Count": 1, "Volume": Decimal('70'),
+             "Average": Decimal('70'), "Smallest": Decimal('70'), "Largest": Decimal('70'),
+             "Share": Decimal('70') * 100 / Decimal('520')},
+            {"transaction_type": "withdrawal", "currency": "USD", "Count": 1, "Volume": Decimal('50'),
+             "Average": Decimal('50'), "Smallest": Decimal('50'), "Largest": Decimal('50'),
+             "Share": Decimal('50') * 100 / Decimal('520')}
+        ]
+        assert output.totals["Count"] == 4
+        assert output.totals["Volume"] == Decimal('520')
+        assert output.totals["Share"] == Decimal('100')
+        storage.close()
+    
+    def test_period_date_dimension_and_residual_filters(self):
+        """Test period bounds, the date dimension and any-of filters"""
+        for day, currency in ((1, "USD"), (1, "EUR"), (2, "USD"), (3, "GBP"), (9, "USD")):
+            self._transaction("10", currency=currency, processed_at=datetime(2024, 3, day, 12, tzinfo=timezone.utc))
+        definition = _definition(
+            dimensions=[DimensionType.DATE],
+            metrics=[MetricDefinition("Count", "count", AggregationType.COUNT)]
+        )
+        
+        plan, output = self._run(
+            definition,
+            datetime(2024, 3, 1), datetime(2024, 3, 9),
+            filters={"currency": ["USD", "EUR"]}
+        )
+        
+        assert plan.explain()["residual_filters"] == {"currency": ["USD", "EUR"]}
+        assert output.rows == [{"date": "2024-03-01", "Count": 2}, {"date": "2024-03-02", "Count": 1}]
+        
+        _, output = self._run(definition, filters={"date": "2024-03-09"})
+        assert output.rows == [{"date": "2024-03-09", "Count": 1}]
+    
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_period_read_from_time_index(self, backend):
+        """Test a built time index turns the period into a key range read"""
+        storage = InMemoryStorage() if backend == "memory" else SQLiteStorage(":memory:")
+        engine = CustomReportEngine(storage, batch_size=2)
+        for day, channel in ((1, "atm"), (2, "atm"), (2, "online"), (3, "atm"), (3, "atm"), (4, "atm"), (9, "atm")):
+            self._transaction("10", channel=channel, processed_at=datetime(2024, 3, day, 12, tzinfo=timezone.utc),
+                              storage=storage)
+        definition = _definition(
+            dimensions=[DimensionType.DATE],
+            metrics=[MetricDefinition("Count", "count", AggregationType.COUNT)],
+            filters={"channel": "atm"}
+        )
+        period = (datetime(2024, 3, 2), datetime(2024, 3, 4))
+        
+        plan, scanned = self._run(definition, *period, engine=engine)
+        assert plan.explain()["access"] == "table_scan"
+        assert plan.explain()["index_backed_filters"] == []
+        assert scanned.records_read == 6
+        
+        assert TransactionTimeIndex(storage).rebuild() == 7
+        plan, indexed = self._run(definition, *period, engine=engine)
+        
+        explained = plan.explain()
+        assert explained["access"] == "index_range"
+        assert explained["index"] == "transactions_by_processed_at"
+        assert explained["index_backed_filters"] == ["processed_at"]
+        assert explained["pushed_filters"] == {"channel": "atm"}
+        assert explained["period"] == ["2024-03-02T00:00:00+00:00", "2024-03-04T00:00:00+00:00"]
+        assert indexed.records_read == 3
+        assert indexed.rows == scanned.rows == [{"date": "2024-03-02", "Count": 1}, {"date": "2024-03-03", "Count": 2}]
+        
+        # Without a period the table is still scanned
+        plan, _ = self._run(definition, engine=engine)
+        assert plan.explain()["access"] == "table_scan"
+        storage.close()
+    
+    def test_high_cardinality_spills_to_disk(self, tmp_path):
+        """Test spilled partial aggregates merge to the same result as in memory"""
+        for i in range(60):
+            self._transaction(str(i), transaction_type=f"type_{i % 25:02d}")
+        definition = _definition(
+            dimensions=[DimensionType.TRANSACTION_TYPE],
+            metrics=[
+                MetricDefinition("Count", "count", AggregationType.COUNT),
+                MetricDefinition("Volume", "amount", AggregationType.SUM),
+                MetricDefinition("Largest", "amount", AggregationType.MAX)
+            ]
+        )
+        spilling = CustomReportEngine(self.storage, batch_size=7, max_groups=4, spill_partitions=3,
+                                      spill_dir=str(tmp_path))
+        
+        _, in_memory = self._run(definition)
+        _, spilled = self._run(definition, engine=spilling)
+        
+        assert in_memory.spill_partitions == 0
+        assert spilled.spill_partitions == 3
+        assert len(spilled.rows) == 25
+        assert spilled.rows == in_memory.rows
+        assert spilled.totals == in_memory.totals
+        assert list(tmp_path.iterdir()) == []
+    
+    def test_invalid_definitions(self):
+        """Test planning and execution errors"""
+        count = [MetricDefinition("Count", "count", AggregationType.COUNT)]
+        
+        with pytest.raises(ValueError, match="Dimension branch is not available for transactions reports"):
+            self.engine.compile(_definition(dimensions=[DimensionType.BRANCH], metrics=count))
+        with pytest.raises(ValueError, match="Unknown report source: ledger"):
+            self.engine.compile(_definition(metrics=count, filters={"source": "ledger"}))
+        
+        self._transaction("10")
+        plan = self.engine.compile(_definition(metrics=[MetricDefinition("Channel", "channel", AggregationType.SUM)]))
+        with pytest.raises(ValueError, match="Field channel of transactions record T0001 is not numeric"):
+            self.engine.execute(plan)
+    
+    def test_default_period_start(self):
+        """Test the current period of each report period"""
+        now = datetime(2024, 8, 15, 13, 30, tzinfo=timezone.utc)
+        assert default_period_start("daily", now) == datetime(2024, 8, 15, tzinfo=timezone.utc)
+        assert default_period_start("weekly", now) == datetime(2024, 8, 12, tzinfo=timezone.utc)
+        assert default_period_start("monthly", now) == datetime(2024, 8, 1, tzinfo=timezone.utc)
+        assert default_period_start("quarterly", now) == datetime(2024, 7, 1, tzinfo=timezone.utc)
+        assert default_period_start("yearly", now) == datetime(2024, 1, 1, tzinfo=timezone.utc)
+    
+    def test_run_saved_definition_over_accounts(self):
+        """Test a saved custom report runs against account facts"""
+        audit_trail = AuditTrail(self.storage)
+        account_manager = AccountManager(self.storage, GeneralLedger(self.storage, audit_trail), audit_trail)
+        customer_manager = CustomerManager(self.storage, audit_trail)
+        customer = customer_manager.create_customer(first_name="Jane", last_name="Doe", email="jane@example.com")
+        customer_manager.update_kyc_status(customer.id, KYCStatus.VERIFIED, KYCTier.TIER_2)
+        for product_type, currency, rate in ((ProductType.SAVINGS, Currency.USD, '0.02'),
+                                             (ProductType.SAVINGS, Currency.USD, '0.04'),
+                                             (ProductType.CHECKING, Currency.USD, None),
+                                             (ProductType.SAVINGS, Currency.EUR, '0.01')):
+            account_manager.create_account(
+                customer.id, product_type, currency, "Account",
+                interest_rate=Decimal(rate) if rate else None
+            )
+        reporting_engine = ReportingEngine(self.storage, audit_trail=audit_trail)
+        reporting_engine.aggregates.rebuild()
+        definition = reporting_engine.create_report_definition(_definition(
+            report_type=ReportType.CUSTOM,
+            dimensions=[DimensionType.PRODUCT, DimensionType.CUSTOMER_TIER],
+            metrics=[
+                MetricDefinition("Accounts", "count", AggregationType.COUNT),
+                MetricDefinition("Average Rate", "interest_rate", AggregationType.AVERAGE),
+                MetricDefinition("Balance", "balance", AggregationType.SUM)
+            ],
+            filters={"currency": "USD"}
+        ))
+        
+        result = reporting_engine.run_report(definition.id)
+        
+        assert result.metadata["plan"]["source"] == "accounts"
+        assert result.metadata["plan"]["pushed_filters"] == {"currency": "USD"}
+        assert result.data == [
+            {"product": "checking", "customer_tier": "tier_2", "Accounts": 1, "Average Rate": None,
+             "Balance": Decimal('0')},
+            {"product": "savings", "customer_tier": "tier_2", "Accounts": 2, "Average Rate": Decimal('0.03'),
+             "Balance": Decimal('0')}
+        ]
+        assert result.totals["Accounts"] == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -15,10 +15,14 @@ from core_banking.reporting import (
 from core_banking.currency import Money, Currency
 from core_banking.storage import InMemoryStorage
 from core_banking.audit import AuditTrail
-from core_banking.accounts import Account, ProductType, AccountState
-from core_banking.ledger import AccountType
+from core_banking.accounts import Account, AccountManager, ProductType, AccountState
+from core_banking.ledger import AccountType, GeneralLedger
+from core_banking.customers import CustomerManager, KYCStatus, KYCTier
+from core_banking.compliance import ComplianceEngine
+from core_banking.transactions import TransactionProcessor, TransactionChannel
 from core_banking.loans import Loan, LoanState
 from core_banking.collections import CollectionCase, DelinquencyStatus
+from core_banking.events import EventDispatcher
 
 
 # Global fixtures
@@ -136,7 +140,8 @@ def reporting_engine(storage, audit_trail, mock_account_manager,
         account_manager=mock_account_manager,
         loan_manager=mock_loan_manager,
         collections_manager=mock_collections_manager,
-        audit_trail=audit_trail
+        audit_trail=audit_trail,
+        event_dispatcher=EventDispatcher()
     )
 
 
@@ -335,7 +340,7 @@ class TestPortfolioSummaryReport:
     
     def test_portfolio_summary_empty_data(self, storage, audit_trail):
         # Test with no managers
-        engine = ReportingEngine(storage=storage, audit_trail=audit_trail)
+        engine = ReportingEngine(storage=storage, audit_trail=audit_trail, event_dispatcher=EventDispatcher())
         result = engine.portfolio_summary(Currency.USD)
         
         assert result.report_id == "portfolio_summary"
@@ -423,7 +428,7 @@ class TestDelinquencyReport:
     
     def test_delinquency_report_empty_collections(self, storage, audit_trail):
         # Test with no collections manager
-        engine = ReportingEngine(storage=storage, audit_trail=audit_trail)
+        engine = ReportingEngine(storage=storage, audit_trail=audit_trail, event_dispatcher=EventDispatcher())
         result = engine.delinquency_report(Currency.USD)
         
         assert result.report_id == "delinquency"
@@ -708,7 +713,8 @@ class TestEmptyDataHandling:
         engine = ReportingEngine(
             storage=storage,
             audit_trail=audit_trail,
-            account_manager=mock_account_manager
+            account_manager=mock_account_manager,
+            event_dispatcher=EventDispatcher()
         )
         
         result = engine.portfolio_summary(Currency.USD)
@@ -736,47 +742,36 @@ class TestMultiCurrencyReporting:
     """Test multi-currency reporting scenarios"""
     
     def test_portfolio_summary_different_currencies(self, storage, audit_trail):
-        # Create accounts in different currencies
-        mock_account_manager = Mock()
+        # Fund accounts in different currencies through the ledger
+        ledger = GeneralLedger(storage, audit_trail)
+        account_manager = AccountManager(storage, ledger, audit_trail)
+        customer_manager = CustomerManager(storage, audit_trail)
+        processor = TransactionProcessor(
+            storage, ledger, account_manager, customer_manager,
+            ComplianceEngine(storage, customer_manager, audit_trail), audit_trail
+        )
         
-        accounts = [
-            Account(
-                id="usd_acc",
-                created_at=datetime.now(timezone.utc),
-                updated_at=datetime.now(timezone.utc),
-                account_number="12345",
-                customer_id="cust1",
-                product_type=ProductType.SAVINGS,
-                account_type=AccountType.ASSET,
-                currency=Currency.USD,
-                name="USD Savings",
-                state=AccountState.ACTIVE
-            ),
-            Account(
-                id="eur_acc",
-                created_at=datetime.now(timezone.utc),
-                updated_at=datetime.now(timezone.utc),
-                account_number="67890",
-                customer_id="cust1",
-                product_type=ProductType.SAVINGS,
-                account_type=AccountType.ASSET,
-                currency=Currency.EUR,
-                name="EUR Savings",
-                state=AccountState.ACTIVE
-            )
-        ]
+        customer = customer_manager.create_customer(
+            first_name="Jane", last_name="Doe", email="jane.doe@example.com"
+        )
+        customer_manager.update_kyc_status(customer.id, KYCStatus.VERIFIED, KYCTier.TIER_2)
         
-        mock_account_manager.get_all_accounts.return_value = accounts
-        mock_account_manager.get_account_balance.side_effect = lambda acc_id: {
-            "usd_acc": Money(Decimal('1000'), Currency.USD),
-            "eur_acc": Money(Decimal('2000'), Currency.EUR)
-        }.get(acc_id, Money(Decimal('0'), Currency.USD))
+        for currency, amount in ((Currency.USD, '1000'), (Currency.EUR, '2000')):
+            account = account_manager.create_account(
+                customer.id, ProductType.SAVINGS, currency, f"{currency.code} Savings"
+            )
+            deposit = processor.deposit(
+                account.id, Money(Decimal(amount), currency), "Initial deposit", TransactionChannel.BRANCH
+            )
+            processor.process_transaction(deposit.id)
         
         engine = ReportingEngine(
             storage=storage,
             audit_trail=audit_trail,
-            account_manager=mock_account_manager
+            account_manager=account_manager
         )
+        # Not wired to a dispatcher, so the aggregates are built explicitly
+        engine.aggregates.rebuild()
         
         # Test USD report
         usd_result = engine.portfolio_summary(Currency.USD)
@@ -5,6 +5,7 @@ Tests for storage backends and transaction support
 import pytest
 import tempfile
 import os
+import threading
 from decimal import Decimal
 from datetime import datetime, timezone
 from pathlib import Path
@@ -102,6 +103,87 @@ class TestStorageInterface:
             
             storage.close()
     
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_scan_range_orders_by_id(self, backend):
+        """Test scan_range returns an id range in order, with limit and reverse"""
+        storage = InMemoryStorage() if backend == "memory" else SQLiteStorage(":memory:")
+        for key in ["b|2", "a|1", "b|1", "c|1", "b|3"]:
+            storage.save("test_table", key, {"id": key})
+        
+        assert [r["id"] for r in storage.scan_range("test_table", "b|", "b}")] == ["b|1", "b|2", "b|3"]
+        assert [r["id"] for r in storage.scan_range("test_table", "b|", "b}", limit=2, reverse=True)] == ["b|3", "b|2"]
+        assert [r["id"] for r in storage.scan_range("test_table", end="b")] == ["a|1"]
+        
+        storage.save("test_table", "b|0", {"id": "b|0"})
+        assert storage.scan_range("test_table", "b|", "b}", limit=1)[0]["id"] == "b|0"
+        
+        storage.close()
+    
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_iter_batches_streams_every_record(self, backend):
+        """Test iter_batches yields each record exactly once in bounded batches"""
+        storage = InMemoryStorage() if backend == "memory" else SQLiteStorage(":memory:")
+        for i in range(25):
+            storage.save("test_table", f"record_{i:02d}", {"id": f"record_{i:02d}", "n": i})
+        
+        batches = list(storage.iter_batches("test_table", batch_size=10))
+        
+        assert [len(batch) for batch in batches] == [10, 10, 5]
+        assert sorted(r["n"] for batch in batches for r in batch) == list(range(25))
+        assert list(storage.iter_batches("empty_table")) == []
+        
+        storage.close()
+    
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_find_batches_matches_like_find(self, backend):
+        """Test find_batches streams exactly the records find() would return"""
+        storage = InMemoryStorage() if backend == "memory" else SQLiteStorage(":memory:")
+        for i in range(30):
+            storage.save("test_table", f"record_{i:02d}", {
+                "id": f"record_{i:02d}",
+                "kind": "even" if i % 2 == 0 else "odd",
+                "flag": i % 3 == 0,
+                "n": i,
+                "note": None if i < 5 else "x",
+                "tags": ["a"] if i == 4 else []
+            })
+        storage.save("test_table", "numeric", {"id": "numeric", "kind": "even", "flag": 1})
+        
+        for filters in ({"kind": "even"}, {"kind": "even", "flag": True}, {"flag": 1}, {"n": 7},
+                        {"note": None}, {"tags": ["a"]}, {"missing": "x"}, {}):
+            batches = list(storage.find_batches("test_table", filters, batch_size=4))
+            found = [record for batch in batches for record in batch]
+            assert all(0 < len(batch) <= 4 for batch in batches)
+            assert sorted(r["id"] for r in found) == sorted(r["id"] for r in storage.find("test_table", filters))
+        
+        storage.close()
+    
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_insert_if_absent_claims_once(self, backend):
+        """Test insert_if_absent writes only when the id is free"""
+        storage = InMemoryStorage() if backend == "memory" else SQLiteStorage(":memory:")
+        
+        assert storage.insert_if_absent("test_table", "key", {"id": "key", "owner": "a"})
+        assert not storage.insert_if_absent("test_table", "key", {"id": "key", "owner": "b"})
+        assert storage.load("test_table", "key")["owner"] == "a"
+        
+        storage.close()
+    
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_load_many_by_id(self, backend):
+        """Test load_many returns the existing records among the ids"""
+        storage = InMemoryStorage() if backend == "memory" else SQLiteStorage(":memory:")
+        storage.save_many("test_table", {f"id{i}": {"id": f"id{i}", "n": i} for i in range(1000)})
+        
+        ids = [f"id{i}" for i in range(999, -1, -1)] + ["missing"]  # More ids than one SQLite query binds
+        records = storage.load_many("test_table", ids)
+        
+        assert set(records) == set(ids) - {"missing"}
+        assert records["id999"]["n"] == 999
+        assert storage.load_many("test_table", []) == {}
+        
+        storage.close()
+    
     @pytest.mark.skipif(
         os.environ.get("SKIP_POSTGRESQL_TESTS", "true") == "true",
         reason="PostgreSQL tests skipped - set SKIP_POSTGRESQL_TESTS=false to enable"
@@ -180,6 +262,94 @@ class TestTransactionSupport:
         # This is expected behavior for in-memory storage
         storage.close()
     
+    def test_nested_atomic_joins_outer_transaction(self):
+        """Test an inner atomic() block does not commit the outer transaction"""
+        storage = SQLiteStorage(":memory:")
+        storage.count("test_table")  # Create the table outside the transaction
+        
+        with pytest.raises(ValueError):
+            with storage.atomic():
+                with storage.atomic():
+                    storage.save("test_table", "inner", {"id": "inner"})
+                storage.save("test_table", "outer", {"id": "outer"})
+                raise ValueError("abort")
+        
+        assert not storage.exists("test_table", "inner")
+        assert not storage.exists("test_table", "outer")
+        
+        with storage.atomic():
+            storage.save("test_table", "kept", {"id": "kept"})
+        assert storage.exists("test_table", "kept")
+        
+        storage.close()
+    
+    def test_table_created_inside_transaction_rolls_back(self):
+        """Test touching a new table inside atomic() does not commit earlier writes"""
+        storage = SQLiteStorage(":memory:")
+        storage.count("test_table")
+        
+        with pytest.raises(ValueError):
+            with storage.atomic():
+                storage.save("test_table", "first", {"id": "first"})
+                storage.save("new_table", "second", {"id": "second"})
+                raise ValueError("abort")
+        
+        assert not storage.exists("test_table", "first")
+        assert storage.count("new_table") == 0
+        
+        storage.close()
+    
+    def test_sqlite_atomic_isolated_between_threads(self):
+        """Test another thread's commit cannot commit an open transaction"""
+        storage = SQLiteStorage(":memory:")
+        storage.count("test_table")
+        other_started = threading.Event()
+        
+        def other_thread():
+            other_started.set()
+            with storage.atomic():
+                storage.save("test_table", "other", {"id": "other"})
+        
+        thread = threading.Thread(target=other_thread)
+        with pytest.raises(ValueError):
+            with storage.atomic():
+                storage.save("test_table", "rolled_back", {"id": "rolled_back"})
+                thread.start()
+                other_started.wait(timeout=5)
+                thread.join(timeout=0.2)
+                raise ValueError("abort")
+        thread.join(timeout=5)
+        
+        assert not storage.exists("test_table", "rolled_back")
+        assert storage.exists("test_table", "other")
+        
+        storage.close()
+    
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_save_many_and_on_commit(self, backend):
+        """Test multi-row saves and commit callbacks"""
+        storage = InMemoryStorage() if backend == "memory" else SQLiteStorage(":memory:")
+        storage.count("test_table")
+        committed = []
+        
+        with pytest.raises(ValueError):
+            with storage.atomic():
+                storage.on_commit(lambda: committed.append("rolled back"))
+                raise ValueError("abort")
+        
+        with storage.atomic():
+            storage.save_many("test_table", {f"r{i}": {"id": f"r{i}", "n": i} for i in range(3)})
+            with storage.atomic():
+                storage.on_commit(lambda: committed.append(storage.count("test_table")))
+            assert committed == []
+        
+        storage.on_commit(lambda: committed.append("immediate"))
+        
+        assert committed == [3, "immediate"]
+        assert storage.load("test_table", "r2") == {"id": "r2", "n": 2}
+        
+        storage.close()
+    
     def test_sqlite_atomic_transactions(self):
         """Test atomic transactions with SQLiteStorage"""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -0,0 +1,178 @@
+"""
+Test suite for the hourly and daily transaction rollup
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import datetime, timedelta, timezone
+
+from core_banking.storage import InMemoryStorage
+from core_banking.audit import AuditTrail
+from core_banking.ledger import GeneralLedger
+from core_banking.accounts import AccountManager, ProductType
+from core_banking.customers import CustomerManager, KYCStatus, KYCTier
+from core_banking.compliance import ComplianceEngine
+from core_banking.transactions import TransactionProcessor, TransactionChannel, TransactionType, TransactionState
+from core_banking.currency import Currency, Money
+from core_banking.events import EventDispatcher
+from core_banking.reporting import ReportingEngine
+from core_banking.transaction_rollup import TransactionRollup
+
+
+def _at(day, hour, minute=0):
+    return datetime(2024, 3, day, hour, minute, tzinfo=timezone.utc)
+
+
+class TestTransactionRollup:
+    """Test backfill, range queries and event-driven updates"""
+    
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.storage = InMemoryStorage()
+        self.rollup = TransactionRollup(self.storage)
+        self._count = 0
+    
+    def _transaction(self, processed_at, amount, transaction_type="deposit", channel="branch",
+                     currency="USD", state="completed"):
+        self._count += 1
+        record = {
+            "id": f"T{self._count:04d}",
+            "transaction_type": transaction_type,
+            "channel": channel,
+            "currency": currency,
+            "amount": amount,
+            "state": state,
+            "processed_at": processed_at.isoformat()
+        }
+        self.storage.save("transactions", record["id"], record)
+        return record
+    
+    def _volume(self, start, end, currency=None):
+        return {
+            (row["transaction_type"], row["channel"], row["currency"]): (row["transaction_count"], row["total_volume"])
+            for row in self.rollup.volume(start, end, currency)
+        }
+    
+    def test_backfill_counts_posted_transactions(self):
+        """Test the backfill streams history and skips unposted transactions"""
+        self._transaction(_at(1, 9), "100.00")
+        self._transaction(_at(1, 9, 30), "50.00")
+        self._transaction(_at(2, 14), "20.00", "withdrawal", "atm")
+        self._transaction(_at(2, 15), "30.00", state="reversed")
+        self._transaction(_at(2, 16), "999.00", state="failed")
+        self._transaction(_at(3, 8), "70.00", currency="EUR")
+        
+        assert self.rollup.backfill(batch_size=2) == 5
+        
+        assert self._volume(_at(1, 0), _at(4, 0)) == {
+            ("deposit", "branch", "EUR"): (1, Decimal('70.00')),
+            ("deposit", "branch", "USD"): (3, Decimal('180.00')),
+            ("withdrawal", "atm", "USD"): (1, Decimal('20.00'))
+        }
+        assert self._volume(_at(1, 0), _at(4, 0), "EUR") == {("deposit", "branch", "EUR"): (1, Decimal('70.00'))}
+    
+    def test_period_ranges_combine_hourly_and_daily_buckets(self):
+        """Test partial days read hourly rows and whole days read daily rows"""
+        for day, hour, amount in ((1, 22, "1"), (1, 23, "2"), (2, 0, "4"), (2, 12, "8"), (3, 1, "16"), (3, 2, "32")):
+            self._transaction(_at(day, hour), amount)
+        self.rollup.backfill()
+        
+        def total(start, end):
+            return sum(volume for _, volume in self._volume(start, end).values())
+        
+        assert total(_at(1, 23), _at(3, 2)) == Decimal('30')
+        assert total(_at(1, 22, 30), _at(3, 1, 15)) == Decimal('31')
+        assert total(_at(2, 0), _at(3, 0)) == Decimal('12')
+        assert total(_at(2, 12), _at(2, 13)) == Decimal('8')
+        assert self.rollup.volume(_at(2, 5), _at(2, 5)) == []
+        # Naive datetimes are taken as UTC
+        assert total(datetime(2024, 3, 1, 23), datetime(2024, 3, 2, 1)) == Decimal('6')
+    
+    def _banking(self, dispatcher=None):
+        storage = InMemoryStorage()
+        audit_trail = AuditTrail(storage)
+        ledger = GeneralLedger(storage, audit_trail)
+        account_manager = AccountManager(storage, ledger, audit_trail)
+        customer_manager = CustomerManager(storage, audit_trail)
+        processor = TransactionProcessor(
+            storage, ledger, account_manager, customer_manager,
+            ComplianceEngine(storage, customer_manager, audit_trail), audit_trail,
+            event_dispatcher=dispatcher
+        )
+        reporting_engine = ReportingEngine(storage, audit_trail=audit_trail, event_dispatcher=dispatcher)
+        
+        customer = customer_manager.create_customer(first_name="John", last_name="Doe", email="john.doe@example.com")
+        customer_manager.update_kyc_status(customer.id, KYCStatus.VERIFIED, KYCTier.TIER_2)
+        account = account_manager.create_account(customer.id, ProductType.SAVINGS, Currency.USD, "Savings")
+        return processor, reporting_engine, account
+    
+    @staticmethod
+    def _deposit(processor, account, amount):
+        deposit = processor.deposit(account.id, Money(Decimal(amount), Currency.USD), "Deposit", TransactionChannel.BRANCH)
+        return processor.process_transaction(deposit.id)
+    
+    def test_posted_transactions_update_rollup(self):
+        """Test TRANSACTION_POSTED events add to the hourly and daily rows"""
+        processor, reporting_engine, account = self._banking(EventDispatcher())
+        
+        now = datetime.now(timezone.utc)
+        period = (now - timedelta(days=1), now + timedelta(hours=1))
+        assert reporting_engine.transaction_volume_report(*period).data == []
+        
+        for amount in ("100.00", "60.00"):
+            self._deposit(processor, account, amount)
+        
+        result = reporting_engine.transaction_volume_report(*period)
+        assert result.data == [{
+            "transaction_type": "deposit",
+            "channel": "branch",
+            "transaction_count": 2,
+            "total_volume": Decimal('160.00'),
+            "average_amount": Decimal('80.00'),
+            "currency": "USD"
+        }]
+        assert result.totals == {"total_transactions": 2, "total_volume": Decimal('160.00')}
+        
+        # The incremental rows agree with a backfill
+        incremental = reporting_engine.transaction_rollup.volume(*period)
+        reporting_engine.transaction_rollup.backfill()
+        assert reporting_engine.transaction_rollup.volume(*period) == incremental
+
+    
+    def test_unsubscribed_rollup_counts_later_postings(self):
+        """Test a rollup without a dispatcher must be backfilled and then counts postings made after it"""
+        processor, reporting_engine, account = self._banking()
+        rollup = reporting_engine.transaction_rollup
+        now = datetime.now(timezone.utc)
+        period = (now - timedelta(days=1), now + timedelta(hours=1))
+        self._deposit(processor, account, "100.00")
+        
+        with pytest.raises(ValueError, match="Transaction rollup has not been built"):
+            reporting_engine.transaction_volume_report(*period)
+        assert rollup.backfill() == 1
+        assert reporting_engine.transaction_volume_report(*period).totals["total_volume"] == Decimal('100.00')
+        
+        self._deposit(processor, account, "500.00")
+        # Bulk postings are counted too
+        posted = processor.post_system_transactions([processor.new_system_transaction(
+            TransactionType.INTEREST_CREDIT, Money(Decimal('7.00'), Currency.USD), "Interest", "interest-1",
+            to_account_id=account.id
+        )])
+        assert posted[0].state == TransactionState.COMPLETED
+        
+        # Reads do not catch up; the change worker does
+        assert reporting_engine.transaction_volume_report(*period).totals["total_transactions"] == 1
+        assert reporting_engine.create_change_worker().run_once() > 0
+        
+        result = reporting_engine.transaction_volume_report(*period)
+        assert result.totals == {"total_transactions": 3, "total_volume": Decimal('607.00')}
+        assert rollup.catch_up() == 0
+        
+        # The caught-up rows agree with a backfill
+        incremental = rollup.volume(*period)
+        rollup.backfill()
+        assert rollup.volume(*period) == incremental
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -569,6 +569,69 @@ class TestTransactionProcessor:
         journal_entry = self.ledger.get_journal_entry(processed.journal_entry_id)
         for line in journal_entry.lines:
             assert line.currency == Currency.EUR
+    
+    def test_post_system_transactions_batch(self):
+        """Test bulk posting of system transactions is idempotent and isolates failures"""
+        credit = self.transaction_processor.new_system_transaction(
+            transaction_type=TransactionType.INTEREST_CREDIT,
+            amount=Money(Decimal('1.25'), Currency.USD),
+            description="Interest earned",
+            idempotency_key="interest:test:1",
+            to_account_id=self.savings_account.id
+        )
+        invalid = self.transaction_processor.new_system_transaction(
+            transaction_type=TransactionType.INTEREST_CREDIT,
+            amount=Money(Decimal('1.00'), Currency.USD),
+            description="Interest earned",
+            idempotency_key="interest:test:2",
+            to_account_id="missing-account"
+        )
+        
+        posted = self.transaction_processor.post_system_transactions([credit, invalid])
+        
+        assert [t.state for t in posted] == [TransactionState.COMPLETED, TransactionState.FAILED]
+        assert posted[0].journal_entry_id is not None
+        assert self.account_manager.get_book_balance(self.savings_account.id) == Money(Decimal('1.25'), Currency.USD)
+        
+        # Rebuilding the same posting returns the stored transaction
+        again = self.transaction_processor.new_system_transaction(
+            transaction_type=TransactionType.INTEREST_CREDIT,
+            amount=Money(Decimal('1.25'), Currency.USD),
+            description="Interest earned",
+            idempotency_key="interest:test:1",
+            to_account_id=self.savings_account.id
+        )
+        assert again.id == credit.id
+        self.transaction_processor.post_system_transactions([again])
+        assert self.account_manager.get_book_balance(self.savings_account.id) == Money(Decimal('1.25'), Currency.USD)
+        assert self.audit_trail.verify_integrity()["valid"]
+
+    
+    def test_processed_transactions_indexed_by_time(self):
+        """Test processed transactions, single and bulk, are written to the time index"""
+        pending = self.transaction_processor.deposit(
+            self.savings_account.id, Money(Decimal('10.00'), Currency.USD), "Deposit", TransactionChannel.BRANCH
+        )
+        index = self.transaction_processor.time_index
+        assert list(index.scan()) == []
+        
+        deposit = self.transaction_processor.process_transaction(pending.id)
+        [credit] = self.transaction_processor.post_system_transactions([
+            self.transaction_processor.new_system_transaction(
+                transaction_type=TransactionType.INTEREST_CREDIT,
+                amount=Money(Decimal('0.10'), Currency.USD),
+                description="Interest earned",
+                idempotency_key="interest:index:1",
+                to_account_id=self.savings_account.id
+            )
+        ])
+        
+        assert [i for batch in index.scan(batch_size=1) for i in batch] == [deposit.id, credit.id]
+        assert list(index.scan(deposit.processed_at, credit.processed_at)) == [[deposit.id]]
+        assert list(index.scan(end=deposit.processed_at)) == []
+        assert not index.is_built()
+        assert index.rebuild() == 2
+        assert index.is_built()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+"""
+Test suite for sliding-window velocity counters
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import datetime, timezone, timedelta
+
+from core_banking.currency import Money, Currency
+from core_banking.storage import InMemoryStorage, SQLiteStorage
+from core_banking.velocity import VelocityCounterStore, GRANULARITIES, HOUR, DAY, bucket_id
+
+
+class TestVelocityCounterStore:
+    """Test bucketed counter windows"""
+    
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.storage = InMemoryStorage()
+        self.store = VelocityCounterStore(self.storage)
+        self.now = datetime(2026, 3, 15, 12, 30, tzinfo=timezone.utc)
+    
+    def test_sliding_window_excludes_old_buckets(self):
+        """Test trailing windows only include buckets inside the window"""
+        usd = Money(Decimal('100.00'), Currency.USD)
+        self.store.record_transaction("C1", usd, self.now - timedelta(minutes=90))
+        self.store.record_transaction("C1", usd, self.now - timedelta(minutes=30))
+        self.store.record_transaction("C1", usd, self.now - timedelta(minutes=5))
+        
+        count, amount = self.store.get_window("C1", timedelta(hours=1), Currency.USD, now=self.now)
+        assert count == 2
+        assert amount == Decimal('200.00')
+        
+        count, amount = self.store.get_window("C1", timedelta(hours=3), Currency.USD, now=self.now)
+        assert count == 3
+        assert amount == Decimal('300.00')
+    
+    def test_cross_currency_count(self):
+        """Test currency=None counts transactions in every currency"""
+        self.store.record_transaction("C1", Money(Decimal('10'), Currency.USD), self.now)
+        self.store.record_transaction("C1", Money(Decimal('10'), Currency.EUR), self.now)
+        
+        count, _ = self.store.get_window("C1", timedelta(hours=1), now=self.now)
+        usd_count, _ = self.store.get_window("C1", timedelta(hours=1), Currency.USD, now=self.now)
+        
+        assert count == 2
+        assert usd_count == 1
+    
+    def test_calendar_day_and_month_totals(self):
+        """Test daily and monthly totals use calendar buckets"""
+        usd = Money(Decimal('25.00'), Currency.USD)
+        self.store.record_transaction("C1", usd, self.now - timedelta(days=1))
+        self.store.record_transaction("C1", usd, self.now)
+        self.store.record_transaction("C1", usd, datetime(2026, 2, 28, tzinfo=timezone.utc))
+        
+        assert self.store.get_daily_total("C1", Currency.USD, self.now) == Money(Decimal('25.00'), Currency.USD)
+        assert self.store.get_monthly_total("C1", Currency.USD, self.now) == Money(Decimal('50.00'), Currency.USD)
+    
+    def test_buckets_are_bounded(self):
+        """Test expired bucket rows are pruned so stored state stays bounded"""
+        usd = Money(Decimal('1'), Currency.USD)
+        times = [self.now + timedelta(minutes=minute) for minute in range(0, 50 * 24 * 60, 173)]
+        for at in times:
+            self.store.record_transaction("C1", usd, at)
+        
+        # One series per granularity for USD and the cross-currency count
+        retained = 2 * sum(granularity.retention for granularity in GRANULARITIES)
+        assert self.storage.count(self.store.table_name) <= retained
+        last = bucket_id(HOUR, times[-1])
+        count, _ = self.store.get_window("C1", timedelta(hours=6), now=times[-1])
+        assert count == len([at for at in times if bucket_id(HOUR, at) > last - 6])
+    
+    def test_workers_share_counters(self):
+        """Test stores in separate workers count each other's transactions"""
+        other = VelocityCounterStore(self.storage)
+        usd = Money(Decimal('40.00'), Currency.USD)
+        self.store.get_daily_total("C1", Currency.USD, self.now)
+        
+        self.store.record_transaction("C1", usd, self.now)
+        other.record_transaction("C1", usd, self.now)
+        
+        assert self.store.get_daily_total("C1", Currency.USD, self.now) == Money(Decimal('80.00'), Currency.USD)
+        assert other.get_monthly_total("C1", Currency.USD, self.now) == Money(Decimal('80.00'), Currency.USD)
+    
+    def test_rolled_back_posting_is_not_counted(self):
+        """Test counters recorded inside a failed transaction roll back with it"""
+        storage = SQLiteStorage(":memory:")
+        store = VelocityCounterStore(storage)
+        store.record_transaction("C1", Money(Decimal('10.00'), Currency.USD), self.now)
+        
+        with pytest.raises(RuntimeError):
+            with storage.atomic():
+                store.record_transaction("C1", Money(Decimal('500.00'), Currency.USD), self.now)
+                raise RuntimeError("posting failed")
+        
+        assert store.get_window("C1", timedelta(hours=1), Currency.USD, now=self.now) == (1, Decimal('10.00'))
+        storage.close()
+    
+    def test_window_beyond_retention_rejected(self):
+        """Test windows longer than the day retention are rejected"""
+        with pytest.raises(ValueError):
+            self.store.get_window("C1", timedelta(days=90))
+    
+    def test_state_round_trip(self):
+        """Test counter state serializes to storage and back"""
+        self.store.record_transaction("C1", Money(Decimal('12.34'), Currency.USD), self.now)
+        
+        reloaded = VelocityCounterStore(self.storage)
+        count, amount = reloaded.get_window("C1", timedelta(minutes=1), Currency.USD, now=self.now)
+        
+        assert count == 1
+        assert amount == Decimal('12.34')
+        assert bucket_id(DAY, self.now) == self.now.date().toordinal()